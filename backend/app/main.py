@@ -0,0 +1,72 @@
+"""
+PRMF Premium Calculator API (FastAPI).
+
+Serves the same calculator as the Next.js route (POST /calculate), plus a
+batch endpoint, from rates held in memory. Rates load at startup and are
+refreshed in the background (see services/premium.py).
+
+Usage:
+    cd backend
+    uvicorn app.main:app --port 8000
+"""
+
+import logging
+from contextlib import asynccontextmanager
+
+from dotenv import load_dotenv
+from fastapi import FastAPI, Request
+from fastapi.exceptions import RequestValidationError
+from fastapi.responses import JSONResponse
+
+from app.routers import calculator
+from app.services.premium import PremiumService, QuoteError
+
+load_dotenv()
+
+logger = logging.getLogger(__name__)
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    app.state.premium.start()
+    yield
+    app.state.premium.stop()
+
+
+def create_app(service: PremiumService = None) -> FastAPI:
+    """
+    Build the API app.
+    
+    Args:
+        service: PremiumService to quote from (default: configured from the environment)
+    """
+    app = FastAPI(title="PRMF Premium Calculator API", version="1.0.0", lifespan=lifespan)
+    app.state.premium = service or PremiumService()
+    app.include_router(calculator.router)
+    
+    @app.exception_handler(QuoteError)
+    async def quote_error_handler(request: Request, error: QuoteError):
+        return JSONResponse({"success": False, "error": error.to_dict()}, status_code=error.status)
+    
+    @app.exception_handler(RequestValidationError)
+    async def validation_error_handler(request: Request, error: RequestValidationError):
+        return JSONResponse(
+            {"success": False, "error": {"code": "INVALID_REQUEST", "message": str(error)}},
+            status_code=400,
+        )
+    
+    @app.exception_handler(Exception)
+    async def internal_error_handler(request: Request, error: Exception):
+        logger.exception("API Error")
+        return JSONResponse(
+            {
+                "success": False,
+                "error": {"code": "INTERNAL_ERROR", "message": "An unexpected error occurred. Please try again."},
+            },
+            status_code=500,
+        )
+    
+    return app
+
+
+app = create_app()
@@ -0,0 +1,66 @@
+"""
+Request and response models of the calculator API.
+
+The endpoints validate request bodies themselves (services/premium.py), so
+errors carry the same codes as the Next.js route instead of FastAPI's 422;
+these models document the shapes in the OpenAPI schema.
+"""
+
+from typing import Literal, Optional
+
+from pydantic import BaseModel, Field
+
+
+class QuoteRequest(BaseModel):
+    age: int = Field(..., ge=18, le=90, examples=[45])
+    benefit_option: Literal["option_1", "option_2", "option_3", "option_4"] = Field(..., examples=["option_2"])
+    family_size: Literal["M", "M+1"] = Field(..., examples=["M"])
+
+
+class QuoteData(BaseModel):
+    age: int
+    family_size: str
+    benefit_option: str
+    premium_amount: float
+    payment_type: Literal["LUMPSUM", "ANNUAL"]
+    currency: str = "KES"
+    disclaimer: str
+
+
+class ErrorDetail(BaseModel):
+    code: str
+    message: str
+
+
+class QuoteResponse(BaseModel):
+    success: bool
+    data: Optional[QuoteData] = None
+    error: Optional[ErrorDetail] = None
+
+
+class BatchQuoteResponse(BaseModel):
+    success: bool
+    count: int
+    failed: int
+    etag: Optional[str] = None
+    results: list[QuoteResponse]
+
+
+class ErrorResponse(BaseModel):
+    success: bool = False
+    error: ErrorDetail
+
+
+def request_body(schema: dict) -> dict:
+    """``openapi_extra`` documenting a JSON request body the endpoint parses itself."""
+    return {"requestBody": {"required": True, "content": {"application/json": {"schema": schema}}}}
+
+
+QUOTE_REQUEST_SCHEMA = QuoteRequest.model_json_schema()
+
+BATCH_REQUEST_SCHEMA = {
+    "title": "BatchQuoteRequest",
+    "type": "object",
+    "required": ["quotes"],
+    "properties": {"quotes": {"type": "array", "maxItems": 1000, "items": QUOTE_REQUEST_SCHEMA}},
+}
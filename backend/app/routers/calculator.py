@@ -0,0 +1,128 @@
+"""
+Calculator endpoints.
+
+Every quote is priced from the in-memory rates of the app's PremiumService
+(``request.app.state.premium``); no endpoint queries the database.
+"""
+
+import json
+
+from fastapi import APIRouter, Request, Response
+from fastapi.responses import JSONResponse
+
+from app.models.schemas import (
+    BATCH_REQUEST_SCHEMA,
+    QUOTE_REQUEST_SCHEMA,
+    BatchQuoteResponse,
+    ErrorResponse,
+    QuoteResponse,
+    request_body,
+)
+from app.services.premium import MAX_BATCH_SIZE, QuoteError, PremiumService
+
+router = APIRouter()
+
+ERROR_RESPONSES = {400: {"model": ErrorResponse}, 404: {"model": ErrorResponse}, 503: {"model": ErrorResponse}}
+
+
+async def read_json(request: Request):
+    """Decode the request body, raising INVALID_REQUEST for anything that is not JSON."""
+    try:
+        return json.loads(await request.body())
+    except ValueError:
+        raise QuoteError("INVALID_REQUEST", "Request body must be valid JSON")
+
+
+def premium_service(request: Request) -> PremiumService:
+    return request.app.state.premium
+
+
+@router.post(
+    "/calculate",
+    response_model=QuoteResponse,
+    responses=ERROR_RESPONSES,
+    openapi_extra=request_body(QUOTE_REQUEST_SCHEMA),
+)
+async def calculate(request: Request):
+    """Calculate the premium for one member."""
+    data = premium_service(request).quote(await read_json(request))
+    return JSONResponse({"success": True, "data": data})
+
+
+@router.post(
+    "/calculate/batch",
+    response_model=BatchQuoteResponse,
+    responses=ERROR_RESPONSES,
+    openapi_extra=request_body(BATCH_REQUEST_SCHEMA),
+)
+async def calculate_batch(request: Request):
+    """
+    Calculate premiums for up to MAX_BATCH_SIZE members in one request.
+    
+    Each item gets its own success/data or success/error entry; an invalid
+    item does not fail the batch.
+    """
+    body = await read_json(request)
+    if not isinstance(body, dict) or "quotes" not in body:
+        raise QuoteError("INVALID_REQUEST", 'Request body must be a JSON object with a "quotes" list')
+    
+    service = premium_service(request)
+    # One snapshot for the prices and the ETag, even if a refresh lands mid-request
+    snapshot = service.snapshot
+    results = service.quote_batch(body["quotes"], snapshot)
+    return JSONResponse({
+        "success": True,
+        "count": len(results),
+        "failed": sum(not result["success"] for result in results),
+        "etag": snapshot.etag if snapshot else None,
+        "results": results,
+    })
+
+
+@router.get("/calculate")
+async def calculate_docs():
+    """API documentation, as returned by GET /api/calculate."""
+    return {
+        "name": "PRMF Premium Calculator API",
+        "version": "1.0.0",
+        "endpoint": "POST /calculate",
+        "batch_endpoint": f"POST /calculate/batch (up to {MAX_BATCH_SIZE} quotes)",
+        "description": "Calculate medical insurance premium based on age, benefit option, and family size",
+        "request": {
+            "age": "number (18-90)",
+            "benefit_option": "string (option_1, option_2, option_3, option_4)",
+            "family_size": "string (M, M+1)",
+        },
+        "example": {"age": 45, "benefit_option": "option_2", "family_size": "M"},
+        "batch_example": {"quotes": [{"age": 45, "benefit_option": "option_2", "family_size": "M"}]},
+        "notes": [
+            "Ages 18-60 receive ANNUAL premium rates",
+            "Ages 61-90 receive LUMPSUM (one-time) premium rates",
+            "M = Principal member only",
+            "M+1 = Principal member + Spouse",
+        ],
+    }
+
+
+@router.get("/rates")
+async def rates(request: Request):
+    """
+    The whole rate book as quote matrix JSON (see scripts/quote_matrix.py).
+    
+    The ETag changes only when a premium does, so clients can revalidate
+    with If-None-Match and price quotes locally.
+    """
+    snapshot = premium_service(request).snapshot
+    if snapshot is None:
+        raise QuoteError("INTERNAL_ERROR", "Premium rates are not loaded yet. Please try again.", status=503)
+    
+    headers = {"ETag": snapshot.etag, "Cache-Control": "public, max-age=60"}
+    if snapshot.etag in request.headers.get("if-none-match", ""):
+        return Response(status_code=304, headers=headers)
+    return Response(snapshot.json, media_type="application/json", headers=headers)
+
+
+@router.get("/health")
+async def health(request: Request):
+    """Status of the loaded rates and the background refresher."""
+    return premium_service(request).health()
@@ -0,0 +1,402 @@
+"""
+Premium quote service.
+
+Rates are loaded into memory once at startup, as a QuoteEngine (see
+scripts/quote_engine.py), and every quote is priced from that snapshot, so
+the request path never touches the database. A background thread polls the
+rate source and swaps in a new snapshot when it changes:
+
+    quote matrix   directory or manifest written by quote_matrix.py build;
+                   reloaded when the manifest's sha256 changes
+    workbook       Rates.xlsx or .xlsm (via the compiled rate book cache);
+                   reloaded when the file's size or mtime changes
+    rate store     supabase, postgresql://... or sqlite:///path;
+                   reloaded when the premium_rates checksum changes
+
+Environment:
+    PRMF_RATE_SOURCE        rate source (default: Rates.xlsx in the repository root)
+    PRMF_REFRESH_SECONDS    seconds between change checks, 0 to disable (default: 60)
+"""
+
+import json
+import logging
+import math
+import os
+import sys
+import threading
+import time
+from typing import Optional
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.dirname(os.path.dirname(os.path.abspath(__file__)))))
+sys.path.insert(0, os.path.join(REPO_ROOT, "scripts"))
+
+from quote_engine import BENEFIT_OPTION_NAMES, QuoteEngine  # noqa: E402
+from quote_matrix import (  # noqa: E402
+    MANIFEST_NAME,
+    QuoteMatrix,
+    encode_json,
+    matrix_digest,
+    matrix_etag,
+    matrix_from_rates,
+)
+from rate_book import FAMILY_SIZES, LUMPSUM_MIN_AGE, MAX_AGE, MIN_AGE, OPTION_COLUMNS  # noqa: E402
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_RATE_SOURCE = os.path.join(REPO_ROOT, "Rates.xlsx")
+DEFAULT_REFRESH_SECONDS = 60.0
+
+# Workbooks QuoteEngine.from_workbook can read (openpyxl), and rate store URL schemes (rate_storage.open_store)
+WORKBOOK_EXTENSIONS = (".xlsx", ".xlsm")
+STORE_SCHEMES = ("postgresql://", "postgres://", "sqlite://")
+
+# Largest batch accepted by quote_batch
+MAX_BATCH_SIZE = 1000
+
+# Same wording as the Next.js route (frontend/src/types/index.ts)
+DISCLAIMERS = {
+    "LUMPSUM": f"This is a LUMPSUM (one-time) premium payment applicable for retirees aged {LUMPSUM_MIN_AGE}-{MAX_AGE}.",
+    "ANNUAL": f"This is an ANNUAL premium payment applicable for active members aged {MIN_AGE}-{LUMPSUM_MIN_AGE - 1}.",
+}
+
+
+class QuoteError(Exception):
+    """
+    A quote request that cannot be priced, with the calculator API's error code.
+    
+    Args:
+        code: Error code (INVALID_AGE, RATE_NOT_FOUND, ...)
+        message: Human-readable message
+        status: HTTP status for the response
+    """
+    
+    def __init__(self, code: str, message: str, status: int = 400):
+        super().__init__(message)
+        self.code = code
+        self.message = message
+        self.status = status
+    
+    def to_dict(self) -> dict:
+        return {"code": self.code, "message": self.message}
+
+
+class RateSnapshot:
+    """
+    Immutable set of rates the service quotes from.
+    
+    Args:
+        engine: QuoteEngine over the rates
+        source: Where the rates came from
+        token: Change token of the source when it was loaded
+    """
+    
+    def __init__(self, engine: QuoteEngine, source: str, token):
+        self.engine = engine
+        self.source = source
+        self.token = token
+        self.cents = matrix_from_rates(engine.rates)
+        self.sha256 = matrix_digest(self.cents)
+        self.etag = matrix_etag(self.sha256)
+        self.loaded_at = time.time()
+        self._json = None
+    
+    @property
+    def json(self) -> bytes:
+        """The rates as quote matrix JSON (see quote_matrix.encode_json), encoded on first use."""
+        if self._json is None:
+            self._json = encode_json(self.cents)
+        return self._json
+
+
+def source_kind(source: str) -> str:
+    """
+    Classify a rate source as "matrix", "workbook" or "store".
+    
+    Raises:
+        ValueError: If the source is a file the service cannot load (e.g. .xls or .csv)
+    """
+    if os.path.isdir(source) or os.path.basename(source) == MANIFEST_NAME:
+        return "matrix"
+    if source.lower().endswith(WORKBOOK_EXTENSIONS):
+        return "workbook"
+    if source in ("supabase", "supabase://") or source.startswith(STORE_SCHEMES):
+        return "store"
+    raise ValueError(
+        f"Unsupported rate source {source!r}: use a quote matrix directory or manifest, "
+        f"a {'/'.join(WORKBOOK_EXTENSIONS)} workbook, supabase, postgresql://... or sqlite:///path"
+    )
+
+
+def validate_quote(body) -> tuple[int, str, str]:
+    """
+    Validate one quote request, with the checks and messages of the Next.js route.
+    
+    Args:
+        body: Decoded JSON request body
+    
+    Returns:
+        Tuple of (age, family_size, benefit_option column)
+    
+    Raises:
+        QuoteError: If a field is missing or invalid
+    """
+    if not isinstance(body, dict):
+        raise QuoteError("INVALID_REQUEST", "Request body must be a JSON object")
+    
+    age = body.get("age")
+    benefit_option = body.get("benefit_option")
+    family_size = body.get("family_size")
+    
+    if age is None:
+        raise QuoteError("MISSING_REQUIRED_FIELD", "Age is required")
+    if isinstance(age, bool) or not isinstance(age, (int, float)) or not float(age).is_integer():
+        raise QuoteError("INVALID_AGE", "Age must be an integer")
+    if not MIN_AGE <= age <= MAX_AGE:
+        raise QuoteError("INVALID_AGE", f"Age must be between {MIN_AGE} and {MAX_AGE}")
+    
+    if not benefit_option:
+        raise QuoteError("MISSING_REQUIRED_FIELD", "Benefit option is required")
+    if benefit_option not in OPTION_COLUMNS:
+        raise QuoteError("INVALID_BENEFIT_OPTION", f"Benefit option must be one of: {', '.join(OPTION_COLUMNS)}")
+    
+    if not family_size:
+        raise QuoteError("MISSING_REQUIRED_FIELD", "Family size is required")
+    if family_size not in FAMILY_SIZES:
+        raise QuoteError("INVALID_FAMILY_SIZE", f"Family size must be one of: {', '.join(FAMILY_SIZES)}")
+    
+    return int(age), family_size, benefit_option
+
+
+def quote_data(age: int, family_size: str, benefit_option: str, premium: float) -> dict:
+    """The ``data`` object of a successful calculator response."""
+    payment_type = "LUMPSUM" if age >= LUMPSUM_MIN_AGE else "ANNUAL"
+    return {
+        "age": age,
+        "family_size": family_size,
+        "benefit_option": BENEFIT_OPTION_NAMES[benefit_option],
+        # DECIMAL(15, 2), as premium_rates stores it
+        "premium_amount": round(premium, 2),
+        "payment_type": payment_type,
+        "currency": "KES",
+        "disclaimer": DISCLAIMERS[payment_type],
+    }
+
+
+def rate_not_found(age: int, family_size: str) -> QuoteError:
+    return QuoteError(
+        "RATE_NOT_FOUND",
+        f"No premium rate found for age {age} and family size {family_size}. Please contact support.",
+        status=404,
+    )
+
+
+class PremiumService:
+    """
+    In-memory premium calculator with background refresh.
+    
+    Quotes read ``self.snapshot`` once and price from it, so a refresh
+    (which replaces the attribute in one assignment) never mixes two rate
+    books within a request.
+    
+    Args:
+        source: Rate source (see module docstring); default PRMF_RATE_SOURCE
+        refresh_seconds: Seconds between change checks, 0 to disable;
+            default PRMF_REFRESH_SECONDS
+    
+    Raises:
+        ValueError: If the source is not a kind the service can load
+    """
+    
+    def __init__(self, source: Optional[str] = None, refresh_seconds: Optional[float] = None):
+        self.source = source or os.getenv("PRMF_RATE_SOURCE") or DEFAULT_RATE_SOURCE
+        if refresh_seconds is None:
+            refresh_seconds = float(os.getenv("PRMF_REFRESH_SECONDS", DEFAULT_REFRESH_SECONDS))
+        self.refresh_seconds = refresh_seconds
+        self.kind = source_kind(self.source)
+        self.snapshot: Optional[RateSnapshot] = None
+        self.refreshes = 0
+        self.last_error: Optional[str] = None
+        self._stop = threading.Event()
+        self._thread: Optional[threading.Thread] = None
+    
+    def _load(self, current_token=None) -> Optional[RateSnapshot]:
+        """
+        Load a snapshot from the source, or return None if it has not changed.
+        
+        Args:
+            current_token: Token of the loaded snapshot (None forces a load)
+        """
+        if self.kind == "matrix":
+            manifest_path = self.source
+            if os.path.isdir(manifest_path):
+                manifest_path = os.path.join(manifest_path, MANIFEST_NAME)
+            with open(manifest_path, encoding="utf-8") as f:
+                if json.load(f)["sha256"] == current_token:
+                    return None
+            matrix = QuoteMatrix.load(manifest_path)
+            return RateSnapshot(QuoteEngine(matrix.rates()), self.source, matrix.sha256)
+        
+        if self.kind == "workbook":
+            stat = os.stat(self.source)
+            token = (stat.st_mtime_ns, stat.st_size)
+            if token == current_token:
+                return None
+            return RateSnapshot(QuoteEngine.from_workbook(self.source), self.source, token)
+        
+        # Stores have no cheap change marker: fetch once and compare checksums.
+        # The store is opened per load, since the refresher runs on its own thread
+        import pandas as pd
+        from rate_storage import open_store
+        from rate_verification import fetch_rate_rows, rates_checksum
+        with open_store(self.source) as store:
+            rows = fetch_rate_rows(store)
+        token = rates_checksum(rows)
+        if token == current_token:
+            return None
+        for column in OPTION_COLUMNS:
+            rows[column] = pd.to_numeric(rows[column], errors="coerce")
+        return RateSnapshot(QuoteEngine.from_frame(rows), self.source, token)
+    
+    def load(self) -> RateSnapshot:
+        """Load the rates (blocking); called once at startup."""
+        self.snapshot = self._load()
+        logger.info("Loaded rates from %s (%s)", self.source, self.snapshot.etag)
+        return self.snapshot
+    
+    def refresh(self) -> bool:
+        """
+        Reload the rates if the source changed.
+        
+        A failed refresh keeps the current snapshot and is recorded in
+        ``last_error``.
+        
+        Returns:
+            True if a new snapshot was swapped in
+        """
+        current = self.snapshot
+        try:
+            snapshot = self._load(current.token if current else None)
+        except Exception as error:
+            self.last_error = f"{type(error).__name__}: {error}"
+            logger.warning("Rate refresh from %s failed: %s", self.source, self.last_error)
+            return False
+        
+        self.last_error = None
+        if snapshot is None:
+            return False
+        self.snapshot = snapshot
+        self.refreshes += 1
+        logger.info("Refreshed rates from %s (%s)", self.source, snapshot.etag)
+        return True
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.refresh_seconds):
+            self.refresh()
+    
+    def start(self) -> None:
+        """Load the rates and start the background refresher."""
+        if self.snapshot is None:
+            self.load()
+        if self.refresh_seconds > 0 and self._thread is None:
+            self._stop.clear()
+            self._thread = threading.Thread(target=self._run, name="rate-refresh", daemon=True)
+            self._thread.start()
+    
+    def stop(self) -> None:
+        """Stop the background refresher."""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join()
+            self._thread = None
+    
+    def _snapshot(self) -> RateSnapshot:
+        snapshot = self.snapshot
+        if snapshot is None:
+            raise QuoteError("INTERNAL_ERROR", "Premium rates are not loaded yet. Please try again.", status=503)
+        return snapshot
+    
+    def quote(self, body) -> dict:
+        """
+        Price one calculator request.
+        
+        Args:
+            body: Decoded JSON request body (age, benefit_option, family_size)
+        
+        Returns:
+            The ``data`` object of the calculator response
+        
+        Raises:
+            QuoteError: If the request is invalid or there is no rate
+        """
+        age, family_size, benefit_option = validate_quote(body)
+        engine = self._snapshot().engine
+        premium = engine.rates[age, FAMILY_SIZES.index(family_size), OPTION_COLUMNS.index(benefit_option)]
+        if np.isnan(premium):
+            raise rate_not_found(age, family_size)
+        return quote_data(age, family_size, benefit_option, float(premium))
+    
+    def quote_batch(self, bodies: list, snapshot: Optional[RateSnapshot] = None) -> list[dict]:
+        """
+        Price many calculator requests against one snapshot.
+        
+        Every item is validated on its own; valid items are priced in one
+        vectorized lookup. An invalid item does not fail the batch.
+        
+        Args:
+            bodies: List of request bodies
+            snapshot: Snapshot to price against (default: the current one); pass
+                the one whose ETag is reported so a refresh cannot slip in between
+        
+        Returns:
+            One result per item, in order: ``{"success": True, "data": ...}``
+            or ``{"success": False, "error": ...}``
+        
+        Raises:
+            QuoteError: If the batch is not a list or is too large
+        """
+        if not isinstance(bodies, list):
+            raise QuoteError("INVALID_REQUEST", "quotes must be a list of quote requests")
+        if len(bodies) > MAX_BATCH_SIZE:
+            raise QuoteError("INVALID_REQUEST", f"A batch may hold at most {MAX_BATCH_SIZE} quotes")
+        
+        results: list[Optional[dict]] = [None] * len(bodies)
+        positions, requests = [], []
+        for position, body in enumerate(bodies):
+            try:
+                requests.append(validate_quote(body))
+                positions.append(position)
+            except QuoteError as error:
+                results[position] = {"success": False, "error": error.to_dict()}
+        
+        if requests:
+            ages, families, options = zip(*requests)
+            engine = (snapshot or self._snapshot()).engine
+            premiums = engine.rates[
+                np.asarray(ages, dtype=np.intp),
+                np.fromiter((FAMILY_SIZES.index(f) for f in families), dtype=np.intp, count=len(families)),
+                np.fromiter((OPTION_COLUMNS.index(o) for o in options), dtype=np.intp, count=len(options)),
+            ].tolist()
+            for position, (age, family_size, benefit_option), premium in zip(positions, requests, premiums):
+                if math.isnan(premium):
+                    results[position] = {"success": False, "error": rate_not_found(age, family_size).to_dict()}
+                else:
+                    results[position] = {"success": True, "data": quote_data(age, family_size, benefit_option, premium)}
+        
+        return results
+    
+    def health(self) -> dict:
+        """Status of the loaded rates for GET /health."""
+        snapshot = self.snapshot
+        return {
+            "status": "ok" if snapshot is not None else "loading",
+            "source": self.source,
+            "source_kind": self.kind,
+            "etag": snapshot.etag if snapshot else None,
+            "loaded_at": snapshot.loaded_at if snapshot else None,
+            "missing_rates": snapshot.engine.missing if snapshot else None,
+            "refresh_seconds": self.refresh_seconds,
+            "refreshes": self.refreshes,
+            "last_error": self.last_error,
+        }
@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""
+Facilities Extraction Benchmark
+===============================
+Runs facilities_to_excel.py against the local KMHFL stand-in server
+(mock_kmhfl_server.py) and reports wall time, records/sec and peak RSS for
+each stage:
+
+    fetch     iter_facility_pages -> list of pages (network, retries, rate limiting)
+    flatten   FacilitySchema.flatten over every page
+    save      stream_facilities_to_file from the fetched pages (flatten + write)
+    pipeline  fetch -> file in one streaming pass, as main() runs it
+
+Results can be appended as JSON lines to a history file so changes in
+throughput can be compared between commits.
+
+Usage:
+    python benchmarks/bench_extraction.py
+    python benchmarks/bench_extraction.py --pages 200 --page-size 100 --concurrency 8 --format parquet
+    python benchmarks/bench_extraction.py --latency 0.05 --throttle-rate 0.05 --rotate-every 40
+    python benchmarks/bench_extraction.py --history benchmarks/results.jsonl
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+from datetime import datetime, timezone
+from typing import Any, Callable, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import pandas as pd
+
+import facilities_to_excel as fx
+from mock_kmhfl_server import MockKmhflServer
+
+
+def current_rss_bytes() -> Optional[int]:
+    """Resident set size of this process (Linux /proc), or None if unavailable."""
+    try:
+        with open("/proc/self/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except (OSError, ValueError, IndexError):
+        return None
+
+
+def max_rss_bytes() -> int:
+    """Lifetime peak RSS of this process as reported by getrusage."""
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+
+class RssSampler:
+    """
+    Samples RSS in a background thread to find the peak within one stage.
+    
+    getrusage only gives the lifetime peak, which never goes down between
+    stages; sampling /proc gives a per-stage figure instead. Where /proc is
+    not available the lifetime peak is reported.
+    
+    Args:
+        interval: Seconds between samples
+    """
+    
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.start_rss = current_rss_bytes()
+        self.peak = self.start_rss or 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+    
+    def _run(self) -> None:
+        while not self._stop.wait(self.interval):
+            rss = current_rss_bytes()
+            if rss and rss > self.peak:
+                self.peak = rss
+    
+    def __enter__(self) -> "RssSampler":
+        if self.start_rss is not None:
+            self._thread.start()
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        if self.start_rss is None:
+            self.peak = max_rss_bytes()
+            return
+        self._stop.set()
+        self._thread.join()
+        self.peak = max(self.peak, current_rss_bytes() or 0)
+
+
+def run_stage(name: str, func: Callable[[], Any], records: Optional[Callable[[Any], int]] = None) -> tuple[dict, Any]:
+    """
+    Time one stage and measure its memory.
+    
+    Args:
+        name: Stage name for the report
+        func: Zero-argument callable doing the work
+        records: Maps the stage result to the number of records processed
+    
+    Returns:
+        Tuple of (metrics dict, stage result)
+    """
+    with RssSampler() as sampler:
+        started = time.perf_counter()
+        result = func()
+        wall = time.perf_counter() - started
+    
+    count = records(result) if records else 0
+    metrics = {
+        "stage": name,
+        "records": count,
+        "wall_seconds": round(wall, 4),
+        "records_per_second": round(count / wall, 1) if wall > 0 else None,
+        "peak_rss_mb": round(sampler.peak / 2**20, 1),
+        "rss_growth_mb": round((sampler.peak - (sampler.start_rss or sampler.peak)) / 2**20, 1),
+    }
+    return metrics, result
+
+
+def git_revision() -> Optional[str]:
+    """Short git commit of the working tree, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(args: argparse.Namespace) -> dict:
+    """
+    Start the stand-in server, run every stage and collect the results.
+    
+    Args:
+        args: Parsed command-line arguments
+    
+    Returns:
+        Result dictionary (config, server stats and per-stage metrics)
+    """
+    server = MockKmhflServer(
+        pages=args.pages,
+        page_size=args.page_size,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        retry_after=args.retry_after,
+        rotate_every=args.rotate_every,
+        seed=args.seed,
+    )
+    stages = []
+    
+    with server, tempfile.TemporaryDirectory(prefix="kmhfl-bench-") as work_dir:
+        fx.configure_endpoints(site_url=server.url, api_url=server.url)
+        
+        def new_session():
+            return fx.create_session_with_retries(
+                retries=args.retries,
+                pool_maxsize=max(10, args.concurrency),
+                rate_limiter=fx.RateLimiter(rate=args.rate, burst=args.burst),
+            )
+        
+        fetch_options = dict(
+            sleep_seconds=0,
+            timeout=30,
+            concurrency=args.concurrency,
+            build_id_cache=os.path.join(work_dir, "build_id.json"),
+        )
+        output_path = os.path.join(work_dir, f"facilities{args.extension}")
+        
+        def fetch():
+            return list(fx.iter_facility_pages(new_session(), **fetch_options))
+        
+        metrics, pages = run_stage("fetch", fetch, lambda result: sum(map(len, result)))
+        stages.append(metrics)
+        
+        def flatten():
+            schema = fx.FacilitySchema()
+            return sum(len(schema.flatten(page)) for page in pages)
+        
+        stages.append(run_stage("flatten", flatten, lambda count: count)[0])
+        
+        def save():
+            return fx.stream_facilities_to_file(pages, output_path, args.format)
+        
+        metrics, _ = run_stage("save", save, lambda count: count)
+        metrics["output_bytes"] = os.path.getsize(output_path)
+        stages.append(metrics)
+        del pages
+        
+        def pipeline():
+            os.remove(output_path)
+            return fx.stream_facilities_to_file(
+                fx.iter_facility_pages(new_session(), **fetch_options), output_path, args.format
+            )
+        
+        stages.append(run_stage("pipeline", pipeline, lambda count: count)[0])
+        server_stats = dict(server.stats)
+    
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "pandas": pd.__version__,
+        "config": {
+            "pages": args.pages,
+            "page_size": args.page_size,
+            "records": args.pages * args.page_size,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "throttle_rate": args.throttle_rate,
+            "rotate_every": args.rotate_every,
+            "concurrency": args.concurrency,
+            "rate": args.rate,
+            "burst": args.burst,
+            "format": args.format,
+        },
+        "server": server_stats,
+        "stages": stages,
+    }
+
+
+def print_report(result: dict) -> None:
+    """Print the per-stage table."""
+    config = result["config"]
+    print(
+        f"\n📊 {config['records']} records ({config['pages']} pages x {config['page_size']}), "
+        f"concurrency {config['concurrency']}, format {config['format']}"
+    )
+    print(f"   Server: {json.dumps(result['server'])}")
+    print(f"\n   {'Stage':<10} {'Records':>8} {'Wall (s)':>9} {'Rec/s':>10} {'Peak RSS':>10} {'Growth':>9}")
+    print("   " + "-" * 61)
+    for stage in result["stages"]:
+        rate = stage["records_per_second"]
+        print(
+            f"   {stage['stage']:<10} {stage['records']:>8} {stage['wall_seconds']:>9.3f} "
+            f"{rate if rate is not None else '-':>10} {stage['peak_rss_mb']:>8.1f}MB {stage['rss_growth_mb']:>7.1f}MB"
+        )
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark facilities extraction against a local KMHFL stand-in")
+    parser.add_argument("--pages", type=int, default=100, help="Listing pages served (default: 100)")
+    parser.add_argument("--page-size", type=int, default=100, help="Facilities per page (default: 100)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Server delay per data request in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random server delay in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of data requests answered with 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of data requests answered with 429")
+    parser.add_argument("--retry-after", type=int, default=1, help="Retry-After seconds sent with 429s (default: 1)")
+    parser.add_argument("--rotate-every", type=int, default=0, help="Rotate the build ID every N Next.js data requests")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--concurrency", type=int, default=4, help="Extractor page concurrency (default: 4)")
+    parser.add_argument("--rate", type=float, default=1000.0, help="Extractor request budget per second (default: 1000)")
+    parser.add_argument("--burst", type=float, default=50.0, help="Extractor burst size (default: 50)")
+    parser.add_argument("--retries", type=int, default=5, help="Extractor retries per request (default: 5)")
+    parser.add_argument(
+        "--format",
+        choices=sorted(fx.OUTPUT_SINKS),
+        default="excel",
+        help="Output format for the save stages (default: excel)",
+    )
+    parser.add_argument("--json", dest="json_path", help="Write the result as JSON to this file")
+    parser.add_argument("--history", help="Append the result as one JSON line to this file")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Show the extractor's log output")
+    args = parser.parse_args()
+    args.extension = next(ext for ext, fmt in fx.OUTPUT_EXTENSIONS.items() if fmt == args.format)
+    return args
+
+
+def main():
+    args = parse_arguments()
+    if not args.verbose:
+        logging.getLogger().setLevel(logging.WARNING)
+    
+    print("⏱️  Running extraction benchmark against the local KMHFL stand-in...")
+    result = run_benchmark(args)
+    print_report(result)
+    
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Saved result to {args.json_path}")
+    
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+        print(f"\n💾 Appended result to {args.history}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,463 @@
+#!/usr/bin/env python3
+"""
+Premium Lookup Load Test
+========================
+Drives the premium lookup path at increasing load and reports latency
+histograms, error rates and a throughput curve, so caching and pooling
+changes can be compared with numbers.
+
+Targets:
+    postgrest   the query the calculator route makes per quote
+                (GET /rest/v1/premium_rates?select=*&age=eq.N&family_size=eq.F),
+                against the local PostgREST stand-in (mock_postgrest_server.py)
+                or a real Supabase project (--supabase-url)
+    calculate   POST a calculator endpoint (--url): the Next.js /api/calculate
+                route or the FastAPI service's /calculate
+
+Load models:
+    closed      --concurrency 1 4 16 64: N clients each send the next request
+                as soon as the previous one returns (throughput curve)
+    open        --arrival-rate 100 200 400: Poisson arrivals at a fixed rate,
+                optionally with bursts (--burst-factor, --burst-every,
+                --burst-length) like renewal season. Latency is measured from
+                the scheduled send time, so queueing behind a saturated
+                service shows up in the percentiles.
+
+Results can be appended as JSON lines to a history file so changes in
+latency can be compared between commits.
+
+Usage:
+    python benchmarks/bench_premium_lookup.py
+    python benchmarks/bench_premium_lookup.py --latency 0.01 --jitter 0.02 --pool-size 4 --concurrency 1 4 16 64
+    python benchmarks/bench_premium_lookup.py --arrival-rate 200 400 --burst-factor 5 --burst-every 10 --burst-length 2
+    python benchmarks/bench_premium_lookup.py --target calculate --url http://localhost:3000/api/calculate
+    python benchmarks/bench_premium_lookup.py --history benchmarks/results.jsonl
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import queue
+import random
+import sys
+import threading
+import time
+import urllib.parse
+from collections import Counter
+from datetime import datetime, timezone
+from typing import Callable, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+from bench_quote_service import git_revision, open_connection, random_quote
+from mock_postgrest_server import MockPostgrestServer
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Histogram buckets: 10 per decade from 0.1 ms to 100 s
+HISTOGRAM_EDGES_MS = np.logspace(-1, 5, 61)
+
+
+def lookup_request(target: str, base_url: str, apikey: Optional[str]) -> Callable[[random.Random], tuple]:
+    """
+    Build the request factory for a target.
+    
+    Args:
+        target: "postgrest" or "calculate"
+        base_url: Supabase/PostgREST project URL, or the calculator endpoint URL
+        apikey: Supabase API key sent with PostgREST requests
+    
+    Returns:
+        Function of an RNG returning (method, path, body, headers, check), where
+        ``check(status, body)`` returns None on success or an error label
+    """
+    path = urllib.parse.urlsplit(base_url).path.rstrip("/")
+    
+    if target == "postgrest":
+        headers = {"Accept": "application/json"}
+        if apikey:
+            headers.update({"apikey": apikey, "Authorization": f"Bearer {apikey}"})
+        
+        def check(status: int, body: bytes) -> Optional[str]:
+            if status != 200:
+                return f"HTTP {status}"
+            return None if len(json.loads(body)) == 1 else "RATE_NOT_FOUND"
+        
+        def make_request(rng: random.Random) -> tuple:
+            quote = random_quote(rng)
+            query = urllib.parse.urlencode(
+                {"select": "*", "age": f"eq.{quote['age']}", "family_size": f"eq.{quote['family_size']}"}
+            )
+            return "GET", f"{path}/rest/v1/premium_rates?{query}", None, headers, check
+        
+        return make_request
+    
+    headers = {"Content-Type": "application/json"}
+    
+    def check(status: int, body: bytes) -> Optional[str]:
+        if status == 200:
+            return None
+        try:
+            return json.loads(body)["error"]["code"]
+        except (ValueError, KeyError, TypeError):
+            return f"HTTP {status}"
+    
+    def make_request(rng: random.Random) -> tuple:
+        return "POST", path or "/", json.dumps(random_quote(rng)).encode(), headers, check
+    
+    return make_request
+
+
+class Worker:
+    """
+    One client with a keep-alive connection, recording latencies and errors.
+    
+    Args:
+        base_url: Server base URL
+        make_request: Request factory from lookup_request
+        seed: RNG seed for this worker's requests
+    """
+    
+    def __init__(self, base_url: str, make_request: Callable, seed: int):
+        self.base_url = base_url
+        self.make_request = make_request
+        self.rng = random.Random(seed)
+        self.latencies: list[float] = []
+        self.errors: Counter = Counter()
+        self.connection: Optional[http.client.HTTPConnection] = None
+    
+    def send(self, scheduled: Optional[float] = None) -> None:
+        """
+        Send one request and record its outcome.
+        
+        Args:
+            scheduled: perf_counter time the request was due (open loop); latency
+                is measured from then instead of from the actual send
+        """
+        method, path, body, headers, check = self.make_request(self.rng)
+        started = time.perf_counter() if scheduled is None else scheduled
+        try:
+            if self.connection is None:
+                self.connection = open_connection(self.base_url)
+            self.connection.request(method, path, body=body, headers=headers)
+            response = self.connection.getresponse()
+            payload = response.read()
+        except TimeoutError:
+            self.errors["timeout"] += 1
+            self.reset()
+            return
+        except (OSError, http.client.HTTPException) as error:
+            self.errors[type(error).__name__] += 1
+            self.reset()
+            return
+        
+        error = check(response.status, payload)
+        if error:
+            self.errors[error] += 1
+        else:
+            self.latencies.append(time.perf_counter() - started)
+    
+    def reset(self) -> None:
+        if self.connection is not None:
+            self.connection.close()
+            self.connection = None
+
+
+def run_closed(base_url: str, make_request: Callable, concurrency: int, duration: float, seed: int) -> list[Worker]:
+    """Run ``concurrency`` clients back to back for ``duration`` seconds."""
+    workers = [Worker(base_url, make_request, seed + index) for index in range(concurrency)]
+    deadline = time.perf_counter() + duration
+    
+    def loop(worker: Worker) -> None:
+        while time.perf_counter() < deadline:
+            worker.send()
+        worker.reset()
+    
+    threads = [threading.Thread(target=loop, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return workers
+
+
+def arrival_times(rate: float, duration: float, rng: np.random.Generator, burst_factor: float = 1.0,
+                  burst_every: float = 0.0, burst_length: float = 0.0) -> np.ndarray:
+    """
+    Poisson arrival times, with periodic bursts.
+    
+    During the first ``burst_length`` seconds of every ``burst_every``
+    seconds the rate is ``rate * burst_factor``. Arrivals are drawn at the
+    peak rate and thinned outside the bursts.
+    
+    Args:
+        rate: Base arrivals per second
+        duration: Seconds covered
+        rng: NumPy random generator
+        burst_factor: Rate multiplier during bursts (1 = no bursts)
+        burst_every: Burst period in seconds
+        burst_length: Burst length in seconds
+    
+    Returns:
+        Sorted arrival offsets in seconds from the start
+    """
+    bursty = burst_factor > 1 and burst_every > 0 and burst_length > 0
+    peak = rate * (burst_factor if bursty else 1.0)
+    count = rng.poisson(peak * duration)
+    times = np.sort(rng.uniform(0, duration, count))
+    if bursty:
+        in_burst = (times % burst_every) < burst_length
+        keep = in_burst | (rng.random(count) < 1.0 / burst_factor)
+        times = times[keep]
+    return times
+
+
+def run_open(base_url: str, make_request: Callable, arrivals: np.ndarray, max_workers: int, seed: int) -> list[Worker]:
+    """
+    Send requests at the given arrival times using up to ``max_workers`` clients.
+    
+    A request due while every client is busy waits for one; the wait counts
+    towards its latency.
+    """
+    due: queue.Queue = queue.Queue()
+    start = time.perf_counter() + 0.05
+    for offset in arrivals:
+        due.put(start + float(offset))
+    
+    workers = [Worker(base_url, make_request, seed + index) for index in range(max_workers)]
+    
+    def loop(worker: Worker) -> None:
+        while True:
+            try:
+                scheduled = due.get_nowait()
+            except queue.Empty:
+                break
+            delay = scheduled - time.perf_counter()
+            if delay > 0:
+                time.sleep(delay)
+            worker.send(scheduled)
+        worker.reset()
+    
+    threads = [threading.Thread(target=loop, args=(worker,)) for worker in workers]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return workers
+
+
+def summarize(label: str, load: float, workers: list[Worker], wall: float) -> dict:
+    """
+    Combine the workers of one load level into metrics and a histogram.
+    
+    Args:
+        label: "concurrency" or "arrival_rate"
+        load: Concurrency or arrivals per second
+        workers: Workers that ran the level
+        wall: Seconds the level took
+    
+    Returns:
+        Metrics dictionary for the level
+    """
+    latencies_ms = np.concatenate([np.array(worker.latencies) for worker in workers]) * 1000
+    errors = sum((worker.errors for worker in workers), Counter())
+    failed = sum(errors.values())
+    total = len(latencies_ms) + failed
+    
+    counts, _ = np.histogram(latencies_ms, bins=HISTOGRAM_EDGES_MS)
+    percentiles = np.percentile(latencies_ms, [50, 90, 99, 99.9]) if len(latencies_ms) else [None] * 4
+    
+    def ms(value) -> Optional[float]:
+        return round(float(value), 3) if value is not None else None
+    
+    return {
+        label: load,
+        "requests": total,
+        "ok": int(len(latencies_ms)),
+        "errors": dict(errors),
+        "error_rate": round(failed / total, 4) if total else 0.0,
+        "wall_seconds": round(wall, 3),
+        "throughput": round(len(latencies_ms) / wall, 1) if wall > 0 else None,
+        "p50_ms": ms(percentiles[0]),
+        "p90_ms": ms(percentiles[1]),
+        "p99_ms": ms(percentiles[2]),
+        "p999_ms": ms(percentiles[3]),
+        "max_ms": ms(latencies_ms.max()) if len(latencies_ms) else None,
+        # [lower ms, upper ms, count] for every non-empty bucket
+        "histogram": [
+            [round(float(HISTOGRAM_EDGES_MS[index]), 3), round(float(HISTOGRAM_EDGES_MS[index + 1]), 3), int(count)]
+            for index, count in enumerate(counts) if count
+        ],
+    }
+
+
+def run_levels(args: argparse.Namespace, base_url: str, make_request: Callable) -> list[dict]:
+    """Run every load level of the chosen load model."""
+    levels = []
+    # Warm up connections and caches before measuring
+    run_closed(base_url, make_request, min(args.concurrency), args.warmup, args.seed)
+    
+    if args.arrival_rate:
+        rng = np.random.default_rng(args.seed)
+        for rate in args.arrival_rate:
+            arrivals = arrival_times(rate, args.duration, rng, args.burst_factor, args.burst_every, args.burst_length)
+            started = time.perf_counter()
+            workers = run_open(base_url, make_request, arrivals, max(args.concurrency), args.seed)
+            levels.append(summarize("arrival_rate", rate, workers, time.perf_counter() - started))
+            print(f"   rate {rate:>8}/s: {levels[-1]['throughput']} ok/s, p99 {levels[-1]['p99_ms']} ms")
+    else:
+        for concurrency in args.concurrency:
+            started = time.perf_counter()
+            workers = run_closed(base_url, make_request, concurrency, args.duration, args.seed)
+            levels.append(summarize("concurrency", concurrency, workers, time.perf_counter() - started))
+            print(f"   concurrency {concurrency:>4}: {levels[-1]['throughput']} ok/s, p99 {levels[-1]['p99_ms']} ms")
+    return levels
+
+
+def run_benchmark(args: argparse.Namespace) -> dict:
+    """
+    Start the PostgREST stand-in (unless a URL is given) and run the load levels.
+    
+    Args:
+        args: Parsed command-line arguments
+    
+    Returns:
+        Result dictionary (config, server stats and per-level metrics)
+    """
+    server_stats = None
+    if args.target == "calculate":
+        levels = run_levels(args, args.url, lookup_request("calculate", args.url, None))
+    elif args.supabase_url:
+        apikey = args.apikey or os.getenv("SUPABASE_ANON_KEY") or os.getenv("NEXT_PUBLIC_SUPABASE_ANON_KEY")
+        levels = run_levels(args, args.supabase_url, lookup_request("postgrest", args.supabase_url, apikey))
+    else:
+        server = MockPostgrestServer(
+            db_path=args.db,
+            rates_path=args.rates,
+            pool_size=args.pool_size,
+            pool_timeout=args.pool_timeout,
+            latency=args.latency,
+            jitter=args.jitter,
+            error_rate=args.error_rate,
+            seed=args.seed,
+        )
+        with server:
+            levels = run_levels(args, server.url, lookup_request("postgrest", server.url, None))
+            server_stats = {key: round(value, 3) for key, value in server.stats.items()}
+    
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "target": args.target,
+            "url": args.url or args.supabase_url,
+            "model": "open" if args.arrival_rate else "closed",
+            "duration": args.duration,
+            "max_concurrency": max(args.concurrency),
+            "burst_factor": args.burst_factor,
+            "burst_every": args.burst_every,
+            "burst_length": args.burst_length,
+            "latency": args.latency,
+            "jitter": args.jitter,
+            "error_rate": args.error_rate,
+            "pool_size": args.pool_size,
+        },
+        "server": server_stats,
+        "levels": levels,
+    }
+
+
+def print_histogram(level: dict, width: int = 40) -> None:
+    """Print one level's latency histogram as bars."""
+    histogram = level["histogram"]
+    if not histogram:
+        return
+    peak = max(count for _, _, count in histogram)
+    for lower, upper, count in histogram:
+        bar = "#" * max(1, round(width * count / peak))
+        print(f"   {lower:>9.2f} - {upper:>9.2f} ms {count:>8}  {bar}")
+
+
+def print_report(result: dict) -> None:
+    """Print the throughput curve and the histogram of the busiest level."""
+    config = result["config"]
+    label = "arrival_rate" if config["model"] == "open" else "concurrency"
+    print(f"\n📊 {config['target']} lookups, {config['model']} loop, {config['duration']}s per level")
+    if result["server"]:
+        print(f"   Stand-in: {json.dumps(result['server'])}")
+    print(
+        f"\n   {'Rate/s' if label == 'arrival_rate' else 'Clients':>8} {'Requests':>9} {'Errors':>7} {'Err %':>6} "
+        f"{'Ok/s':>9} {'p50 (ms)':>9} {'p90 (ms)':>9} {'p99 (ms)':>9} {'p99.9 (ms)':>10}"
+    )
+    print("   " + "-" * 84)
+    for level in result["levels"]:
+        print(
+            f"   {level[label]:>8} {level['requests']:>9} {level['requests'] - level['ok']:>7} "
+            f"{level['error_rate'] * 100:>5.1f}% {level['throughput'] or '-':>9} "
+            f"{level['p50_ms'] if level['p50_ms'] is not None else '-':>9} "
+            f"{level['p90_ms'] if level['p90_ms'] is not None else '-':>9} "
+            f"{level['p99_ms'] if level['p99_ms'] is not None else '-':>9} "
+            f"{level['p999_ms'] if level['p999_ms'] is not None else '-':>10}"
+        )
+        if level["errors"]:
+            print(f"            errors: {json.dumps(level['errors'])}")
+    
+    busiest = result["levels"][-1]
+    print(f"\n   Latency histogram at {label.replace('_', ' ')} {busiest[label]}:")
+    print_histogram(busiest)
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Load-test the premium lookup path")
+    parser.add_argument("--target", choices=("postgrest", "calculate"), default="postgrest", help="What to load (default: postgrest)")
+    parser.add_argument("--url", help="Calculator endpoint for --target calculate (e.g. http://localhost:3000/api/calculate)")
+    parser.add_argument("--supabase-url", help="Load a real PostgREST/Supabase project instead of the local stand-in")
+    parser.add_argument("--apikey", help="Supabase API key (default: SUPABASE_ANON_KEY or NEXT_PUBLIC_SUPABASE_ANON_KEY)")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 64], help="Closed-loop client counts, or the open-loop client limit (max)")
+    parser.add_argument("--arrival-rate", type=float, nargs="+", help="Open-loop arrivals per second (one level each)")
+    parser.add_argument("--burst-factor", type=float, default=1.0, help="Open-loop rate multiplier during bursts (default: 1, no bursts)")
+    parser.add_argument("--burst-every", type=float, default=0.0, help="Seconds between burst starts")
+    parser.add_argument("--burst-length", type=float, default=0.0, help="Seconds each burst lasts")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per load level (default: 5)")
+    parser.add_argument("--warmup", type=float, default=0.5, help="Warm-up seconds (default: 0.5)")
+    parser.add_argument("--db", help="Stand-in database seeded by seed_database.py (default: seed from --rates)")
+    parser.add_argument("--rates", default=os.path.join(REPO_ROOT, "Rates.xlsx"), help="Rate workbook for the stand-in (default: Rates.xlsx)")
+    parser.add_argument("--pool-size", type=int, default=10, help="Stand-in database connections (default: 10)")
+    parser.add_argument("--pool-timeout", type=float, default=10.0, help="Stand-in connection wait limit in seconds (default: 10)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Stand-in query time in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Stand-in extra random query time in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of stand-in requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--json", dest="json_path", help="Write the result as JSON to this file")
+    parser.add_argument("--history", help="Append the result as one JSON line to this file")
+    args = parser.parse_args()
+    if args.target == "calculate" and not args.url:
+        parser.error("--target calculate needs --url")
+    return args
+
+
+def main():
+    args = parse_arguments()
+    
+    print("⏱️  Running premium lookup load test...")
+    result = run_benchmark(args)
+    print_report(result)
+    
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Saved result to {args.json_path}")
+    
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+        print(f"\n💾 Appended result to {args.history}")
+
+
+if __name__ == "__main__":
+    main()
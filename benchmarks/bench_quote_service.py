@@ -0,0 +1,354 @@
+#!/usr/bin/env python3
+"""
+Quote Service Benchmark
+=======================
+Load-tests the FastAPI quote service (backend/app) and reports latency
+percentiles and throughput for each scenario:
+
+    single    POST /calculate, one member per request
+    batch     POST /calculate/batch, --batch-size members per request
+    rates     GET /rates with If-None-Match (304 revalidation)
+
+Each client thread keeps one HTTP/1.1 connection open, so the figures
+measure the service rather than connection setup. By default the service
+is started with uvicorn on a free local port; pass --url to benchmark a
+running instance instead.
+
+Results can be appended as JSON lines to a history file so changes in
+latency can be compared between commits.
+
+Usage:
+    python benchmarks/bench_quote_service.py
+    python benchmarks/bench_quote_service.py --clients 16 --duration 10 --batch-size 500
+    python benchmarks/bench_quote_service.py --url http://localhost:8000 --scenarios single
+    python benchmarks/bench_quote_service.py --history benchmarks/results.jsonl
+"""
+
+import argparse
+import http.client
+import json
+import os
+import platform
+import random
+import socket
+import subprocess
+import sys
+import threading
+import time
+import urllib.parse
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+BACKEND_DIR = os.path.join(REPO_ROOT, "backend")
+
+SCENARIOS = ("single", "batch", "rates")
+FAMILY_SIZES = ("M", "M+1")
+OPTIONS = ("option_1", "option_2", "option_3", "option_4")
+
+
+def random_quote(rng: random.Random) -> dict:
+    return {"age": rng.randint(18, 90), "benefit_option": rng.choice(OPTIONS), "family_size": rng.choice(FAMILY_SIZES)}
+
+
+def free_port() -> int:
+    with socket.socket() as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+def wait_until_ready(url: str, timeout: float = 30.0) -> dict:
+    """Poll GET /health until the service has loaded its rates."""
+    parsed = urllib.parse.urlsplit(url)
+    deadline = time.monotonic() + timeout
+    while True:
+        try:
+            connection = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=2)
+            connection.request("GET", "/health")
+            health = json.loads(connection.getresponse().read())
+            connection.close()
+            if health.get("status") == "ok":
+                return health
+        except (OSError, ValueError, http.client.HTTPException):
+            pass
+        if time.monotonic() > deadline:
+            raise RuntimeError(f"Quote service at {url} did not become ready within {timeout:.0f}s")
+        time.sleep(0.2)
+
+
+class ServiceProcess:
+    """
+    Runs the quote service with uvicorn in a subprocess.
+    
+    Args:
+        rates: PRMF_RATE_SOURCE for the service
+        workers: uvicorn worker processes
+    """
+    
+    def __init__(self, rates: str, workers: int = 1):
+        self.url = f"http://127.0.0.1:{free_port()}"
+        self.rates = rates
+        self.workers = workers
+        self.process: Optional[subprocess.Popen] = None
+    
+    def __enter__(self) -> "ServiceProcess":
+        port = urllib.parse.urlsplit(self.url).port
+        env = dict(os.environ, PRMF_RATE_SOURCE=self.rates, PRMF_REFRESH_SECONDS="0")
+        self.process = subprocess.Popen(
+            [
+                sys.executable, "-m", "uvicorn", "app.main:app",
+                "--host", "127.0.0.1", "--port", str(port),
+                "--workers", str(self.workers), "--log-level", "warning", "--no-access-log",
+            ],
+            cwd=BACKEND_DIR,
+            env=env,
+        )
+        try:
+            wait_until_ready(self.url)
+        except RuntimeError:
+            self.__exit__()
+            raise
+        return self
+    
+    def __exit__(self, *exc_info) -> None:
+        if self.process is not None:
+            self.process.terminate()
+            try:
+                self.process.wait(timeout=10)
+            except subprocess.TimeoutExpired:
+                self.process.kill()
+            self.process = None
+
+
+def open_connection(url: str) -> http.client.HTTPConnection:
+    """Keep-alive connection with Nagle's algorithm off, so small requests are not delayed."""
+    parsed = urllib.parse.urlsplit(url)
+    connection = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=30)
+    connection.connect()
+    connection.sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+    return connection
+
+
+def client_loop(url: str, make_request, deadline: float, latencies: list, errors: list) -> None:
+    """
+    Send requests on one keep-alive connection until the deadline.
+    
+    Args:
+        url: Service base URL
+        make_request: Returns (method, path, body, headers, expected status) for the next request
+        deadline: time.perf_counter() value to stop at
+        latencies: Receives the latency of every successful request, in seconds
+        errors: Receives a description of every failed request
+    """
+    connection = open_connection(url)
+    while time.perf_counter() < deadline:
+        method, path, body, headers, expected = make_request()
+        started = time.perf_counter()
+        try:
+            connection.request(method, path, body=body, headers=headers)
+            response = connection.getresponse()
+            response.read()
+        except (OSError, http.client.HTTPException) as error:
+            errors.append(type(error).__name__)
+            connection.close()
+            connection = open_connection(url)
+            continue
+        elapsed = time.perf_counter() - started
+        if response.status == expected:
+            latencies.append(elapsed)
+        else:
+            errors.append(f"HTTP {response.status}")
+    connection.close()
+
+
+def run_scenario(name: str, url: str, args: argparse.Namespace) -> dict:
+    """
+    Load the service with one scenario and summarize the latencies.
+    
+    Args:
+        name: One of SCENARIOS
+        url: Service base URL
+        args: Parsed command-line arguments
+    
+    Returns:
+        Metrics dictionary for the scenario
+    """
+    rng = random.Random(args.seed)
+    json_headers = {"Content-Type": "application/json"}
+    quotes_per_request = 1
+    
+    if name == "single":
+        bodies = [json.dumps(random_quote(rng)).encode() for _ in range(1024)]
+        
+        def make_request():
+            return "POST", "/calculate", bodies[rng.randrange(len(bodies))], json_headers, 200
+    elif name == "batch":
+        quotes_per_request = args.batch_size
+        bodies = [
+            json.dumps({"quotes": [random_quote(rng) for _ in range(args.batch_size)]}).encode()
+            for _ in range(16)
+        ]
+        
+        def make_request():
+            return "POST", "/calculate/batch", bodies[rng.randrange(len(bodies))], json_headers, 200
+    else:
+        parsed = urllib.parse.urlsplit(url)
+        connection = http.client.HTTPConnection(parsed.hostname, parsed.port, timeout=10)
+        connection.request("GET", "/rates")
+        etag = connection.getresponse().getheader("ETag")
+        connection.close()
+        
+        def make_request():
+            return "GET", "/rates", None, {"If-None-Match": etag}, 304
+    
+    # Warm up the connection pool and the service before measuring
+    client_loop(url, make_request, time.perf_counter() + args.warmup, [], [])
+    
+    latencies: list[float] = []
+    errors: list[str] = []
+    deadline = time.perf_counter() + args.duration
+    threads = [
+        threading.Thread(target=client_loop, args=(url, make_request, deadline, latencies, errors))
+        for _ in range(args.clients)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    wall = time.perf_counter() - started
+    
+    samples = np.array(latencies) * 1000
+    percentiles = np.percentile(samples, [50, 90, 99]) if len(samples) else [None] * 3
+    return {
+        "scenario": name,
+        "requests": len(latencies),
+        "errors": len(errors),
+        "wall_seconds": round(wall, 3),
+        "requests_per_second": round(len(latencies) / wall, 1),
+        "quotes_per_second": round(len(latencies) * quotes_per_request / wall, 1) if name != "rates" else None,
+        "p50_ms": round(float(percentiles[0]), 3) if len(samples) else None,
+        "p90_ms": round(float(percentiles[1]), 3) if len(samples) else None,
+        "p99_ms": round(float(percentiles[2]), 3) if len(samples) else None,
+        "max_ms": round(float(samples.max()), 3) if len(samples) else None,
+    }
+
+
+def git_revision() -> Optional[str]:
+    """Short git commit of the working tree, if available."""
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"],
+            capture_output=True, text=True, check=True,
+            cwd=os.path.dirname(os.path.abspath(__file__)),
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_benchmark(args: argparse.Namespace) -> dict:
+    """
+    Start the service (unless --url is given) and run every scenario.
+    
+    Args:
+        args: Parsed command-line arguments
+    
+    Returns:
+        Result dictionary (config, service health and per-scenario metrics)
+    """
+    def run_all(url: str) -> tuple[dict, list]:
+        health = wait_until_ready(url)
+        return health, [run_scenario(name, url, args) for name in args.scenarios]
+    
+    if args.url:
+        health, scenarios = run_all(args.url.rstrip("/"))
+    else:
+        with ServiceProcess(args.rates, args.workers) as service:
+            health, scenarios = run_all(service.url)
+    
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "config": {
+            "url": args.url,
+            "rates": health.get("source"),
+            "workers": args.workers if not args.url else None,
+            "clients": args.clients,
+            "duration": args.duration,
+            "batch_size": args.batch_size,
+        },
+        "etag": health.get("etag"),
+        "scenarios": scenarios,
+    }
+
+
+def print_report(result: dict) -> None:
+    """Print the per-scenario table."""
+    config = result["config"]
+    print(f"\n📊 {config['clients']} clients x {config['duration']}s per scenario, rates {result['etag']}")
+    print(f"   Source: {config['rates']}")
+    print(
+        f"\n   {'Scenario':<9} {'Requests':>9} {'Errors':>7} {'Req/s':>10} {'Quotes/s':>11} "
+        f"{'p50 (ms)':>9} {'p90 (ms)':>9} {'p99 (ms)':>9}"
+    )
+    print("   " + "-" * 80)
+    for scenario in result["scenarios"]:
+        quotes = scenario["quotes_per_second"]
+        print(
+            f"   {scenario['scenario']:<9} {scenario['requests']:>9} {scenario['errors']:>7} "
+            f"{scenario['requests_per_second']:>10} {quotes if quotes is not None else '-':>11} "
+            f"{scenario['p50_ms'] if scenario['p50_ms'] is not None else '-':>9} "
+            f"{scenario['p90_ms'] if scenario['p90_ms'] is not None else '-':>9} "
+            f"{scenario['p99_ms'] if scenario['p99_ms'] is not None else '-':>9}"
+        )
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the FastAPI quote service")
+    parser.add_argument("--url", help="Benchmark a running service instead of starting one")
+    parser.add_argument(
+        "--rates",
+        default=os.path.join(REPO_ROOT, "Rates.xlsx"),
+        help="Rate source for the started service (default: Rates.xlsx)",
+    )
+    parser.add_argument("--workers", type=int, default=1, help="uvicorn workers for the started service (default: 1)")
+    parser.add_argument("--clients", type=int, default=8, help="Concurrent keep-alive clients (default: 8)")
+    parser.add_argument("--duration", type=float, default=5.0, help="Seconds per scenario (default: 5)")
+    parser.add_argument("--warmup", type=float, default=0.5, help="Warm-up seconds before each scenario (default: 0.5)")
+    parser.add_argument("--batch-size", type=int, default=100, help="Quotes per batch request (default: 100)")
+    parser.add_argument(
+        "--scenarios",
+        nargs="+",
+        choices=SCENARIOS,
+        default=list(SCENARIOS),
+        help="Scenarios to run (default: all)",
+    )
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--json", dest="json_path", help="Write the result as JSON to this file")
+    parser.add_argument("--history", help="Append the result as one JSON line to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    
+    print("⏱️  Running quote service benchmark...")
+    result = run_benchmark(args)
+    print_report(result)
+    
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Saved result to {args.json_path}")
+    
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+        print(f"\n💾 Appended result to {args.history}")
+
+
+if __name__ == "__main__":
+    main()
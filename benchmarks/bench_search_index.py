@@ -0,0 +1,183 @@
+#!/usr/bin/env python3
+"""
+Facility Search Index Benchmark
+===============================
+Times facility_search.py on synthetic facilities (mock_kmhfl_server.py's
+make_facility):
+
+    documents    SearchDocuments.from_frame over flatten_facilities_data output
+    full         update_search_index into an empty directory
+    incremental  update_search_index after --change-rate of the facilities were renamed
+    open         SearchIndex() on the updated index (metadata only)
+
+then measures per-query latency for exact, prefix, fuzzy, field-restricted
+and code queries (each query is repeated --repeat times, after one cold
+run).
+
+Usage:
+    python benchmarks/bench_search_index.py
+    python benchmarks/bench_search_index.py --facilities 15000 --change-rate 0.02 --repeat 500
+    python benchmarks/bench_search_index.py --history benchmarks/search_results.jsonl
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+
+import facility_search as search
+from bench_extraction import git_revision, run_stage
+from facilities_to_excel import flatten_facilities_data
+from mock_kmhfl_server import make_facility
+
+# Query kinds and queries that match make_facility names, counties and wards
+QUERIES = {
+    "exact": ["nairobi dispensary", "kisumu health centre"],
+    "prefix": ["kiamb disp", "nak hosp", "k"],
+    "fuzzy": ["nyrei", "hospitl", "mombsa nursing"],
+    "field": ["county:kisumu", "ward:ward 3"],
+    "code": ["10005", "1234"],
+}
+
+
+def percentile_us(samples: list[float], percentile: float) -> float:
+    return round(float(np.percentile(samples, percentile)) * 1e6, 1)
+
+
+def run_benchmark(args: argparse.Namespace) -> dict:
+    """
+    Build and update an index, then time the queries.
+    
+    Args:
+        args: Parsed command-line arguments
+    
+    Returns:
+        Result dictionary (config, per-stage metrics and query latencies)
+    """
+    facilities = [make_facility(i, args.seed) for i in range(args.facilities)]
+    df = flatten_facilities_data(facilities)
+    rng = np.random.default_rng(args.seed)
+    for position in rng.choice(len(facilities), int(len(facilities) * args.change_rate), replace=False):
+        facilities[position]["name"] += " Annex"
+    changed = flatten_facilities_data(facilities)
+    stages = []
+    
+    with tempfile.TemporaryDirectory(prefix="search-bench-") as work_dir:
+        path = os.path.join(work_dir, "facilities.search")
+        metrics, documents = run_stage("documents", lambda: search.SearchDocuments.from_frame(df), len)
+        stages.append(metrics)
+        stages.append(run_stage("full", lambda: search.update_search_index(path, documents), lambda _: len(documents))[0])
+        metrics, stats = run_stage(
+            "incremental",
+            lambda: search.update_search_index(path, search.SearchDocuments.from_frame(changed)),
+            lambda _: len(changed),
+        )
+        metrics.update(mode=stats["mode"], changed=stats["changed"], segments=stats["segments"])
+        stages.append(metrics)
+        metrics, index = run_stage("open", lambda: search.SearchIndex(path), len)
+        stages.append(metrics)
+        index_bytes = sum(
+            os.path.getsize(os.path.join(root, name)) for root, _, names in os.walk(path) for name in names
+        )
+        
+        queries = []
+        for kind, texts in QUERIES.items():
+            for text in texts:
+                started = time.perf_counter()
+                results = index.search(text, args.limit)
+                cold = time.perf_counter() - started
+                samples = []
+                for _ in range(args.repeat):
+                    started = time.perf_counter()
+                    index.search(text, args.limit)
+                    samples.append(time.perf_counter() - started)
+                queries.append({
+                    "kind": kind,
+                    "query": text,
+                    "results": len(results),
+                    "cold_us": round(cold * 1e6, 1),
+                    "p50_us": percentile_us(samples, 50),
+                    "p99_us": percentile_us(samples, 99),
+                })
+    
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "config": {
+            "facilities": args.facilities,
+            "change_rate": args.change_rate,
+            "limit": args.limit,
+            "repeat": args.repeat,
+            "index_bytes": index_bytes,
+        },
+        "stages": stages,
+        "queries": queries,
+    }
+
+
+def print_report(result: dict) -> None:
+    """Print the build stages and the query latency table."""
+    config = result["config"]
+    print(f"\n📊 {config['facilities']} facilities, index {config['index_bytes'] / 2**20:.1f} MB")
+    print(f"\n   {'Stage':<12} {'Records':>8} {'Wall (s)':>9} {'Rec/s':>12}")
+    print("   " + "-" * 44)
+    for stage in result["stages"]:
+        rate = stage["records_per_second"]
+        print(f"   {stage['stage']:<12} {stage['records']:>8} {stage['wall_seconds']:>9.3f} {rate if rate is not None else '-':>12}")
+    incremental = next(stage for stage in result["stages"] if stage["stage"] == "incremental")
+    print(f"   ({incremental['mode']} update: {incremental['changed']} changed, {incremental['segments']} segments)")
+    
+    print(f"\n   {'Kind':<7} {'Query':<18} {'Hits':>5} {'Cold (us)':>10} {'p50 (us)':>9} {'p99 (us)':>9}")
+    print("   " + "-" * 63)
+    for query in result["queries"]:
+        print(
+            f"   {query['kind']:<7} {query['query']:<18} {query['results']:>5} {query['cold_us']:>10.1f} "
+            f"{query['p50_us']:>9.1f} {query['p99_us']:>9.1f}"
+        )
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the facility search index on synthetic data")
+    parser.add_argument("--facilities", type=int, default=15000, help="Synthetic facilities (default: 15000)")
+    parser.add_argument("--change-rate", type=float, default=0.01, help="Share of facilities renamed before the incremental update (default: 0.01)")
+    parser.add_argument("--limit", type=int, default=10, help="Results per query (default: 10)")
+    parser.add_argument("--repeat", type=int, default=200, help="Timed runs per query (default: 200)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--json", dest="json_path", help="Write the result as JSON to this file")
+    parser.add_argument("--history", help="Append the result as one JSON line to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    logging.getLogger().setLevel(logging.WARNING)
+    
+    print("⏱️  Running search index benchmark...")
+    result = run_benchmark(args)
+    print_report(result)
+    
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Saved result to {args.json_path}")
+    
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+        print(f"\n💾 Appended result to {args.history}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,238 @@
+#!/usr/bin/env python3
+"""
+Facility Spatial Index Benchmark
+================================
+Times facility_spatial.py on synthetic facilities (mock_kmhfl_server.py's
+make_facility) and uniformly scattered member locations:
+
+    build     FacilityIndex.from_frame over flatten_facilities_data output
+    save      FacilityIndex.save
+    load      FacilityIndex.load
+    nearest   k nearest facilities of every member
+    filtered  the same, limited to --keph-level / --status facilities
+    within    every facility within --radius-km of every member
+    assign    assign_facilities (nearest, filtered) into a member table
+
+The pairwise baseline (a pandas cross join plus haversine, as an ad hoc
+script would do it) runs on a sample of members; its time is extrapolated
+to all members, and its nearest facilities are checked against the index.
+A filter that matches no facility is checked to give no matches.
+
+--outliers moves that many facilities to coordinates far outside Kenya
+(as swapped or mistyped KMHFL coordinates are), to check that a few bad
+points do not slow the queries down.
+
+Usage:
+    python benchmarks/bench_spatial_index.py
+    python benchmarks/bench_spatial_index.py --facilities 15000 --members 500000 --k 3
+    python benchmarks/bench_spatial_index.py --outliers 20
+    python benchmarks/bench_spatial_index.py --history benchmarks/spatial_results.jsonl
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import sys
+import tempfile
+import time
+from datetime import datetime, timezone
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+sys.path.insert(0, os.path.dirname(os.path.abspath(__file__)))
+
+import numpy as np
+import pandas as pd
+
+import facility_spatial as fs
+from bench_extraction import git_revision, run_stage
+from facilities_to_excel import flatten_facilities_data
+from mock_kmhfl_server import make_facility
+
+# make_facility scatters facilities over this box; members are drawn from a slightly larger one
+LATITUDE_RANGE = (-4.8, 4.8)
+LONGITUDE_RANGE = (33.7, 42.1)
+
+
+def pairwise_nearest(facilities: pd.DataFrame, members: pd.DataFrame, k: int) -> pd.DataFrame:
+    """
+    k nearest facilities per member by brute force: cross join, haversine, sort.
+    
+    Args:
+        facilities: id, latitude, longitude per facility
+        members: member, latitude, longitude per member
+        k: Facilities per member
+    
+    Returns:
+        member, id and distance_km of the k nearest facilities of every member
+    """
+    pairs = members.merge(facilities, how="cross", suffixes=("", "_facility"))
+    lat1, lon1 = np.radians(pairs["latitude"]), np.radians(pairs["longitude"])
+    lat2, lon2 = np.radians(pairs["latitude_facility"]), np.radians(pairs["longitude_facility"])
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    pairs["distance_km"] = 2 * fs.EARTH_RADIUS_KM * np.arcsin(np.sqrt(a))
+    nearest = pairs.sort_values(["member", "distance_km"]).groupby("member").head(k)
+    return nearest[["member", "id", "distance_km"]]
+
+
+def run_benchmark(args: argparse.Namespace) -> dict:
+    """
+    Build the data, run every stage and collect the results.
+    
+    Args:
+        args: Parsed command-line arguments
+    
+    Returns:
+        Result dictionary (config, per-stage metrics and the pairwise baseline)
+    """
+    facilities = [make_facility(i, args.seed) for i in range(args.facilities)]
+    rng = np.random.default_rng(args.seed)
+    for position in rng.choice(len(facilities), min(args.outliers, len(facilities)), replace=False):
+        facilities[position]["lat_long"] = [float(rng.uniform(-60, 60)), float(rng.uniform(-170, 170))]
+    df = flatten_facilities_data(facilities)
+    members = pd.DataFrame({
+        "member": np.arange(args.members),
+        "latitude": rng.uniform(*LATITUDE_RANGE, args.members),
+        "longitude": rng.uniform(*LONGITUDE_RANGE, args.members),
+    })
+    latitudes, longitudes = members["latitude"].to_numpy(), members["longitude"].to_numpy()
+    filters = {name: values for name, values in (("keph_level", args.keph_level), ("status", args.status)) if values}
+    stages = []
+    
+    metrics, index = run_stage("build", lambda: fs.FacilityIndex.from_frame(df), len)
+    stages.append(metrics)
+    
+    with tempfile.TemporaryDirectory(prefix="spatial-bench-") as work_dir:
+        path = os.path.join(work_dir, "facilities.spatial.npz")
+        metrics, _ = run_stage("save", lambda: index.save(path), lambda _: len(index))
+        metrics["index_bytes"] = os.path.getsize(path)
+        stages.append(metrics)
+        stages.append(run_stage("load", lambda: fs.FacilityIndex.load(path), len)[0])
+    
+    metrics, (_, nearest) = run_stage(
+        "nearest", lambda: index.nearest(latitudes, longitudes, args.k), lambda _: args.members
+    )
+    stages.append(metrics)
+    metrics, _ = run_stage(
+        "filtered", lambda: index.nearest(latitudes, longitudes, args.k, filters), lambda _: args.members
+    )
+    metrics["facilities"] = int(len(index.select(filters)))
+    stages.append(metrics)
+    metrics, (_, found, _) = run_stage(
+        "within", lambda: index.within(latitudes, longitudes, args.radius_km), lambda _: args.members
+    )
+    metrics["matches"] = int(len(found))
+    stages.append(metrics)
+    stages.append(run_stage(
+        "assign", lambda: fs.assign_facilities(index, members, k=args.k, filters=filters), lambda _: args.members
+    )[0])
+    
+    sample = members.sample(min(args.pairwise_sample, args.members), random_state=args.seed)
+    coordinates = pd.DataFrame({"id": index.ids, "latitude": index.latitudes, "longitude": index.longitudes})
+    started = time.perf_counter()
+    brute = pairwise_nearest(coordinates, sample, args.k)
+    wall = time.perf_counter() - started
+    expected = brute.groupby("member")["id"].apply(list)
+    ids = np.array(index.ids, dtype=object)
+    mismatches = sum(list(ids[nearest[member]]) != expected[member] for member in sample["member"])
+    baseline = {
+        "members": len(sample),
+        "wall_seconds": round(wall, 4),
+        "extrapolated_seconds": round(wall * args.members / len(sample), 1),
+        "mismatches": int(mismatches),
+    }
+    
+    _, unmatched = index.nearest(latitudes[:1000], longitudes[:1000], args.k, {"status": ["(no such status)"]})
+    empty_filter_ok = bool((unmatched == -1).all())
+    
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "git_revision": git_revision(),
+        "python": platform.python_version(),
+        "numpy": np.__version__,
+        "config": {
+            "facilities": args.facilities,
+            "outliers": args.outliers,
+            "indexed": len(index),
+            "cell_km": round(index.cell_km, 2),
+            "members": args.members,
+            "k": args.k,
+            "radius_km": args.radius_km,
+            "filters": filters,
+        },
+        "stages": stages,
+        "pairwise": baseline,
+        "empty_filter_ok": empty_filter_ok,
+    }
+
+
+def print_report(result: dict) -> None:
+    """Print the per-stage table and the pairwise comparison."""
+    config = result["config"]
+    print(
+        f"\n📊 {config['members']} members, {config['indexed']} facilities ({config['cell_km']} km cells), "
+        f"k={config['k']}, radius {config['radius_km']} km"
+    )
+    print(f"\n   {'Stage':<10} {'Records':>8} {'Wall (s)':>9} {'Rec/s':>12} {'Peak RSS':>10}")
+    print("   " + "-" * 53)
+    for stage in result["stages"]:
+        rate = stage["records_per_second"]
+        print(
+            f"   {stage['stage']:<10} {stage['records']:>8} {stage['wall_seconds']:>9.3f} "
+            f"{rate if rate is not None else '-':>12} {stage['peak_rss_mb']:>8.1f}MB"
+        )
+    
+    baseline = result["pairwise"]
+    nearest = next(stage for stage in result["stages"] if stage["stage"] == "nearest")
+    print(
+        f"\n   Pairwise pandas: {baseline['wall_seconds']:.2f}s for {baseline['members']} members, "
+        f"~{baseline['extrapolated_seconds']:,.0f}s for all ({baseline['extrapolated_seconds'] / max(nearest['wall_seconds'], 1e-9):,.0f}x the index)"
+    )
+    if baseline["mismatches"]:
+        print(f"   ❌ {baseline['mismatches']} sampled members got different nearest facilities")
+    else:
+        print("   ✅ Sampled members got the same nearest facilities")
+    if result["empty_filter_ok"]:
+        print("   ✅ A filter matching no facility gives no matches")
+    else:
+        print("   ❌ A filter matching no facility still gave matches")
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Benchmark the facility spatial index on synthetic data")
+    parser.add_argument("--facilities", type=int, default=15000, help="Synthetic facilities (default: 15000)")
+    parser.add_argument("--members", type=int, default=300000, help="Member locations (default: 300000)")
+    parser.add_argument("--k", type=int, default=3, help="Nearest facilities per member (default: 3)")
+    parser.add_argument("--radius-km", type=float, default=5.0, help="Radius for the within stage (default: 5)")
+    parser.add_argument("--keph-level", nargs="+", default=["Level 4", "Level 5"], help="KEPH levels for the filtered stages")
+    parser.add_argument("--status", nargs="+", default=["Operational"], help="Operation statuses for the filtered stages")
+    parser.add_argument("--outliers", type=int, default=0, help="Facilities moved far outside Kenya (default: 0)")
+    parser.add_argument("--pairwise-sample", type=int, default=200, help="Members in the pairwise baseline (default: 200)")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    parser.add_argument("--json", dest="json_path", help="Write the result as JSON to this file")
+    parser.add_argument("--history", help="Append the result as one JSON line to this file")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    logging.getLogger().setLevel(logging.WARNING)
+    
+    print("⏱️  Running spatial index benchmark...")
+    result = run_benchmark(args)
+    print_report(result)
+    
+    if args.json_path:
+        with open(args.json_path, "w", encoding="utf-8") as f:
+            json.dump(result, f, indent=2)
+        print(f"\n💾 Saved result to {args.json_path}")
+    
+    if args.history:
+        with open(args.history, "a", encoding="utf-8") as f:
+            f.write(json.dumps(result) + "\n")
+        print(f"\n💾 Appended result to {args.history}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,366 @@
+#!/usr/bin/env python3
+"""
+Local KMHFL Stand-in Server
+===========================
+Serves a synthetic facility registry with the same URLs and JSON shapes as
+the public KMHFL site, so facilities_to_excel.py can be exercised and
+benchmarked without touching the live government service.
+
+Endpoints:
+    /public/facilities                              HTML page exposing the build ID
+    /_next/data/<build>/public/facilities.json      Next.js data (?page=N), 404 for old builds
+    /api/facilities/facilities/                     DRF-style pagination with `next` URLs
+
+Failure injection (all optional): fixed/jittered latency, a share of 503
+responses, a share of 429 responses with Retry-After, and build ID rotation
+every N data requests (old build URLs then return 404, like a redeploy).
+
+Usage:
+    python benchmarks/mock_kmhfl_server.py --port 8000 --pages 50
+    python facilities_to_excel.py ...   # after configure_endpoints("http://127.0.0.1:8000")
+"""
+
+import argparse
+import json
+import random
+import threading
+import time
+from datetime import datetime, timedelta, timezone
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qs, urlencode, urlparse
+
+COUNTIES = ["Nairobi", "Mombasa", "Kisumu", "Nakuru", "Kiambu", "Machakos", "Kakamega", "Nyeri", "Garissa", "Turkana"]
+FACILITY_TYPES = ["Dispensary", "Health Centre", "Medical Clinic", "Sub-County Hospital", "Nursing Home"]
+OWNERS = ["Ministry of Health", "Private Practice", "Faith Based Organization", "NGO"]
+KEPH_LEVELS = [None, "Level 2", "Level 3", "Level 4", "Level 5"]
+
+
+def make_facility(index: int, seed: int = 0) -> dict:
+    """
+    Build one synthetic facility record shaped like a KMHFL listing entry.
+    
+    Args:
+        index: Facility number (0-based); the record is deterministic per index and seed
+        seed: Random seed for the registry
+    
+    Returns:
+        Facility dictionary with scalar, nested and list fields
+    """
+    rng = random.Random(seed * 1_000_003 + index)
+    county = rng.choice(COUNTIES)
+    facility_type = rng.choice(FACILITY_TYPES)
+    updated = datetime(2024, 1, 1, tzinfo=timezone.utc) + timedelta(minutes=rng.randrange(60 * 24 * 365))
+    
+    return {
+        "id": f"00000000-0000-4000-8000-{index:012d}",
+        "code": 10000 + index,
+        "name": f"{county} {facility_type} {index}",
+        "official_name": f"{county} {facility_type} {index}" if rng.random() < 0.8 else None,
+        "registration_number": f"REG/{index:06d}" if rng.random() < 0.6 else "",
+        "keph_level_name": rng.choice(KEPH_LEVELS),
+        "facility_type_name": facility_type,
+        "owner_name": rng.choice(OWNERS),
+        "county": county,
+        "sub_county_name": f"{county} Central",
+        "constituency_name": f"{county} Town",
+        "ward_name": f"Ward {index % 40}",
+        "operation_status_name": "Operational" if rng.random() < 0.95 else "Non-Operational",
+        "number_of_beds": rng.randrange(0, 200) if rng.random() < 0.7 else None,
+        "number_of_cots": rng.randrange(0, 20),
+        "open_whole_day": rng.random() < 0.3,
+        "open_weekends": rng.random() < 0.5,
+        "is_published": True,
+        "is_classified": False,
+        "approved": True,
+        "lat_long": [round(rng.uniform(-4.6, 4.6), 6), round(rng.uniform(33.9, 41.9), 6)],
+        "created": "2019-06-01T08:00:00Z",
+        "updated": updated.strftime("%Y-%m-%dT%H:%M:%S.%fZ"),
+        "deleted": False,
+        "officer_in_charge": (
+            {"name": f"Officer {index}", "reg_no": f"OC{index:05d}", "title_name": "Clinical Officer"}
+            if rng.random() < 0.6 else None
+        ),
+        "facility_type_details": {
+            "id": f"type-{FACILITY_TYPES.index(facility_type)}",
+            "name": facility_type,
+            "parent": {"id": "type-parent", "name": "Primary Care"},
+        },
+        "facility_contacts": [
+            {"contact_type_name": "MOBILE", "contact": f"07{rng.randrange(10**8):08d}"}
+        ],
+        "facility_services": [{"service_name": f"Service {n}"} for n in range(rng.randrange(4))],
+    }
+
+
+class MockKmhflServer:
+    """
+    Threaded HTTP server that mimics the KMHFL facilities endpoints.
+    
+    Args:
+        pages: Number of listing pages
+        page_size: Facilities per page (the last page may be shorter via ``records``)
+        records: Total facilities (default: pages * page_size)
+        latency: Base delay per data request in seconds
+        jitter: Extra random delay per data request, uniform in [0, jitter]
+        error_rate: Share of data requests answered with 503
+        throttle_rate: Share of data requests answered with 429
+        retry_after: Retry-After value sent with 429 responses (whole seconds)
+        rotate_every: Switch to a new build ID after this many Next.js data requests (0 = never)
+        seed: Random seed for the registry and failure injection
+        host: Interface to bind
+        port: Port to bind (0 = any free port)
+    """
+    
+    def __init__(
+        self,
+        pages: int = 20,
+        page_size: int = 30,
+        records: Optional[int] = None,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        throttle_rate: float = 0.0,
+        retry_after: int = 1,
+        rotate_every: int = 0,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self.page_size = page_size
+        self.records = records if records is not None else pages * page_size
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        self.throttle_rate = throttle_rate
+        self.retry_after = retry_after
+        self.rotate_every = rotate_every
+        self.seed = seed
+        
+        self.build_number = 1
+        self._build_requests = 0
+        self.stats = {"requests": 0, "data_requests": 0, "errors": 0, "throttled": 0, "stale_build": 0, "rotations": 0}
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        self._facilities = [make_facility(i, seed) for i in range(self.records)]
+        
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def url(self) -> str:
+        """Base URL of the running server."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    @property
+    def build_id(self) -> str:
+        """Currently deployed build ID."""
+        return f"mockbuild-{self.seed}-{self.build_number}"
+    
+    @property
+    def total_pages(self) -> int:
+        return max(1, -(-self.records // self.page_size))
+    
+    def start(self) -> "MockKmhflServer":
+        """Serve in a background thread and return self."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-kmhfl", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        """Shut the server down."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+    
+    def __enter__(self) -> "MockKmhflServer":
+        return self.start()
+    
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+    
+    def page_body(self, page: int, query: dict) -> dict:
+        """
+        Build a DRF-style listing page.
+        
+        Args:
+            page: Page number (1-based)
+            query: Parsed query parameters (``updated_after`` and ``page_size`` are honoured)
+        
+        Returns:
+            Dictionary with count, next, previous, total_pages and results
+        """
+        facilities = self._facilities
+        since = query.get("updated_after", [None])[0]
+        if since:
+            # Records updated at or after the timestamp, as fetch_updated_facilities expects
+            since = datetime.fromisoformat(since.replace("Z", "+00:00"))
+            facilities = [f for f in facilities if datetime.fromisoformat(f["updated"].replace("Z", "+00:00")) >= since]
+        page_size = int(query.get("page_size", [self.page_size])[0])
+        
+        total_pages = max(1, -(-len(facilities) // page_size))
+        results = facilities[(page - 1) * page_size:page * page_size]
+        
+        def page_url(number: int) -> str:
+            params = {k: v[0] for k, v in query.items()}
+            params["page"] = number
+            return f"{self.url}/api/facilities/facilities/?{urlencode(params)}"
+        
+        return {
+            "count": len(facilities),
+            "next": page_url(page + 1) if page < total_pages else None,
+            "previous": page_url(page - 1) if page > 1 else None,
+            "current_page": page,
+            "total_pages": total_pages,
+            "page_size": page_size,
+            "results": results,
+        }
+    
+    def _inject_failure(self) -> Optional[int]:
+        """Apply latency and pick an injected failure status (None for success)."""
+        with self._lock:
+            self.stats["data_requests"] += 1
+            roll = self._rng.random()
+            delay = self.latency + self._rng.random() * self.jitter
+        
+        if delay:
+            time.sleep(delay)
+        
+        if roll < self.throttle_rate:
+            with self._lock:
+                self.stats["throttled"] += 1
+            return 429
+        if roll < self.throttle_rate + self.error_rate:
+            with self._lock:
+                self.stats["errors"] += 1
+            return 503
+        return None
+    
+    def _current_build(self, requested: str) -> bool:
+        """Count a Next.js data request, rotating the build if due. True if ``requested`` is live."""
+        with self._lock:
+            live = requested == self.build_id
+            if not live:
+                self.stats["stale_build"] += 1
+            elif self.rotate_every:
+                self._build_requests += 1
+                if self._build_requests >= self.rotate_every:
+                    self._build_requests = 0
+                    self.build_number += 1
+                    self.stats["rotations"] += 1
+            return live
+    
+    def _handler_class(self) -> type:
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; without this, delayed ACKs add ~40ms per response
+            disable_nagle_algorithm = True
+            
+            def log_message(self, format: str, *args) -> None:
+                pass
+            
+            def send_body(self, status: int, body: bytes, content_type: str, headers: Optional[dict] = None) -> None:
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def send_json(self, status: int, payload: dict) -> None:
+                self.send_body(status, json.dumps(payload).encode("utf-8"), "application/json")
+            
+            def do_GET(self) -> None:
+                with server._lock:
+                    server.stats["requests"] += 1
+                
+                url = urlparse(self.path)
+                query = parse_qs(url.query)
+                parts = url.path.strip("/").split("/")
+                
+                if url.path.rstrip("/") == "/public/facilities":
+                    html = (
+                        f'<html><head><script src="/_next/static/{server.build_id}/_buildManifest.js">'
+                        f"</script></head><body>Facilities</body></html>"
+                    )
+                    self.send_body(200, html.encode("utf-8"), "text/html")
+                    return
+                
+                is_nextjs = len(parts) == 5 and parts[:2] == ["_next", "data"] and parts[3:] == ["public", "facilities.json"]
+                is_api = url.path.rstrip("/") == "/api/facilities/facilities"
+                if not (is_nextjs or is_api):
+                    self.send_json(404, {"detail": "Not found."})
+                    return
+                
+                if is_nextjs and not server._current_build(parts[2]):
+                    self.send_json(404, {"detail": "Not found."})
+                    return
+                
+                status = server._inject_failure()
+                if status == 429:
+                    self.send_body(
+                        429, b'{"detail": "Request was throttled."}', "application/json",
+                        {"Retry-After": str(server.retry_after)},
+                    )
+                    return
+                if status:
+                    self.send_json(status, {"detail": "Service unavailable."})
+                    return
+                
+                try:
+                    page = int(query.get("page", ["1"])[0])
+                except ValueError:
+                    page = 1
+                data = server.page_body(page, query)
+                
+                if is_nextjs:
+                    self.send_json(200, {"pageProps": {"data": data}, "__N_SSP": True})
+                else:
+                    self.send_json(200, data)
+        
+        return Handler
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a local KMHFL stand-in server")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=8000, help="Port to bind (default: 8000)")
+    parser.add_argument("--pages", type=int, default=20, help="Number of listing pages (default: 20)")
+    parser.add_argument("--page-size", type=int, default=30, help="Facilities per page (default: 30)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Delay per data request in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random delay per data request in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of data requests answered with 503")
+    parser.add_argument("--throttle-rate", type=float, default=0.0, help="Share of data requests answered with 429")
+    parser.add_argument("--rotate-every", type=int, default=0, help="Rotate the build ID every N Next.js data requests")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    server = MockKmhflServer(
+        pages=args.pages,
+        page_size=args.page_size,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        throttle_rate=args.throttle_rate,
+        rotate_every=args.rotate_every,
+        seed=args.seed,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"🚀 Mock KMHFL serving {server.records} facilities on {server.url} (build {server.build_id})")
+    print("   Press Ctrl+C to stop")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n📊 Stats:", json.dumps(server.stats))
+
+
+if __name__ == "__main__":
+    main()
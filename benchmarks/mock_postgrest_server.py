@@ -0,0 +1,461 @@
+#!/usr/bin/env python3
+"""
+Local PostgREST Stand-in Server
+===============================
+Serves the premium_rates table over the PostgREST interface Supabase
+exposes (``/rest/v1/<table>``), so the premium lookup path can be load
+tested without a Supabase project. The data comes from a SQLite database
+seeded by seed_database.py (``--store sqlite:///rates.db``), or is seeded
+from Rates.xlsx at startup.
+
+Supported (read-only) PostgREST features:
+    select=col1,col2                   column selection (* for all)
+    col=eq.value                       filters: eq, neq, gt, gte, lt, lte, in.(a,b), is.null
+    order=col.asc,col2.desc            ordering
+    limit=N / offset=N / Range: 0-9    paging, with a Content-Range response header
+    Prefer: count=exact                total row count in Content-Range
+    Accept: application/vnd.pgrst.object+json
+                                       single object (maybeSingle/single), 406 otherwise
+
+Requests are served through a fixed pool of database connections, like
+PostgREST's db-pool: latency is injected while a connection is held, so a
+small pool and slow queries queue up the way they do in production.
+Requests that wait longer than the pool timeout get PostgREST's 504.
+
+Usage:
+    python scripts/seed_database.py --store sqlite:///rates.db
+    python benchmarks/mock_postgrest_server.py --db rates.db --port 3000 --latency 0.02 --pool-size 10
+    # then point NEXT_PUBLIC_SUPABASE_URL / SUPABASE_URL at http://127.0.0.1:3000
+"""
+
+import argparse
+import json
+import os
+import queue
+import random
+import re
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Optional
+from urllib.parse import parse_qsl, urlparse
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "scripts"))
+
+OBJECT_MEDIA_TYPE = "application/vnd.pgrst.object+json"
+
+# PostgREST operators supported in filters
+FILTER_OPERATORS = {"eq": "=", "neq": "<>", "gt": ">", "gte": ">=", "lt": "<", "lte": "<="}
+
+# Query parameters that are not column filters
+RESERVED_PARAMETERS = {"select", "order", "limit", "offset", "on_conflict", "columns"}
+
+
+class PostgrestError(Exception):
+    """
+    An error response in PostgREST's JSON shape.
+    
+    Args:
+        status: HTTP status
+        code: PostgREST error code (PGRST...)
+        message: Error message
+        details: Optional details
+    """
+    
+    def __init__(self, status: int, code: str, message: str, details: Optional[str] = None):
+        super().__init__(message)
+        self.status = status
+        self.body = {"code": code, "details": details, "hint": None, "message": message}
+
+
+def seed_database(rates_path: str, db_path: str) -> int:
+    """
+    Seed a SQLite database from a rate workbook with seed_database.py's upload.
+    
+    Args:
+        rates_path: Rate workbook (e.g. Rates.xlsx)
+        db_path: SQLite file to create or update
+    
+    Returns:
+        Number of premium_rates rows
+    """
+    from rate_book_cache import load_rates_frame
+    from rate_storage import SQLiteRateStore
+    from seed_database import upload_rates
+    
+    with SQLiteRateStore(db_path) as store:
+        result = upload_rates(load_rates_frame(rates_path), store)
+    if "error" in result:
+        raise RuntimeError(f"Could not seed {db_path}: {result['error']}")
+    return result["total_records"]
+
+
+def parse_value(value: str):
+    """Convert a filter value to a number where it looks like one (SQLite compares by type)."""
+    if re.fullmatch(r"-?\d+", value):
+        return int(value)
+    if re.fullmatch(r"-?\d+\.\d*", value):
+        return float(value)
+    return value
+
+
+def build_query(table: str, columns: set, params: list[tuple[str, str]], headers) -> tuple[str, list, str, int]:
+    """
+    Translate a PostgREST read into SQL.
+    
+    Args:
+        table: Table name (already validated)
+        columns: Columns of the table
+        params: Query parameters as (name, value) pairs
+        headers: Request headers (Range)
+    
+    Returns:
+        Tuple of (select SQL, parameters, FROM/WHERE clause for counting, offset)
+    
+    Raises:
+        PostgrestError: For unknown columns or unsupported operators
+    """
+    def column(name: str) -> str:
+        if name not in columns:
+            raise PostgrestError(400, "42703", f"column {table}.{name} does not exist")
+        return name
+    
+    selected, where, values, order = "*", [], [], []
+    offset, limit = 0, -1
+    
+    for name, value in params:
+        if name == "select":
+            names = [part.strip() for part in value.split(",") if part.strip()]
+            selected = "*" if names in ([], ["*"]) else ", ".join(column(part) for part in names)
+        elif name == "order":
+            for term in value.split(","):
+                parts = term.split(".")
+                direction = "DESC" if "desc" in parts[1:] else "ASC"
+                nulls = " NULLS FIRST" if "nullsfirst" in parts[1:] else " NULLS LAST" if "nullslast" in parts[1:] else ""
+                order.append(f"{column(parts[0])} {direction}{nulls}")
+        elif name == "limit":
+            limit = int(value)
+        elif name == "offset":
+            offset = int(value)
+        elif name not in RESERVED_PARAMETERS:
+            operator, _, operand = value.partition(".")
+            negate = operator == "not"
+            if negate:
+                operator, _, operand = operand.partition(".")
+            if operator in FILTER_OPERATORS:
+                clause = f"{column(name)} {FILTER_OPERATORS[operator]} ?"
+                values.append(parse_value(operand))
+            elif operator == "in":
+                items = [parse_value(item.strip().strip('"')) for item in operand.strip("()").split(",") if item.strip()]
+                clause = f"{column(name)} IN ({', '.join('?' for _ in items)})" if items else "0"
+                values.extend(items)
+            elif operator == "is" and operand in ("null", "true", "false"):
+                clause = f"{column(name)} IS {operand.upper()}"
+            else:
+                raise PostgrestError(400, "PGRST100", f"failed to parse filter ({value})")
+            where.append(f"NOT ({clause})" if negate else clause)
+    
+    range_header = headers.get("Range")
+    if range_header:
+        match = re.fullmatch(r"(\d+)-(\d*)", range_header.strip())
+        if match:
+            offset = int(match.group(1))
+            if match.group(2):
+                limit = int(match.group(2)) - offset + 1
+    
+    from_clause = f" FROM {table}" + (f" WHERE {' AND '.join(where)}" if where else "")
+    sql = f"SELECT {selected}{from_clause}" + (f" ORDER BY {', '.join(order)}" if order else "")
+    sql += f" LIMIT {limit} OFFSET {offset}"
+    return sql, values, from_clause, offset
+
+
+class ConnectionPool:
+    """
+    Fixed-size pool of SQLite connections, standing in for PostgREST's db-pool.
+    
+    Args:
+        db_path: SQLite database file
+        size: Number of connections
+    """
+    
+    def __init__(self, db_path: str, size: int):
+        self.size = size
+        self._idle: queue.Queue = queue.Queue()
+        for _ in range(size):
+            connection = sqlite3.connect(db_path, check_same_thread=False)
+            connection.row_factory = sqlite3.Row
+            self._idle.put(connection)
+    
+    def acquire(self, timeout: float) -> sqlite3.Connection:
+        """
+        Take a connection, waiting up to ``timeout`` seconds.
+        
+        Raises:
+            PostgrestError: 504 PGRST003 if no connection frees up in time
+        """
+        try:
+            return self._idle.get(timeout=timeout)
+        except queue.Empty:
+            raise PostgrestError(504, "PGRST003", "Timed out acquiring connection from connection pool.")
+    
+    def release(self, connection: sqlite3.Connection) -> None:
+        self._idle.put(connection)
+    
+    def close(self) -> None:
+        while not self._idle.empty():
+            self._idle.get_nowait().close()
+
+
+class MockPostgrestServer:
+    """
+    Threaded HTTP server that mimics PostgREST reads of the rate tables.
+    
+    Args:
+        db_path: SQLite database seeded by seed_database.py (default: seed a
+            temporary one from ``rates_path``)
+        rates_path: Rate workbook used when ``db_path`` is not given
+        pool_size: Database connections (PostgREST db-pool)
+        pool_timeout: Seconds a request waits for a connection before a 504
+        latency: Query time per request in seconds, spent holding a connection
+        jitter: Extra random query time, uniform in [0, jitter]
+        error_rate: Share of requests answered with 503
+        seed: Random seed for failure injection
+        host: Interface to bind
+        port: Port to bind (0 = any free port)
+    """
+    
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        rates_path: str = "Rates.xlsx",
+        pool_size: int = 10,
+        pool_timeout: float = 10.0,
+        latency: float = 0.0,
+        jitter: float = 0.0,
+        error_rate: float = 0.0,
+        seed: int = 0,
+        host: str = "127.0.0.1",
+        port: int = 0,
+    ):
+        self._temp_dir = None
+        if db_path is None:
+            self._temp_dir = tempfile.TemporaryDirectory(prefix="postgrest-standin-")
+            db_path = os.path.join(self._temp_dir.name, "rates.db")
+            seed_database(rates_path, db_path)
+        if not os.path.exists(db_path):
+            raise FileNotFoundError(f"{db_path} not found (seed it with seed_database.py --store sqlite:///{db_path})")
+        
+        self.db_path = db_path
+        self.pool_timeout = pool_timeout
+        self.latency = latency
+        self.jitter = jitter
+        self.error_rate = error_rate
+        
+        self.stats = {
+            "requests": 0, "errors": 0, "pool_timeouts": 0, "rows_returned": 0,
+            "max_in_use": 0, "pool_wait_seconds": 0.0,
+        }
+        self._in_use = 0
+        self._lock = threading.Lock()
+        self._rng = random.Random(seed)
+        
+        with sqlite3.connect(db_path) as connection:
+            tables = [row[0] for row in connection.execute("SELECT name FROM sqlite_master WHERE type = 'table'")]
+            self.tables = {
+                table: {row[1] for row in connection.execute(f"PRAGMA table_info({table})")}
+                for table in tables if not table.startswith("sqlite_")
+            }
+        self.pool = ConnectionPool(db_path, pool_size)
+        
+        self._httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._httpd.daemon_threads = True
+        self._thread: Optional[threading.Thread] = None
+    
+    @property
+    def url(self) -> str:
+        """Base URL of the running server (the Supabase project URL)."""
+        host, port = self._httpd.server_address[:2]
+        return f"http://{host}:{port}"
+    
+    def start(self) -> "MockPostgrestServer":
+        """Serve in a background thread and return self."""
+        self._thread = threading.Thread(target=self._httpd.serve_forever, name="mock-postgrest", daemon=True)
+        self._thread.start()
+        return self
+    
+    def stop(self) -> None:
+        """Shut the server down."""
+        self._httpd.shutdown()
+        self._httpd.server_close()
+        self.pool.close()
+        if self._temp_dir is not None:
+            self._temp_dir.cleanup()
+    
+    def __enter__(self) -> "MockPostgrestServer":
+        return self.start()
+    
+    def __exit__(self, *exc_info) -> None:
+        self.stop()
+    
+    def query(self, table: str, params: list[tuple[str, str]], headers) -> tuple[list[dict], str, Optional[int]]:
+        """
+        Run one read against the pool, with the configured query time.
+        
+        Args:
+            table: Table name from the URL
+            params: Query parameters
+            headers: Request headers (Range, Prefer)
+        
+        Returns:
+            Tuple of (rows, Content-Range value, total count or None)
+        
+        Raises:
+            PostgrestError: For unknown tables, bad queries, injected errors and pool timeouts
+        """
+        if table not in self.tables:
+            raise PostgrestError(404, "42P01", f'relation "public.{table}" does not exist')
+        sql, values, from_clause, offset = build_query(table, self.tables[table], params, headers)
+        
+        with self._lock:
+            roll = self._rng.random()
+            delay = self.latency + self._rng.random() * self.jitter
+        if roll < self.error_rate:
+            with self._lock:
+                self.stats["errors"] += 1
+            raise PostgrestError(503, "PGRST000", "Could not connect with the database.")
+        
+        waited = time.perf_counter()
+        try:
+            connection = self.pool.acquire(self.pool_timeout)
+        except PostgrestError:
+            with self._lock:
+                self.stats["pool_timeouts"] += 1
+            raise
+        with self._lock:
+            self.stats["pool_wait_seconds"] += time.perf_counter() - waited
+            self._in_use += 1
+            self.stats["max_in_use"] = max(self.stats["max_in_use"], self._in_use)
+        
+        try:
+            if delay:
+                time.sleep(delay)
+            try:
+                rows = [dict(row) for row in connection.execute(sql, values)]
+                total = None
+                if "count=exact" in headers.get("Prefer", ""):
+                    total = connection.execute(f"SELECT COUNT(*){from_clause}", values).fetchone()[0]
+            except sqlite3.Error as error:
+                raise PostgrestError(400, "PGRST100", str(error))
+        finally:
+            with self._lock:
+                self._in_use -= 1
+            self.pool.release(connection)
+        
+        with self._lock:
+            self.stats["rows_returned"] += len(rows)
+        content_range = f"{offset}-{offset + len(rows) - 1}" if rows else "*"
+        return rows, f"{content_range}/{total if total is not None else '*'}", total
+    
+    def _handler_class(self) -> type:
+        server = self
+        
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # Headers and body are separate writes; without this, delayed ACKs add ~40ms per response
+            disable_nagle_algorithm = True
+            
+            def log_message(self, format: str, *args) -> None:
+                pass
+            
+            def send_json(self, status: int, payload, headers: Optional[dict] = None) -> None:
+                body = json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/json; charset=utf-8")
+                self.send_header("Content-Length", str(len(body)))
+                for name, value in (headers or {}).items():
+                    self.send_header(name, value)
+                self.end_headers()
+                self.wfile.write(body)
+            
+            def do_GET(self) -> None:
+                with server._lock:
+                    server.stats["requests"] += 1
+                
+                url = urlparse(self.path)
+                parts = url.path.strip("/").split("/")
+                if len(parts) != 3 or parts[:2] != ["rest", "v1"]:
+                    self.send_json(404, {"code": "PGRST125", "details": None, "hint": None, "message": "Invalid path"})
+                    return
+                
+                try:
+                    rows, content_range, total = server.query(parts[2], parse_qsl(url.query), self.headers)
+                except PostgrestError as error:
+                    self.send_json(error.status, error.body)
+                    return
+                except ValueError as error:
+                    self.send_json(400, PostgrestError(400, "PGRST100", str(error)).body)
+                    return
+                
+                headers = {"Content-Range": content_range}
+                if OBJECT_MEDIA_TYPE in self.headers.get("Accept", ""):
+                    if len(rows) != 1:
+                        error = PostgrestError(
+                            406, "PGRST116", "JSON object requested, multiple (or no) rows returned",
+                            f"The result contains {len(rows)} rows",
+                        )
+                        self.send_json(406, error.body)
+                        return
+                    self.send_json(200, rows[0], headers)
+                    return
+                
+                status = 206 if total is not None and len(rows) < total else 200
+                self.send_json(status, rows, headers)
+        
+        return Handler
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Run a local PostgREST stand-in for premium_rates")
+    parser.add_argument("--host", default="127.0.0.1", help="Interface to bind (default: 127.0.0.1)")
+    parser.add_argument("--port", type=int, default=3000, help="Port to bind (default: 3000)")
+    parser.add_argument("--db", help="SQLite database seeded by seed_database.py (default: seed one from --rates)")
+    parser.add_argument("--rates", default="Rates.xlsx", help="Rate workbook used without --db (default: Rates.xlsx)")
+    parser.add_argument("--pool-size", type=int, default=10, help="Database connections (default: 10)")
+    parser.add_argument("--pool-timeout", type=float, default=10.0, help="Seconds to wait for a connection (default: 10)")
+    parser.add_argument("--latency", type=float, default=0.0, help="Query time per request in seconds")
+    parser.add_argument("--jitter", type=float, default=0.0, help="Extra random query time in seconds")
+    parser.add_argument("--error-rate", type=float, default=0.0, help="Share of requests answered with 503")
+    parser.add_argument("--seed", type=int, default=0, help="Random seed (default: 0)")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    server = MockPostgrestServer(
+        db_path=args.db,
+        rates_path=args.rates,
+        pool_size=args.pool_size,
+        pool_timeout=args.pool_timeout,
+        latency=args.latency,
+        jitter=args.jitter,
+        error_rate=args.error_rate,
+        seed=args.seed,
+        host=args.host,
+        port=args.port,
+    )
+    print(f"🚀 Mock PostgREST serving {', '.join(sorted(server.tables))} on {server.url}/rest/v1")
+    print(f"   Database: {args.db or 'seeded from ' + args.rates}, pool of {args.pool_size} connections")
+    print("   Press Ctrl+C to stop")
+    try:
+        server._httpd.serve_forever()
+    except KeyboardInterrupt:
+        print("\n📊 Stats:", json.dumps(server.stats))
+    finally:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
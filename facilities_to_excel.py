@@ -10,24 +10,50 @@ It dynamically discovers the Next.js build ID and uses internal data endpoints f
 
 Usage:
     python facilities_to_excel.py --out kmhfr_facilities.xlsx
+    python facilities_to_excel.py --out kmhfr_facilities.parquet
 """
 
 import argparse
+import csv
+import gzip
+import hashlib
+import json
 import logging
+import math
 import os
 import re
 import sys  
+import tempfile
+import threading
 import time
 import urllib3
-from typing import Any, Optional
+import zipfile
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from datetime import datetime, timedelta, timezone
+from email.utils import parsedate_to_datetime
+from typing import Any, Iterable, Iterator, Optional
 from urllib.parse import parse_qs, urlencode, urlparse
+from xml.sax.saxutils import escape as xml_escape
 
 import certifi
+import numpy as np
 import pandas as pd
 import requests
+from openpyxl.utils import get_column_letter
 from requests.adapters import HTTPAdapter
 from urllib3.util.retry import Retry
 
+from facility_diff import (
+    RowHashes,
+    RowHashWriter,
+    diff_row_hashes,
+    load_row_hashes,
+    sidecar_path,
+    write_change_log,
+)
+from facility_search import INDEX_SUFFIX, SearchDocumentWriter, update_search_index
+
 # Fix certificate path issue on Windows
 os.environ['SSL_CERT_FILE'] = certifi.where()
 os.environ['REQUESTS_CA_BUNDLE'] = certifi.where()
@@ -48,12 +74,263 @@ KMHFL_PUBLIC_FACILITIES_URL = f"{KMHFL_BASE_URL}/public/facilities"
 API_BASE_URL = "https://api.kmhfr.health.go.ke"
 API_FACILITIES_ENDPOINT = "/api/facilities/facilities/"
 
+# Default output file
+DEFAULT_OUTPUT_PATH = "kmhfr_facilities.xlsx"
+
+# Excel export: rows sampled when estimating column widths, rows per write chunk
+WIDTH_SAMPLE_ROWS = 2000
+EXCEL_CHUNK_ROWS = 10000
+
+# Flattened columns placed first in every output
+PRIORITY_COLUMNS = [
+    'id', 'code', 'name', 'facility_type_name', 'owner_name',
+    'county', 'constituency', 'ward_name', 'keph_level_name',
+    'operation_status_name', 'regulatory_status_name'
+]
+
+# Page size used when streaming an in-memory snapshot to the output
+SNAPSHOT_CHUNK_SIZE = 1000
+
+# Fewer records than this from a fetch method means it did not work
+MIN_EXPECTED_FACILITIES = 100
+
+# Default directory for page checkpoints (used by --resume)
+DEFAULT_CHECKPOINT_DIR = ".kmhfl_checkpoints"
+
+# Discovered Next.js build ID is cached here and reused until it is this old
+DEFAULT_BUILD_ID_CACHE = ".kmhfl_build_id.json"
+DEFAULT_BUILD_ID_TTL = 6 * 60 * 60
+BUILD_ID_REFRESH_ATTEMPTS = 3
+
+# Incremental sync: local snapshot layout and the API's modified-since filter
+DEFAULT_SNAPSHOT_DIR = ".kmhfl_snapshot"
+SNAPSHOT_FACILITIES_FILE = "facilities.jsonl.gz"
+SNAPSHOT_STATE_FILE = "sync_state.json"
+UPDATED_FIELD = "updated"
+UPDATED_SINCE_PARAM = "updated_after"
+# Changes are requested from this long before the watermark, so records committed late
+# with an older timestamp are not missed (re-fetched ones merge by id harmlessly)
+WATERMARK_OVERLAP = timedelta(minutes=5)
+
+
+def configure_endpoints(site_url: Optional[str] = None, api_url: Optional[str] = None) -> None:
+    """
+    Point the extractor at another KMHFL website and/or backend API.
+    
+    Used to run against a mirror or a local stand-in server (see benchmarks/).
+    
+    Args:
+        site_url: Base URL of the KMHFL website (serves /public/facilities and _next/data)
+        api_url: Base URL of the backend API
+    """
+    global KMHFL_BASE_URL, KMHFL_PUBLIC_FACILITIES_URL, API_BASE_URL
+    
+    if site_url:
+        KMHFL_BASE_URL = site_url.rstrip("/")
+        KMHFL_PUBLIC_FACILITIES_URL = f"{KMHFL_BASE_URL}/public/facilities"
+    if api_url:
+        API_BASE_URL = api_url.rstrip("/")
+
+
+class RateLimiter:
+    """
+    Thread-safe token bucket with adaptive (AIMD) rate control.
+    
+    Every request takes one token. Tokens refill at the current rate up to
+    ``burst``. When the server answers 429/5xx or fails to respond, the rate
+    is cut multiplicatively and any Retry-After delay pauses all callers.
+    Fast successful responses raise the rate additively, back up to the
+    configured budget.
+    
+    Args:
+        rate: Requests-per-second budget (also the ceiling for speed-ups)
+        burst: Maximum number of tokens that can accumulate
+        min_rate: Floor for the adaptive rate
+        slowdown_factor: Multiplier applied to the rate on 429/5xx
+        speedup_step: Requests-per-second added after each fast response
+        fast_response_seconds: Responses quicker than this count as fast
+    """
+    
+    def __init__(
+        self,
+        rate: float = 5.0,
+        burst: int = 5,
+        min_rate: float = 0.1,
+        slowdown_factor: float = 0.5,
+        speedup_step: float = 0.25,
+        fast_response_seconds: float = 2.0,
+    ):
+        if rate <= 0:
+            raise ValueError("rate must be positive")
+        
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(1, burst)
+        self.min_rate = min(min_rate, rate)
+        self.slowdown_factor = slowdown_factor
+        self.speedup_step = speedup_step
+        self.fast_response_seconds = fast_response_seconds
+        
+        self._tokens = float(self.burst)
+        self._last_refill = time.monotonic()
+        self._blocked_until = 0.0
+        self._lock = threading.Lock()
+    
+    def _refill(self, now: float) -> None:
+        self._tokens = min(self.burst, self._tokens + (now - self._last_refill) * self.rate)
+        self._last_refill = now
+    
+    def acquire(self) -> float:
+        """
+        Block until a request may be sent.
+        
+        Returns:
+            Seconds spent waiting
+        """
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._refill(now)
+                
+                if now < self._blocked_until:
+                    delay = self._blocked_until - now
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                else:
+                    delay = (1 - self._tokens) / self.rate
+            
+            time.sleep(delay)
+            waited += delay
+    
+    def record_response(
+        self,
+        status_code: int,
+        elapsed: Optional[float] = None,
+        retry_after: Optional[str] = None,
+    ) -> None:
+        """
+        Adapt the rate to a server response.
+        
+        Args:
+            status_code: HTTP status code
+            elapsed: Response time in seconds, if known
+            retry_after: Raw Retry-After header value, if any
+        """
+        if status_code == 429 or status_code >= 500:
+            self._slow_down(f"HTTP {status_code}", parse_retry_after(retry_after))
+        elif status_code < 400 and elapsed is not None and elapsed <= self.fast_response_seconds:
+            with self._lock:
+                if self.rate < self.max_rate:
+                    self._refill(time.monotonic())
+                    self.rate = min(self.max_rate, self.rate + self.speedup_step)
+                    logger.debug(f"Responses are fast; request rate raised to {self.rate:.2f}/s")
+    
+    def record_failure(self) -> None:
+        """Adapt the rate to a request that got no response (connection error or timeout)."""
+        self._slow_down("request failure")
+    
+    def _slow_down(self, reason: str, pause: Optional[float] = None) -> None:
+        with self._lock:
+            now = time.monotonic()
+            self._refill(now)
+            self.rate = max(self.min_rate, self.rate * self.slowdown_factor)
+            self._tokens = 0.0
+            if pause:
+                self._blocked_until = max(self._blocked_until, now + pause)
+        
+        message = f"{reason}; request rate reduced to {self.rate:.2f}/s"
+        if pause:
+            message += f", pausing {pause:.1f}s (Retry-After)"
+        logger.warning(message)
+
+
+def parse_retry_after(value: Optional[str]) -> Optional[float]:
+    """
+    Parse a Retry-After header value.
+    
+    Args:
+        value: Header value, either delta-seconds or an HTTP date
+    
+    Returns:
+        Delay in seconds, or None if missing or unparseable
+    """
+    if not value:
+        return None
+    
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    
+    try:
+        retry_at = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    
+    if retry_at.tzinfo is None:
+        retry_at = retry_at.replace(tzinfo=timezone.utc)
+    return max(0.0, (retry_at - datetime.now(timezone.utc)).total_seconds())
+
+
+class RateLimitedRetry(Retry):
+    """
+    urllib3 retry policy that reports retried responses to a RateLimiter.
+    
+    Retries normally happen inside urllib3 where the adapter never sees them,
+    so the policy forwards each retried status to the limiter and takes a
+    token before the retry is sent.
+    """
+    
+    rate_limiter: Optional[RateLimiter] = None
+    
+    def new(self, **kw: Any) -> "RateLimitedRetry":
+        retry = super().new(**kw)
+        retry.rate_limiter = self.rate_limiter
+        return retry
+    
+    def increment(self, method=None, url=None, response=None, error=None, _pool=None, _stacktrace=None):
+        if self.rate_limiter is not None and response is not None:
+            self.rate_limiter.record_response(response.status, retry_after=response.headers.get("Retry-After"))
+        return super().increment(method, url, response, error, _pool, _stacktrace)
+    
+    def sleep(self, response=None) -> None:
+        super().sleep(response)
+        if self.rate_limiter is not None:
+            self.rate_limiter.acquire()
+
+
+class RateLimitedAdapter(HTTPAdapter):
+    """HTTP adapter that takes a RateLimiter token before every request."""
+    
+    def __init__(self, rate_limiter: RateLimiter, **kwargs: Any):
+        self.rate_limiter = rate_limiter
+        super().__init__(**kwargs)
+    
+    def send(self, request, **kwargs):
+        self.rate_limiter.acquire()
+        try:
+            response = super().send(request, **kwargs)
+        except (requests.exceptions.ConnectionError, requests.exceptions.Timeout):
+            self.rate_limiter.record_failure()
+            raise
+        
+        self.rate_limiter.record_response(
+            response.status_code,
+            response.elapsed.total_seconds(),
+            response.headers.get("Retry-After"),
+        )
+        return response
+
 
 def create_session_with_retries(
     retries: int = 3,
     backoff_factor: float = 0.5,
-    status_forcelist: tuple = (502, 503, 504),
+    status_forcelist: tuple = (429, 502, 503, 504),
     verify_ssl: bool = True,
+    pool_maxsize: int = 10,
+    rate_limiter: Optional[RateLimiter] = None,
 ) -> requests.Session:
     """
     Create a requests session with automatic retry logic.
@@ -63,6 +340,8 @@ def create_session_with_retries(
         backoff_factor: Backoff factor for retry delays
         status_forcelist: HTTP status codes to retry on
         verify_ssl: Whether to verify SSL certificates
+        pool_maxsize: Connections kept per host (should be >= fetch concurrency)
+        rate_limiter: Optional limiter shared by every request made through the session
     
     Returns:
         Configured requests.Session object
@@ -73,14 +352,20 @@ def create_session_with_retries(
     if not verify_ssl:
         urllib3.disable_warnings(urllib3.exceptions.InsecureRequestWarning)
     
-    retry_strategy = Retry(
+    retry_class = RateLimitedRetry if rate_limiter is not None else Retry
+    retry_strategy = retry_class(
         total=retries,
         backoff_factor=backoff_factor,
         status_forcelist=status_forcelist,
         allowed_methods=["GET"],
     )
     
-    adapter = HTTPAdapter(max_retries=retry_strategy)
+    if rate_limiter is not None:
+        retry_strategy.rate_limiter = rate_limiter
+        adapter = RateLimitedAdapter(rate_limiter, max_retries=retry_strategy, pool_maxsize=pool_maxsize)
+    else:
+        adapter = HTTPAdapter(max_retries=retry_strategy, pool_maxsize=pool_maxsize)
+    session.rate_limiter = rate_limiter
     session.mount("http://", adapter)
     session.mount("https://", adapter)
     
@@ -94,6 +379,89 @@ def create_session_with_retries(
     return session
 
 
+def pause_between_requests(session: requests.Session, sleep_seconds: float) -> None:
+    """
+    Wait between paginated requests.
+    
+    Sessions with a rate limiter are throttled by their adapter, so this only
+    sleeps for plain sessions.
+    
+    Args:
+        session: Requests session in use
+        sleep_seconds: Fixed delay for sessions without a rate limiter
+    """
+    if getattr(session, "rate_limiter", None) is None and sleep_seconds > 0:
+        time.sleep(sleep_seconds)
+
+
+class PageCheckpoint:
+    """
+    On-disk cache of fetched pages for one extraction.
+    
+    Pages are stored as JSON files under ``<root>/<build_id>-<filters hash>/``,
+    one file per pagination method and page number, so a failed or split run
+    can be resumed without downloading pages that already arrived.
+    
+    Args:
+        root_dir: Checkpoint root directory
+        build_id: Next.js build ID the pages were fetched with
+        filters: Query filters applied to the listing (part of the cache key)
+    """
+    
+    def __init__(self, root_dir: str, build_id: str, filters: Optional[dict] = None):
+        self.build_id = build_id
+        self.filters = dict(filters or {})
+        filters_key = hashlib.sha256(
+            json.dumps(self.filters, sort_keys=True).encode("utf-8")
+        ).hexdigest()[:12]
+        self.directory = os.path.join(root_dir, f"{build_id}-{filters_key}")
+        os.makedirs(self.directory, exist_ok=True)
+    
+    def _path(self, method: str, page: int) -> str:
+        return os.path.join(self.directory, f"{method}-{page:05d}.json")
+    
+    def load(self, method: str, page: int) -> Optional[dict]:
+        """
+        Load a stored page.
+        
+        Args:
+            method: Pagination method ("pages" or "api")
+            page: Page number (1-based)
+        
+        Returns:
+            Stored page data, or None if the page is not on disk or unreadable
+        """
+        path = self._path(method, page)
+        if not os.path.exists(path):
+            return None
+        
+        try:
+            with open(path, encoding="utf-8") as f:
+                return json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable checkpoint {path}: {e}")
+            return None
+    
+    def save(self, method: str, page: int, page_data: dict) -> None:
+        """
+        Store a page atomically (write to a temporary file, then rename).
+        
+        Args:
+            method: Pagination method ("pages" or "api")
+            page: Page number (1-based)
+            page_data: Page data dictionary to store
+        """
+        path = self._path(method, page)
+        tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(page_data, f, separators=(",", ":"))
+        os.replace(tmp_path, path)
+    
+    def has(self, method: str, page: int) -> bool:
+        """Return True if the page is stored on disk."""
+        return os.path.exists(self._path(method, page))
+
+
 def get_nextjs_build_id(session: requests.Session, timeout: int = 30) -> Optional[str]:
     """
     Extract the Next.js build ID from the KMHFL website.
@@ -137,10 +505,161 @@ def get_nextjs_build_id(session: requests.Session, timeout: int = 30) -> Optiona
         return None
 
 
+class BuildIdResolver:
+    """
+    Thread-safe holder of the current Next.js build ID.
+    
+    The ID is read from a small JSON cache file while it is younger than
+    ``ttl`` seconds, so a run normally starts without downloading the
+    facilities HTML. When KMHFL redeploys, the old ID's data URLs return 404;
+    callers then ask for refresh(), which rediscovers the ID once (other
+    workers that hit the same 404 reuse the new ID) and updates the cache.
+    
+    Args:
+        session: Requests session used for discovery
+        timeout: Discovery request timeout in seconds
+        cache_path: Build ID cache file (None to disable caching)
+        ttl: Seconds a cached ID is trusted without rediscovery (0 to always rediscover)
+    """
+    
+    def __init__(
+        self,
+        session: requests.Session,
+        timeout: int = 30,
+        cache_path: Optional[str] = DEFAULT_BUILD_ID_CACHE,
+        ttl: float = DEFAULT_BUILD_ID_TTL,
+    ):
+        self.session = session
+        self.timeout = timeout
+        self.cache_path = cache_path
+        self.ttl = ttl
+        self._build_id: Optional[str] = None
+        self._lock = threading.Lock()
+    
+    @property
+    def build_id(self) -> Optional[str]:
+        """The current build ID, from the cache or discovered on first use."""
+        with self._lock:
+            if self._build_id is None:
+                self._build_id = self._load_cached() or self._discover()
+            return self._build_id
+    
+    def refresh(self, stale_build_id: Optional[str]) -> Optional[str]:
+        """
+        Rediscover the build ID after ``stale_build_id`` was rejected.
+        
+        Args:
+            stale_build_id: The ID the failing request used
+        
+        Returns:
+            The new build ID (the same as ``stale_build_id`` if the site still
+            reports it), or None if discovery failed
+        """
+        with self._lock:
+            if self._build_id is not None and self._build_id != stale_build_id:
+                # Another worker already refreshed it
+                return self._build_id
+            
+            logger.warning(f"Build ID {stale_build_id} was rejected; rediscovering...")
+            build_id = self._discover()
+            if build_id:
+                self._build_id = build_id
+            return build_id
+    
+    def _load_cached(self) -> Optional[str]:
+        if not self.cache_path or self.ttl <= 0 or not os.path.exists(self.cache_path):
+            return None
+        
+        try:
+            with open(self.cache_path, encoding="utf-8") as f:
+                cached = json.load(f)
+        except (OSError, ValueError) as e:
+            logger.warning(f"Ignoring unreadable build ID cache {self.cache_path}: {e}")
+            return None
+        
+        if cached.get("base_url") != KMHFL_BASE_URL:
+            return None
+        
+        age = time.time() - cached.get("discovered_at", 0)
+        if not 0 <= age < self.ttl:
+            logger.info(f"Cached build ID is {age / 3600:.1f}h old; rediscovering")
+            return None
+        
+        logger.info(f"Using cached Next.js build ID: {cached.get('build_id')} ({age / 60:.0f} min old)")
+        return cached.get("build_id")
+    
+    def _discover(self) -> Optional[str]:
+        build_id = get_nextjs_build_id(self.session, self.timeout)
+        if build_id and self.cache_path:
+            try:
+                directory = os.path.dirname(os.path.abspath(self.cache_path))
+                os.makedirs(directory, exist_ok=True)
+                tmp_path = f"{self.cache_path}.{os.getpid()}.tmp"
+                with open(tmp_path, "w", encoding="utf-8") as f:
+                    json.dump(
+                        {"base_url": KMHFL_BASE_URL, "build_id": build_id, "discovered_at": time.time()},
+                        f,
+                    )
+                os.replace(tmp_path, self.cache_path)
+            except OSError as e:
+                logger.warning(f"Could not write build ID cache {self.cache_path}: {e}")
+        return build_id
+
+
+def get_with_build_id(
+    session: requests.Session,
+    build_id: str,
+    url_for: Any,
+    timeout: int = 60,
+    resolver: Optional[BuildIdResolver] = None,
+) -> requests.Response:
+    """
+    GET a build-specific Next.js data URL, following build ID rotations.
+    
+    If the response is a 404 and a resolver is given, the build ID is
+    rediscovered and the same URL is requested again with the new ID (up to
+    BUILD_ID_REFRESH_ATTEMPTS times, in case the site redeploys again while
+    the page is being retried).
+    
+    Args:
+        session: Requests session to use
+        build_id: Build ID to use when there is no resolver
+        url_for: Callable mapping a build ID to the URL to fetch
+        timeout: Request timeout in seconds
+        resolver: Optional shared build ID resolver (its current ID is used)
+    
+    Returns:
+        The final response (not checked for errors)
+    """
+    if resolver is not None:
+        build_id = resolver.build_id or build_id
+    
+    response = session.get(url_for(build_id), timeout=timeout)
+    
+    attempts = 0
+    while response.status_code == 404 and resolver is not None and attempts < BUILD_ID_REFRESH_ATTEMPTS:
+        attempts += 1
+        new_build_id = resolver.refresh(build_id)
+        if not new_build_id or new_build_id == build_id:
+            break
+        
+        build_id = new_build_id
+        logger.info(f"Retrying with new build ID {build_id}")
+        response = session.get(url_for(build_id), timeout=timeout)
+    
+    return response
+
+
+def build_nextjs_initial_url(build_id: str) -> str:
+    """Return the Next.js data URL of the first facilities page."""
+    return f"{KMHFL_BASE_URL}/_next/data/{build_id}/public/facilities.json"
+
+
 def fetch_initial_page_data(
     session: requests.Session,
     build_id: str,
     timeout: int = 60,
+    resolver: Optional[BuildIdResolver] = None,
 ) -> Optional[dict]:
     """
     Fetch the initial facilities page data using Next.js data endpoint.
@@ -149,15 +668,14 @@ def fetch_initial_page_data(
         session: Requests session to use
         build_id: Next.js build ID
         timeout: Request timeout in seconds
+        resolver: Optional build ID resolver; a 404 triggers rediscovery and one retry
     
     Returns:
         Page data dictionary or None on failure
     """
-    data_url = f"{KMHFL_BASE_URL}/_next/data/{build_id}/public/facilities.json"
-    
     try:
-        logger.info(f"Fetching initial page data from: {data_url}")
-        response = session.get(data_url, timeout=timeout)
+        logger.info(f"Fetching initial page data from: {build_nextjs_initial_url(build_id)}")
+        response = get_with_build_id(session, build_id, build_nextjs_initial_url, timeout, resolver)
         response.raise_for_status()
         
         data = response.json()
@@ -196,15 +714,18 @@ def fetch_api_page(
         return None
 
 
-def fetch_all_facilities_via_nextjs(
+def iter_facility_pages_via_nextjs(
     session: requests.Session,
     build_id: str,
     sleep_seconds: float = 0.2,
     max_pages: Optional[int] = None,
     timeout: int = 60,
-) -> list[dict]:
+    checkpoint: Optional[PageCheckpoint] = None,
+    resume: bool = False,
+    resolver: Optional[BuildIdResolver] = None,
+) -> Iterator[list[dict]]:
     """
-    Fetch all facilities using the Next.js server-side data endpoints and backend API.
+    Stream facilities page by page using the Next.js data endpoint and backend API.
     
     This method first gets the initial page from Next.js, then follows pagination
     URLs from the backend API.
@@ -212,188 +733,775 @@ def fetch_all_facilities_via_nextjs(
     Args:
         session: Requests session to use
         build_id: Next.js build ID
-        sleep_seconds: Sleep time between requests
+        sleep_seconds: Sleep time between requests (ignored if the session has a rate limiter)
         max_pages: Maximum pages to fetch (None for all)
         timeout: Request timeout in seconds
+        checkpoint: Optional page cache; every fetched page is stored in it
+        resume: Reuse pages already in the checkpoint instead of refetching them
+        resolver: Optional build ID resolver used to recover from build ID rotation
     
-    Returns:
-        List of all facility records
+    Yields:
+        The facility records of each page, in page order
     """
-    all_facilities = []
+    fetched = 0
     
     # Get initial page from Next.js
-    initial_data = fetch_initial_page_data(session, build_id, timeout)
+    initial_data = checkpoint.load("api", 1) if checkpoint and resume else None
+    if initial_data:
+        logger.info("Page 1: loaded from checkpoint")
+    else:
+        initial_data = fetch_initial_page_data(session, build_id, timeout, resolver)
+        if initial_data and checkpoint:
+            checkpoint.save("api", 1, initial_data)
     
     if not initial_data:
         logger.error("Failed to fetch initial page data")
-        return all_facilities
+        return
     
     total_count = initial_data.get("count", 0)
     results = initial_data.get("results", [])
     next_url = initial_data.get("next")
     
-    all_facilities.extend(results)
-    logger.info(f"Page 1: fetched {len(results)} records (total so far: {len(all_facilities)}, API total: {total_count})")
+    fetched += len(results)
+    logger.info(f"Page 1: fetched {len(results)} records (total so far: {fetched}, API total: {total_count})")
+    yield results
     
     page = 1
     
     # Continue fetching from backend API using next URLs
     while next_url and (max_pages is None or page < max_pages):
         page += 1
-        time.sleep(sleep_seconds)
-        
-        logger.info(f"Fetching page {page}...")
         
-        page_data = fetch_api_page(session, next_url, timeout)
+        page_data = checkpoint.load("api", page) if checkpoint and resume else None
+        if page_data:
+            logger.info(f"Page {page}: loaded from checkpoint")
+        else:
+            pause_between_requests(session, sleep_seconds)
+            logger.info(f"Fetching page {page}...")
+            page_data = fetch_api_page(session, next_url, timeout)
+            if page_data and checkpoint:
+                checkpoint.save("api", page, page_data)
         
         if not page_data:
             logger.warning(f"Failed to fetch page {page}, stopping pagination")
+            if checkpoint:
+                logger.warning(f"Pages 1-{page - 1} are checkpointed; rerun with --resume to continue from page {page}")
             break
         
         results = page_data.get("results", [])
         next_url = page_data.get("next")
         
-        all_facilities.extend(results)
-        logger.info(f"Page {page}: fetched {len(results)} records (total so far: {len(all_facilities)}, API total: {total_count})")
-    
-    return all_facilities
+        fetched += len(results)
+        logger.info(f"Page {page}: fetched {len(results)} records (total so far: {fetched}, API total: {total_count})")
+        yield results
 
 
-def fetch_all_facilities_via_pages(
+def fetch_all_facilities_via_nextjs(
     session: requests.Session,
     build_id: str,
     sleep_seconds: float = 0.2,
     max_pages: Optional[int] = None,
     timeout: int = 60,
+    checkpoint: Optional[PageCheckpoint] = None,
+    resume: bool = False,
 ) -> list[dict]:
     """
-    Fetch all facilities by iterating through page numbers in Next.js data endpoints.
+    Fetch all facilities using the Next.js server-side data endpoints and backend API.
     
-    This is a fallback method if the backend API pagination URLs don't work.
+    Convenience wrapper that collects iter_facility_pages_via_nextjs into one list.
+    
+    Returns:
+        List of all facility records
+    """
+    pages = iter_facility_pages_via_nextjs(
+        session, build_id, sleep_seconds, max_pages, timeout, checkpoint, resume
+    )
+    return [facility for page in pages for facility in page]
+
+
+def build_nextjs_data_url(build_id: str, page: int = 1) -> str:
+    """
+    Build the Next.js data endpoint URL for a facilities page.
+    
+    Args:
+        build_id: Next.js build ID
+        page: Page number (1-based)
+    
+    Returns:
+        Full data URL for the page
+    """
+    data_url = build_nextjs_initial_url(build_id)
+    if page > 1:
+        data_url = f"{data_url}?page={page}"
+    return data_url
+
+
+def fetch_nextjs_page(
+    session: requests.Session,
+    build_id: str,
+    page: int,
+    timeout: int = 60,
+    resolver: Optional[BuildIdResolver] = None,
+) -> dict:
+    """
+    Fetch a single facilities page from the Next.js data endpoint.
+    
+    Retries are handled by the session's adapter, so every page gets the same
+    retry and timeout behaviour regardless of which worker fetches it. With a
+    resolver, a 404 (the site was redeployed under a new build ID) is followed
+    by build ID rediscovery and a retry of the same page.
     
     Args:
         session: Requests session to use
         build_id: Next.js build ID
-        sleep_seconds: Sleep time between requests
-        max_pages: Maximum pages to fetch (None for all)
+        page: Page number (1-based)
         timeout: Request timeout in seconds
+        resolver: Optional shared build ID resolver (overrides ``build_id``)
     
     Returns:
-        List of all facility records
+        The page's ``pageProps.data`` dictionary (empty if missing)
+    
+    Raises:
+        requests.exceptions.RequestException: On connection errors or non-2xx responses
+    """
+    response = get_with_build_id(
+        session, build_id, lambda current: build_nextjs_data_url(current, page), timeout, resolver
+    )
+    response.raise_for_status()
+    return response.json().get("pageProps", {}).get("data", {})
+
+
+def iter_pages_concurrently(
+    session: requests.Session,
+    build_id: str,
+    pages: Iterable[int],
+    concurrency: int = 4,
+    timeout: int = 60,
+    checkpoint: Optional[PageCheckpoint] = None,
+    resolver: Optional[BuildIdResolver] = None,
+) -> Iterator[tuple[int, dict]]:
+    """
+    Fetch Next.js facilities pages with a bounded worker pool.
+    
+    Pages are yielded in the order given, regardless of the order in which
+    the requests complete. At most ``2 * concurrency`` pages are in flight or
+    buffered at any time. The first failing page raises its exception; pages
+    that have not started yet are cancelled.
+    
+    Args:
+        session: Requests session to use (shared by all workers)
+        build_id: Next.js build ID
+        pages: Page numbers to fetch
+        concurrency: Number of worker threads
+        timeout: Request timeout in seconds (per page)
+        checkpoint: Optional page cache; workers store each page as soon as it arrives
+        resolver: Optional build ID resolver shared by the workers
+    
+    Yields:
+        Tuples of (page number, page data dictionary)
+    """
+    page_iter = iter(pages)
+    pending: deque = deque()
+    
+    def fetch_page(page: int) -> dict:
+        page_data = fetch_nextjs_page(session, build_id, page, timeout, resolver)
+        if page_data and checkpoint:
+            checkpoint.save("pages", page, page_data)
+        return page_data
+    
+    with ThreadPoolExecutor(max_workers=concurrency, thread_name_prefix="kmhfl-page") as executor:
+        
+        def submit_next() -> None:
+            page = next(page_iter, None)
+            if page is not None:
+                pending.append((page, executor.submit(fetch_page, page)))
+        
+        for _ in range(concurrency * 2):
+            submit_next()
+        
+        try:
+            while pending:
+                page, future = pending.popleft()
+                page_data = future.result()
+                submit_next()
+                yield page, page_data
+        finally:
+            for _, future in pending:
+                future.cancel()
+
+
+def iter_facility_pages_via_pages(
+    session: requests.Session,
+    build_id: str,
+    sleep_seconds: float = 0.2,
+    max_pages: Optional[int] = None,
+    timeout: int = 60,
+    concurrency: int = 1,
+    checkpoint: Optional[PageCheckpoint] = None,
+    resume: bool = False,
+    resolver: Optional[BuildIdResolver] = None,
+) -> Iterator[list[dict]]:
+    """
+    Stream facilities page by page by iterating page numbers in Next.js data endpoints.
+    
+    This is a fallback method if the backend API pagination URLs don't work.
+    Page 1 is always fetched first to learn ``total_pages``; with
+    ``concurrency > 1`` the remaining pages are then fetched by a worker pool
+    and reassembled in page order.
+    
+    Args:
+        session: Requests session to use
+        build_id: Next.js build ID
+        sleep_seconds: Sleep time between requests (serial mode without a rate limiter only)
+        max_pages: Maximum pages to fetch (None for all)
+        timeout: Request timeout in seconds
+        concurrency: Number of pages to fetch in parallel after page 1
+        checkpoint: Optional page cache; every fetched page is stored in it
+        resume: Reuse pages already in the checkpoint instead of refetching them
+        resolver: Optional build ID resolver; pages that 404 after a redeploy are
+            retried with the rediscovered build ID
+    
+    Yields:
+        The facility records of each page, in page order
     """
-    all_facilities = []
+    fetched = 0
     page = 1
     total_pages = None
     
-    while True:
-        if max_pages and page > max_pages:
-            break
+    def cached(page: int) -> bool:
+        return bool(checkpoint and resume and checkpoint.has("pages", page))
+    
+    def load_or_fetch(page: int) -> dict:
+        if cached(page):
+            page_data = checkpoint.load("pages", page)
+            if page_data is not None:
+                logger.info(f"Page {page}: loaded from checkpoint")
+                return page_data
         
-        # Construct URL with page parameter
-        if page == 1:
-            data_url = f"{KMHFL_BASE_URL}/_next/data/{build_id}/public/facilities.json"
-        else:
-            data_url = f"{KMHFL_BASE_URL}/_next/data/{build_id}/public/facilities.json?page={page}"
+        logger.info(f"Fetching page {page}...")
+        page_data = fetch_nextjs_page(session, build_id, page, timeout, resolver)
+        if page_data and checkpoint:
+            checkpoint.save("pages", page, page_data)
+        return page_data
+    
+    def page_results(page: int, page_data: dict) -> Optional[list[dict]]:
+        """Extract one page of results. Returns None when pagination should stop."""
+        nonlocal total_pages, fetched
         
-        try:
-            logger.info(f"Fetching page {page}...")
-            response = session.get(data_url, timeout=timeout)
-            
-            if response.status_code == 404:
-                # Build ID may have changed, try to get new one
-                logger.warning("Got 404, build ID may have changed")
+        if not page_data:
+            logger.warning(f"No data in page {page} response")
+            return None
+        
+        results = page_data.get("results", [])
+        
+        if total_pages is None:
+            total_pages = page_data.get("total_pages", 1)
+            logger.info(f"Total pages: {total_pages}, Total records: {page_data.get('count', 0)}")
+        
+        if not results:
+            logger.info(f"No more results at page {page}")
+            return None
+        
+        fetched += len(results)
+        logger.info(f"Page {page}/{total_pages}: fetched {len(results)} records (total so far: {fetched})")
+        return results
+    
+    try:
+        while True:
+            if max_pages and page > max_pages:
                 break
             
-            response.raise_for_status()
-            data = response.json()
-            page_data = data.get("pageProps", {}).get("data", {})
-            
-            if not page_data:
-                logger.warning(f"No data in page {page} response")
+            from_cache = cached(page)
+            results = page_results(page, load_or_fetch(page))
+            if results is None:
                 break
+            yield results
             
-            results = page_data.get("results", [])
-            total_count = page_data.get("count", 0)
-            current_total_pages = page_data.get("total_pages", 1)
-            
-            if total_pages is None:
-                total_pages = current_total_pages
-                logger.info(f"Total pages: {total_pages}, Total records: {total_count}")
-            
-            if not results:
-                logger.info(f"No more results at page {page}")
+            if page >= total_pages:
                 break
             
-            all_facilities.extend(results)
-            logger.info(f"Page {page}/{total_pages}: fetched {len(results)} records (total so far: {len(all_facilities)})")
-            
-            if page >= total_pages:
+            if concurrency > 1:
+                last_page = min(total_pages, max_pages) if max_pages else total_pages
+                remaining = range(page + 1, last_page + 1)
+                missing = [p for p in remaining if not cached(p)]
+                # Workers checkpoint pages as they arrive, so decide once which pages come from them
+                missing_set = set(missing)
+                logger.info(
+                    f"Fetching {len(missing)} of pages {page + 1}-{last_page} "
+                    f"with concurrency {concurrency}..."
+                )
+                concurrent_pages = iter_pages_concurrently(
+                    session, build_id, missing, concurrency, timeout, checkpoint, resolver
+                )
+                try:
+                    for page in remaining:
+                        if page not in missing_set:
+                            page_data = load_or_fetch(page)
+                        else:
+                            fetched_page, page_data = next(concurrent_pages)
+                            if fetched_page != page:
+                                raise RuntimeError(f"Expected page {page} from the worker pool, got page {fetched_page}")
+                        results = page_results(page, page_data)
+                        if results is None:
+                            break
+                        yield results
+                finally:
+                    concurrent_pages.close()
                 break
             
             page += 1
-            time.sleep(sleep_seconds)
-            
-        except requests.exceptions.HTTPError as e:
-            logger.error(f"HTTP error on page {page}: {e}")
-            break
-        except Exception as e:
-            logger.error(f"Error on page {page}: {e}")
-            break
+            if not from_cache:
+                pause_between_requests(session, sleep_seconds)
     
-    return all_facilities
+    except requests.exceptions.HTTPError as e:
+        if e.response is not None and e.response.status_code == 404:
+            if resolver is not None:
+                logger.error(f"Got 404 even with a freshly discovered build ID after page {page}")
+            else:
+                logger.warning("Got 404, build ID may have changed")
+        else:
+            logger.error(f"HTTP error after page {page}: {e}")
+        if checkpoint:
+            logger.warning("Fetched pages are checkpointed; rerun with --resume to continue")
+    except Exception as e:
+        logger.error(f"Error after page {page}: {e}")
+        if checkpoint:
+            logger.warning("Fetched pages are checkpointed; rerun with --resume to continue")
 
 
-def fetch_all_facilities(
+def fetch_all_facilities_via_pages(
     session: requests.Session,
+    build_id: str,
     sleep_seconds: float = 0.2,
     max_pages: Optional[int] = None,
     timeout: int = 60,
+    concurrency: int = 1,
+    checkpoint: Optional[PageCheckpoint] = None,
+    resume: bool = False,
 ) -> list[dict]:
     """
-    Main function to fetch all facilities using the best available method.
+    Fetch all facilities by iterating through page numbers in Next.js data endpoints.
+    
+    Convenience wrapper that collects iter_facility_pages_via_pages into one list.
+    
+    Returns:
+        List of all facility records
+    """
+    pages = iter_facility_pages_via_pages(
+        session, build_id, sleep_seconds, max_pages, timeout, concurrency, checkpoint, resume
+    )
+    return [facility for page in pages for facility in page]
+
+
+def iter_facility_pages(
+    session: requests.Session,
+    sleep_seconds: float = 0.2,
+    max_pages: Optional[int] = None,
+    timeout: int = 60,
+    concurrency: int = 1,
+    checkpoint_dir: Optional[str] = None,
+    resume: bool = False,
+    build_id_cache: Optional[str] = DEFAULT_BUILD_ID_CACHE,
+    build_id_ttl: float = DEFAULT_BUILD_ID_TTL,
+) -> Iterator[list[dict]]:
+    """
+    Stream all facilities page by page using the best available method.
     
     Tries multiple approaches:
     1. Next.js data endpoint with backend API pagination
     2. Next.js data endpoint with page number iteration
     
+    When ``concurrency > 1`` the order is reversed: page number iteration
+    knows the page count up front and can be fetched in parallel, while the
+    API pagination has to follow ``next`` URLs one at a time.
+    
+    A method's pages are held back until it has produced at least
+    ``MIN_EXPECTED_FACILITIES`` records; if it stops short of that, they are
+    discarded and the next method is tried, so nothing from a failed attempt
+    reaches the consumer.
+    
     Args:
         session: Requests session to use
         sleep_seconds: Sleep time between requests
         max_pages: Maximum pages to fetch (None for all)
         timeout: Request timeout in seconds
-    
-    Returns:
-        List of all facility records
+        concurrency: Number of pages to fetch in parallel
+        checkpoint_dir: Directory where fetched pages are stored (None to disable)
+        resume: Skip pages already stored in ``checkpoint_dir``
+        build_id_cache: File caching the discovered build ID (None to disable)
+        build_id_ttl: Seconds a cached build ID is used without rediscovery
+    
+    Yields:
+        The facility records of each page, in page order
     """
-    # First, get the Next.js build ID
-    build_id = get_nextjs_build_id(session, timeout)
+    # First, get the Next.js build ID (cached between runs, refreshed on 404)
+    resolver = BuildIdResolver(session, timeout, build_id_cache, build_id_ttl)
+    build_id = resolver.build_id
     
     if not build_id:
         logger.error("Could not determine Next.js build ID. Cannot proceed.")
-        return []
+        return
+    
+    checkpoint = PageCheckpoint(checkpoint_dir, build_id) if checkpoint_dir else None
+    if checkpoint:
+        logger.info(f"Checkpointing pages to: {checkpoint.directory}")
     
-    # Try fetching via Next.js + backend API pagination
-    logger.info("Attempting to fetch facilities via Next.js + API pagination...")
-    facilities = fetch_all_facilities_via_nextjs(
-        session, build_id, sleep_seconds, max_pages, timeout
+    via_nextjs = (
+        "Next.js + API pagination",
+        lambda: iter_facility_pages_via_nextjs(
+            session, build_id, sleep_seconds, max_pages, timeout, checkpoint, resume, resolver
+        ),
     )
+    via_pages = (
+        f"page iteration (concurrency {concurrency})",
+        lambda: iter_facility_pages_via_pages(
+            session, build_id, sleep_seconds, max_pages, timeout, concurrency, checkpoint, resume,
+            resolver,
+        ),
+    )
+    methods = [via_pages, via_nextjs] if concurrency > 1 else [via_nextjs, via_pages]
     
-    # If we got very few results, try the page iteration method
-    if len(facilities) < 100:
-        logger.info("Trying alternative page iteration method...")
-        facilities = fetch_all_facilities_via_pages(
-            session, build_id, sleep_seconds, max_pages, timeout
-        )
+    for attempt, (description, iter_method) in enumerate(methods):
+        if attempt == 0:
+            logger.info(f"Attempting to fetch facilities via {description}...")
+        else:
+            logger.info(f"Trying alternative method: {description}...")
+        
+        held_back = []
+        held_back_count = 0
+        
+        for page in iter_method():
+            if held_back_count >= MIN_EXPECTED_FACILITIES:
+                yield page
+                continue
+            
+            held_back.append(page)
+            held_back_count += len(page)
+            if held_back_count >= MIN_EXPECTED_FACILITIES:
+                yield from held_back
+                held_back = []
+        
+        if held_back_count >= MIN_EXPECTED_FACILITIES:
+            return
+        
+        if attempt == len(methods) - 1:
+            # Last resort: return whatever was found
+            yield from held_back
+
+
+def fetch_all_facilities(
+    session: requests.Session,
+    sleep_seconds: float = 0.2,
+    max_pages: Optional[int] = None,
+    timeout: int = 60,
+    concurrency: int = 1,
+    checkpoint_dir: Optional[str] = None,
+    resume: bool = False,
+    build_id_cache: Optional[str] = DEFAULT_BUILD_ID_CACHE,
+    build_id_ttl: float = DEFAULT_BUILD_ID_TTL,
+) -> list[dict]:
+    """
+    Main function to fetch all facilities using the best available method.
+    
+    Convenience wrapper that collects iter_facility_pages into one list.
+    
+    Returns:
+        List of all facility records
+    """
+    pages = iter_facility_pages(
+        session, sleep_seconds, max_pages, timeout, concurrency, checkpoint_dir, resume,
+        build_id_cache, build_id_ttl,
+    )
+    return [facility for page in pages for facility in page]
+
+
+def parse_timestamp(value: Any) -> Optional[datetime]:
+    """
+    Parse an ISO-8601 timestamp as returned by the KMHFL API.
+    
+    Args:
+        value: Timestamp string (e.g. "2024-05-01T08:30:00.123456Z")
+    
+    Returns:
+        Timezone-aware datetime, or None if the value is missing or invalid
+    """
+    if not isinstance(value, str) or not value:
+        return None
+    
+    try:
+        parsed = datetime.fromisoformat(value.replace("Z", "+00:00"))
+    except ValueError:
+        return None
+    
+    return parsed if parsed.tzinfo else parsed.replace(tzinfo=timezone.utc)
+
+
+def compute_watermark(facilities: Iterable[dict], fallback: datetime, floor: Optional[datetime] = None) -> str:
+    """
+    Compute the sync watermark: the latest ``updated`` timestamp seen.
+    
+    Using the server's own timestamps avoids clock skew between this machine
+    and KMHFL. If no record carries a usable timestamp, ``fallback`` is used.
+    
+    Args:
+        facilities: Facility records
+        fallback: Timestamp to use when no record has an ``updated`` field
+        floor: The watermark never moves below this (the previous watermark;
+            records re-fetched from the overlap window are older than it)
+    
+    Returns:
+        Watermark as an ISO-8601 string
+    """
+    latest = None
+    for facility in facilities:
+        updated = parse_timestamp(facility.get(UPDATED_FIELD))
+        if updated and (latest is None or updated > latest):
+            latest = updated
+    
+    latest = latest or fallback
+    if floor is not None and latest < floor:
+        latest = floor
+    return latest.isoformat()
+
+
+def load_snapshot(snapshot_dir: str) -> tuple[dict[str, dict], Optional[str]]:
+    """
+    Load the local facilities snapshot and its sync watermark.
+    
+    Args:
+        snapshot_dir: Snapshot directory
+    
+    Returns:
+        Tuple of (facilities keyed by id, watermark or None if never synced)
+    """
+    facilities_path = os.path.join(snapshot_dir, SNAPSHOT_FACILITIES_FILE)
+    state_path = os.path.join(snapshot_dir, SNAPSHOT_STATE_FILE)
+    
+    if not os.path.exists(facilities_path) or not os.path.exists(state_path):
+        return {}, None
+    
+    facilities = {}
+    with gzip.open(facilities_path, "rt", encoding="utf-8") as f:
+        for line in f:
+            facility = json.loads(line)
+            facilities[str(facility["id"])] = facility
+    
+    with open(state_path, encoding="utf-8") as f:
+        state = json.load(f)
+    
+    return facilities, state.get("watermark")
+
+
+def save_snapshot(snapshot_dir: str, facilities: dict[str, dict], watermark: str) -> None:
+    """
+    Write the facilities snapshot (gzipped JSON lines) and its sync watermark.
+    
+    The state file is written last, so an interrupted save leaves the previous
+    watermark in place and the next run simply re-applies the same changes.
+    
+    Args:
+        snapshot_dir: Snapshot directory
+        facilities: Facilities keyed by id
+        watermark: Sync watermark to record
+    """
+    os.makedirs(snapshot_dir, exist_ok=True)
+    facilities_path = os.path.join(snapshot_dir, SNAPSHOT_FACILITIES_FILE)
+    state_path = os.path.join(snapshot_dir, SNAPSHOT_STATE_FILE)
+    
+    with gzip.open(f"{facilities_path}.tmp", "wt", encoding="utf-8") as f:
+        for facility in facilities.values():
+            f.write(json.dumps(facility, separators=(",", ":")))
+            f.write("\n")
+    os.replace(f"{facilities_path}.tmp", facilities_path)
+    
+    with open(f"{state_path}.tmp", "w", encoding="utf-8") as f:
+        json.dump({
+            "watermark": watermark,
+            "synced_at": datetime.now(timezone.utc).isoformat(),
+            "count": len(facilities),
+        }, f, indent=2)
+    os.replace(f"{state_path}.tmp", state_path)
+
+
+def fetch_updated_facilities(
+    session: requests.Session,
+    since: str,
+    sleep_seconds: float = 0.2,
+    timeout: int = 60,
+    page_size: int = 500,
+) -> Optional[list[dict]]:
+    """
+    Fetch facilities modified since a watermark from the backend API.
+    
+    Args:
+        session: Requests session to use
+        since: ISO-8601 watermark; records updated at or after WATERMARK_OVERLAP
+            before it are requested
+        sleep_seconds: Sleep time between requests (ignored if the session has a rate limiter)
+        timeout: Request timeout in seconds
+        page_size: Records requested per page
+    
+    Returns:
+        List of changed facility records, or None if the API could not be read
+    """
+    since_time = parse_timestamp(since)
+    if since_time is not None:
+        since = (since_time - WATERMARK_OVERLAP).isoformat()
+    query = urlencode({UPDATED_SINCE_PARAM: since, "page_size": page_size})
+    next_url = f"{API_BASE_URL}{API_FACILITIES_ENDPOINT}?{query}"
+    changes = []
+    page = 0
+    
+    while next_url:
+        page += 1
+        if page > 1:
+            pause_between_requests(session, sleep_seconds)
+        
+        page_data = fetch_api_page(session, next_url, timeout)
+        if page_data is None:
+            logger.warning(f"Failed to fetch changes page {page}")
+            return None
+        
+        results = page_data.get("results", [])
+        changes.extend(results)
+        next_url = page_data.get("next")
+        logger.info(f"Changes page {page}: {len(results)} records (total so far: {len(changes)}, API total: {page_data.get('count', 0)})")
+    
+    return changes
+
+
+def merge_facility_changes(snapshot: dict[str, dict], changes: list[dict]) -> dict[str, int]:
+    """
+    Merge changed facility records into a snapshot in place.
+    
+    Records flagged as ``deleted`` are removed; everything else replaces the
+    snapshot record with the same id (or is added if new).
+    
+    Args:
+        snapshot: Facilities keyed by id (modified in place)
+        changes: Changed facility records from the API
+    
+    Returns:
+        Counts of added, updated and removed records
+    """
+    summary = {"added": 0, "updated": 0, "removed": 0}
+    
+    for facility in changes:
+        facility_id = facility.get("id")
+        if facility_id is None:
+            continue
+        
+        key = str(facility_id)
+        if facility.get("deleted"):
+            if snapshot.pop(key, None) is not None:
+                summary["removed"] += 1
+        elif key in snapshot:
+            snapshot[key] = facility
+            summary["updated"] += 1
+        else:
+            snapshot[key] = facility
+            summary["added"] += 1
+    
+    return summary
+
+
+def sync_facilities(
+    session: requests.Session,
+    snapshot_dir: str = DEFAULT_SNAPSHOT_DIR,
+    force_full: bool = False,
+    sleep_seconds: float = 0.2,
+    max_pages: Optional[int] = None,
+    timeout: int = 60,
+    concurrency: int = 1,
+    checkpoint_dir: Optional[str] = None,
+    resume: bool = False,
+    build_id_cache: Optional[str] = DEFAULT_BUILD_ID_CACHE,
+    build_id_ttl: float = DEFAULT_BUILD_ID_TTL,
+) -> list[dict]:
+    """
+    Bring the local snapshot up to date and return every facility in it.
+    
+    Only records modified since the stored watermark are downloaded. A full
+    pull (via fetch_all_facilities) happens when forced, when there is no
+    watermark yet, or when the incremental API request fails.
+    
+    Args:
+        session: Requests session to use
+        snapshot_dir: Directory holding the snapshot and its watermark
+        force_full: Ignore the watermark and re-pull the whole registry
+        sleep_seconds: Sleep time between requests
+        max_pages: Maximum pages to fetch on a full pull (None for all)
+        timeout: Request timeout in seconds
+        concurrency: Number of pages to fetch in parallel on a full pull
+        checkpoint_dir: Page checkpoint directory for a full pull
+        resume: Resume a checkpointed full pull
+        build_id_cache: Build ID cache file for a full pull (None to disable)
+        build_id_ttl: Seconds a cached build ID is used without rediscovery
+    
+    Returns:
+        List of all facility records in the updated snapshot
+    """
+    started_at = datetime.now(timezone.utc)
+    snapshot, watermark = ({}, None) if force_full else load_snapshot(snapshot_dir)
+    
+    if watermark:
+        logger.info(f"Incremental sync: {len(snapshot)} facilities in snapshot, fetching changes since {watermark}")
+        changes = fetch_updated_facilities(session, watermark, sleep_seconds, timeout)
+        
+        if changes is not None:
+            summary = merge_facility_changes(snapshot, changes)
+            logger.info(
+                f"Merged {len(changes)} changed records: {summary['added']} added, "
+                f"{summary['updated']} updated, {summary['removed']} removed"
+            )
+            # Changes from the overlap window predate the old watermark, which is kept as a floor
+            old_watermark = parse_timestamp(watermark)
+            new_watermark = compute_watermark(changes, fallback=old_watermark or started_at, floor=old_watermark)
+            save_snapshot(snapshot_dir, snapshot, new_watermark)
+            return list(snapshot.values())
+        
+        logger.warning("Incremental sync failed; falling back to a full pull")
+    elif not force_full:
+        logger.info("No sync watermark found; performing a full pull")
+    else:
+        logger.info("Full pull forced")
+    
+    facilities = fetch_all_facilities(
+        session,
+        sleep_seconds=sleep_seconds,
+        max_pages=max_pages,
+        timeout=timeout,
+        concurrency=concurrency,
+        checkpoint_dir=checkpoint_dir,
+        resume=resume,
+        build_id_cache=build_id_cache,
+        build_id_ttl=build_id_ttl,
+    )
+    
+    if not facilities:
+        return []
+    
+    if max_pages:
+        logger.warning("Full pull was limited by --max-pages; snapshot not saved")
+        return facilities
     
-    return facilities
+    snapshot = {}
+    merge_facility_changes(snapshot, facilities)
+    save_snapshot(snapshot_dir, snapshot, compute_watermark(facilities, fallback=started_at))
+    logger.info(f"Saved snapshot of {len(snapshot)} facilities to {snapshot_dir}")
+    return list(snapshot.values())
 
 
-def flatten_facilities_data(facilities: list[dict]) -> pd.DataFrame:
+def flatten_facilities_data(
+    facilities: list[dict],
+    schema: Optional["FacilitySchema"] = None,
+) -> pd.DataFrame:
     """
     Flatten nested JSON data into a pandas DataFrame.
     
     Args:
         facilities: List of facility records
+        schema: Facility schema to flatten with (learned from the data if None)
     
     Returns:
         Flattened DataFrame
@@ -404,58 +1512,937 @@ def flatten_facilities_data(facilities: list[dict]) -> pd.DataFrame:
     
     logger.info(f"Flattening {len(facilities)} facility records...")
     
-    # Use json_normalize to flatten nested structures
-    df = pd.json_normalize(facilities, sep=".")
+    # Flatten nested structures; columns come out with the important ones first
+    df = flatten_page(facilities, schema)
     
-    # Reorder columns to put important ones first
-    priority_columns = [
-        'id', 'code', 'name', 'facility_type_name', 'owner_name',
-        'county', 'constituency', 'ward_name', 'keph_level_name',
-        'operation_status_name', 'regulatory_status_name'
-    ]
+    logger.info(f"Created DataFrame with {len(df)} rows and {len(df.columns)} columns")
     
-    # Get columns that exist in the DataFrame
-    existing_priority = [col for col in priority_columns if col in df.columns]
-    other_columns = [col for col in df.columns if col not in priority_columns]
+    return df
+
+
+def estimate_column_widths(df: pd.DataFrame, sample_rows: Optional[int] = WIDTH_SAMPLE_ROWS) -> dict[str, int]:
+    """
+    Estimate the display width (longest value length) of every column.
     
-    # Reorder
-    df = df[existing_priority + other_columns]
+    Numeric columns are measured from their min/max without converting every
+    value to a string. Other columns are converted in one vectorized pass over
+    at most ``sample_rows`` rows (a fixed-seed random sample).
     
-    logger.info(f"Created DataFrame with {len(df)} rows and {len(df.columns)} columns")
+    Args:
+        df: DataFrame to measure
+        sample_rows: Rows to sample for non-numeric columns (None for all rows)
     
-    return df
+    Returns:
+        Longest value length per column, never shorter than the column name
+    """
+    if sample_rows is not None and len(df) > sample_rows:
+        sample = df.sample(n=sample_rows, random_state=0)
+    else:
+        sample = df
+    
+    widths = {}
+    for col in df.columns:
+        series = df[col]
+        longest = 0
+        if pd.api.types.is_integer_dtype(series) and not pd.api.types.is_bool_dtype(series):
+            if series.notna().any():
+                longest = max(len(str(series.min())), len(str(series.max())))
+        else:
+            lengths = sample[col].dropna().astype(str).str.len()
+            longest = int(lengths.max()) if len(lengths) else 0
+        widths[col] = max(longest, len(str(col)))
+    
+    return widths
 
 
-def save_to_excel(df: pd.DataFrame, output_path: str, sheet_name: str = "Facilities") -> None:
+def save_to_excel(
+    df: pd.DataFrame,
+    output_path: str,
+    sheet_name: str = "Facilities",
+    fast: bool = True,
+) -> None:
     """
     Save DataFrame to Excel file.
     
+    The fast mode streams rows through XlsxStreamWriter in chunks. The
+    pandas mode goes through DataFrame.to_excel (slower, but keeps pandas'
+    header styling and date formats).
+    
     Args:
         df: DataFrame to save
         output_path: Output file path
         sheet_name: Name of the Excel sheet
+        fast: Use the streaming writer instead of DataFrame.to_excel
     """
     if df.empty:
         logger.warning("DataFrame is empty. Creating Excel file with headers only.")
     
     logger.info(f"Saving to Excel: {output_path}")
     
-    # Use openpyxl engine for .xlsx files
-    with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
-        df.to_excel(writer, sheet_name=sheet_name, index=False)
+    columns = [str(col) for col in df.columns]
+    widths = dict(zip(columns, estimate_column_widths(df).values()))
+    
+    if fast:
+        sink = ExcelSink(output_path, sheet_name)
+        sink.open(columns, {}, widths)
+        for start in range(0, len(df), EXCEL_CHUNK_ROWS):
+            chunk = df.iloc[start:start + EXCEL_CHUNK_ROWS]
+            sink.write(chunk.astype(object).where(chunk.notna(), None).values.tolist())
+        sink.close()
+    else:
+        # Use openpyxl engine for .xlsx files
+        with pd.ExcelWriter(output_path, engine="openpyxl") as writer:
+            df.to_excel(writer, sheet_name=sheet_name, index=False)
+            
+            # Auto-adjust column widths
+            worksheet = writer.sheets[sheet_name]
+            for idx, col in enumerate(columns, start=1):
+                # Limit to reasonable width
+                worksheet.column_dimensions[get_column_letter(idx)].width = min(widths[col] + 2, 50)
+    
+    logger.info(f"Successfully saved {len(df)} records to {output_path}")
+
+
+def order_columns(columns: Iterable[str]) -> list[str]:
+    """
+    Order flattened column names with the most important facility columns first.
+    
+    Args:
+        columns: Column names in discovery order
+    
+    Returns:
+        Column names: PRIORITY_COLUMNS that are present, then the rest in discovery order
+    """
+    columns = list(columns)
+    existing_priority = [col for col in PRIORITY_COLUMNS if col in columns]
+    other_columns = [col for col in columns if col not in PRIORITY_COLUMNS]
+    return existing_priority + other_columns
+
+
+class _SchemaNode:
+    """One key in the facility schema tree: a leaf column, a nested object, or both."""
+    
+    __slots__ = ("path", "index", "children")
+    
+    def __init__(self, path: tuple[str, ...] = ()) -> None:
+        self.path = path
+        self.index: Optional[int] = None
+        self.children: dict[str, "_SchemaNode"] = {}
+    
+    def child(self, key: str) -> "_SchemaNode":
+        """Return the child node for ``key``, creating it if needed."""
+        node = self.children.get(key)
+        if node is None:
+            node = self.children[key] = _SchemaNode(self.path + (key,))
+        return node
+
+
+class FacilitySchema:
+    """
+    Compiled flattener for facility records.
+    
+    The schema is a tree of dotted column paths, with the set of value kinds
+    seen in each column. Flattening walks every record once and writes values
+    straight into preallocated per-column arrays, which are then converted to
+    the column's resolved dtype (nullable Int64/boolean, float64 or object).
+    Nested dicts become dotted columns and lists are kept as values, like
+    ``pd.json_normalize(sep=".")``, but every known column is always present
+    and column order only depends on the schema. Loading a saved schema
+    therefore gives the same columns, names and dtypes on every run.
+    
+    Unknown paths are added on the fly (appended to the column list) unless
+    ``learn=False`` is passed to flatten().
+    
+    Args:
+        columns: Known column paths in output discovery order
+        dtypes: Known column dtypes (as produced by resolve_column_dtype)
+    """
+    
+    DTYPE_KINDS = {"bool": "boolean", "int64": "integer", "float64": "floating", "string": "string"}
+    
+    def __init__(self, columns: Optional[list[str]] = None, dtypes: Optional[dict[str, str]] = None):
+        self.columns: list[str] = []
+        self._kinds: list[set[str]] = []
+        self._root = _SchemaNode()
+        
+        dtypes = dtypes or {}
+        for column in columns or []:
+            index = self._add_column(column.split("."))
+            if column in dtypes:
+                self._kinds[index].add(self.DTYPE_KINDS[dtypes[column]])
+    
+    @classmethod
+    def load(cls, path: str) -> "FacilitySchema":
+        """
+        Load a schema saved with save().
+        
+        Args:
+            path: Schema JSON file
+        
+        Returns:
+            FacilitySchema instance
+        """
+        with open(path, encoding="utf-8") as f:
+            data = json.load(f)
+        return cls(data["columns"], data.get("dtypes"))
+    
+    def save(self, path: str) -> None:
+        """
+        Save the schema (column order and dtypes) as JSON.
+        
+        Args:
+            path: Schema JSON file
+        """
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"columns": self.columns, "dtypes": self.dtypes}, f, indent=2)
+    
+    @property
+    def dtypes(self) -> dict[str, str]:
+        """Resolved dtype per column."""
+        return {col: resolve_column_dtype(kinds) for col, kinds in zip(self.columns, self._kinds)}
+    
+    def _add_column(self, path: Iterable[str]) -> int:
+        node = self._root
+        for key in path:
+            node = node.child(key)
+        return self._add_leaf(node)
+    
+    def _add_leaf(self, node: _SchemaNode) -> int:
+        if node.index is None:
+            node.index = len(self.columns)
+            self.columns.append(".".join(node.path))
+            self._kinds.append(set())
+        return node.index
+    
+    def flatten(self, records: list[dict], learn: bool = True) -> pd.DataFrame:
+        """
+        Flatten records into a DataFrame with every schema column.
+        
+        Args:
+            records: Facility records
+            learn: Add unknown paths to the schema (otherwise they are dropped)
+        
+        Returns:
+            DataFrame with columns in order_columns(self.columns) order
+        """
+        n = len(records)
+        values: list[list] = [[None] * n for _ in self.columns]
+        
+        def fill(record: dict, node: _SchemaNode, row: int) -> None:
+            nested = None
+            children = node.children
+            for key, value in record.items():
+                # Nested objects are expanded after the scalars of the same level
+                if type(value) is dict:
+                    if value:
+                        if nested is None:
+                            nested = []
+                        nested.append((key, value))
+                    continue
+                
+                child = children.get(key)
+                if child is None or child.index is None:
+                    if not learn:
+                        continue
+                    child = node.child(key)
+                    self._add_leaf(child)
+                    values.append([None] * n)
+                
+                values[child.index][row] = value
+            
+            if nested:
+                for key, value in nested:
+                    child = children.get(key)
+                    if child is None:
+                        if not learn:
+                            continue
+                        child = node.child(key)
+                    fill(value, child, row)
+        
+        root = self._root
+        for row, record in enumerate(records):
+            fill(record, root, row)
+        
+        data = {}
+        for index, column in enumerate(self.columns):
+            series = pd.Series(values[index], dtype=object)
+            if n:
+                self._kinds[index].add(column_kind(series))
+            data[column] = self._typed(column, series, resolve_column_dtype(self._kinds[index]))
+        
+        df = pd.DataFrame(data, index=pd.RangeIndex(n), columns=self.columns)
+        return df[order_columns(self.columns)]
+    
+    @staticmethod
+    def _typed(column: str, series: pd.Series, dtype: str) -> pd.Series:
+        target = {"bool": "boolean", "int64": "Int64", "float64": "float64"}.get(dtype)
+        if target is None:
+            return series
+        
+        try:
+            return series.astype(target)
+        except (TypeError, ValueError) as e:
+            logger.debug(f"Column {column} does not fit dtype {dtype}, keeping values as-is: {e}")
+            return series
+
+
+def flatten_page(facilities: list[dict], schema: Optional[FacilitySchema] = None) -> pd.DataFrame:
+    """
+    Flatten one page of facility records (nested fields become dotted columns).
+    
+    Args:
+        facilities: Facility records from a single page
+        schema: Schema to flatten with (and extend); a fresh one if None
+    
+    Returns:
+        Flattened DataFrame with every schema column
+    """
+    return (schema or FacilitySchema()).flatten(facilities)
+
+
+def iter_chunks(items: list, chunk_size: int) -> Iterator[list]:
+    """
+    Split a list into consecutive chunks.
+    
+    Args:
+        items: Items to split
+        chunk_size: Maximum items per chunk
+    
+    Yields:
+        Slices of ``items``
+    """
+    for start in range(0, len(items), chunk_size):
+        yield items[start:start + chunk_size]
+
+
+def excel_cell_value(value: Any) -> Any:
+    """
+    Convert a flattened value into something openpyxl can store.
+    
+    Missing values become empty cells and nested lists/dicts are written as
+    their string representation, matching DataFrame.to_excel.
+    
+    Args:
+        value: Flattened cell value
+    
+    Returns:
+        Value safe to append to a worksheet
+    """
+    # Before the float check: np.float64 subclasses float but is not a plain float
+    if isinstance(value, np.generic):
+        return excel_cell_value(value.item())
+    if value is None or isinstance(value, (str, int, bool)):
+        return value
+    if isinstance(value, float):
+        return None if value != value else value
+    if value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, datetime):
+        return value
+    return str(value)
+
+
+class FlattenedSpool:
+    """
+    Temporary on-disk buffer of flattened facility rows.
+    
+    Output sinks need the header row, column widths and dtypes before the
+    first data row, but they are only known once every page has been seen.
+    Each page is flattened with the shared schema (which grows as new paths
+    appear) and appended to a temporary JSON lines file. Only the schema,
+    widths and row count stay in memory, and a second pass streams the rows
+    back out in one fixed column order.
+    
+    Args:
+        schema: Schema the pages are flattened with
+        directory: Where to create the temporary file (default: system temp dir)
+    """
+    
+    def __init__(self, schema: FacilitySchema, directory: Optional[str] = None):
+        fd, self.path = tempfile.mkstemp(prefix="facilities-", suffix=".jsonl", dir=directory)
+        self._file = os.fdopen(fd, "w+", encoding="utf-8")
+        self.schema = schema
+        self.widths: dict[str, int] = {}
+        self.rows = 0
+    
+    def __enter__(self) -> "FlattenedSpool":
+        return self
+    
+    def __exit__(self, *exc_info: Any) -> None:
+        self.close()
+    
+    @property
+    def columns(self) -> list[str]:
+        """All schema columns, in output order."""
+        return order_columns(self.schema.columns)
+    
+    def add(self, facilities: list[dict]) -> None:
+        """
+        Flatten a page and append it to the spool.
+        
+        Args:
+            facilities: Facility records from a single page
+        """
+        if not facilities:
+            return
+        
+        df = self.schema.flatten(facilities)
+        for col, width in estimate_column_widths(df).items():
+            self.widths[col] = max(self.widths.get(col, 0), width)
+        
+        rows = df.astype(object).where(df.notna(), None).values.tolist()
+        self._file.write(json.dumps({"columns": list(df.columns), "rows": rows}, default=str))
+        self._file.write("\n")
+        self.rows += len(rows)
+    
+    def iter_rows(self, columns: Optional[list[str]] = None) -> Iterator[list]:
+        """
+        Stream spooled rows back out.
+        
+        Args:
+            columns: Output column order (default: self.columns)
+        
+        Yields:
+            One list of values per row; columns a page lacked are None
+        """
+        columns = columns or self.columns
+        self._file.flush()
+        self._file.seek(0)
+        
+        for line in self._file:
+            page = json.loads(line)
+            positions = {col: i for i, col in enumerate(page["columns"])}
+            indices = [positions.get(col) for col in columns]
+            for row in page["rows"]:
+                yield [None if i is None else row[i] for i in indices]
+        
+        self._file.seek(0, os.SEEK_END)
+    
+    def close(self) -> None:
+        """Close and delete the temporary file."""
+        if not self._file.closed:
+            self._file.close()
+        if os.path.exists(self.path):
+            os.remove(self.path)
+
+
+def column_kind(series: pd.Series) -> str:
+    """
+    Classify the values of one flattened column for dtype resolution.
+    
+    Integral floats (e.g. an integer column that was float64 in the source)
+    are reported as "integer".
+    
+    Args:
+        series: Flattened column from one page
+    
+    Returns:
+        A pandas infer_dtype kind such as "integer", "floating", "boolean" or "string"
+    """
+    values = series.dropna()
+    kind = pd.api.types.infer_dtype(values, skipna=True)
+    if kind == "floating" and bool((values == values.round()).all()):
+        return "integer"
+    return kind
+
+
+def resolve_column_dtype(kinds: set[str]) -> str:
+    """
+    Pick one stable output dtype for a column from every kind seen across pages.
+    
+    Args:
+        kinds: Kinds reported by column_kind for each page
+    
+    Returns:
+        One of "bool", "int64", "float64" or "string"
+    """
+    kinds = kinds - {"empty"}
+    if not kinds:
+        return "string"
+    if kinds == {"boolean"}:
+        return "bool"
+    if kinds == {"integer"}:
+        return "int64"
+    if kinds <= {"integer", "floating", "mixed-integer-float"}:
+        return "float64"
+    return "string"
+
+
+def coerce_value(value: Any, dtype: str) -> Any:
+    """
+    Convert a flattened value to a column's resolved dtype.
+    
+    Args:
+        value: Flattened cell value (None for missing)
+        dtype: Resolved column dtype
+    
+    Returns:
+        Converted value, or None for missing values
+    """
+    if value is None or (isinstance(value, float) and value != value):
+        return None
+    if dtype == "int64":
+        return int(value)
+    if dtype == "float64":
+        return float(value)
+    if dtype == "bool":
+        return bool(value)
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, separators=(",", ":"), default=str)
+    return str(value)
+
+
+class XlsxStreamWriter:
+    """
+    Minimal streaming .xlsx writer for large single-sheet exports.
+    
+    Rows are serialised straight to the worksheet XML inside the zip archive,
+    using inline strings, so nothing but the current row is held in memory and
+    there is no per-cell object overhead (several times faster than an
+    openpyxl write-only workbook). Row 1 is written in bold as the header.
+    
+    Args:
+        output_path: Output file path
+        sheet_name: Name of the Excel sheet
+        columns: Header row
+        widths: Column width per column name (characters)
+    """
+    
+    CONTENT_TYPES = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+        '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+        '<Default Extension="xml" ContentType="application/xml"/>'
+        '<Override PartName="/xl/workbook.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+        '<Override PartName="/xl/worksheets/sheet1.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+        '<Override PartName="/xl/styles.xml" ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.styles+xml"/>'
+        '</Types>'
+    )
+    ROOT_RELS = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument" Target="xl/workbook.xml"/>'
+        '</Relationships>'
+    )
+    WORKBOOK_RELS = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+        '<Relationship Id="rId1" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet" Target="worksheets/sheet1.xml"/>'
+        '<Relationship Id="rId2" Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/styles" Target="styles.xml"/>'
+        '</Relationships>'
+    )
+    WORKBOOK = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+        'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+        '<sheets><sheet name="{sheet_name}" sheetId="1" r:id="rId1"/></sheets>'
+        '</workbook>'
+    )
+    STYLES = (
+        '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+        '<styleSheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        '<fonts count="2"><font><sz val="11"/><name val="Calibri"/></font>'
+        '<font><b/><sz val="11"/><name val="Calibri"/></font></fonts>'
+        '<fills count="2"><fill><patternFill patternType="none"/></fill>'
+        '<fill><patternFill patternType="gray125"/></fill></fills>'
+        '<borders count="1"><border><left/><right/><top/><bottom/><diagonal/></border></borders>'
+        '<cellStyleXfs count="1"><xf numFmtId="0" fontId="0" fillId="0" borderId="0"/></cellStyleXfs>'
+        '<cellXfs count="2"><xf numFmtId="0" fontId="0" fillId="0" borderId="0" xfId="0"/>'
+        '<xf numFmtId="0" fontId="1" fillId="0" borderId="0" xfId="0" applyFont="1"/></cellXfs>'
+        '<cellStyles count="1"><cellStyle name="Normal" xfId="0" builtinId="0"/></cellStyles>'
+        '</styleSheet>'
+    )
+    
+    # Characters that are not allowed in XML 1.0 documents
+    ILLEGAL_XML_CHARS = re.compile(r"[\x00-\x08\x0b\x0c\x0e-\x1f\ufffe\uffff]")
+    # Excel's per-cell text limit
+    MAX_CELL_CHARS = 32767
+    
+    def __init__(
+        self,
+        output_path: str,
+        sheet_name: str,
+        columns: list[str],
+        widths: Optional[dict[str, int]] = None,
+    ):
+        widths = widths or {}
+        self._letters = [get_column_letter(idx) for idx in range(1, len(columns) + 1)]
+        self._row_idx = 0
+        self._buffer: list[str] = []
+        
+        self._zip = zipfile.ZipFile(output_path, "w", compression=zipfile.ZIP_DEFLATED, compresslevel=1)
+        self._zip.writestr("[Content_Types].xml", self.CONTENT_TYPES)
+        self._zip.writestr("_rels/.rels", self.ROOT_RELS)
+        self._zip.writestr("xl/_rels/workbook.xml.rels", self.WORKBOOK_RELS)
+        self._zip.writestr("xl/workbook.xml", self.WORKBOOK.format(sheet_name=xml_escape(sheet_name[:31], {'"': "&quot;"})))
+        self._zip.writestr("xl/styles.xml", self.STYLES)
+        self._sheet = self._zip.open("xl/worksheets/sheet1.xml", "w", force_zip64=True)
         
-        # Auto-adjust column widths
-        worksheet = writer.sheets[sheet_name]
-        for idx, col in enumerate(df.columns):
-            max_length = max(
-                df[col].astype(str).map(len).max() if len(df) > 0 else 0,
-                len(str(col))
+        self._sheet.write(
+            b'<?xml version="1.0" encoding="UTF-8" standalone="yes"?>\n'
+            b'<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main">'
+        )
+        if columns:
+            cols = "".join(
+                f'<col min="{idx}" max="{idx}" width="{min(widths.get(col, len(col)) + 2, 50)}" customWidth="1"/>'
+                for idx, col in enumerate(columns, start=1)
             )
-            # Limit to reasonable width
-            adjusted_width = min(max_length + 2, 50)
-            worksheet.column_dimensions[chr(65 + idx) if idx < 26 else f"{chr(64 + idx // 26)}{chr(65 + idx % 26)}"].width = adjusted_width
+            self._sheet.write(f"<cols>{cols}</cols>".encode("utf-8"))
+        self._sheet.write(b"<sheetData>")
+        self.write_row(columns, style=1)
+    
+    def _cell(self, ref: str, value: Any, style: str) -> str:
+        if isinstance(value, bool):
+            return f'<c r="{ref}"{style} t="b"><v>{int(value)}</v></c>'
+        if isinstance(value, int):
+            return f'<c r="{ref}"{style}><v>{int(value)}</v></c>'
+        if isinstance(value, float) and math.isfinite(value):
+            return f'<c r="{ref}"{style}><v>{float(value)!r}</v></c>'
+        
+        text = value if isinstance(value, str) else str(value)
+        text = xml_escape(self.ILLEGAL_XML_CHARS.sub("", text[:self.MAX_CELL_CHARS]))
+        space = ' xml:space="preserve"' if text[:1].isspace() or text[-1:].isspace() else ""
+        return f'<c r="{ref}"{style} t="inlineStr"><is><t{space}>{text}</t></is></c>'
+    
+    def write_row(self, values: Iterable[Any], style: int = 0) -> None:
+        """
+        Append one row. Missing values (None/NaN) become empty cells.
+        
+        Args:
+            values: Cell values, converted with excel_cell_value
+            style: Cell style index (0 = normal, 1 = bold)
+        """
+        self._row_idx += 1
+        row_idx = self._row_idx
+        style_attr = f' s="{style}"' if style else ""
+        cells = []
+        for letter, value in zip(self._letters, values):
+            value = excel_cell_value(value)
+            if value is not None:
+                cells.append(self._cell(f"{letter}{row_idx}", value, style_attr))
+        
+        self._buffer.append(f'<row r="{row_idx}">{"".join(cells)}</row>')
+        if len(self._buffer) >= 1000:
+            self._flush()
+    
+    def _flush(self) -> None:
+        self._sheet.write("".join(self._buffer).encode("utf-8"))
+        self._buffer = []
+    
+    def close(self) -> None:
+        """Finish the worksheet and the archive."""
+        self._flush()
+        self._sheet.write(b"</sheetData></worksheet>")
+        self._sheet.close()
+        self._zip.close()
+
+
+class OutputSink:
+    """
+    Base class for facility output writers.
     
-    logger.info(f"Successfully saved {len(df)} records to {output_path}")
+    A sink is opened once with the final column order, resolved dtypes and
+    column widths, then receives rows in batches, so every format can be
+    written without holding the whole dataset in memory.
+    
+    Args:
+        output_path: Output file path
+        sheet_name: Sheet/table name, for formats that have one
+    """
+    
+    format_name = ""
+    
+    def __init__(self, output_path: str, sheet_name: str = "Facilities"):
+        self.output_path = output_path
+        self.sheet_name = sheet_name
+        self.columns: list[str] = []
+        self.dtypes: dict[str, str] = {}
+    
+    def open(self, columns: list[str], dtypes: dict[str, str], widths: dict[str, int]) -> None:
+        """
+        Prepare the output for writing.
+        
+        Args:
+            columns: Output column order
+            dtypes: Resolved dtype per column
+            widths: Longest value length per column
+        """
+        self.columns = columns
+        self.dtypes = dtypes
+    
+    def write(self, rows: list[list]) -> None:
+        """Write a batch of rows (values in column order)."""
+        raise NotImplementedError
+    
+    def close(self) -> None:
+        """Finish the file."""
+
+
+class ExcelSink(OutputSink):
+    """Excel (.xlsx) output through XlsxStreamWriter (constant memory)."""
+    
+    format_name = "excel"
+    
+    def open(self, columns: list[str], dtypes: dict[str, str], widths: dict[str, int]) -> None:
+        super().open(columns, dtypes, widths)
+        self._writer = XlsxStreamWriter(self.output_path, self.sheet_name, columns, widths)
+    
+    def write(self, rows: list[list]) -> None:
+        for row in rows:
+            self._writer.write_row(row)
+    
+    def close(self) -> None:
+        self._writer.close()
+
+
+class CsvSink(OutputSink):
+    """UTF-8 CSV output, written row batch by row batch."""
+    
+    format_name = "csv"
+    
+    def open(self, columns: list[str], dtypes: dict[str, str], widths: dict[str, int]) -> None:
+        super().open(columns, dtypes, widths)
+        self._file = open(self.output_path, "w", encoding="utf-8", newline="")
+        self._writer = csv.writer(self._file)
+        self._writer.writerow(columns)
+    
+    def write(self, rows: list[list]) -> None:
+        dtypes = [self.dtypes[col] for col in self.columns]
+        self._writer.writerows(
+            [coerce_value(value, dtype) for value, dtype in zip(row, dtypes)]
+            for row in rows
+        )
+    
+    def close(self) -> None:
+        self._file.close()
+
+
+class ArrowSink(OutputSink):
+    """Base for Arrow-based outputs: rows become record batches with a fixed schema."""
+    
+    ARROW_TYPES = {"bool": "bool_", "int64": "int64", "float64": "float64", "string": "string"}
+    
+    def open(self, columns: list[str], dtypes: dict[str, str], widths: dict[str, int]) -> None:
+        super().open(columns, dtypes, widths)
+        try:
+            import pyarrow
+        except ImportError:
+            raise RuntimeError(
+                f"{self.format_name} output requires pyarrow. Install it with: pip install pyarrow"
+            ) from None
+        
+        self._pa = pyarrow
+        self.schema = pyarrow.schema([
+            (col, getattr(pyarrow, self.ARROW_TYPES[dtypes[col]])()) for col in columns
+        ])
+        self._writer = self._open_writer()
+    
+    def _open_writer(self) -> Any:
+        raise NotImplementedError
+    
+    def write(self, rows: list[list]) -> None:
+        if not rows:
+            return
+        
+        arrays = []
+        for idx, field in enumerate(self.schema):
+            dtype = self.dtypes[field.name]
+            arrays.append(self._pa.array(
+                [coerce_value(row[idx], dtype) for row in rows], type=field.type
+            ))
+        self._writer.write_batch(self._pa.RecordBatch.from_arrays(arrays, schema=self.schema))
+    
+    def close(self) -> None:
+        self._writer.close()
+
+
+class ParquetSink(ArrowSink):
+    """Apache Parquet output (one row group per batch)."""
+    
+    format_name = "parquet"
+    
+    def _open_writer(self) -> Any:
+        import pyarrow.parquet
+        return pyarrow.parquet.ParquetWriter(self.output_path, self.schema)
+
+
+class FeatherSink(ArrowSink):
+    """Arrow IPC file output, readable as Feather v2."""
+    
+    format_name = "feather"
+    
+    def _open_writer(self) -> Any:
+        return self._pa.ipc.new_file(self.output_path, self.schema)
+
+
+OUTPUT_SINKS = {
+    sink.format_name: sink for sink in (ExcelSink, CsvSink, ParquetSink, FeatherSink)
+}
+
+OUTPUT_EXTENSIONS = {
+    ".xlsx": "excel",
+    ".csv": "csv",
+    ".parquet": "parquet",
+    ".feather": "feather",
+    ".arrow": "feather",
+}
+
+
+def resolve_output_format(output_path: str, output_format: Optional[str] = None) -> str:
+    """
+    Determine the output format from an explicit choice or the file extension.
+    
+    Args:
+        output_path: Output file path
+        output_format: Explicit format name (overrides the extension)
+    
+    Returns:
+        Format name (a key of OUTPUT_SINKS); Excel if the extension is unknown
+    """
+    if output_format:
+        if output_format not in OUTPUT_SINKS:
+            raise ValueError(f"Unknown output format: {output_format}")
+        return output_format
+    
+    extension = os.path.splitext(output_path)[1].lower()
+    return OUTPUT_EXTENSIONS.get(extension, "excel")
+
+
+def stream_facilities_to_file(
+    pages: Iterable[list[dict]],
+    output_path: str,
+    output_format: Optional[str] = None,
+    sheet_name: str = "Facilities",
+    batch_size: int = 1000,
+    schema: Optional[FacilitySchema] = None,
+    write_hashes: bool = True,
+    search_index: Optional[str] = None,
+) -> int:
+    """
+    Flatten and write facilities one page at a time to any supported format.
+    
+    Peak memory is bounded by the page size rather than the registry size:
+    pages are flattened and spooled to a temporary file next to the output,
+    then streamed into the output sink in batches. Every format shares the
+    same column order, and Parquet/Feather/CSV use dtypes resolved from all
+    pages so the schema does not depend on which page came first. Pass a
+    loaded FacilitySchema to keep columns and dtypes identical across runs;
+    it is extended in place with any new paths.
+    
+    Unless ``write_hashes`` is False, per-facility content hashes are
+    computed from the same rows and saved next to the output as
+    ``<output>.hashes.npz``, for diffing extracts (see facility_diff.py).
+    With ``search_index``, the facility search index at that path is
+    updated from the same rows (see facility_search.py).
+    
+    The output is written to a temporary file and moved into place once
+    complete, so a failed run leaves the previous extract untouched.
+    
+    Args:
+        pages: Facility records page by page (e.g. from iter_facility_pages)
+        output_path: Output file path
+        output_format: Format name (default: from the file extension, else Excel)
+        sheet_name: Sheet name for Excel output
+        batch_size: Rows handed to the sink at a time
+        schema: Facility schema to flatten with (a fresh one if None)
+        write_hashes: Save the hash sidecar next to the output
+        search_index: Search index directory to update
+    
+    Returns:
+        Number of facilities written (0 means nothing was written)
+    """
+    output_format = resolve_output_format(output_path, output_format)
+    spool_dir = os.path.dirname(os.path.abspath(output_path))
+    schema = schema or FacilitySchema()
+    
+    with FlattenedSpool(schema, spool_dir) as spool:
+        for page in pages:
+            spool.add(page)
+        
+        if not spool.rows:
+            logger.warning("No facilities data to save")
+            return 0
+        
+        columns = spool.columns
+        logger.info(f"Flattened {spool.rows} facility records into {len(columns)} columns")
+        logger.info(f"Saving to {output_format}: {output_path}")
+        
+        hasher = None
+        if write_hashes:
+            try:
+                hasher = RowHashWriter(columns)
+            except ValueError as e:
+                logger.warning(f"Not writing a hash sidecar: {e}")
+        
+        searchable = None
+        if search_index:
+            try:
+                searchable = SearchDocumentWriter(columns)
+            except ValueError as e:
+                logger.warning(f"Not updating the search index: {e}")
+        
+        # Written next to the output and moved into place once complete
+        tmp_path = f"{output_path}.{os.getpid()}.tmp"
+        sink = OUTPUT_SINKS[output_format](tmp_path, sheet_name)
+        replaced = False
+        try:
+            sink.open(columns, schema.dtypes, spool.widths)
+            try:
+                count = 0
+                batch = []
+                for row in spool.iter_rows(columns):
+                    batch.append(row)
+                    if len(batch) >= batch_size:
+                        sink.write(batch)
+                        if hasher:
+                            hasher.add(batch)
+                        if searchable:
+                            searchable.add(batch)
+                        count += len(batch)
+                        batch = []
+                sink.write(batch)
+                if hasher:
+                    hasher.add(batch)
+                if searchable:
+                    searchable.add(batch)
+                count += len(batch)
+            finally:
+                sink.close()
+            os.replace(tmp_path, output_path)
+            replaced = True
+        finally:
+            if not replaced and os.path.exists(tmp_path):
+                os.remove(tmp_path)
+    
+    logger.info(f"Successfully saved {count} records to {output_path}")
+    
+    if hasher:
+        hasher.build().save(sidecar_path(output_path), extract_path=output_path)
+        logger.info(f"Saved facility hashes to {sidecar_path(output_path)}")
+    
+    if searchable:
+        stats = update_search_index(search_index, searchable.build())
+        logger.info(
+            f"Search index {search_index}: {stats['mode']} update, {stats['added']} added, "
+            f"{stats['changed']} changed, {stats['removed']} removed"
+        )
+    return count
+
+
+def stream_facilities_to_excel(
+    pages: Iterable[list[dict]],
+    output_path: str,
+    sheet_name: str = "Facilities",
+) -> int:
+    """
+    Flatten and write facilities to Excel one page at a time.
+    
+    Convenience wrapper around stream_facilities_to_file for Excel output.
+    
+    Returns:
+        Number of facilities written (0 means nothing was written)
+    """
+    return stream_facilities_to_file(pages, output_path, "excel", sheet_name)
 
 
 def parse_arguments() -> argparse.Namespace:
@@ -466,29 +2453,63 @@ def parse_arguments() -> argparse.Namespace:
         Parsed arguments namespace
     """
     parser = argparse.ArgumentParser(
-        description="Extract KMHFL/KMHFR facilities data to Excel",
+        description="Extract KMHFL/KMHFR facilities data to Excel, CSV, Parquet or Feather",
         formatter_class=argparse.RawDescriptionHelpFormatter,
         epilog="""
 Examples:
   python facilities_to_excel.py
   python facilities_to_excel.py --out my_facilities.xlsx
+  python facilities_to_excel.py --out facilities.parquet  # Format from the extension
+  python facilities_to_excel.py --format csv              # Writes kmhfr_facilities.csv
   python facilities_to_excel.py --max-pages 10  # Limit to 10 pages for testing
-  python facilities_to_excel.py --sleep 0.5     # Slower requests
+  python facilities_to_excel.py --rate 2        # At most 2 requests per second
+  python facilities_to_excel.py --concurrency 8 # Fetch 8 pages in parallel
+  python facilities_to_excel.py --resume        # Continue an interrupted run from its checkpoints
+  python facilities_to_excel.py --incremental   # Only download facilities changed since the last sync
+  python facilities_to_excel.py --changes changes.jsonl  # Log facilities added/removed/changed since the last extract
+  python facilities_to_excel.py --search-index  # Update the facility search index (see facility_search.py)
   python facilities_to_excel.py --no-verify-ssl # Disable SSL verification
         """,
     )
     
     parser.add_argument(
         "--out",
-        default="kmhfr_facilities.xlsx",
-        help="Output Excel file path (default: kmhfr_facilities.xlsx)",
+        default=DEFAULT_OUTPUT_PATH,
+        help="Output file path (default: kmhfr_facilities.xlsx)",
+    )
+    
+    parser.add_argument(
+        "--format",
+        choices=sorted(OUTPUT_SINKS),
+        default=None,
+        help="Output format (default: from the --out extension, else excel). Parquet/Feather need pyarrow",
+    )
+    
+    parser.add_argument(
+        "--rate",
+        type=float,
+        default=5.0,
+        help="Request budget in requests per second; lowered automatically on 429/5xx (default: 5)",
+    )
+    
+    parser.add_argument(
+        "--burst",
+        type=int,
+        default=5,
+        help="Number of requests that may be sent back-to-back (default: 5)",
     )
     
     parser.add_argument(
         "--sleep",
         type=float,
-        default=0.2,
-        help="Sleep time between API requests in seconds (default: 0.2)",
+        default=None,
+        help="Deprecated: fixed delay between requests; equivalent to --rate 1/SLEEP --burst 1",
+    )
+    
+    parser.add_argument(
+        "--schema",
+        default=None,
+        help="Facility schema JSON: loaded if it exists (fixing column order and dtypes), updated after the run",
     )
     
     parser.add_argument(
@@ -498,6 +2519,77 @@ Examples:
         help="Maximum number of pages to fetch (default: all)",
     )
     
+    parser.add_argument(
+        "--concurrency",
+        type=int,
+        default=1,
+        help="Number of pages to fetch in parallel once the page count is known (default: 1)",
+    )
+    
+    parser.add_argument(
+        "--checkpoint-dir",
+        default=None,
+        help="Store every fetched page in this directory (default: disabled, or .kmhfl_checkpoints with --resume)",
+    )
+    
+    parser.add_argument(
+        "--resume",
+        action="store_true",
+        help="Reuse pages already in the checkpoint directory and fetch only the missing ones",
+    )
+    
+    parser.add_argument(
+        "--build-id-cache",
+        default=DEFAULT_BUILD_ID_CACHE,
+        help=f"File caching the discovered Next.js build ID; empty to disable (default: {DEFAULT_BUILD_ID_CACHE})",
+    )
+    
+    parser.add_argument(
+        "--build-id-ttl",
+        type=float,
+        default=DEFAULT_BUILD_ID_TTL,
+        help=f"Seconds a cached build ID is used before rediscovery (default: {DEFAULT_BUILD_ID_TTL})",
+    )
+    
+    parser.add_argument(
+        "--incremental",
+        action="store_true",
+        help="Keep a local snapshot and only fetch facilities changed since the last sync",
+    )
+    
+    parser.add_argument(
+        "--snapshot-dir",
+        default=DEFAULT_SNAPSHOT_DIR,
+        help=f"Snapshot directory for --incremental (default: {DEFAULT_SNAPSHOT_DIR})",
+    )
+    
+    parser.add_argument(
+        "--force-full",
+        action="store_true",
+        help="With --incremental, ignore the watermark and re-pull the whole registry",
+    )
+    
+    parser.add_argument(
+        "--no-hashes",
+        action="store_true",
+        help="Do not write the per-facility hash sidecar (<out>.hashes.npz) used for diffing extracts",
+    )
+    
+    parser.add_argument(
+        "--changes",
+        default=None,
+        help="Write a change log (JSON lines) of facilities added, removed or changed since the extract being replaced",
+    )
+    
+    parser.add_argument(
+        "--search-index",
+        nargs="?",
+        const="",
+        default=None,
+        metavar="DIR",
+        help=f"Update the facility search index (default DIR: <out>{INDEX_SUFFIX}); see facility_search.py",
+    )
+    
     parser.add_argument(
         "--timeout",
         type=int,
@@ -547,34 +2639,96 @@ def main() -> int:
     
     # Create session with retry logic
     verify_ssl = not args.no_verify_ssl
-    session = create_session_with_retries(retries=args.retries, verify_ssl=verify_ssl)
+    output_path = args.out
+    if args.format and output_path == DEFAULT_OUTPUT_PATH:
+        extension = next(ext for ext, fmt in OUTPUT_EXTENSIONS.items() if fmt == args.format)
+        output_path = os.path.splitext(output_path)[0] + extension
+    
+    concurrency = max(1, args.concurrency)
+    checkpoint_dir = args.checkpoint_dir or (DEFAULT_CHECKPOINT_DIR if args.resume else None)
+    if args.sleep:
+        rate_limiter = RateLimiter(rate=1 / args.sleep, burst=1)
+    else:
+        rate_limiter = RateLimiter(rate=args.rate, burst=args.burst)
+    
+    session = create_session_with_retries(
+        retries=args.retries,
+        verify_ssl=verify_ssl,
+        pool_maxsize=max(10, concurrency),
+        rate_limiter=rate_limiter,
+    )
     
     if not verify_ssl:
         logger.warning("SSL certificate verification is disabled!")
     
     try:
-        # Fetch all facilities
-        facilities = fetch_all_facilities(
-            session=session,
-            sleep_seconds=args.sleep,
+        fetch_options = dict(
+            sleep_seconds=0,
             max_pages=args.max_pages,
             timeout=args.timeout,
+            concurrency=concurrency,
+            checkpoint_dir=checkpoint_dir,
+            resume=args.resume,
+            build_id_cache=args.build_id_cache or None,
+            build_id_ttl=args.build_id_ttl,
         )
         
-        if not facilities:
+        # Fetch facilities page by page
+        if args.incremental:
+            facilities = sync_facilities(
+                session,
+                snapshot_dir=args.snapshot_dir,
+                force_full=args.force_full,
+                **fetch_options,
+            )
+            pages = iter_chunks(facilities, SNAPSHOT_CHUNK_SIZE)
+        else:
+            pages = iter_facility_pages(session, **fetch_options)
+        
+        schema = None
+        if args.schema and os.path.exists(args.schema):
+            schema = FacilitySchema.load(args.schema)
+            logger.info(f"Loaded facility schema with {len(schema.columns)} columns from {args.schema}")
+        schema = schema or FacilitySchema()
+        
+        # Hashes of the extract about to be replaced, for --changes
+        previous = None
+        if args.changes and os.path.exists(output_path):
+            previous = load_row_hashes(output_path, save=False)
+        
+        # Flatten and save as pages arrive
+        total = stream_facilities_to_file(
+            pages,
+            output_path,
+            args.format,
+            schema=schema,
+            write_hashes=not args.no_hashes or bool(args.changes),
+            search_index=None if args.search_index is None else args.search_index or output_path + INDEX_SUFFIX,
+        )
+        
+        if not total:
             logger.error("No facilities data retrieved. Please check your connection.")
             return 1
         
-        # Flatten data to DataFrame
-        df = flatten_facilities_data(facilities)
+        if args.schema:
+            schema.save(args.schema)
         
-        # Save to Excel
-        save_to_excel(df, args.out)
+        if args.changes:
+            if previous is None:
+                logger.info(f"No previous extract at {output_path}; not writing {args.changes}")
+            else:
+                diff = diff_row_hashes(previous, RowHashes.load(sidecar_path(output_path)))
+                write_change_log(diff, args.changes, f"previous {output_path}", output_path)
+                summary = diff.summary()
+                logger.info(
+                    f"Changes since the previous extract: {summary['added']} added, "
+                    f"{summary['removed']} removed, {summary['changed']} changed -> {args.changes}"
+                )
         
         logger.info("=" * 60)
         logger.info("Extraction completed successfully!")
-        logger.info(f"Total facilities: {len(facilities)}")
-        logger.info(f"Output file: {args.out}")
+        logger.info(f"Total facilities: {total}")
+        logger.info(f"Output file: {output_path}")
         logger.info("=" * 60)
         
         return 0
@@ -0,0 +1,621 @@
+#!/usr/bin/env python3
+"""
+Facility Extract Diff
+
+Compares two facility extracts (e.g. yesterday's and today's
+kmhfr_facilities.xlsx) and reports the facilities that were added, removed
+or changed, with the changed column names.
+
+Every extract written by facilities_to_excel.py gets a hash sidecar next to
+it (``<extract>.hashes.npz``): one 64-bit content hash per facility, keyed
+by ``id``, plus one hash per cell. Diffing two extracts then only joins the
+two sidecars on their key hashes and compares row hashes; cell hashes are
+only looked at for the rows whose row hash differs. Neither extract is
+opened, so two full registries diff in milliseconds. Extracts without a
+sidecar (older runs) are read once and get one.
+
+The result is written as a compact JSON lines change log: a summary line,
+then one line per added, removed or changed facility.
+
+Usage:
+    python facility_diff.py yesterday.xlsx kmhfr_facilities.xlsx
+    python facility_diff.py yesterday.xlsx kmhfr_facilities.xlsx --out changes.jsonl
+    python facility_diff.py --build kmhfr_facilities.xlsx    # write the sidecar of an existing extract
+"""
+
+import argparse
+import ast
+import gzip
+import hashlib
+import json
+import logging
+import math
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+logger = logging.getLogger(__name__)
+
+SIDECAR_SUFFIX = ".hashes.npz"
+SIDECAR_FORMAT_VERSION = 1
+
+# Facilities are matched on this column; the label columns are copied into the change log
+KEY_COLUMN = "id"
+LABEL_COLUMNS = ("code", "name")
+
+# Separates the ids and labels packed into one byte array in the sidecar
+FIELD_SEPARATOR = "\x1f"
+
+# Odd 64-bit multiplier used to mix a cell hash with its column's name hash
+HASH_MULTIPLIER = np.uint64(0x9E3779B97F4A7C15)
+
+
+def sidecar_path(extract_path: str) -> str:
+    """Path of the hash sidecar of an extract."""
+    return extract_path + SIDECAR_SUFFIX
+
+
+def canonical_value(value: Any) -> Optional[str]:
+    """
+    Text form of a cell value that is the same however the extract was written.
+    
+    Missing values and empty strings are None, integral floats are written
+    as integers (a column can be int64 in one run and float64 in the next),
+    and nested lists/dicts as compact JSON, as coerce_value writes them.
+    
+    Args:
+        value: Flattened cell value
+    
+    Returns:
+        Canonical string, or None for a missing value
+    """
+    # Exact type checks first: nearly every cell is a str, None or int
+    kind = type(value)
+    if kind is str:
+        return value or None
+    if value is None:
+        return None
+    if kind is int:
+        return str(value)
+    if value is pd.NA or value is pd.NaT:
+        return None
+    if isinstance(value, np.generic):
+        value = value.item()
+    if isinstance(value, bool):
+        return str(value)
+    if isinstance(value, float):
+        if math.isnan(value):
+            return None
+        return str(int(value)) if value.is_integer() and abs(value) < 2**63 else repr(value)
+    if isinstance(value, (int, str)):
+        return str(value) or None
+    if isinstance(value, (list, dict)):
+        return json.dumps(value, separators=(",", ":"), default=str)
+    return str(value)
+
+
+def read_extract(path: str, columns: Optional[list[str]] = None) -> pd.DataFrame:
+    """
+    Read an extract written by facilities_to_excel.py (format from the extension).
+    
+    Args:
+        path: Excel, CSV, Parquet or Feather extract
+        columns: Only read these columns (those missing from the extract are skipped)
+    
+    Returns:
+        Extract as a DataFrame; CSV cells are read as strings
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        usecols = (lambda column: column in columns) if columns else None
+        return pd.read_csv(path, dtype=str, keep_default_na=False, usecols=usecols)
+    if extension in (".parquet", ".feather", ".arrow"):
+        import pyarrow.dataset as ds
+        
+        dataset = ds.dataset(path, format="parquet" if extension == ".parquet" else "feather")
+        names = [name for name in columns if name in dataset.schema.names] if columns else None
+        return dataset.to_table(columns=names).to_pandas()
+    usecols = (lambda column: column in columns) if columns else None
+    return pd.read_excel(path, usecols=usecols)
+
+
+def parse_nested(value: Any) -> Any:
+    """
+    Turn a nested list/dict read back from an extract into the original value.
+    
+    CSV/Parquet/Feather store nested values as JSON and Excel as Python's
+    repr, so both are tried; anything else is returned unchanged.
+    """
+    if isinstance(value, str) and value[:1] in ("[", "{"):
+        try:
+            return json.loads(value)
+        except ValueError:
+            try:
+                return ast.literal_eval(value)
+            except (ValueError, SyntaxError):
+                pass
+    return value
+
+
+def hash_cells(values: Iterable[Any]) -> np.ndarray:
+    """
+    Hash one column of cell values.
+    
+    Args:
+        values: Cell values of one column
+    
+    Returns:
+        uint64 hashes; 0 for missing values and never 0 otherwise
+    """
+    texts = np.array([canonical_value(value) for value in values], dtype=object)
+    missing = np.equal(texts, None)
+    texts[missing] = ""
+    hashes = pd.util.hash_array(texts, categorize=False) | np.uint64(1)
+    hashes[missing] = 0
+    return hashes
+
+
+def name_hash(name: str) -> np.uint64:
+    """Stable 64-bit hash of a column name (or key)."""
+    return np.uint64(int.from_bytes(hashlib.blake2b(name.encode("utf-8"), digest_size=8).digest(), "little"))
+
+
+def combine_row_hashes(columns: list[str], cell_hashes: np.ndarray) -> np.ndarray:
+    """
+    Combine the cell hashes of each row into one row hash.
+    
+    Each cell is mixed with its column's name hash and the results are
+    summed, so the row hash does not depend on column order, and missing
+    cells (hash 0) add nothing: a column that is new but empty, or dropped
+    while empty, leaves row hashes unchanged.
+    
+    Args:
+        columns: Column names, one per cell_hashes column
+        cell_hashes: uint64 array of shape (rows, columns) from hash_cells
+    
+    Returns:
+        uint64 row hashes
+    """
+    names = np.array([name_hash(column) for column in columns], dtype=np.uint64)
+    with np.errstate(over="ignore"):
+        mixed = (cell_hashes ^ names) * HASH_MULTIPLIER
+    mixed[cell_hashes == 0] = 0
+    return mixed.sum(axis=1, dtype=np.uint64)
+
+
+def hash_keys(ids: list[str]) -> np.ndarray:
+    """64-bit hashes of facility ids, used as join keys."""
+    return pd.util.hash_array(np.array(ids, dtype=object), categorize=False)
+
+
+def pack_strings(values: Iterable[Any]) -> np.ndarray:
+    """Pack strings into one uint8 array (np.load needs no pickle for it)."""
+    text = FIELD_SEPARATOR.join("" if value is None else str(value) for value in values)
+    return np.frombuffer(text.encode("utf-8"), dtype=np.uint8)
+
+
+def unpack_strings(packed: np.ndarray, count: int) -> list[str]:
+    """Inverse of pack_strings."""
+    if count == 0:
+        return []
+    return packed.tobytes().decode("utf-8").split(FIELD_SEPARATOR)
+
+
+class RowHashes:
+    """
+    Per-facility content hashes of one extract.
+    
+    Args:
+        ids: Facility ids, one per row
+        columns: Hashed column names
+        cell_hashes: uint64 array of shape (rows, columns) from hash_cells
+        labels: Label column values (LABEL_COLUMNS) per row, for the change log
+    """
+    
+    def __init__(self, ids: list[str], columns: list[str], cell_hashes: np.ndarray, labels: Optional[dict] = None):
+        key_hashes = hash_keys(ids)
+        unique, first = np.unique(key_hashes, return_index=True)
+        if len(unique) != len(ids):
+            logger.warning(f"{len(ids) - len(unique)} duplicate facility ids; keeping the first row of each")
+            first.sort()
+            ids = [ids[i] for i in first]
+            cell_hashes = cell_hashes[first]
+            labels = {name: [values[i] for i in first] for name, values in (labels or {}).items()}
+            key_hashes = key_hashes[first]
+        
+        self.ids = ids
+        self.columns = list(columns)
+        self.key_hashes = key_hashes
+        self.row_hashes = combine_row_hashes(self.columns, cell_hashes)
+        # 32 bits per cell is enough to tell which columns of a changed row differ
+        self.cell_hashes = (cell_hashes & np.uint64(0xFFFFFFFF)).astype(np.uint32)
+        self.labels = labels or {}
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    @classmethod
+    def from_rows(cls, columns: list[str], rows: list[list]) -> "RowHashes":
+        """
+        Hash flattened rows.
+        
+        Args:
+            columns: Column names (must include KEY_COLUMN)
+            rows: Row values in column order
+        
+        Returns:
+            RowHashes of the rows
+        """
+        writer = RowHashWriter(columns)
+        writer.add(rows)
+        return writer.build()
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "RowHashes":
+        """Hash a flattened facilities DataFrame (e.g. an extract read back with pandas)."""
+        columns = [str(column) for column in df.columns]
+        rows = df.astype(object).where(df.notna(), None).values.tolist()
+        return cls.from_rows(columns, [[parse_nested(value) for value in row] for row in rows])
+    
+    @classmethod
+    def from_extract(cls, path: str) -> "RowHashes":
+        """
+        Read an extract (Excel, CSV, Parquet or Feather) and hash it.
+        
+        Args:
+            path: Extract written by facilities_to_excel.py
+        
+        Returns:
+            RowHashes of the extract
+        """
+        df = read_extract(path)
+        logger.info(f"Read {len(df)} facilities from {path}")
+        return cls.from_frame(df)
+    
+    def save(self, path: str, extract_path: Optional[str] = None) -> None:
+        """
+        Write the sidecar (atomically).
+        
+        Args:
+            path: Sidecar path (see sidecar_path)
+            extract_path: Extract the hashes belong to; its size and mtime are
+                recorded so a stale sidecar is detected
+        """
+        stat = os.stat(extract_path) if extract_path and os.path.exists(extract_path) else None
+        meta = {
+            "format_version": SIDECAR_FORMAT_VERSION,
+            "key": KEY_COLUMN,
+            "rows": len(self),
+            "columns": self.columns,
+            "labels": list(self.labels),
+            "extract_size": stat.st_size if stat else None,
+            "extract_mtime_ns": stat.st_mtime_ns if stat else None,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        arrays = {
+            "meta": np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+            "ids": pack_strings(self.ids),
+            "row_hashes": self.row_hashes,
+            "cell_hashes": self.cell_hashes,
+        }
+        for name, values in self.labels.items():
+            arrays[f"label_{name}"] = pack_strings(values)
+        
+        with open(f"{path}.tmp", "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(f"{path}.tmp", path)
+    
+    @classmethod
+    def load(cls, path: str) -> "RowHashes":
+        """
+        Load a sidecar written by save().
+        
+        Raises:
+            ValueError: If the sidecar has another format version
+        """
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes())
+            if meta.get("format_version") != SIDECAR_FORMAT_VERSION:
+                raise ValueError(f"{path} has sidecar format {meta.get('format_version')}, expected {SIDECAR_FORMAT_VERSION}")
+            
+            hashes = cls.__new__(cls)
+            hashes.ids = unpack_strings(data["ids"], meta["rows"])
+            hashes.columns = meta["columns"]
+            hashes.key_hashes = hash_keys(hashes.ids)
+            hashes.row_hashes = data["row_hashes"]
+            hashes.cell_hashes = data["cell_hashes"]
+            hashes.labels = {name: unpack_strings(data[f"label_{name}"], meta["rows"]) for name in meta["labels"]}
+        return hashes
+
+
+def is_sidecar_current(sidecar: str, extract_path: str) -> bool:
+    """True if the sidecar was written for the extract as it is now."""
+    if not os.path.exists(sidecar):
+        return False
+    try:
+        with np.load(sidecar) as data:
+            meta = json.loads(data["meta"].tobytes())
+    except (OSError, ValueError, KeyError):
+        return False
+    stat = os.stat(extract_path)
+    return (
+        meta.get("format_version") == SIDECAR_FORMAT_VERSION
+        and meta.get("extract_size") == stat.st_size
+        and meta.get("extract_mtime_ns") == stat.st_mtime_ns
+    )
+
+
+def load_row_hashes(path: str, save: bool = True) -> RowHashes:
+    """
+    Get the hashes of an extract, from its sidecar when it is current.
+    
+    Args:
+        path: Extract or sidecar path
+        save: Write a sidecar when the extract had to be read
+    
+    Returns:
+        RowHashes of the extract
+    """
+    if path.endswith(SIDECAR_SUFFIX):
+        return RowHashes.load(path)
+    
+    sidecar = sidecar_path(path)
+    if is_sidecar_current(sidecar, path):
+        return RowHashes.load(sidecar)
+    
+    logger.info(f"No current hash sidecar for {path}; reading the extract")
+    hashes = RowHashes.from_extract(path)
+    if save:
+        hashes.save(sidecar, extract_path=path)
+        logger.info(f"Wrote {sidecar}")
+    return hashes
+
+
+class RowHashWriter:
+    """
+    Builds RowHashes batch by batch while an extract is written.
+    
+    Args:
+        columns: Output column order (must include KEY_COLUMN)
+    """
+    
+    def __init__(self, columns: list[str]):
+        if KEY_COLUMN not in columns:
+            raise ValueError(f"Extract has no {KEY_COLUMN!r} column to key facilities on")
+        self.columns = list(columns)
+        self._key = self.columns.index(KEY_COLUMN)
+        self._labels = {name: self.columns.index(name) for name in LABEL_COLUMNS if name in self.columns}
+        self._ids: list[str] = []
+        self._label_values: dict[str, list] = {name: [] for name in self._labels}
+        self._batches: list[np.ndarray] = []
+    
+    def add(self, rows: list[list]) -> None:
+        """Hash a batch of rows (values in column order)."""
+        if not rows:
+            return
+        self._ids.extend(str(row[self._key]) for row in rows)
+        for name, index in self._labels.items():
+            self._label_values[name].extend(row[index] for row in rows)
+        self._batches.append(np.column_stack([
+            hash_cells([row[index] for row in rows]) for index in range(len(self.columns))
+        ]))
+    
+    def build(self) -> RowHashes:
+        """RowHashes of every row added."""
+        cells = np.concatenate(self._batches) if self._batches else np.zeros((0, len(self.columns)), dtype=np.uint64)
+        return RowHashes(self._ids, self.columns, cells, self._label_values)
+
+
+class FacilityDiff:
+    """
+    Added, removed and changed facilities between two extracts.
+    
+    Row positions index into the old/new RowHashes; changed_columns holds
+    the changed column names of each changed row, in the same order.
+    """
+    
+    def __init__(self, old: RowHashes, new: RowHashes, added: np.ndarray, removed: np.ndarray,
+                 changed_old: np.ndarray, changed_new: np.ndarray, changed_columns: list[list[str]]):
+        self.old = old
+        self.new = new
+        self.added = added
+        self.removed = removed
+        self.changed_old = changed_old
+        self.changed_new = changed_new
+        self.changed_columns = changed_columns
+    
+    @property
+    def unchanged(self) -> int:
+        return len(self.new) - len(self.added) - len(self.changed_new)
+    
+    def summary(self) -> dict:
+        """Counts of the diff, plus how often each column changed."""
+        column_counts: dict[str, int] = {}
+        for columns in self.changed_columns:
+            for column in columns:
+                column_counts[column] = column_counts.get(column, 0) + 1
+        return {
+            "old": len(self.old),
+            "new": len(self.new),
+            "added": len(self.added),
+            "removed": len(self.removed),
+            "changed": len(self.changed_new),
+            "unchanged": self.unchanged,
+            "changed_columns": dict(sorted(column_counts.items(), key=lambda item: (-item[1], item[0]))),
+        }
+    
+    def iter_changes(self) -> Iterable[dict]:
+        """One change record per added, removed or changed facility."""
+        def record(op: str, hashes: RowHashes, row: int) -> dict:
+            entry = {"op": op, KEY_COLUMN: hashes.ids[row]}
+            for name, values in hashes.labels.items():
+                if values[row] not in (None, ""):
+                    entry[name] = values[row]
+            return entry
+        
+        for row in self.added.tolist():
+            yield record("added", self.new, row)
+        for row in self.removed.tolist():
+            yield record("removed", self.old, row)
+        for row, columns in zip(self.changed_new.tolist(), self.changed_columns):
+            entry = record("changed", self.new, row)
+            entry["columns"] = columns
+            yield entry
+
+
+def diff_row_hashes(old: RowHashes, new: RowHashes) -> FacilityDiff:
+    """
+    Diff two extracts by their hashes.
+    
+    Facilities are joined on their key hashes; only rows whose row hash
+    differs have their cell hashes compared, column by column name, so
+    columns that exist in only one extract are handled (a missing column
+    counts as empty).
+    
+    Args:
+        old: Hashes of the earlier extract
+        new: Hashes of the later extract
+    
+    Returns:
+        FacilityDiff
+    """
+    _, old_common, new_common = np.intersect1d(old.key_hashes, new.key_hashes, assume_unique=True, return_indices=True)
+    
+    added = np.setdiff1d(np.arange(len(new)), new_common, assume_unique=True)
+    removed = np.setdiff1d(np.arange(len(old)), old_common, assume_unique=True)
+    
+    differs = old.row_hashes[old_common] != new.row_hashes[new_common]
+    changed_old, changed_new = old_common[differs], new_common[differs]
+    order = np.argsort(changed_new, kind="stable")
+    changed_old, changed_new = changed_old[order], changed_new[order]
+    
+    # Columns of both extracts, new order first; absent columns compare as empty (hash 0)
+    columns = new.columns + [column for column in old.columns if column not in set(new.columns)]
+    old_index = {column: index for index, column in enumerate(old.columns)}
+    new_index = {column: index for index, column in enumerate(new.columns)}
+    
+    def aligned(hashes: RowHashes, rows: np.ndarray, index: dict) -> np.ndarray:
+        cells = np.zeros((len(rows), len(columns)), dtype=np.uint32)
+        positions = [(out, index[column]) for out, column in enumerate(columns) if column in index]
+        if positions and len(rows):
+            out_columns, in_columns = map(list, zip(*positions))
+            cells[:, out_columns] = hashes.cell_hashes[np.ix_(rows, in_columns)]
+        return cells
+    
+    different = aligned(old, changed_old, old_index) != aligned(new, changed_new, new_index)
+    names = np.array(columns, dtype=object)
+    changed_columns = [names[row].tolist() for row in different]
+    
+    return FacilityDiff(old, new, added, removed, changed_old, changed_new, changed_columns)
+
+
+def write_change_log(diff: FacilityDiff, path: str, old_label: str = "", new_label: str = "") -> int:
+    """
+    Write the diff as JSON lines: a summary line, then one line per change.
+    
+    The file is gzipped when the path ends in .gz.
+    
+    Args:
+        diff: Diff to write
+        path: Change log path
+        old_label: Name of the earlier extract, for the summary line
+        new_label: Name of the later extract, for the summary line
+    
+    Returns:
+        Number of change lines written
+    """
+    opener = gzip.open if path.endswith(".gz") else open
+    count = 0
+    with opener(f"{path}.tmp", "wt", encoding="utf-8") as f:
+        summary = {
+            "op": "summary",
+            "old_extract": old_label,
+            "new_extract": new_label,
+            "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            **diff.summary(),
+        }
+        f.write(json.dumps(summary, separators=(",", ":"), default=str) + "\n")
+        for change in diff.iter_changes():
+            f.write(json.dumps(change, separators=(",", ":"), default=str) + "\n")
+            count += 1
+    os.replace(f"{path}.tmp", path)
+    return count
+
+
+def diff_extracts(old_path: str, new_path: str, save_sidecars: bool = True) -> FacilityDiff:
+    """
+    Diff two extracts (or their sidecars).
+    
+    Args:
+        old_path: Earlier extract or sidecar
+        new_path: Later extract or sidecar
+        save_sidecars: Write sidecars for extracts that had none
+    
+    Returns:
+        FacilityDiff
+    """
+    return diff_row_hashes(load_row_hashes(old_path, save_sidecars), load_row_hashes(new_path, save_sidecars))
+
+
+def print_summary(diff: FacilityDiff, limit: int = 10) -> None:
+    """Print the diff counts and the most frequently changed columns."""
+    summary = diff.summary()
+    print(f"\n📊 {summary['old']} -> {summary['new']} facilities")
+    print(f"   ➕ Added:     {summary['added']}")
+    print(f"   ➖ Removed:   {summary['removed']}")
+    print(f"   ✏️  Changed:   {summary['changed']}")
+    print(f"   ✓  Unchanged: {summary['unchanged']}")
+    if summary["changed_columns"]:
+        print("\n   Most changed columns:")
+        for column, count in list(summary["changed_columns"].items())[:limit]:
+            print(f"      {column}: {count}")
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Diff two facility extracts by their per-facility hashes")
+    parser.add_argument("old", nargs="?", help="Earlier extract (or its .hashes.npz sidecar)")
+    parser.add_argument("new", nargs="?", help="Later extract (or its .hashes.npz sidecar)")
+    parser.add_argument("--out", help="Write the change log (JSON lines, gzipped if it ends in .gz)")
+    parser.add_argument("--build", nargs="+", metavar="EXTRACT", help="Only write the hash sidecars of these extracts")
+    parser.add_argument("--no-save", action="store_true", help="Do not write sidecars for extracts that have none")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose logging")
+    args = parser.parse_args()
+    if not args.build and not (args.old and args.new):
+        parser.error("give two extracts to diff, or --build EXTRACT")
+    return args
+
+
+def main() -> int:
+    args = parse_arguments()
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    
+    if args.build:
+        for path in args.build:
+            hashes = RowHashes.from_extract(path)
+            hashes.save(sidecar_path(path), extract_path=path)
+            print(f"💾 {sidecar_path(path)}: {len(hashes)} facilities, {len(hashes.columns)} columns")
+        return 0
+    
+    started = time.perf_counter()
+    diff = diff_extracts(args.old, args.new, save_sidecars=not args.no_save)
+    elapsed = time.perf_counter() - started
+    print_summary(diff)
+    print(f"\n⏱️  Diffed in {elapsed * 1000:.1f} ms")
+    
+    if args.out:
+        count = write_change_log(diff, args.out, args.old, args.new)
+        print(f"💾 Wrote {count} changes to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,757 @@
+#!/usr/bin/env python3
+"""
+Facility Search Index
+
+Finds facilities by partial name, code, county, constituency or ward
+without opening the extract: "kiamb disp", "kiambu level 4" (any order),
+"nyrei" (typo for Nyeri), "county:kisumu ward:kondele", or a facility code.
+
+The index is an inverted index on disk, in a directory next to the extract
+(``<extract>.search``). Each field is tokenized into lower-case ASCII words.
+Every word points at the facilities and fields it occurs in. Queries match
+words exactly, by prefix (the vocabulary is sorted, so a prefix is one
+binary search) and by edit distance (up to two edits, through a
+precomputed deletion table). Arrays are memory-mapped when a query first
+needs them, so opening an index costs nothing and a query takes well under
+a millisecond.
+
+Rebuilds are incremental: facilities whose searchable fields did not change
+are left alone. Changed and new facilities go into a new segment, and
+replaced or removed ones are masked out. Once these deltas grow past
+MERGE_RATIO of the index, the segments are merged into one.
+
+Usage:
+    python facility_search.py build kmhfr_facilities.xlsx
+    python facility_search.py search "kiamb disp"
+    python facility_search.py search "county:kisumu" --limit 20 --index kmhfr_facilities.xlsx.search
+    python facility_search.py search            # read queries from stdin
+"""
+
+import argparse
+import json
+import logging
+import os
+import re
+import shutil
+import sys
+import time
+import unicodedata
+from datetime import datetime, timezone
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from facility_diff import FIELD_SEPARATOR, KEY_COLUMN, canonical_value, hash_keys, read_extract
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+INDEX_SUFFIX = ".search"
+DEFAULT_INDEX_PATH = "kmhfr_facilities.xlsx" + INDEX_SUFFIX
+META_FILE = "meta.json"
+
+# Searchable fields and the flattened columns they are read from (the first present one)
+SEARCH_FIELDS = {
+    "name": ("name",),
+    "code": ("code",),
+    "county": ("county", "county_name"),
+    "constituency": ("constituency", "constituency_name"),
+    "ward": ("ward_name", "ward"),
+}
+FIELD_BITS = {field: 1 << position for position, field in enumerate(SEARCH_FIELDS)}
+
+# A word found in the name (or the code) ranks above one found in an admin unit
+FIELD_WEIGHTS = {"name": 1.0, "code": 1.0, "county": 0.6, "constituency": 0.6, "ward": 0.6}
+EXACT_WEIGHT = 1.0
+PREFIX_WEIGHT = 0.7
+FUZZY_WEIGHT = 0.5
+
+# Edits allowed for a query word of at least this many characters (numbers are never fuzzy-matched)
+FUZZY_MIN_LENGTH = {1: 4, 2: 8}
+MAX_EDITS = max(FUZZY_MIN_LENGTH)
+
+# Merge all segments once masked plus delta documents exceed this share of the index
+MERGE_RATIO = 0.25
+MAX_SEGMENTS = 4
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Highest field weight for every combination of field bits
+BIT_WEIGHTS = np.array([
+    max([weight for field, weight in FIELD_WEIGHTS.items() if bits & FIELD_BITS[field]], default=0.0)
+    for bits in range(1 << len(SEARCH_FIELDS))
+], dtype=np.float32)
+
+
+def normalize(text: str) -> str:
+    """Lower-case ASCII form of a text (accents dropped)."""
+    return unicodedata.normalize("NFKD", text).encode("ascii", "ignore").decode("ascii").lower()
+
+
+def tokenize(text: Optional[str]) -> list[str]:
+    """Words of a field value or query."""
+    return TOKEN_PATTERN.findall(normalize(text)) if text else []
+
+
+def deletions(word: str, depth: int = MAX_EDITS) -> set[str]:
+    """The word and every string made by deleting up to ``depth`` characters from it."""
+    found = {word}
+    frontier = {word}
+    for _ in range(depth):
+        frontier = {item[:i] + item[i + 1:] for item in frontier if len(item) > 1 for i in range(len(item))}
+        found |= frontier
+    return found
+
+
+def edit_distance(a: str, b: str, limit: int) -> int:
+    """
+    Optimal string alignment distance (insertions, deletions, substitutions, transpositions).
+    
+    Returns:
+        The distance, or ``limit + 1`` once it is known to exceed the limit
+    """
+    if abs(len(a) - len(b)) > limit:
+        return limit + 1
+    previous2, previous = None, list(range(len(b) + 1))
+    for i in range(1, len(a) + 1):
+        current = [i] + [0] * len(b)
+        for j in range(1, len(b) + 1):
+            cost = a[i - 1] != b[j - 1]
+            current[j] = min(previous[j] + 1, current[j - 1] + 1, previous[j - 1] + cost)
+            if i > 1 and j > 1 and a[i - 1] == b[j - 2] and a[i - 2] == b[j - 1]:
+                current[j] = min(current[j], previous2[j - 2] + 1)
+        if min(current) > limit:
+            return limit + 1
+        previous2, previous = previous, current
+    return previous[-1]
+
+
+def allowed_edits(word: str) -> int:
+    """Edits a query word may be away from an indexed word."""
+    if word.isdigit():
+        return 0
+    return max([edits for edits, length in FUZZY_MIN_LENGTH.items() if len(word) >= length], default=0)
+
+
+def string_hashes(values: Iterable[str]) -> np.ndarray:
+    """64-bit hashes of strings (stable across processes)."""
+    return pd.util.hash_array(np.array(list(values), dtype=object), categorize=False)
+
+
+def pack_records(columns: list[list[Optional[str]]]) -> tuple[np.ndarray, np.ndarray]:
+    """
+    UTF-8 blob and offsets of stored records, one per document.
+    
+    Each record holds the document's values of the given columns, separated
+    by FIELD_SEPARATOR (None is stored as empty).
+    """
+    encoded = [FIELD_SEPARATOR.join(value or "" for value in row).encode("utf-8") for row in zip(*columns)]
+    offsets = np.zeros(len(encoded) + 1, dtype=np.int64)
+    np.cumsum([len(value) for value in encoded], out=offsets[1:])
+    return np.frombuffer(b"".join(encoded), dtype=np.uint8), offsets
+
+
+class SearchDocuments:
+    """
+    Searchable fields of a set of facilities.
+    
+    Args:
+        ids: Facility ids
+        fields: Values per SEARCH_FIELDS field, one per facility (None if missing)
+    """
+    
+    def __init__(self, ids: list[str], fields: dict[str, list[Optional[str]]]):
+        key_hashes = hash_keys(ids)
+        unique, first = np.unique(key_hashes, return_index=True)
+        if len(unique) != len(ids):
+            logger.warning(f"{len(ids) - len(unique)} duplicate facility ids; indexing the first row of each")
+            first.sort()
+            ids = [ids[i] for i in first]
+            fields = {field: [values[i] for i in first] for field, values in fields.items()}
+            key_hashes = key_hashes[first]
+        self.ids = ids
+        self.fields = {field: fields.get(field) or [None] * len(ids) for field in SEARCH_FIELDS}
+        self.key_hashes = key_hashes
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "SearchDocuments":
+        """Searchable fields of flattened facilities (flatten_facilities_data output or an extract)."""
+        writer = SearchDocumentWriter([str(column) for column in df.columns])
+        writer.add(df.astype(object).where(df.notna(), None).values.tolist())
+        return writer.build()
+    
+    @classmethod
+    def from_extract(cls, path: str) -> "SearchDocuments":
+        """Read the searchable columns of an extract."""
+        columns = [KEY_COLUMN] + [column for candidates in SEARCH_FIELDS.values() for column in candidates]
+        df = read_extract(path, columns)
+        logger.info(f"Read {len(df)} facilities from {path}")
+        return cls.from_frame(df)
+    
+    def content_hashes(self) -> np.ndarray:
+        """One hash per facility over its searchable fields."""
+        rows = zip(*(self.fields[field] for field in SEARCH_FIELDS))
+        return string_hashes("\x1f".join(value or "" for value in row) for row in rows)
+    
+    def subset(self, positions: np.ndarray) -> "SearchDocuments":
+        """The documents at the given positions."""
+        documents = SearchDocuments.__new__(SearchDocuments)
+        documents.ids = [self.ids[i] for i in positions]
+        documents.fields = {field: [values[i] for i in positions] for field, values in self.fields.items()}
+        documents.key_hashes = self.key_hashes[positions]
+        return documents
+
+
+class SearchDocumentWriter:
+    """
+    Collects searchable fields batch by batch while an extract is written.
+    
+    Args:
+        columns: Output column order (must include KEY_COLUMN)
+    """
+    
+    def __init__(self, columns: list[str]):
+        if KEY_COLUMN not in columns:
+            raise ValueError(f"Extract has no {KEY_COLUMN!r} column to key facilities on")
+        self._key = columns.index(KEY_COLUMN)
+        self._fields = {
+            field: next((columns.index(column) for column in candidates if column in columns), None)
+            for field, candidates in SEARCH_FIELDS.items()
+        }
+        self._ids: list[str] = []
+        self._values: dict[str, list[Optional[str]]] = {field: [] for field in SEARCH_FIELDS}
+    
+    def add(self, rows: list[list]) -> None:
+        """Collect a batch of rows (values in column order)."""
+        self._ids.extend(str(row[self._key]) for row in rows)
+        for field, index in self._fields.items():
+            if index is None:
+                self._values[field].extend([None] * len(rows))
+            else:
+                self._values[field].extend(canonical_value(row[index]) for row in rows)
+    
+    def build(self) -> SearchDocuments:
+        """SearchDocuments of every row added."""
+        return SearchDocuments(self._ids, self._values)
+
+
+def write_segment(documents: SearchDocuments, directory: str) -> None:
+    """
+    Write the inverted index of some documents as a segment directory.
+    
+    A segment holds the sorted vocabulary, postings (document numbers and
+    the fields each word occurs in) grouped by word, the fuzzy deletion
+    table, and the stored fields shown in results.
+    
+    Args:
+        documents: Documents of the segment
+        directory: Segment directory (created)
+    """
+    terms, docs, bits = [], [], []
+    for field, values in documents.fields.items():
+        bit = FIELD_BITS[field]
+        for doc, value in enumerate(values):
+            for term in tokenize(value):
+                terms.append(term)
+                docs.append(doc)
+                bits.append(bit)
+    
+    vocabulary, term_ids = np.unique(np.array(terms, dtype=object), return_inverse=True)
+    # One posting per (word, document), with the bits of every field the word occurs in
+    keys = term_ids.astype(np.int64) * max(len(documents), 1) + np.array(docs, dtype=np.int64)
+    keys, posting_of = np.unique(keys, return_inverse=True)
+    fields = np.zeros(len(keys), dtype=np.uint8)
+    np.bitwise_or.at(fields, posting_of, np.array(bits, dtype=np.uint8))
+    postings = (keys % max(len(documents), 1)).astype(np.int32)
+    offsets = np.searchsorted(keys // max(len(documents), 1), np.arange(len(vocabulary) + 1)).astype(np.int64)
+    
+    # Symmetric-delete table: every word within MAX_EDITS of a query word shares a deletion with it
+    delete_terms, delete_strings = [], []
+    for term_id, term in enumerate(vocabulary.tolist()):
+        if not term.isdigit():
+            variants = deletions(term)
+            delete_strings.extend(variants)
+            delete_terms.extend([term_id] * len(variants))
+    delete_hashes = string_hashes(delete_strings)
+    delete_order = np.argsort(delete_hashes, kind="stable")
+    
+    width = max((len(term) for term in vocabulary.tolist()), default=1)
+    arrays = {
+        "vocabulary": np.array([term.encode("ascii") for term in vocabulary.tolist()], dtype=f"S{width}"),
+        "offsets": offsets,
+        "postings": postings,
+        "fields": fields,
+        "delete_hashes": delete_hashes[delete_order],
+        "delete_terms": np.array(delete_terms, dtype=np.int32)[delete_order],
+        "key_hashes": documents.key_hashes,
+        "content_hashes": documents.content_hashes(),
+        "name_lengths": np.array([len(value or "") for value in documents.fields["name"]], dtype=np.int32),
+    }
+    arrays["records"], arrays["record_offsets"] = pack_records([documents.ids] + list(documents.fields.values()))
+    
+    os.makedirs(directory)
+    for name, array in arrays.items():
+        np.save(os.path.join(directory, f"{name}.npy"), array)
+
+
+class Segment:
+    """
+    One segment of a search index, read lazily.
+    
+    Arrays are memory-mapped the first time a query needs them.
+    
+    Args:
+        directory: Segment directory
+        deleted: Mask of documents replaced or removed since the segment was written
+    """
+    
+    def __init__(self, directory: str, deleted: Optional[np.ndarray] = None):
+        self.directory = directory
+        self.deleted = deleted
+        self._arrays: dict[str, np.ndarray] = {}
+    
+    def array(self, name: str) -> np.ndarray:
+        if name not in self._arrays:
+            # A plain ndarray view of the mapping: pages are still read on demand, without memmap's per-slice overhead
+            self._arrays[name] = np.load(os.path.join(self.directory, f"{name}.npy"), mmap_mode="r").view(np.ndarray)
+        return self._arrays[name]
+    
+    def __len__(self) -> int:
+        return len(self.array("key_hashes"))
+    
+    def document(self, doc: int) -> dict:
+        """Stored id and SEARCH_FIELDS values of a document."""
+        start, end = self.array("record_offsets")[doc:doc + 2].tolist()
+        values = self.array("records")[start:end].tobytes().decode("utf-8").split(FIELD_SEPARATOR)
+        return {column: value or None for column, value in zip(("id", *SEARCH_FIELDS), values)}
+    
+    def term_ranges(self, word: str, prefix: bool) -> list[tuple[int, int, float]]:
+        """
+        Vocabulary ranges (first term id, last term id + 1, weight) a word matches without edits.
+        
+        The word itself comes first, then the longer words it is a prefix of.
+        """
+        vocabulary = self.array("vocabulary")
+        key = word.encode("ascii")
+        # A word longer than the longest indexed one can only match fuzzily
+        if len(key) > vocabulary.itemsize:
+            return []
+        low = int(np.searchsorted(vocabulary, key, side="left"))
+        high = int(np.searchsorted(vocabulary, key, side="right"))
+        ranges = [(low, high, EXACT_WEIGHT)]
+        if prefix and len(key) < vocabulary.itemsize:
+            ranges.append((high, int(np.searchsorted(vocabulary, key + b"\xff", side="left")), PREFIX_WEIGHT))
+        return ranges
+    
+    def has_term(self, word: str, prefix: bool) -> bool:
+        """True if the word (or, with prefix, a word it starts) is in the vocabulary."""
+        return any(first < last for first, last, _ in self.term_ranges(word, prefix))
+    
+    def fuzzy_terms(self, word: str, wanted: np.ndarray) -> list[tuple[int, int]]:
+        """
+        (term id, distance) of indexed words 1..allowed_edits(word) edits away from a word.
+        
+        Args:
+            word: Normalized query word
+            wanted: string_hashes of the word's deletions
+        """
+        edits = allowed_edits(word)
+        hashes = self.array("delete_hashes")
+        starts = np.searchsorted(hashes, wanted, side="left")
+        ends = np.searchsorted(hashes, wanted, side="right")
+        terms = self.array("delete_terms")
+        candidates = {term for start, end in zip(starts.tolist(), ends.tolist()) for term in terms[start:end].tolist()}
+        vocabulary = self.array("vocabulary")
+        found = []
+        for term_id in candidates:
+            distance = edit_distance(word, vocabulary[term_id].decode("ascii"), edits)
+            if 0 < distance <= edits:
+                found.append((term_id, distance))
+        return found
+    
+    def word_scores(self, word: str, field: Optional[str], prefix: bool, fuzzy: Optional[np.ndarray] = None) -> np.ndarray:
+        """
+        Best match score of one query word for every document of the segment.
+        
+        Args:
+            word: Normalized query word
+            field: Only count matches in this field (None for any field)
+            prefix: Also match indexed words that start with the word
+            fuzzy: Deletion hashes of the word, to also match indexed words a few edits away
+        
+        Returns:
+            float32 scores, 0 where the word does not match
+        """
+        ranges = self.term_ranges(word, prefix)
+        if fuzzy is not None:
+            for term_id, distance in self.fuzzy_terms(word, fuzzy):
+                ranges.append((term_id, term_id + 1, FUZZY_WEIGHT / distance))
+        
+        scores = np.zeros(len(self), dtype=np.float32)
+        offsets, postings, fields = self.array("offsets"), self.array("postings"), self.array("fields")
+        mask = FIELD_BITS[field] if field else 0xFF
+        for first, last, weight in ranges:
+            start, end = offsets[first], offsets[last]
+            if start == end:
+                continue
+            weights = BIT_WEIGHTS[fields[start:end] & mask] * weight
+            np.maximum.at(scores, postings[start:end], weights)
+        return scores
+    
+    def search(
+        self, words: list[tuple[Optional[str], str]], prefix: bool, fuzzy: dict[str, np.ndarray]
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        Documents matching every query word.
+        
+        Args:
+            words: (field, word) pairs from parse_query
+            prefix: Match words by prefix
+            fuzzy: Deletion hashes of the words to match fuzzily
+        
+        Returns:
+            (document numbers, scores) of the matches
+        """
+        total = np.zeros(len(self), dtype=np.float32)
+        matched = np.ones(len(self), dtype=bool)
+        for field, word in words:
+            scores = self.word_scores(word, field, prefix, fuzzy.get(word))
+            matched &= scores > 0
+            total += scores
+        if self.deleted is not None:
+            matched &= ~self.deleted
+        docs = np.flatnonzero(matched)
+        return docs, total[docs]
+
+
+def parse_query(query: str) -> list[tuple[Optional[str], str]]:
+    """
+    Split a query into (field, word) pairs.
+    
+    ``field:value`` restricts the words of value to one of SEARCH_FIELDS;
+    other words match any field.
+    """
+    words = []
+    for part in query.split():
+        field, _, value = part.partition(":")
+        if value and field.lower() in SEARCH_FIELDS:
+            words.extend((field.lower(), word) for word in tokenize(value))
+        else:
+            words.extend((None, word) for word in tokenize(part))
+    return words
+
+
+class SearchIndex:
+    """
+    Facility search index on disk.
+    
+    Only the small metadata file is read when the index is opened; segment
+    arrays are memory-mapped by the first query that needs them. Updates
+    keep the files of the generation they replace until the update after,
+    and a query that finds a file gone (the index was updated more than
+    once since it was opened) reopens the index and runs again.
+    
+    Args:
+        path: Index directory (see update_search_index)
+    
+    Raises:
+        FileNotFoundError: If there is no index at path
+        ValueError: If the index has another format version
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.reload()
+    
+    def reload(self) -> None:
+        """Read the current metadata; segments are reopened lazily."""
+        with open(os.path.join(self.path, META_FILE), encoding="utf-8") as f:
+            self.meta = json.load(f)
+        if self.meta.get("format_version") != INDEX_FORMAT_VERSION:
+            raise ValueError(f"{self.path} has index format {self.meta.get('format_version')}, expected {INDEX_FORMAT_VERSION}")
+        self._segments: Optional[list[Segment]] = None
+    
+    def __len__(self) -> int:
+        return self.meta["documents"]
+    
+    @property
+    def segments(self) -> list[Segment]:
+        if self._segments is None:
+            self._segments = [
+                Segment(
+                    os.path.join(self.path, entry["name"]),
+                    np.load(os.path.join(self.path, entry["deleted"])) if entry.get("deleted") else None,
+                )
+                for entry in self.meta["segments"]
+            ]
+        return self._segments
+    
+    def search(self, query: str, limit: int = 10, prefix: bool = True, fuzzy: bool = True) -> list[dict]:
+        """
+        Find facilities matching every word of a query.
+        
+        Exact word matches rank above prefix matches, which rank above fuzzy
+        ones; matches in the name or code rank above matches in the county,
+        constituency or ward. Ties go to the shorter name. A word is only
+        matched fuzzily when nothing in the index matches it as typed.
+        
+        Args:
+            query: Words, optionally restricted as ``field:value``
+            limit: Maximum number of results
+            prefix: Match words by prefix
+            fuzzy: Match words with typos
+        
+        Returns:
+            Results, best first: id, the SEARCH_FIELDS values and score
+        """
+        try:
+            return self._search(query, limit, prefix, fuzzy)
+        except FileNotFoundError:
+            generation = self.meta.get("generation")
+            self.reload()
+            if self.meta.get("generation") == generation:
+                raise
+            logger.info(f"{self.path} was updated to generation {self.meta.get('generation')}; reopened it")
+            return self._search(query, limit, prefix, fuzzy)
+    
+    def _search(self, query: str, limit: int, prefix: bool, fuzzy: bool) -> list[dict]:
+        words = parse_query(query)
+        if not words:
+            return []
+        
+        # Deletion hashes are computed once per word and shared by the segments
+        typos = {}
+        if fuzzy:
+            for _, word in words:
+                if word not in typos and allowed_edits(word) and not any(segment.has_term(word, prefix) for segment in self.segments):
+                    typos[word] = string_hashes(deletions(word, allowed_edits(word)))
+        
+        candidates = []
+        for number, segment in enumerate(self.segments):
+            docs, scores = segment.search(words, prefix, typos)
+            lengths = segment.array("name_lengths")[docs]
+            if len(docs) > limit:
+                # Best score first, then shortest name, as one sort key
+                rank = np.rint(scores * 1000).astype(np.float64) * 10_000 - np.minimum(lengths, 9_999)
+                best = np.argpartition(-rank, limit - 1)[:limit]
+                docs, scores, lengths = docs[best], scores[best], lengths[best]
+            candidates.extend(zip(np.rint(-scores * 1000).tolist(), lengths.tolist(), [number] * len(docs), docs.tolist()))
+        
+        results = []
+        for negative_score, _, number, doc in sorted(candidates)[:limit]:
+            result = self.segments[number].document(doc)
+            result["score"] = -negative_score / 1000
+            results.append(result)
+        return results
+
+
+def live_documents(path: str, meta: dict) -> tuple[np.ndarray, np.ndarray, np.ndarray, np.ndarray]:
+    """
+    Key hashes, content hashes, segment numbers and document numbers of the
+    documents of an index that are not masked out.
+    """
+    keys, contents, segments, docs = [], [], [], []
+    for number, entry in enumerate(meta["segments"]):
+        segment = Segment(os.path.join(path, entry["name"]))
+        live = np.ones(entry["size"], dtype=bool)
+        if entry.get("deleted"):
+            live &= ~np.load(os.path.join(path, entry["deleted"]))
+        positions = np.flatnonzero(live)
+        keys.append(np.asarray(segment.array("key_hashes"))[positions])
+        contents.append(np.asarray(segment.array("content_hashes"))[positions])
+        segments.append(np.full(len(positions), number))
+        docs.append(positions)
+    if not keys:
+        empty = np.zeros(0, dtype=np.uint64)
+        return empty, empty, np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64)
+    return np.concatenate(keys), np.concatenate(contents), np.concatenate(segments), np.concatenate(docs)
+
+
+def meta_files(meta: Optional[dict]) -> set[str]:
+    """Segment directories and deletion masks a metadata dict references."""
+    if not meta:
+        return set()
+    files = {entry["name"] for entry in meta["segments"]}
+    return files | {entry["deleted"] for entry in meta["segments"] if entry.get("deleted")}
+
+
+def write_meta(path: str, meta: dict, keep: Iterable[str] = ()) -> None:
+    """
+    Replace the metadata file atomically, then delete the files nothing references.
+    
+    Args:
+        path: Index directory
+        meta: New metadata
+        keep: Files to keep although the new metadata does not reference them
+            (those of the generation being replaced, for readers that opened it)
+    """
+    meta["updated_at"] = datetime.now(timezone.utc).isoformat(timespec="seconds")
+    with open(os.path.join(path, f"{META_FILE}.tmp"), "w", encoding="utf-8") as f:
+        json.dump(meta, f, indent=2)
+    os.replace(os.path.join(path, f"{META_FILE}.tmp"), os.path.join(path, META_FILE))
+    
+    referenced = {META_FILE} | meta_files(meta) | set(keep)
+    for name in os.listdir(path):
+        if name not in referenced:
+            target = os.path.join(path, name)
+            shutil.rmtree(target) if os.path.isdir(target) else os.remove(target)
+
+
+def update_search_index(path: str, documents: SearchDocuments, full: bool = False) -> dict:
+    """
+    Bring the index at path up to date with a set of facilities.
+    
+    Facilities whose searchable fields are unchanged stay where they are.
+    Changed and new ones are written as a new segment, and replaced or
+    removed ones are masked out. The whole index is rebuilt as one segment
+    when there is no index yet, when ``full`` is set, when the masked and
+    delta documents would exceed MERGE_RATIO of the index, or when it would
+    have more than MAX_SEGMENTS segments.
+    
+    Args:
+        path: Index directory (created if missing)
+        documents: Every facility the index should contain
+        full: Rebuild from scratch
+    
+    Returns:
+        Statistics: mode ("full", "incremental" or "unchanged"), documents,
+        added, changed, removed and segments
+    """
+    meta = None
+    if os.path.exists(os.path.join(path, META_FILE)):
+        with open(os.path.join(path, META_FILE), encoding="utf-8") as f:
+            meta = json.load(f)
+    # New files get the next generation's name, so they never overwrite the current
+    # generation's files; those are kept until the next update for open readers
+    generation = (meta or {}).get("generation", 0) + 1
+    current_files = meta_files(meta)
+    if meta is not None and meta.get("format_version") != INDEX_FORMAT_VERSION:
+        logger.info(f"{path} has index format {meta.get('format_version')}; rebuilding")
+        meta = None
+    if full:
+        meta = None
+    
+    stats = {"mode": "full", "documents": len(documents), "added": len(documents), "changed": 0, "removed": 0}
+    
+    if meta is not None:
+        old_keys, old_contents, old_segments, old_docs = live_documents(path, meta)
+        _, old_common, new_common = np.intersect1d(old_keys, documents.key_hashes, assume_unique=True, return_indices=True)
+        differs = old_contents[old_common] != documents.content_hashes()[new_common]
+        added = np.setdiff1d(np.arange(len(documents)), new_common, assume_unique=True)
+        removed = np.setdiff1d(np.arange(len(old_keys)), old_common, assume_unique=True)
+        masked = np.concatenate([old_common[differs], removed])
+        delta = np.sort(np.concatenate([new_common[differs], added]))
+        stats.update(added=len(added), changed=int(differs.sum()), removed=len(removed))
+        
+        if not len(masked) and not len(delta):
+            stats.update(mode="unchanged", segments=len(meta["segments"]))
+            return stats
+        
+        masked_total = sum(entry["size"] for entry in meta["segments"]) - len(old_keys) + len(masked)
+        segment_count = len(meta["segments"]) + (1 if len(delta) else 0)
+        if (masked_total + len(delta)) <= MERGE_RATIO * max(len(documents), 1) and segment_count <= MAX_SEGMENTS:
+            for number in np.unique(old_segments[masked]).tolist():
+                entry = meta["segments"][number]
+                deleted = np.zeros(entry["size"], dtype=bool)
+                if entry.get("deleted"):
+                    deleted |= np.load(os.path.join(path, entry["deleted"]))
+                deleted[old_docs[masked][old_segments[masked] == number]] = True
+                entry["deleted"] = f"{entry['name']}.deleted-{generation}.npy"
+                np.save(os.path.join(path, entry["deleted"]), deleted)
+            if len(delta):
+                name = f"segment-{generation:06d}"
+                write_segment(documents.subset(delta), os.path.join(path, name))
+                meta["segments"].append({"name": name, "size": len(delta), "deleted": None})
+            meta.update(generation=generation, documents=len(documents))
+            write_meta(path, meta, keep=current_files)
+            stats.update(mode="incremental", segments=len(meta["segments"]))
+            return stats
+    
+    os.makedirs(path, exist_ok=True)
+    name = f"segment-{generation:06d}"
+    write_segment(documents, os.path.join(path, name))
+    meta = {
+        "format_version": INDEX_FORMAT_VERSION,
+        "generation": generation,
+        "documents": len(documents),
+        "fields": list(SEARCH_FIELDS),
+        "segments": [{"name": name, "size": len(documents), "deleted": None}],
+    }
+    write_meta(path, meta, keep=current_files)
+    stats["segments"] = 1
+    return stats
+
+
+def print_results(results: list[dict], elapsed: float) -> None:
+    """Print search results as a compact table."""
+    print(f"🔎 {len(results)} result{'s' if len(results) != 1 else ''} in {elapsed * 1000:.2f} ms")
+    for result in results:
+        admin = ", ".join(value for value in (result["ward"], result["constituency"], result["county"]) if value)
+        print(f"   {result['code'] or '-':>7}  {result['name'] or '-'}  ({admin})  [{result['score']}]")
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build or query the facility search index")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose logging")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    build = commands.add_parser("build", help="Build or update the index of an extract")
+    build.add_argument("extract", help="Facility extract (.xlsx, .csv, .parquet, .feather)")
+    build.add_argument("--index", help=f"Index directory (default: <extract>{INDEX_SUFFIX})")
+    build.add_argument("--full", action="store_true", help="Rebuild from scratch instead of updating")
+    
+    search = commands.add_parser("search", help="Search facilities")
+    search.add_argument("query", nargs="*", help="Query words (field:value restricts a word); read from stdin if omitted")
+    search.add_argument("--index", default=DEFAULT_INDEX_PATH, help=f"Index directory (default: {DEFAULT_INDEX_PATH})")
+    search.add_argument("--limit", type=int, default=10, help="Maximum results (default: 10)")
+    search.add_argument("--no-prefix", action="store_true", help="Only match whole words")
+    search.add_argument("--no-fuzzy", action="store_true", help="Do not match words with typos")
+    search.add_argument("--json", action="store_true", help="Print results as JSON lines")
+    return parser.parse_args()
+
+
+def main() -> int:
+    args = parse_arguments()
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    
+    if args.command == "build":
+        started = time.perf_counter()
+        path = args.index or args.extract + INDEX_SUFFIX
+        stats = update_search_index(path, SearchDocuments.from_extract(args.extract), full=args.full)
+        print(f"💾 {path}: {stats['documents']} facilities, {stats['segments']} segment(s), {stats['mode']} ({time.perf_counter() - started:.2f}s)")
+        if stats["mode"] != "full":
+            print(f"   ➕ {stats['added']} added, ✏️  {stats['changed']} changed, ➖ {stats['removed']} removed")
+        return 0
+    
+    try:
+        index = SearchIndex(args.index)
+    except FileNotFoundError:
+        print(f"❌ No search index at {args.index}; run: python facility_search.py build <extract>")
+        return 1
+    
+    queries = [" ".join(args.query)] if args.query else (line.strip() for line in sys.stdin)
+    for query in queries:
+        if not query:
+            continue
+        started = time.perf_counter()
+        results = index.search(query, args.limit, prefix=not args.no_prefix, fuzzy=not args.no_fuzzy)
+        elapsed = time.perf_counter() - started
+        if args.json:
+            for result in results:
+                print(json.dumps(result))
+        else:
+            print(f"\n{query}")
+            print_results(results, elapsed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
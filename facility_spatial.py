@@ -0,0 +1,847 @@
+#!/usr/bin/env python3
+"""
+Facility Spatial Index
+
+Nearest-facility and radius queries over the coordinates of extracted
+facilities, in bulk: assigning a few hundred thousand member locations to
+their nearest facilities takes seconds instead of the hours a pairwise
+pandas merge would.
+
+The index is built from the flattened facility records
+(flatten_facilities_data, or any extract written by facilities_to_excel.py)
+and saved as one .npz file. Facilities are placed on the unit sphere and
+bucketed into a uniform 3D grid, so queries only compute distances to the
+facilities in nearby grid cells and results are exact great-circle
+distances, without projection or antimeridian special cases.
+
+Attribute filters (KEPH level, operation status, facility type, owner,
+county) are applied before any distance is computed: the matching
+facilities get a grid of their own (built once per filter and cached), so
+a query for Level 4+ operational facilities never looks at a dispensary.
+
+Usage:
+    python facility_spatial.py build kmhfr_facilities.xlsx --out facilities.spatial.npz
+    python facility_spatial.py assign members.csv --index facilities.spatial.npz --out assigned.csv \\
+        --keph-level "Level 4" "Level 5" --status Operational
+    python facility_spatial.py assign members.csv --index facilities.spatial.npz --radius-km 10 --out nearby.csv
+"""
+
+import argparse
+import json
+import logging
+import math
+import os
+import sys
+import time
+from datetime import datetime, timezone
+from typing import Any, Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from facility_diff import (
+    KEY_COLUMN,
+    LABEL_COLUMNS,
+    canonical_value,
+    pack_strings,
+    parse_nested,
+    read_extract,
+    unpack_strings,
+)
+
+logger = logging.getLogger(__name__)
+
+INDEX_FORMAT_VERSION = 1
+DEFAULT_INDEX_SUFFIX = ".spatial.npz"
+
+# Mean Earth radius (IUGG), used for every distance
+EARTH_RADIUS_KM = 6371.0088
+
+# KMHFL sends coordinates as lat_long: [latitude, longitude]; separate columns are used when present
+COORDINATES_COLUMN = "lat_long"
+LATITUDE_COLUMNS = ("latitude", "lat")
+LONGITUDE_COLUMNS = ("longitude", "long", "lon", "lng")
+
+# Facility columns that queries can filter on, by the name used in filters
+FILTER_COLUMNS = {
+    "keph_level": "keph_level_name",
+    "status": "operation_status_name",
+    "facility_type": "facility_type_name",
+    "owner": "owner_name",
+    "county": "county",
+}
+
+# Grid cells are sized so that a cell holds about this many facilities
+TARGET_CELL_FACILITIES = 8
+MIN_CELL_KM = 0.05
+# Point density is measured between these percentiles of the coordinates (outliers excluded)
+EXTENT_PERCENTILES = (1, 99)
+
+# Upper bound on query x candidate distances computed at once
+MAX_PAIRS_PER_CHUNK = 2_000_000
+
+
+def to_unit_vectors(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """Points on the unit sphere (shape (n, 3)) for latitudes/longitudes in degrees."""
+    lat = np.radians(np.asarray(latitudes, dtype=np.float64))
+    lon = np.radians(np.asarray(longitudes, dtype=np.float64))
+    cos_lat = np.cos(lat)
+    return np.column_stack([cos_lat * np.cos(lon), cos_lat * np.sin(lon), np.sin(lat)])
+
+
+def chord_to_km(chord: np.ndarray) -> np.ndarray:
+    """Great-circle distance in km for a straight-line distance between unit vectors."""
+    return 2 * EARTH_RADIUS_KM * np.arcsin(np.minimum(np.asarray(chord) / 2, 1.0))
+
+
+def km_to_chord(km: float) -> float:
+    """Straight-line distance between unit vectors that are ``km`` apart on the surface."""
+    return 2 * math.sin(min(km / EARTH_RADIUS_KM, math.pi) / 2)
+
+
+def valid_coordinates(latitudes: np.ndarray, longitudes: np.ndarray) -> np.ndarray:
+    """
+    Mask of usable coordinates.
+    
+    Missing and out-of-range values are invalid, and so is (0, 0): the
+    registry uses it for facilities that were never geocoded.
+    """
+    with np.errstate(invalid="ignore"):
+        return (
+            np.isfinite(latitudes) & np.isfinite(longitudes)
+            & (np.abs(latitudes) <= 90) & (np.abs(longitudes) <= 180)
+            & ~((latitudes == 0) & (longitudes == 0))
+        )
+
+
+def parse_lat_long(value: Any) -> tuple[float, float]:
+    """
+    Latitude and longitude of one lat_long cell.
+    
+    Args:
+        value: [latitude, longitude] list, or its JSON/repr text as read back from an extract
+    
+    Returns:
+        (latitude, longitude); NaNs if the cell is missing or malformed
+    """
+    value = parse_nested(value)
+    if isinstance(value, (list, tuple)) and len(value) == 2:
+        try:
+            return float(value[0]), float(value[1])
+        except (TypeError, ValueError):
+            pass
+    return math.nan, math.nan
+
+
+def frame_coordinates(df: pd.DataFrame) -> tuple[np.ndarray, np.ndarray]:
+    """
+    Latitudes and longitudes of flattened facility rows.
+    
+    Args:
+        df: Flattened facilities (lat_long, or latitude/longitude columns)
+    
+    Returns:
+        (latitudes, longitudes) as float arrays, NaN where missing
+    
+    Raises:
+        ValueError: If the frame has no coordinate columns
+    """
+    latitude = next((column for column in LATITUDE_COLUMNS if column in df.columns), None)
+    longitude = next((column for column in LONGITUDE_COLUMNS if column in df.columns), None)
+    if latitude and longitude:
+        return (
+            pd.to_numeric(df[latitude], errors="coerce").to_numpy(dtype=np.float64),
+            pd.to_numeric(df[longitude], errors="coerce").to_numpy(dtype=np.float64),
+        )
+    if COORDINATES_COLUMN in df.columns:
+        pairs = [parse_lat_long(value) for value in df[COORDINATES_COLUMN].tolist()]
+        coordinates = np.array(pairs, dtype=np.float64).reshape(-1, 2)
+        return coordinates[:, 0], coordinates[:, 1]
+    raise ValueError(f"No coordinate columns ({COORDINATES_COLUMN!r} or latitude/longitude) in the facility data")
+
+
+def encode_categories(values: Iterable[Any]) -> tuple[np.ndarray, list[str]]:
+    """
+    Categorical codes of an attribute column.
+    
+    Returns:
+        (int32 codes, categories); missing values get code -1
+    """
+    texts = [canonical_value(value) for value in values]
+    categories = sorted({text for text in texts if text is not None})
+    lookup = {category: code for code, category in enumerate(categories)}
+    codes = np.array([lookup.get(text, -1) if text is not None else -1 for text in texts], dtype=np.int32)
+    return codes, categories
+
+
+class SpatialGrid:
+    """
+    Uniform 3D grid over points on the unit sphere.
+    
+    Points are bucketed into cubes with side ``cell`` (a chord length) and
+    stored sorted by cube, so the points of a cube are one slice. Every
+    point within chord distance ``r * cell`` of a query lies in the cubes
+    at most ``r`` steps from the query's cube, which bounds how far a
+    query has to look.
+    
+    Args:
+        vectors: Points from to_unit_vectors, shape (n, 3)
+        cell: Cube side; chosen from the point density if None
+    """
+    
+    def __init__(self, vectors: np.ndarray, cell: Optional[float] = None):
+        self.vectors = np.ascontiguousarray(vectors, dtype=np.float64)
+        self.cell = float(cell) if cell else self.default_cell(self.vectors)
+        # Cube coordinates stay within +-(1 / cell) for the points and within
+        # +-(3 / cell) for the cubes a search visits; the offset keeps them positive
+        self._offset = int(math.ceil(3 / self.cell)) + 2
+        self._span = 2 * self._offset + 1
+        self._deltas: dict[int, np.ndarray] = {}
+        
+        keys = self.cube_keys(self.vectors)
+        self.order = np.argsort(keys, kind="stable")
+        self.sorted_vectors = self.vectors[self.order]
+        self.cell_keys, self.starts, counts = np.unique(keys[self.order], return_index=True, return_counts=True)
+        self.ends = self.starts + counts
+    
+    def __len__(self) -> int:
+        return len(self.vectors)
+    
+    @staticmethod
+    def default_cell(vectors: np.ndarray) -> float:
+        """
+        Cube side that puts about TARGET_CELL_FACILITIES points in an occupied cube.
+        
+        The density is measured inside the EXTENT_PERCENTILES box of the
+        points, so a few swapped or outlying coordinates sit in sparse cubes
+        of their own instead of stretching every cube.
+        """
+        if len(vectors) < 2:
+            return 0.01
+        low, high = np.percentile(vectors, EXTENT_PERCENTILES, axis=0)
+        inside = int(np.all((vectors >= low) & (vectors <= high), axis=1).sum())
+        # The points cover roughly the two largest sides of that box
+        extents = np.sort(high - low)
+        area = max(extents[1] * extents[2], 1e-12)
+        cell = math.sqrt(area * TARGET_CELL_FACILITIES / max(inside, 1))
+        return min(max(cell, km_to_chord(MIN_CELL_KM)), 0.5)
+    
+    def cube_keys(self, vectors: np.ndarray) -> np.ndarray:
+        """One int64 key per point, identifying its cube."""
+        cubes = np.floor(vectors / self.cell).astype(np.int64) + self._offset
+        return (cubes[:, 0] * self._span + cubes[:, 1]) * self._span + cubes[:, 2]
+    
+    def neighbour_deltas(self, steps: int) -> np.ndarray:
+        """Key offsets of the cubes at most ``steps`` away in every axis."""
+        if steps not in self._deltas:
+            axis = np.arange(-steps, steps + 1, dtype=np.int64)
+            di, dj, dk = np.meshgrid(axis, axis, axis, indexing="ij")
+            self._deltas[steps] = ((di * self._span + dj) * self._span + dk).ravel()
+        return self._deltas[steps]
+    
+    def covers_all(self, steps: int) -> bool:
+        """True if searching ``steps`` cubes out would visit (nearly) every occupied cube anyway."""
+        return (2 * steps + 1) ** 3 >= len(self.cell_keys) or steps * self.cell >= 2
+    
+    def candidates(self, key: int, steps: int) -> np.ndarray:
+        """
+        Positions (in sorted order) of the points in the cubes around a cube.
+        
+        Args:
+            key: Cube key of the query
+            steps: Search radius in cubes
+        
+        Returns:
+            Sorted-order positions of the candidate points
+        """
+        if self.covers_all(steps):
+            return np.arange(len(self.vectors))
+        wanted = key + self.neighbour_deltas(steps)
+        found = np.searchsorted(self.cell_keys, wanted)
+        inside = found < len(self.cell_keys)
+        found = found[inside]
+        found = found[self.cell_keys[found] == wanted[inside]]
+        if len(found) == 0:
+            return np.zeros(0, dtype=np.int64)
+        
+        # Concatenate the slices starts[found]:ends[found] without a Python loop
+        starts, counts = self.starts[found], self.ends[found] - self.starts[found]
+        offsets = np.cumsum(counts) - counts
+        return np.repeat(starts - offsets, counts) + np.arange(counts.sum())
+    
+    def _query_groups(self, queries: np.ndarray) -> Iterable[tuple[int, np.ndarray]]:
+        """Yield (cube key, query positions) for every cube that holds queries."""
+        keys = self.cube_keys(queries)
+        order = np.argsort(keys, kind="stable")
+        unique, starts = np.unique(keys[order], return_index=True)
+        ends = np.append(starts[1:], len(order))
+        for key, start, end in zip(unique.tolist(), starts.tolist(), ends.tolist()):
+            yield key, order[start:end]
+    
+    def _distances(self, queries: np.ndarray, positions: np.ndarray) -> np.ndarray:
+        """Chord distances, shape (queries, positions)."""
+        difference = queries[:, None, :] - self.sorted_vectors[positions][None, :, :]
+        return np.sqrt(np.einsum("ijk,ijk->ij", difference, difference))
+    
+    def _keep_nearest(
+        self, chord: np.ndarray, positions: np.ndarray, chunk: np.ndarray, wanted: int,
+        distances: np.ndarray, indices: np.ndarray,
+    ) -> None:
+        """Store the ``wanted`` smallest of each row of ``chord`` (nearest first) for the queries in ``chunk``."""
+        nearest = np.argpartition(chord, wanted - 1, axis=1)[:, :wanted]
+        found = np.take_along_axis(chord, nearest, axis=1)
+        ranked = np.argsort(found, axis=1, kind="stable")
+        distances[chunk, :wanted] = np.take_along_axis(found, ranked, axis=1)
+        indices[chunk, :wanted] = self.order[positions[np.take_along_axis(nearest, ranked, axis=1)]]
+    
+    def _chunks(self, members: np.ndarray, candidates: int) -> Iterable[np.ndarray]:
+        size = max(1, MAX_PAIRS_PER_CHUNK // max(candidates, 1))
+        for start in range(0, len(members), size):
+            yield members[start:start + size]
+    
+    def nearest(self, queries: np.ndarray, k: int = 1) -> tuple[np.ndarray, np.ndarray]:
+        """
+        k nearest points of every query.
+        
+        Args:
+            queries: Query points from to_unit_vectors, shape (m, 3)
+            k: Number of neighbours
+        
+        Returns:
+            (chord distances, point indices), both shape (m, k) and sorted by
+            distance; padded with inf/-1 when there are fewer than k points
+        """
+        distances = np.full((len(queries), k), np.inf)
+        indices = np.full((len(queries), k), -1, dtype=np.int64)
+        wanted = min(k, len(self.vectors))
+        if wanted == 0 or len(queries) == 0:
+            return distances, indices
+        
+        # Queries far from every point (outlying coordinates) would scan all
+        # points one cube at a time; they are collected and scanned together
+        remote = []
+        for key, members in self._query_groups(queries):
+            steps = 1
+            candidates = self.candidates(key, steps)
+            while len(candidates) < wanted and not self.covers_all(steps):
+                steps *= 2
+                candidates = self.candidates(key, steps)
+            if self.covers_all(steps):
+                remote.append(members)
+                continue
+            
+            for chunk in self._chunks(members, len(candidates)):
+                chord = self._distances(queries[chunk], candidates)
+                # Points beyond the searched cubes may still be nearer than the
+                # k-th candidate; widen the search until it covers that distance
+                reach = float(np.partition(chord, wanted - 1, axis=1)[:, wanted - 1].max())
+                if reach > steps * self.cell:
+                    wider_steps = int(math.ceil(reach / self.cell))
+                    if self.covers_all(wider_steps):
+                        remote.append(chunk)
+                        continue
+                    wider = self.candidates(key, wider_steps)
+                    self._keep_nearest(self._distances(queries[chunk], wider), wider, chunk, wanted, distances, indices)
+                else:
+                    self._keep_nearest(chord, candidates, chunk, wanted, distances, indices)
+        
+        if remote:
+            # For unit vectors |q - p|^2 = 2 - 2 q.p, so one matrix product ranks
+            # every point; exact distances are computed for the chosen ones
+            for chunk in self._chunks(np.concatenate(remote), len(self.vectors)):
+                nearest = np.argpartition(-(queries[chunk] @ self.sorted_vectors.T), wanted - 1, axis=1)[:, :wanted]
+                difference = queries[chunk][:, None, :] - self.sorted_vectors[nearest]
+                chord = np.sqrt(np.einsum("ijk,ijk->ij", difference, difference))
+                ranked = np.argsort(chord, axis=1, kind="stable")
+                distances[chunk, :wanted] = np.take_along_axis(chord, ranked, axis=1)
+                indices[chunk, :wanted] = self.order[np.take_along_axis(nearest, ranked, axis=1)]
+        return distances, indices
+    
+    def within(self, queries: np.ndarray, radius: float) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Every point within a chord distance of each query.
+        
+        Args:
+            queries: Query points from to_unit_vectors, shape (m, 3)
+            radius: Chord distance (see km_to_chord)
+        
+        Returns:
+            (query indices, point indices, chord distances) of every match,
+            ordered by query and then distance
+        """
+        steps = max(1, int(math.ceil(radius / self.cell)))
+        matches = []
+        if len(self.vectors) and len(queries):
+            for key, members in self._query_groups(queries):
+                candidates = self.candidates(key, steps)
+                if len(candidates) == 0:
+                    continue
+                for chunk in self._chunks(members, len(candidates)):
+                    chord = self._distances(queries[chunk], candidates)
+                    rows, columns = np.nonzero(chord <= radius)
+                    matches.append((chunk[rows], self.order[candidates[columns]], chord[rows, columns]))
+        if not matches:
+            return np.zeros(0, dtype=np.int64), np.zeros(0, dtype=np.int64), np.zeros(0)
+        
+        query_indices, point_indices, chords = (np.concatenate(parts) for parts in zip(*matches))
+        order = np.lexsort((chords, query_indices))
+        return query_indices[order], point_indices[order], chords[order]
+    
+    def arrays(self) -> dict[str, np.ndarray]:
+        """The grid's arrays, for saving with the index."""
+        return {"grid_order": self.order, "grid_cell_keys": self.cell_keys, "grid_starts": self.starts, "grid_ends": self.ends}
+    
+    @classmethod
+    def from_arrays(cls, vectors: np.ndarray, cell: float, arrays: dict) -> "SpatialGrid":
+        """Rebuild a saved grid without re-sorting its points."""
+        grid = cls.__new__(cls)
+        grid.vectors = np.ascontiguousarray(vectors, dtype=np.float64)
+        grid.cell = cell
+        grid._offset = int(math.ceil(3 / cell)) + 2
+        grid._span = 2 * grid._offset + 1
+        grid._deltas = {}
+        grid.order = arrays["grid_order"]
+        grid.sorted_vectors = grid.vectors[grid.order]
+        grid.cell_keys = arrays["grid_cell_keys"]
+        grid.starts = arrays["grid_starts"]
+        grid.ends = arrays["grid_ends"]
+        return grid
+
+
+class FacilityIndex:
+    """
+    Spatial index over facilities, with attribute filters.
+    
+    Facilities without usable coordinates are left out of the index (and
+    counted in ``skipped``).
+    
+    Args:
+        ids: Facility ids
+        latitudes: Facility latitudes in degrees
+        longitudes: Facility longitudes in degrees
+        attributes: Filterable attribute values per facility, by FILTER_COLUMNS column
+        labels: Label column values per facility (LABEL_COLUMNS), for query results
+        cell_km: Grid cell size in km; chosen from the facility density if None
+    """
+    
+    def __init__(
+        self,
+        ids: list[str],
+        latitudes: np.ndarray,
+        longitudes: np.ndarray,
+        attributes: Optional[dict[str, Iterable[Any]]] = None,
+        labels: Optional[dict[str, Iterable[Any]]] = None,
+        cell_km: Optional[float] = None,
+    ):
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        keep = valid_coordinates(latitudes, longitudes)
+        positions = np.flatnonzero(keep)
+        self.skipped = int(len(keep) - len(positions))
+        
+        self.ids = [str(ids[i]) for i in positions]
+        self.latitudes = latitudes[keep]
+        self.longitudes = longitudes[keep]
+        self.labels = {name: [canonical_value(values[i]) for i in positions] for name, values in self._lists(labels).items()}
+        self.attributes = {
+            column: encode_categories(values[i] for i in positions) for column, values in self._lists(attributes).items()
+        }
+        self.grid = SpatialGrid(to_unit_vectors(self.latitudes, self.longitudes), km_to_chord(cell_km) if cell_km else None)
+        self._subsets: dict[tuple, tuple[SpatialGrid, np.ndarray]] = {}
+    
+    @staticmethod
+    def _lists(columns: Optional[dict[str, Iterable[Any]]]) -> dict[str, list]:
+        return {name: list(values) for name, values in (columns or {}).items()}
+    
+    def __len__(self) -> int:
+        return len(self.ids)
+    
+    @property
+    def cell_km(self) -> float:
+        return float(chord_to_km(self.grid.cell))
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame, cell_km: Optional[float] = None) -> "FacilityIndex":
+        """
+        Index flattened facilities (flatten_facilities_data output or an extract read back).
+        
+        Args:
+            df: Flattened facilities with an id column and coordinates
+            cell_km: Grid cell size in km (automatic if None)
+        
+        Returns:
+            FacilityIndex
+        
+        Raises:
+            ValueError: If the frame has no id or coordinate columns
+        """
+        if KEY_COLUMN not in df.columns:
+            raise ValueError(f"Facility data has no {KEY_COLUMN!r} column")
+        latitudes, longitudes = frame_coordinates(df)
+        index = cls(
+            df[KEY_COLUMN].astype(str).tolist(),
+            latitudes,
+            longitudes,
+            attributes={column: df[column].tolist() for column in FILTER_COLUMNS.values() if column in df.columns},
+            labels={column: df[column].tolist() for column in LABEL_COLUMNS if column in df.columns},
+            cell_km=cell_km,
+        )
+        if index.skipped:
+            logger.warning(f"{index.skipped} of {len(df)} facilities have no usable coordinates and are not indexed")
+        return index
+    
+    @classmethod
+    def from_extract(cls, path: str, cell_km: Optional[float] = None) -> "FacilityIndex":
+        """Read the columns the index needs from an extract and index it."""
+        columns = [KEY_COLUMN, COORDINATES_COLUMN, *LATITUDE_COLUMNS, *LONGITUDE_COLUMNS, *LABEL_COLUMNS, *FILTER_COLUMNS.values()]
+        df = read_extract(path, columns)
+        logger.info(f"Read {len(df)} facilities from {path}")
+        return cls.from_frame(df, cell_km)
+    
+    def save(self, path: str, source: Optional[str] = None) -> None:
+        """
+        Write the index, grid included, to one .npz file (atomically).
+        
+        Args:
+            path: Index path
+            source: Extract the index was built from, recorded in its metadata
+        """
+        meta = {
+            "format_version": INDEX_FORMAT_VERSION,
+            "rows": len(self),
+            "skipped": self.skipped,
+            "cell_chord": self.grid.cell,
+            "labels": list(self.labels),
+            "attributes": {column: len(categories) for column, (_, categories) in self.attributes.items()},
+            "source": source,
+            "created_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        }
+        arrays = {
+            "meta": np.frombuffer(json.dumps(meta).encode("utf-8"), dtype=np.uint8),
+            "ids": pack_strings(self.ids),
+            "latitudes": self.latitudes,
+            "longitudes": self.longitudes,
+            **self.grid.arrays(),
+        }
+        for name, values in self.labels.items():
+            arrays[f"label_{name}"] = pack_strings(values)
+        for column, (codes, categories) in self.attributes.items():
+            arrays[f"attribute_{column}"] = codes
+            arrays[f"categories_{column}"] = pack_strings(categories)
+        
+        with open(f"{path}.tmp", "wb") as f:
+            np.savez(f, **arrays)
+        os.replace(f"{path}.tmp", path)
+    
+    @classmethod
+    def load(cls, path: str) -> "FacilityIndex":
+        """
+        Load an index written by save().
+        
+        Raises:
+            ValueError: If the file has another format version
+        """
+        with np.load(path) as data:
+            meta = json.loads(data["meta"].tobytes())
+            if meta.get("format_version") != INDEX_FORMAT_VERSION:
+                raise ValueError(f"{path} has index format {meta.get('format_version')}, expected {INDEX_FORMAT_VERSION}")
+            
+            rows = meta["rows"]
+            index = cls.__new__(cls)
+            index.skipped = meta["skipped"]
+            index.ids = unpack_strings(data["ids"], rows)
+            index.latitudes = data["latitudes"]
+            index.longitudes = data["longitudes"]
+            index.labels = {
+                name: [value or None for value in unpack_strings(data[f"label_{name}"], rows)] for name in meta["labels"]
+            }
+            index.attributes = {
+                column: (data[f"attribute_{column}"], unpack_strings(data[f"categories_{column}"], count))
+                for column, count in meta["attributes"].items()
+            }
+            index.grid = SpatialGrid.from_arrays(
+                to_unit_vectors(index.latitudes, index.longitudes), meta["cell_chord"], {name: data[name] for name in data.files if name.startswith("grid_")}
+            )
+            index._subsets = {}
+        return index
+    
+    def select(self, filters: Optional[dict[str, Iterable[str]]] = None) -> np.ndarray:
+        """
+        Positions of the facilities that pass the filters.
+        
+        Args:
+            filters: Allowed values per filter (a FILTER_COLUMNS name or column),
+                compared case-insensitively; a facility must pass every filter
+        
+        Returns:
+            Sorted facility positions
+        
+        Raises:
+            ValueError: If a filter names an attribute the index does not have
+        """
+        mask = np.ones(len(self), dtype=bool)
+        for name, allowed in (filters or {}).items():
+            column = FILTER_COLUMNS.get(name, name)
+            if column not in self.attributes:
+                raise ValueError(f"Cannot filter on {name!r}; the index has {sorted(self.attributes) or 'no attributes'}")
+            codes, categories = self.attributes[column]
+            wanted = {str(value).strip().casefold() for value in allowed}
+            matching = [code for code, category in enumerate(categories) if category.casefold() in wanted]
+            mask &= np.isin(codes, matching)
+        return np.flatnonzero(mask)
+    
+    def _grid_for(self, filters: Optional[dict[str, Iterable[str]]]) -> tuple[SpatialGrid, Optional[np.ndarray]]:
+        """The grid to search for a filter, and the facility positions of its points (None for all)."""
+        key = tuple(sorted((name, tuple(sorted(str(value).casefold() for value in allowed))) for name, allowed in (filters or {}).items()))
+        if not key:
+            return self.grid, None
+        if key not in self._subsets:
+            positions = self.select(filters)
+            self._subsets[key] = (SpatialGrid(self.grid.vectors[positions]), positions)
+            if len(positions):
+                logger.debug(f"Filter {dict(key)} matches {len(positions)} of {len(self)} facilities")
+            else:
+                logger.warning(f"Filter {dict(key)} matches none of the {len(self)} facilities")
+        return self._subsets[key]
+    
+    def nearest(
+        self,
+        latitudes: Iterable[float],
+        longitudes: Iterable[float],
+        k: int = 1,
+        filters: Optional[dict[str, Iterable[str]]] = None,
+        max_km: Optional[float] = None,
+    ) -> tuple[np.ndarray, np.ndarray]:
+        """
+        The k nearest facilities of every location.
+        
+        Args:
+            latitudes: Query latitudes in degrees
+            longitudes: Query longitudes in degrees
+            k: Facilities per location
+            filters: Attribute filters (see select)
+            max_km: Leave out facilities further away than this
+        
+        Returns:
+            (distances in km, facility positions), both shape (locations, k) and
+            nearest first; inf/-1 where there is no (or no close enough)
+            facility, and for locations without usable coordinates
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        distances = np.full((len(latitudes), k), np.inf)
+        positions = np.full((len(latitudes), k), -1, dtype=np.int64)
+        
+        grid, subset = self._grid_for(filters)
+        if subset is not None and len(subset) == 0:
+            return distances, positions
+        valid = np.flatnonzero(valid_coordinates(latitudes, longitudes))
+        chords, found = grid.nearest(to_unit_vectors(latitudes[valid], longitudes[valid]), k)
+        if subset is not None:
+            found = np.where(found >= 0, subset[np.maximum(found, 0)], -1)
+        
+        km = chord_to_km(chords)
+        if max_km is not None:
+            far = km > max_km
+            km[far], found[far] = np.inf, -1
+        distances[valid], positions[valid] = km, found
+        return distances, positions
+    
+    def within(
+        self,
+        latitudes: Iterable[float],
+        longitudes: Iterable[float],
+        radius_km: float,
+        filters: Optional[dict[str, Iterable[str]]] = None,
+    ) -> tuple[np.ndarray, np.ndarray, np.ndarray]:
+        """
+        Every facility within a radius of each location.
+        
+        Args:
+            latitudes: Query latitudes in degrees
+            longitudes: Query longitudes in degrees
+            radius_km: Search radius in km
+            filters: Attribute filters (see select)
+        
+        Returns:
+            (location positions, facility positions, distances in km) of every
+            match, ordered by location and then distance
+        """
+        latitudes = np.asarray(latitudes, dtype=np.float64)
+        longitudes = np.asarray(longitudes, dtype=np.float64)
+        grid, subset = self._grid_for(filters)
+        valid = np.flatnonzero(valid_coordinates(latitudes, longitudes))
+        queries, found, chords = grid.within(to_unit_vectors(latitudes[valid], longitudes[valid]), km_to_chord(radius_km))
+        if subset is not None:
+            found = subset[found]
+        return valid[queries], found, chord_to_km(chords)
+    
+    def facility_columns(self, positions: np.ndarray) -> dict[str, list]:
+        """id and label columns (prefixed ``facility_``) for facility positions; None where a position is -1."""
+        columns = {"facility_id": self.ids, **{f"facility_{name}": values for name, values in self.labels.items()}}
+        return {name: [values[i] if i >= 0 else None for i in positions.tolist()] for name, values in columns.items()}
+
+
+def assign_facilities(
+    index: FacilityIndex,
+    locations: pd.DataFrame,
+    lat_column: str = "latitude",
+    lon_column: str = "longitude",
+    k: int = 1,
+    filters: Optional[dict[str, Iterable[str]]] = None,
+    max_km: Optional[float] = None,
+    radius_km: Optional[float] = None,
+) -> pd.DataFrame:
+    """
+    Assign locations (e.g. members) to facilities.
+    
+    With ``radius_km`` every facility within the radius is listed;
+    otherwise the k nearest. Locations with no match keep one row with
+    empty facility columns in nearest mode and are left out in radius mode.
+    
+    Args:
+        index: Facility index
+        locations: Locations, one per row
+        lat_column: Latitude column of locations
+        lon_column: Longitude column of locations
+        k: Facilities per location (nearest mode)
+        filters: Attribute filters (see FacilityIndex.select)
+        max_km: Maximum distance (nearest mode)
+        radius_km: Search radius; switches to radius mode
+    
+    Returns:
+        The location columns, then rank, facility id/labels and distance_km,
+        one row per (location, facility)
+    
+    Raises:
+        ValueError: If the coordinate columns are missing
+    """
+    missing = [column for column in (lat_column, lon_column) if column not in locations.columns]
+    if missing:
+        raise ValueError(f"Location data has no {', '.join(missing)} column; pass the coordinate column names")
+    latitudes = pd.to_numeric(locations[lat_column], errors="coerce").to_numpy(dtype=np.float64)
+    longitudes = pd.to_numeric(locations[lon_column], errors="coerce").to_numpy(dtype=np.float64)
+    
+    if radius_km is not None:
+        rows, facilities, distances = index.within(latitudes, longitudes, radius_km, filters)
+        starts = np.searchsorted(rows, rows, side="left")
+        ranks = np.arange(len(rows)) - starts + 1
+    else:
+        distances, facilities = index.nearest(latitudes, longitudes, k, filters, max_km)
+        rows = np.repeat(np.arange(len(locations)), k)
+        ranks = np.tile(np.arange(1, k + 1), len(locations))
+        distances, facilities = distances.ravel(), facilities.ravel()
+        # Keep rank 1 of unmatched locations so that every location appears
+        keep = (facilities >= 0) | (ranks == 1)
+        rows, ranks, distances, facilities = rows[keep], ranks[keep], distances[keep], facilities[keep]
+    
+    result = locations.iloc[rows].reset_index(drop=True)
+    result["rank"] = np.where(facilities >= 0, ranks, 0)
+    for name, values in index.facility_columns(facilities).items():
+        result[name] = values
+    result["distance_km"] = np.where(facilities >= 0, np.round(distances, 3), np.nan)
+    return result
+
+
+def read_locations(path: str) -> pd.DataFrame:
+    """Read a location table (CSV, Excel, Parquet or Feather, by extension)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".csv":
+        return pd.read_csv(path)
+    if extension == ".parquet":
+        return pd.read_parquet(path)
+    if extension in (".feather", ".arrow"):
+        return pd.read_feather(path)
+    return pd.read_excel(path)
+
+
+def write_table(df: pd.DataFrame, path: str) -> None:
+    """Write a result table (CSV, Excel, Parquet or Feather, by extension)."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".parquet":
+        df.to_parquet(path, index=False)
+    elif extension in (".feather", ".arrow"):
+        df.to_feather(path)
+    elif extension in (".xlsx", ".xls"):
+        df.to_excel(path, index=False)
+    else:
+        df.to_csv(path, index=False)
+
+
+def load_index(path: str, cell_km: Optional[float] = None) -> FacilityIndex:
+    """Load a saved index, or build one from an extract."""
+    if path.endswith(".npz"):
+        return FacilityIndex.load(path)
+    return FacilityIndex.from_extract(path, cell_km)
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build a facility spatial index or assign locations to facilities")
+    parser.add_argument("-v", "--verbose", action="store_true", help="Enable verbose logging")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    build = commands.add_parser("build", help="Index the facilities of an extract")
+    build.add_argument("extract", help="Facility extract (.xlsx, .csv, .parquet, .feather)")
+    build.add_argument("--out", help=f"Index path (default: <extract>{DEFAULT_INDEX_SUFFIX})")
+    build.add_argument("--cell-km", type=float, default=None, help="Grid cell size in km (default: from facility density)")
+    
+    assign = commands.add_parser("assign", help="Assign locations to their nearest facilities")
+    assign.add_argument("locations", help="Locations table (.csv, .xlsx, .parquet, .feather)")
+    assign.add_argument("--index", required=True, help="Saved index (.npz) or a facility extract")
+    assign.add_argument("--out", required=True, help="Result table; the extension picks the format")
+    assign.add_argument("--lat-column", default="latitude", help="Latitude column of the locations (default: latitude)")
+    assign.add_argument("--lon-column", default="longitude", help="Longitude column of the locations (default: longitude)")
+    assign.add_argument("--k", type=int, default=1, help="Nearest facilities per location (default: 1)")
+    assign.add_argument("--max-km", type=float, default=None, help="Ignore facilities further away than this")
+    assign.add_argument("--radius-km", type=float, default=None, help="List every facility within this radius instead")
+    for name, column in FILTER_COLUMNS.items():
+        assign.add_argument(f"--{name.replace('_', '-')}", nargs="+", metavar="VALUE", help=f"Only facilities with these {column} values")
+    
+    args = parser.parse_args()
+    if args.command == "assign" and args.k < 1:
+        parser.error("--k must be at least 1")
+    return args
+
+
+def main() -> int:
+    args = parse_arguments()
+    logging.basicConfig(
+        level=logging.DEBUG if args.verbose else logging.INFO,
+        format="%(asctime)s - %(levelname)s - %(message)s",
+        datefmt="%Y-%m-%d %H:%M:%S",
+    )
+    
+    if args.command == "build":
+        started = time.perf_counter()
+        index = FacilityIndex.from_extract(args.extract, args.cell_km)
+        path = args.out or args.extract + DEFAULT_INDEX_SUFFIX
+        index.save(path, source=args.extract)
+        print(f"💾 {path}: {len(index)} facilities, {index.cell_km:.2f} km cells ({time.perf_counter() - started:.2f}s)")
+        if index.skipped:
+            print(f"   ⚠️ {index.skipped} facilities without coordinates were left out")
+        return 0
+    
+    index = load_index(args.index)
+    filters = {name: getattr(args, name) for name in FILTER_COLUMNS if getattr(args, name)}
+    locations = read_locations(args.locations)
+    
+    started = time.perf_counter()
+    try:
+        result = assign_facilities(
+            index, locations, args.lat_column, args.lon_column, args.k, filters, args.max_km, args.radius_km
+        )
+    except ValueError as e:
+        print(f"❌ {e}")
+        return 1
+    elapsed = time.perf_counter() - started
+    
+    write_table(result, args.out)
+    matched = int(result["facility_id"].notna().sum())
+    print(f"\n📍 {len(locations)} locations against {len(index.select(filters))} of {len(index)} facilities in {elapsed:.2f}s")
+    print(f"   Matches: {matched}")
+    print(f"💾 Wrote {len(result)} rows to {args.out}")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
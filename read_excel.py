@@ -1,42 +1,437 @@
-import pandas as pd
-
-# Path to the Excel file
-excel_file = "Rates.xlsx"
-
-# Read all sheet names
-xl = pd.ExcelFile(excel_file)
-print("=" * 60)
-print("EXCEL FILE ANALYSIS: Rates.xlsx")
-print("=" * 60)
-print(f"\nNumber of sheets: {len(xl.sheet_names)}")
-print(f"Sheet names: {xl.sheet_names}")
-
-# Read and display each sheet
-for sheet_name in xl.sheet_names:
-    print("\n" + "=" * 60)
-    print(f"SHEET: {sheet_name}")
+"""
+Workbook Profiler
+=================
+Profiles every sheet of one or more workbooks (.xlsx) or CSV files in a
+single streaming pass. Each workbook is opened once, read-only, and rows
+are consumed as they are read: per column the profiler keeps counts,
+inferred dtype, min/max/mean/std and a K-minimum-values distinct-count
+sketch, so memory grows with the number of columns, not rows.
+
+The first row of each sheet is the header, as with pd.read_excel.
+
+Usage:
+    python read_excel.py                                   # profile Rates.xlsx
+    python read_excel.py kmhfl_facilities.xlsx --json report.json
+    python read_excel.py a.xlsx b.csv --json -             # JSON on stdout, text report on stderr
+    python read_excel.py a.xlsx b.csv --json - --quiet     # JSON report on stdout only
+"""
+
+import argparse
+import contextlib
+import csv
+import hashlib
+import heapq
+import json
+import math
+import os
+import sys
+import time
+from datetime import date, datetime, timezone
+from typing import Iterable, Iterator, Optional
+
+# Distinct counts are exact up to this many values per column, estimated above
+DISTINCT_SKETCH_SIZE = 1024
+
+# Rows kept per sheet for the text preview
+DEFAULT_PREVIEW_ROWS = 20
+
+HASH_SPACE = float(1 << 64)
+
+
+class DistinctSketch:
+    """
+    K-minimum-values estimate of the number of distinct values.
+    
+    Keeps the k smallest 64-bit hashes seen; with n >= k distinct values the
+    k-th smallest hash h estimates n as (k - 1) / (h / 2**64). Below k the
+    count is exact.
+    
+    Args:
+        k: Number of hashes kept
+    """
+    
+    def __init__(self, k: int = DISTINCT_SKETCH_SIZE):
+        self.k = k
+        self.heap: list[int] = []   # negated hashes: a max-heap of the k smallest
+        self.members: set[int] = set()
+    
+    def add(self, value) -> None:
+        key = value_key(value)
+        h = int.from_bytes(hashlib.blake2b(key.encode("utf-8"), digest_size=8).digest(), "big")
+        if h in self.members:
+            return
+        if len(self.heap) < self.k:
+            heapq.heappush(self.heap, -h)
+            self.members.add(h)
+        elif h < -self.heap[0]:
+            self.members.discard(-heapq.heappushpop(self.heap, -h))
+            self.members.add(h)
+    
+    @property
+    def exact(self) -> bool:
+        return len(self.heap) < self.k
+    
+    def estimate(self) -> int:
+        if self.exact:
+            return len(self.heap)
+        return int(round((self.k - 1) / (-self.heap[0] / HASH_SPACE)))
+
+
+def value_key(value) -> str:
+    """Canonical text of a cell value for hashing (1 and 1.0 count as one value)."""
+    if isinstance(value, float) and value.is_integer():
+        value = int(value)
+    return f"{type(value).__name__}:{value}" if not isinstance(value, (int, float)) else f"num:{value}"
+
+
+class ColumnProfile:
+    """
+    Running statistics of one column.
+    
+    Args:
+        name: Column header
+    """
+    
+    def __init__(self, name: str):
+        self.name = name
+        self.count = 0
+        self.missing = 0
+        self.types: dict[str, int] = {}
+        self.numeric_count = 0
+        self.mean = 0.0
+        self.m2 = 0.0
+        self.minimum = None
+        self.maximum = None
+        self.min_length: Optional[int] = None
+        self.max_length: Optional[int] = None
+        self.distinct = DistinctSketch()
+    
+    def add(self, value) -> None:
+        self.count += 1
+        if value is None or (isinstance(value, str) and not value.strip()) or (isinstance(value, float) and math.isnan(value)):
+            self.missing += 1
+            return
+        
+        kind = cell_type(value)
+        self.types[kind] = self.types.get(kind, 0) + 1
+        self.distinct.add(value)
+        
+        if kind in ("int", "float"):
+            # Welford's online mean and variance
+            self.numeric_count += 1
+            delta = value - self.mean
+            self.mean += delta / self.numeric_count
+            self.m2 += delta * (value - self.mean)
+        
+        if kind == "str":
+            length = len(value)
+            self.min_length = length if self.min_length is None else min(self.min_length, length)
+            self.max_length = length if self.max_length is None else max(self.max_length, length)
+        else:
+            # Range of numbers and dates; text columns report lengths instead
+            try:
+                if self.minimum is None or value < self.minimum:
+                    self.minimum = value
+                if self.maximum is None or value > self.maximum:
+                    self.maximum = value
+            except TypeError:
+                # Numbers mixed with dates: keep the range of the first kind seen
+                pass
+    
+    @property
+    def dtype(self) -> str:
+        """pandas-style dtype the column would load as."""
+        kinds = set(self.types)
+        if not kinds:
+            return "object"
+        if kinds == {"bool"}:
+            return "bool"
+        if kinds == {"int"}:
+            return "float64" if self.missing else "int64"
+        if kinds <= {"int", "float"}:
+            return "float64"
+        if kinds == {"datetime"}:
+            return "datetime64[ns]"
+        return "object"
+    
+    def to_dict(self) -> dict:
+        numeric = self.numeric_count > 0 and self.dtype in ("int64", "float64")
+        std = math.sqrt(self.m2 / (self.numeric_count - 1)) if numeric and self.numeric_count > 1 else None
+        return {
+            "name": self.name,
+            "dtype": self.dtype,
+            "count": self.count - self.missing,
+            "missing": self.missing,
+            "types": self.types,
+            "min": json_value(self.minimum),
+            "max": json_value(self.maximum),
+            "mean": self.mean if numeric else None,
+            "std": std,
+            "min_length": self.min_length,
+            "max_length": self.max_length,
+            "distinct": self.distinct.estimate(),
+            "distinct_exact": self.distinct.exact,
+        }
+
+
+def cell_type(value) -> str:
+    """Classify a cell value as bool, int, float, datetime or str."""
+    if isinstance(value, bool):
+        return "bool"
+    if isinstance(value, int):
+        return "int"
+    if isinstance(value, float):
+        return "float"
+    if isinstance(value, (datetime, date)):
+        return "datetime"
+    return "str"
+
+
+def json_value(value):
+    """Make a min/max value JSON-serializable."""
+    if isinstance(value, (datetime, date)):
+        return value.isoformat()
+    return value
+
+
+class SheetProfile:
+    """
+    Streaming profile of one sheet.
+    
+    Args:
+        name: Sheet name
+        preview_rows: Number of leading rows kept for display
+    """
+    
+    def __init__(self, name: str, preview_rows: int = DEFAULT_PREVIEW_ROWS):
+        self.name = name
+        self.columns: list[ColumnProfile] = []
+        self.rows = 0
+        self.preview: list[tuple] = []
+        self.preview_rows = preview_rows
+        self.seconds = 0.0
+        self.blank_header: list[bool] = []
+    
+    def consume(self, rows: Iterable[tuple]) -> "SheetProfile":
+        """Profile rows; the first one is the header."""
+        started = time.perf_counter()
+        iterator = iter(rows)
+        header = next(iterator, None)
+        if header is not None:
+            self.columns = [ColumnProfile(header_name(value, index)) for index, value in enumerate(header)]
+            self.blank_header = [blank_cell(value) for value in header]
+        
+        for values in iterator:
+            if len(values) > len(self.columns):
+                # Ragged row: earlier rows had no value in the new columns
+                for index in range(len(self.columns), len(values)):
+                    column = ColumnProfile(header_name(None, index))
+                    column.count = column.missing = self.rows
+                    self.columns.append(column)
+                    self.blank_header.append(True)
+            
+            for column, value in zip(self.columns, values):
+                column.add(value)
+            for column in self.columns[len(values):]:
+                column.add(None)
+            
+            if len(self.preview) < self.preview_rows:
+                self.preview.append(tuple(values))
+            self.rows += 1
+        
+        self.trim_columns()
+        self.seconds = time.perf_counter() - started
+        return self
+    
+    def trim_columns(self) -> None:
+        """
+        Drop trailing columns with a blank header and no values.
+        
+        openpyxl pads rows to the sheet's formatted width; pandas (and
+        rate_book.read_sheet_grid) only see the used area.
+        """
+        while self.columns and self.blank_header[len(self.columns) - 1] and self.columns[-1].missing == self.columns[-1].count:
+            self.columns.pop()
+        self.preview = [values[:len(self.columns)] for values in self.preview]
+    
+    def to_dict(self) -> dict:
+        return {
+            "name": self.name,
+            "rows": self.rows,
+            "columns": [column.to_dict() for column in self.columns],
+            "seconds": round(self.seconds, 4),
+        }
+
+
+def blank_cell(value) -> bool:
+    """True for an empty cell (None or whitespace-only text)."""
+    return value is None or (isinstance(value, str) and not value.strip())
+
+
+def header_name(value, index: int) -> str:
+    """Header text (whitespace collapsed), or pandas' "Unnamed: n" for blank header cells."""
+    if blank_cell(value):
+        return f"Unnamed: {index}"
+    return " ".join(str(value).split())
+
+
+def iter_sheets(path: str) -> Iterator[tuple[str, Iterator[tuple]]]:
+    """
+    Open a workbook once and yield (sheet name, row iterator) per sheet.
+    
+    .xlsx/.xlsm files are read with openpyxl in read-only, values-only mode;
+    .csv files are one sheet named after the file.
+    
+    Args:
+        path: Workbook or CSV path
+    
+    Yields:
+        Tuples of (sheet name, iterator of row tuples)
+    """
+    if path.lower().endswith(".csv"):
+        with open(path, newline="", encoding="utf-8") as f:
+            yield os.path.splitext(os.path.basename(path))[0], (tuple(parse_csv_cell(v) for v in row) for row in csv.reader(f))
+        return
+    
+    import openpyxl
+    
+    workbook = openpyxl.load_workbook(path, read_only=True, data_only=True)
+    try:
+        for worksheet in workbook.worksheets:
+            yield worksheet.title, worksheet.iter_rows(values_only=True)
+    finally:
+        workbook.close()
+
+
+def parse_csv_cell(value: str):
+    """Read a CSV cell as int, float or text, as pd.read_csv would infer."""
+    if value == "":
+        return None
+    try:
+        return int(value)
+    except ValueError:
+        pass
+    try:
+        return float(value)
+    except ValueError:
+        return value
+
+
+def profile_workbook(path: str, preview_rows: int = DEFAULT_PREVIEW_ROWS) -> dict:
+    """
+    Profile every sheet of a workbook in one pass.
+    
+    Args:
+        path: Workbook or CSV path
+        preview_rows: Rows kept per sheet for display
+    
+    Returns:
+        Dictionary with path, size, seconds and a list of sheet profiles;
+        the SheetProfile objects are under the "_profiles" key
+    """
+    started = time.perf_counter()
+    profiles = [SheetProfile(name, preview_rows).consume(rows) for name, rows in iter_sheets(path)]
+    return {
+        "path": os.path.abspath(path),
+        "size_bytes": os.path.getsize(path),
+        "seconds": round(time.perf_counter() - started, 4),
+        "sheets": [profile.to_dict() for profile in profiles],
+        "_profiles": profiles,
+    }
+
+
+def print_profile(report: dict) -> None:
+    """Print a workbook profile in the layout of the original analysis script."""
+    print("=" * 60)
+    print(f"EXCEL FILE ANALYSIS: {os.path.basename(report['path'])}")
     print("=" * 60)
+    print(f"\nNumber of sheets: {len(report['sheets'])}")
+    print(f"Sheet names: {[sheet['name'] for sheet in report['sheets']]}")
     
-    df = pd.read_excel(excel_file, sheet_name=sheet_name)
-    
-    print(f"\nShape: {df.shape[0]} rows x {df.shape[1]} columns")
-    print(f"\nColumns: {list(df.columns)}")
-    print(f"\nData Types:\n{df.dtypes}")
-    print(f"\nFirst 20 rows:")
-    print(df.head(20).to_string())
-    
-    # Show basic statistics for numeric columns
-    numeric_cols = df.select_dtypes(include=['number']).columns
-    if len(numeric_cols) > 0:
-        print(f"\nBasic Statistics for Numeric Columns:")
-        print(df[numeric_cols].describe().to_string())
-    
-    # Check for missing values
-    missing = df.isnull().sum()
-    if missing.any():
-        print(f"\nMissing Values:")
-        print(missing[missing > 0])
-
-print("\n" + "=" * 60)
-print("END OF ANALYSIS")
-print("=" * 60)
+    for sheet, profile in zip(report["sheets"], report["_profiles"]):
+        print("\n" + "=" * 60)
+        print(f"SHEET: {sheet['name']}")
+        print("=" * 60)
+        
+        columns = sheet["columns"]
+        print(f"\nShape: {sheet['rows']} rows x {len(columns)} columns")
+        print(f"\nColumns: {[column['name'] for column in columns]}")
+        print("\nData Types:")
+        for column in columns:
+            print(f"   {column['name']:<30} {column['dtype']}")
+        
+        if profile.preview:
+            print(f"\nFirst {len(profile.preview)} rows:")
+            for values in profile.preview:
+                print("   " + " | ".join("" if value is None else str(value) for value in values))
+        
+        numeric = [column for column in columns if column["mean"] is not None]
+        if numeric:
+            print("\nBasic Statistics for Numeric Columns:")
+            for column in numeric:
+                std = f"{column['std']:.4g}" if column["std"] is not None else "-"
+                print(
+                    f"   {column['name']:<30} count={column['count']} mean={column['mean']:.6g} std={std} "
+                    f"min={column['min']} max={column['max']}"
+                )
+        
+        print("\nDistinct Values:")
+        for column in columns:
+            approx = "" if column["distinct_exact"] else "~"
+            print(f"   {column['name']:<30} {approx}{column['distinct']}")
+        
+        missing = [column for column in columns if column["missing"]]
+        if missing:
+            print("\nMissing Values:")
+            for column in missing:
+                print(f"   {column['name']:<30} {column['missing']}")
+        
+        print(f"\n   Profiled in {sheet['seconds']:.3f}s")
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Profile workbooks in one streaming pass")
+    parser.add_argument("workbooks", nargs="*", default=["Rates.xlsx"], help="Workbooks (.xlsx) or CSV files (default: Rates.xlsx)")
+    parser.add_argument("--json", default=None, help="Write the JSON report to this file ('-' for stdout; the text report then goes to stderr)")
+    parser.add_argument("--preview-rows", type=int, default=DEFAULT_PREVIEW_ROWS, help=f"Rows shown per sheet (default: {DEFAULT_PREVIEW_ROWS})")
+    parser.add_argument("--quiet", action="store_true", help="Skip the text report")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    
+    # With the JSON report on stdout, the text report goes to stderr
+    text_output = sys.stderr if args.json == "-" else sys.stdout
+    
+    reports = []
+    with contextlib.redirect_stdout(text_output):
+        for path in args.workbooks:
+            report = profile_workbook(path, 0 if args.quiet else args.preview_rows)
+            if not args.quiet:
+                print_profile(report)
+            reports.append(report)
+        
+        if not args.quiet:
+            print("\n" + "=" * 60)
+            print("END OF ANALYSIS")
+            print("=" * 60)
+    
+    if args.json:
+        document = {
+            "generated_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+            "distinct_sketch_size": DISTINCT_SKETCH_SIZE,
+            "workbooks": [{key: value for key, value in report.items() if key != "_profiles"} for report in reports],
+        }
+        if args.json == "-":
+            json.dump(document, sys.stdout, indent=2, default=str)
+            print()
+        else:
+            with open(args.json, "w", encoding="utf-8") as f:
+                json.dump(document, f, indent=2, default=str)
+            if not args.quiet:
+                print(f"\n💾 JSON report: {args.json}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,384 @@
+"""
+PRMF Bulk Census Pricing
+========================
+Prices a member census (CSV or Parquet) against the premium rate book
+without loading the whole census into memory.
+
+The census is read in chunks; chunks are priced by a pool of worker
+processes (sharing the memory-mapped compiled rate book, or each holding
+a copy of the rate array when it came from Supabase) and written to the
+output in their original order as they complete. Rows that cannot
+be priced (age outside 18-90, unknown family size or option) are written
+to a rejects file with the reason instead of stopping the run. Totals per
+family size and benefit option are printed and saved next to the output.
+
+Usage:
+    python scripts/price_census.py census.csv --out priced.csv
+    python scripts/price_census.py census.parquet --out priced.parquet --workers 8
+    python scripts/price_census.py census.csv --out priced.csv --option option_2 --family-size M
+    python scripts/price_census.py census.csv --out priced.csv --supabase
+"""
+
+import argparse
+import os
+import time
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from typing import Iterator, Optional
+
+import numpy as np
+import pandas as pd
+
+from quote_engine import PREMIUM_DECIMALS, QuoteEngine
+from rate_book import MAX_AGE, MIN_AGE
+from rate_book_cache import open_rate_array
+
+DEFAULT_CHUNK_ROWS = 100_000
+
+# Set in each worker process by init_worker
+_engine: Optional[QuoteEngine] = None
+
+
+def init_worker(rates) -> None:
+    """
+    Process pool initializer: build the worker's quote engine.
+    
+    Args:
+        rates: Path of a compiled rate book (memory-mapped, so all workers
+            share one copy) or the rate array itself
+    """
+    global _engine
+    _engine = QuoteEngine(open_rate_array(rates) if isinstance(rates, str) else rates)
+
+
+def reject_reasons(priced: pd.DataFrame) -> pd.Series:
+    """
+    Explain why each invalid row could not be priced.
+    
+    Args:
+        priced: Output of QuoteEngine.quote_batch
+    
+    Returns:
+        Reason per row (None for valid rows)
+    """
+    age = priced["age"]
+    reasons = np.select(
+        [
+            age.isna().to_numpy(),
+            ((age < MIN_AGE) | (age > MAX_AGE)).fillna(False).to_numpy(dtype=bool),
+            priced["family_size"].isna().to_numpy(),
+            priced["benefit_option"].isna().to_numpy(),
+        ],
+        [
+            "invalid age",
+            f"age outside {MIN_AGE}-{MAX_AGE}",
+            "unknown family size",
+            "unknown benefit option",
+        ],
+        default="no rate",
+    )
+    return pd.Series(np.where(priced["valid"].to_numpy(), None, reasons), index=priced.index, dtype=object)
+
+
+def price_chunk(
+    chunk: pd.DataFrame,
+    age_column: str,
+    family_column: Optional[str],
+    option_column: Optional[str],
+    family_size: Optional[str],
+    option: Optional[str],
+    csv_output: bool = False,
+) -> tuple:
+    """
+    Price one census chunk (runs in a worker process).
+    
+    With ``csv_output`` the priced and rejected rows come back already
+    encoded as CSV text (with a header line), so serialization happens in
+    the workers rather than in the single writing process.
+    
+    Args:
+        chunk: Census rows
+        age_column: Column holding member ages
+        family_column: Column holding family sizes (None to use ``family_size`` for every row)
+        option_column: Column holding benefit options (None to use ``option`` for every row)
+        family_size: Family size for every row when there is no family column
+        option: Benefit option for every row when there is no option column
+        csv_output: Return priced and rejected rows as CSV text instead of DataFrames
+    
+    Returns:
+        Tuple of (priced rows, rejected rows with a reason column, totals per
+        family size and option with the premium total in whole cents)
+    """
+    families = chunk[family_column].to_numpy() if family_column else family_size
+    options = chunk[option_column].to_numpy() if option_column else option
+    quotes = _engine.quote_batch(chunk[age_column].to_numpy(), families, options)
+    quotes.index = chunk.index
+    
+    valid = quotes["valid"].to_numpy()
+    priced = chunk[valid].assign(
+        premium_amount=quotes["premium_amount"][valid],
+        payment_type=quotes["payment_type"][valid],
+    )
+    if not family_column:
+        priced["family_size"] = family_size
+    if not option_column:
+        priced["benefit_option"] = quotes["benefit_option"][valid]
+    
+    rejects = chunk[~valid].assign(reject_reason=reject_reasons(quotes)[~valid])
+    
+    # Sum whole cents so totals add up exactly to the rounded premiums written out
+    totals = (
+        quotes[valid]
+        .assign(premium_cents=np.round(quotes["premium_amount"][valid] * 10 ** PREMIUM_DECIMALS).astype(np.int64))
+        .groupby(["family_size", "benefit_option"], sort=False)["premium_cents"]
+        .agg(members="count", premium_cents="sum")
+        .reset_index()
+    )
+    if csv_output:
+        return priced.to_csv(index=False), rejects.to_csv(index=False) if len(rejects) else "", totals
+    return priced, rejects, totals
+
+
+def iter_census_chunks(path: str, chunk_rows: int) -> Iterator[pd.DataFrame]:
+    """
+    Read a census file in chunks.
+    
+    Args:
+        path: CSV or Parquet census file
+        chunk_rows: Rows per chunk
+    
+    Yields:
+        DataFrames of at most ``chunk_rows`` rows, with a running row index
+    """
+    if path.lower().endswith((".parquet", ".pq")):
+        import pyarrow.parquet as pq
+        
+        offset = 0
+        for batch in pq.ParquetFile(path).iter_batches(batch_size=chunk_rows):
+            chunk = batch.to_pandas()
+            chunk.index = pd.RangeIndex(offset, offset + len(chunk))
+            offset += len(chunk)
+            yield chunk
+    else:
+        yield from pd.read_csv(path, chunksize=chunk_rows)
+
+
+class ChunkWriter:
+    """
+    Appends DataFrame chunks to a CSV or Parquet file.
+    
+    The Parquet writer is opened with the first chunk's schema; later
+    chunks are cast to it. CSV chunks may also be passed as CSV text with a
+    header line, which is written only once, even if the first chunk is empty.
+    
+    Args:
+        path: Output file (.csv, .parquet or .pq)
+    """
+    
+    def __init__(self, path: str):
+        self.path = path
+        self.rows = 0
+        self.header_written = False
+        self.parquet = path.lower().endswith((".parquet", ".pq"))
+        self._writer = None
+        self._schema = None
+        if os.path.exists(path):
+            os.remove(path)
+    
+    def write(self, df, rows: Optional[int] = None) -> None:
+        """
+        Append a chunk.
+        
+        Args:
+            df: DataFrame, or CSV text with a header line (CSV output only)
+            rows: Number of rows in ``df`` (required for CSV text)
+        """
+        if isinstance(df, str):
+            _, _, body = df.partition("\n")
+            with open(self.path, "a", encoding="utf-8", newline="") as f:
+                f.write(body if self.header_written else df)
+            self.header_written = True
+            self.rows += rows
+            return
+        
+        if self.parquet:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+            
+            table = pa.Table.from_pandas(df, schema=self._schema, preserve_index=False)
+            if self._writer is None:
+                self._schema = table.schema
+                self._writer = pq.ParquetWriter(self.path, self._schema)
+            self._writer.write_table(table)
+        else:
+            df.to_csv(self.path, mode="a", header=not self.header_written, index=False)
+            self.header_written = True
+        self.rows += len(df)
+    
+    def close(self) -> None:
+        if self._writer is not None:
+            self._writer.close()
+
+
+def load_engine(args: argparse.Namespace) -> QuoteEngine:
+    """Load the rate book from Supabase (--supabase) or the workbook."""
+    if args.supabase:
+        from dotenv import load_dotenv
+        from supabase import create_client
+        
+        load_dotenv()
+        url, key = os.getenv("SUPABASE_URL"), os.getenv("SUPABASE_SERVICE_KEY")
+        if not url or not key:
+            raise RuntimeError("Missing SUPABASE_URL or SUPABASE_SERVICE_KEY in .env file")
+        print("📖 Loading rate book from Supabase premium_rates...")
+        return QuoteEngine.from_supabase(create_client(url, key))
+    
+    print(f"📖 Loading rate book: {args.rates}")
+    return QuoteEngine.from_workbook(args.rates, args.cache_dir)
+
+
+def price_census(args: argparse.Namespace, engine: QuoteEngine) -> dict:
+    """
+    Stream the census through the worker pool and write the outputs.
+    
+    Args:
+        args: Parsed command-line arguments
+        engine: Loaded quote engine (workers map its compiled file, or get a copy of its array)
+    
+    Returns:
+        Summary with row counts, totals frame, elapsed seconds and output paths
+    """
+    base, _ = os.path.splitext(args.out)
+    rejects_path = args.rejects or f"{base}_rejects.csv"
+    totals_path = args.totals or f"{base}_totals.csv"
+    
+    priced_writer = ChunkWriter(args.out)
+    rejects_writer = ChunkWriter(rejects_path)
+    totals_parts = []
+    rows_in = 0
+    started = time.perf_counter()
+    
+    chunks = iter_census_chunks(args.census, args.chunk_rows)
+    pending: deque = deque()
+    csv_output = not priced_writer.parquet and not rejects_writer.parquet
+    job = (args.age_column, args.family_column, args.option_column, args.family_size, args.option, csv_output)
+    
+    rates = getattr(engine.rates, "filename", None) or engine.rates
+    with ProcessPoolExecutor(max_workers=args.workers, initializer=init_worker, initargs=(rates,)) as pool:
+        
+        def submit_next() -> bool:
+            chunk = next(chunks, None)
+            if chunk is None:
+                return False
+            pending.append((len(chunk), pool.submit(price_chunk, chunk, *job)))
+            return True
+        
+        # Keep a bounded number of chunks in flight so memory stays flat
+        for _ in range(args.workers * 2):
+            if not submit_next():
+                break
+        
+        while pending:
+            rows, future = pending.popleft()
+            priced, rejects, totals = future.result()
+            submit_next()
+            
+            rows_in += rows
+            priced_rows = int(totals["members"].sum())
+            priced_writer.write(priced, priced_rows)
+            if len(rejects):
+                rejects_writer.write(rejects, rows - priced_rows)
+            totals_parts.append(totals)
+            
+            elapsed = time.perf_counter() - started
+            print(f"   Priced {rows_in:,} rows ({rows_in / elapsed:,.0f} rows/sec), {rejects_writer.rows:,} rejected")
+    
+    priced_writer.close()
+    rejects_writer.close()
+    elapsed = time.perf_counter() - started
+    
+    totals = pd.concat(totals_parts) if totals_parts else pd.DataFrame(
+        columns=["family_size", "benefit_option", "members", "premium_cents"]
+    )
+    totals = (
+        totals.groupby(["family_size", "benefit_option"])[["members", "premium_cents"]]
+        .sum()
+        .reset_index()
+    )
+    totals["premium_total"] = (totals.pop("premium_cents") / 10 ** PREMIUM_DECIMALS).round(PREMIUM_DECIMALS)
+    totals.to_csv(totals_path, index=False)
+    
+    return {
+        "rows": rows_in,
+        "priced": priced_writer.rows,
+        "rejected": rejects_writer.rows,
+        "elapsed": elapsed,
+        "totals": totals,
+        "rejects_path": rejects_path if rejects_writer.rows else None,
+        "totals_path": totals_path,
+    }
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Price a member census against the PRMF rate book")
+    parser.add_argument("census", help="Census file (.csv or .parquet)")
+    parser.add_argument("--out", required=True, help="Priced output file (.csv or .parquet)")
+    parser.add_argument("--rejects", help="Rejected rows file (default: <out>_rejects.csv)")
+    parser.add_argument("--totals", help="Totals file (default: <out>_totals.csv)")
+    parser.add_argument("--rates", default="Rates.xlsx", help="Rate workbook (default: Rates.xlsx)")
+    parser.add_argument("--cache-dir", default=None, help="Compiled rate book cache (default: .rate_book_cache next to the workbook)")
+    parser.add_argument("--supabase", action="store_true", help="Load rates from Supabase premium_rates instead")
+    parser.add_argument("--age-column", default="age", help="Census age column (default: age)")
+    parser.add_argument("--family-column", default="family_size", help="Census family size column (default: family_size)")
+    parser.add_argument("--option-column", default="benefit_option", help="Census option column (default: benefit_option)")
+    parser.add_argument("--family-size", default=None, help="Family size for every row (ignores --family-column)")
+    parser.add_argument("--option", default=None, help="Benefit option for every row (ignores --option-column)")
+    parser.add_argument("--chunk-rows", type=int, default=DEFAULT_CHUNK_ROWS, help=f"Rows per chunk (default: {DEFAULT_CHUNK_ROWS})")
+    parser.add_argument("--workers", type=int, default=os.cpu_count() or 1, help="Worker processes (default: CPU count)")
+    args = parser.parse_args()
+    
+    if args.family_size:
+        args.family_column = None
+    if args.option:
+        args.option_column = None
+    args.workers = max(1, args.workers)
+    return args
+
+
+def main():
+    args = parse_arguments()
+    
+    print("=" * 50)
+    print("PRMF Bulk Census Pricing")
+    print("=" * 50)
+    
+    try:
+        engine = load_engine(args)
+    except Exception as e:
+        print(f"❌ Could not load rate book: {e}")
+        return 1
+    
+    print(f"\n💰 Pricing {args.census} with {args.workers} workers ({args.chunk_rows:,} rows per chunk)...")
+    try:
+        summary = price_census(args, engine)
+    except (KeyError, ValueError, OSError) as e:
+        print(f"❌ Pricing failed: {e}")
+        return 1
+    
+    print("\n" + "=" * 50)
+    print("PRICING SUMMARY")
+    print("=" * 50)
+    print(f"Rows read: {summary['rows']:,}")
+    print(f"Priced: {summary['priced']:,} -> {args.out}")
+    if summary["rejects_path"]:
+        print(f"Rejected: {summary['rejected']:,} -> {summary['rejects_path']}")
+    else:
+        print("Rejected: 0")
+    print(f"Elapsed: {summary['elapsed']:.2f}s ({summary['rows'] / max(summary['elapsed'], 1e-9):,.0f} rows/sec)")
+    print(f"\nTotals ({summary['totals_path']}):")
+    print(summary["totals"].to_string(index=False))
+    return 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,328 @@
+"""
+PRMF In-Memory Quote Engine
+===========================
+Loads the premium rate book once into a dense NumPy array indexed by
+(age, family size, benefit option) and prices members without a database
+round trip per quote.
+
+    engine = QuoteEngine.from_excel("Rates.xlsx")
+    engine.quote(45, "M", "option_2")                        # one member
+    engine.quote_batch(ages, family_sizes, options)          # whole arrays at once
+
+Usage:
+    python scripts/quote_engine.py --age 45 --family-size M --option option_2
+"""
+
+import argparse
+import json
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from rate_book import (
+    FAMILY_SIZES,
+    LUMPSUM_MIN_AGE,
+    MAX_AGE,
+    MIN_AGE,
+    OPTION_COLUMNS,
+    PAYMENT_TYPES,
+    RATE_ARRAY_SHAPE,
+    rates_to_array,
+    read_excel_rates,
+)
+from rate_book_cache import load_rate_book
+
+# Display names, as returned by the calculator API
+BENEFIT_OPTION_NAMES = {
+    "option_1": "Option I",
+    "option_2": "Option II",
+    "option_3": "Option III",
+    "option_4": "Option IV",
+}
+
+# Premiums are returned in KES cents, as stored in premium_rates (DECIMAL(15,2))
+PREMIUM_DECIMALS = 2
+
+# Scalar lookups for single quotes
+FAMILY_INDEX = {family_size: index for index, family_size in enumerate(FAMILY_SIZES)}
+OPTION_INDEX = {
+    **{column: index for index, column in enumerate(OPTION_COLUMNS)},
+    **{BENEFIT_OPTION_NAMES[column]: index for index, column in enumerate(OPTION_COLUMNS)},
+    **{index + 1: index for index in range(len(OPTION_COLUMNS))},
+    **{str(index + 1): index for index in range(len(OPTION_COLUMNS))},
+}
+
+
+def encode_family_sizes(family_sizes) -> np.ndarray:
+    """
+    Map family sizes ("M", "M+1") to rate book indices.
+    
+    Args:
+        family_sizes: Array-like of family size strings
+    
+    Returns:
+        int8 array of indices into FAMILY_SIZES, -1 for unknown values
+    """
+    values = np.asarray(family_sizes, dtype=object)
+    codes = np.full(values.shape, -1, dtype=np.int8)
+    for index, family_size in enumerate(FAMILY_SIZES):
+        codes[values == family_size] = index
+    return codes
+
+
+def encode_options(options) -> np.ndarray:
+    """
+    Map benefit options to rate book indices.
+    
+    Accepts option columns ("option_1".."option_4"), display names
+    ("Option I".."Option IV") or option numbers (1-4, as numbers or strings).
+    
+    Args:
+        options: Array-like of benefit options
+    
+    Returns:
+        int8 array of indices into OPTION_COLUMNS, -1 for unknown values
+    """
+    values = np.asarray(options)
+    codes = np.full(values.shape, -1, dtype=np.int8)
+    
+    if values.dtype.kind in "iuf":
+        numbers = values.astype(np.float64)
+        valid = (numbers >= 1) & (numbers <= len(OPTION_COLUMNS)) & (numbers == np.floor(numbers))
+        codes[valid] = numbers[valid].astype(np.int8) - 1
+        return codes
+    
+    values = values.astype(object)
+    for index, column in enumerate(OPTION_COLUMNS):
+        codes[(values == column) | (values == BENEFIT_OPTION_NAMES[column]) | (values == str(index + 1))] = index
+    return codes
+
+
+class QuoteEngine:
+    """
+    Dense, read-only premium table for O(1) and vectorized quotes.
+    
+    ``rates[age, family, option]`` holds the premium in KES for ages 0..MAX_AGE
+    (only MIN_AGE..MAX_AGE are populated), family sizes in FAMILY_SIZES order
+    and options in OPTION_COLUMNS order. Missing entries are NaN.
+    
+    Args:
+        rates: float64 array of RATE_ARRAY_SHAPE (may be a read-only memory map)
+    """
+    
+    def __init__(self, rates: np.ndarray):
+        if rates.shape != RATE_ARRAY_SHAPE:
+            raise ValueError(f"Rate array has shape {rates.shape}, expected {RATE_ARRAY_SHAPE}")
+        
+        # A read-only view, so the caller's array stays writeable
+        self.rates = rates.view()
+        self.rates.setflags(write=False)
+    
+    @classmethod
+    def from_frame(cls, df: pd.DataFrame) -> "QuoteEngine":
+        """
+        Build an engine from a normalized rate frame.
+        
+        Args:
+            df: Frame with age, family_size and option_1..option_4 columns
+                (as returned by read_excel_rates or selected from premium_rates)
+        
+        Returns:
+            QuoteEngine with every row of the frame loaded
+        """
+        return cls(rates_to_array(df))
+    
+    @classmethod
+    def from_excel(cls, file_path: str) -> "QuoteEngine":
+        """Build an engine from Rates.xlsx (see rate_book.read_excel_rates)."""
+        return cls.from_frame(read_excel_rates(file_path))
+    
+    @classmethod
+    def from_workbook(cls, file_path: str, cache_dir: Optional[str] = None) -> "QuoteEngine":
+        """
+        Build an engine from the compiled rate book cache of a workbook.
+        
+        The workbook is only parsed when its contents changed since the last
+        compile; otherwise the cached array is memory-mapped read-only.
+        
+        Args:
+            file_path: Rate workbook (e.g. Rates.xlsx)
+            cache_dir: Compiled rate book directory (default: next to the workbook)
+        
+        Returns:
+            QuoteEngine over the memory-mapped rate array
+        """
+        return cls(load_rate_book(file_path, cache_dir))
+    
+    @classmethod
+    def from_records(cls, records: list[dict]) -> "QuoteEngine":
+        """Build an engine from premium_rates rows (e.g. a Supabase response's ``data``)."""
+        return cls.from_frame(pd.DataFrame.from_records(records))
+    
+    @classmethod
+    def from_supabase(cls, supabase) -> "QuoteEngine":
+        """
+        Build an engine from the premium_rates table in one query.
+        
+        Args:
+            supabase: Supabase client
+        
+        Returns:
+            QuoteEngine loaded with every premium_rates row
+        """
+        columns = ",".join(("age", "family_size") + OPTION_COLUMNS)
+        response = supabase.table("premium_rates").select(columns).execute()
+        return cls.from_records(response.data)
+    
+    @classmethod
+    def from_store(cls, store) -> "QuoteEngine":
+        """
+        Build an engine from premium_rates in any rate store (see rate_storage.py).
+        
+        Args:
+            store: RateStore (Supabase, PostgreSQL or SQLite)
+        
+        Returns:
+            QuoteEngine loaded with every premium_rates row
+        """
+        return cls.from_records(store.fetch_rates(("age", "family_size") + OPTION_COLUMNS))
+    
+    @property
+    def missing(self) -> int:
+        """Number of (age, family size) pairs in MIN_AGE..MAX_AGE without a full set of rates."""
+        book = self.rates[MIN_AGE:MAX_AGE + 1]
+        return int(np.isnan(book).any(axis=2).sum())
+    
+    def quote(self, age: int, family_size: str, option: Union[str, int]) -> dict:
+        """
+        Price one member.
+        
+        Args:
+            age: Member age (MIN_AGE..MAX_AGE)
+            family_size: "M" or "M+1"
+            option: Benefit option ("option_1".."option_4", "Option I".."Option IV" or 1-4)
+        
+        Returns:
+            Dictionary with age, family_size, benefit_option, premium_amount and payment_type
+        
+        Raises:
+            ValueError: If an input is outside the rate book or the rate is missing
+        """
+        if not isinstance(age, (int, np.integer)) or not MIN_AGE <= age <= MAX_AGE:
+            raise ValueError(f"Age must be an integer between {MIN_AGE} and {MAX_AGE}")
+        family = FAMILY_INDEX.get(family_size)
+        if family is None:
+            raise ValueError(f"Family size must be one of: {', '.join(FAMILY_SIZES)}")
+        option_index = OPTION_INDEX.get(option)
+        if option_index is None:
+            raise ValueError(f"Benefit option must be one of: {', '.join(OPTION_COLUMNS)}")
+        
+        premium = self.rates[age, family, option_index]
+        if np.isnan(premium):
+            raise ValueError(f"No premium rate for age {age} and family size {family_size}")
+        
+        return {
+            "age": int(age),
+            "family_size": FAMILY_SIZES[family],
+            "benefit_option": BENEFIT_OPTION_NAMES[OPTION_COLUMNS[option_index]],
+            "premium_amount": round(float(premium), PREMIUM_DECIMALS),
+            "payment_type": "LUMPSUM" if age >= LUMPSUM_MIN_AGE else "ANNUAL",
+        }
+    
+    def price(self, ages: np.ndarray, families: np.ndarray, options: np.ndarray) -> np.ndarray:
+        """
+        Look up premiums for already-encoded inputs.
+        
+        Args:
+            ages: Integer ages
+            families: Family size indices (from encode_family_sizes)
+            options: Option indices (from encode_options)
+        
+        Returns:
+            float64 premiums rounded to PREMIUM_DECIMALS, NaN wherever an
+            input is outside the rate book
+        """
+        ages = np.asarray(ages)
+        valid = (ages >= MIN_AGE) & (ages <= MAX_AGE) & (families >= 0) & (options >= 0)
+        premiums = self.rates[
+            np.where(valid, ages, 0).astype(np.intp),
+            np.where(valid, families, 0),
+            np.where(valid, options, 0),
+        ]
+        premiums[~valid] = np.nan
+        return np.round(premiums, PREMIUM_DECIMALS)
+    
+    def quote_batch(self, ages, family_sizes, options) -> pd.DataFrame:
+        """
+        Price many members at once.
+        
+        Invalid rows (age outside MIN_AGE..MAX_AGE, unknown family size or
+        option, missing rate) are not an error: their premium is NaN and
+        ``valid`` is False.
+        
+        Args:
+            ages: Array-like of ages (non-integer ages are invalid)
+            family_sizes: Array-like of family sizes, or a single value for all rows
+            options: Array-like of benefit options, or a single value for all rows
+        
+        Returns:
+            DataFrame with age, family_size, benefit_option, premium_amount,
+            payment_type and valid columns, one row per input
+        """
+        raw_ages = pd.to_numeric(pd.Series(np.asarray(ages)), errors="coerce").to_numpy(dtype=np.float64)
+        whole = np.isfinite(raw_ages) & (raw_ages == np.floor(np.nan_to_num(raw_ages)))
+        int_ages = np.where(whole, np.nan_to_num(raw_ages), -1).astype(np.int64)
+        
+        families = np.broadcast_to(encode_family_sizes(family_sizes), int_ages.shape)
+        option_codes = np.broadcast_to(encode_options(options), int_ages.shape)
+        
+        premiums = self.price(int_ages, families, option_codes)
+        valid = ~np.isnan(premiums)
+        
+        family_names = np.array(FAMILY_SIZES + (None,), dtype=object)
+        option_names = np.array([BENEFIT_OPTION_NAMES[c] for c in OPTION_COLUMNS] + [None], dtype=object)
+        payment_types = np.array(PAYMENT_TYPES, dtype=object)[(int_ages >= LUMPSUM_MIN_AGE).astype(np.int8)]
+        
+        return pd.DataFrame({
+            "age": pd.arrays.IntegerArray(np.where(whole, int_ages, 0), mask=~whole),
+            "family_size": family_names[families],
+            "benefit_option": option_names[option_codes],
+            "premium_amount": premiums,
+            "payment_type": np.where(valid, payment_types, None),
+            "valid": valid,
+        })
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Quote PRMF premiums from the rate book")
+    parser.add_argument("--rates", default="Rates.xlsx", help="Path to the rate workbook (default: Rates.xlsx)")
+    parser.add_argument("--cache-dir", default=None, help="Compiled rate book cache (default: .rate_book_cache next to the workbook)")
+    parser.add_argument("--age", type=int, required=True, help=f"Member age ({MIN_AGE}-{MAX_AGE})")
+    parser.add_argument("--family-size", choices=FAMILY_SIZES, default="M", help="Family size (default: M)")
+    parser.add_argument(
+        "--option",
+        default=None,
+        help="Benefit option (option_1..option_4); all options are quoted if omitted",
+    )
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    
+    print(f"📖 Loading rate book: {args.rates}")
+    engine = QuoteEngine.from_workbook(args.rates, args.cache_dir)
+    if engine.missing:
+        print(f"   ⚠️ {engine.missing} (age, family size) pairs have no rates")
+    
+    options: list[Optional[str]] = [args.option] if args.option else list(OPTION_COLUMNS)
+    for option in options:
+        try:
+            print(json.dumps(engine.quote(args.age, args.family_size, option)))
+        except ValueError as e:
+            print(f"❌ {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,377 @@
+"""
+PRMF Quote Matrix Artifact
+==========================
+The calculator's whole answer space is 73 ages x 2 family sizes x 4
+options. This module packs it into a small static artifact that an API can
+serve from memory or a CDN with no database round trip:
+
+    quote_matrix-<hash>.bin    binary: 16-byte header + int64 cents, little-endian
+    quote_matrix-<hash>.json   compact JSON with the same cents
+    quote_matrix.json          manifest: etag, sha256 and the two file names
+
+Premiums are stored as whole cents (the DECIMAL(15, 2) of premium_rates),
+so the artifact can be compared byte for byte with the database. The hash
+is the SHA-256 of the binary form and the ETag is derived from it: it only
+changes when a premium does.
+
+Usage:
+    python scripts/quote_matrix.py build --rates Rates.xlsx --out quote_matrix
+    python scripts/quote_matrix.py validate quote_matrix --store sqlite:///rates.db
+    python scripts/quote_matrix.py show quote_matrix --age 45 --family-size M
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import struct
+from typing import Optional, Union
+
+import numpy as np
+import pandas as pd
+
+from rate_book import FAMILY_SIZES, LUMPSUM_MIN_AGE, MAX_AGE, MIN_AGE, OPTION_COLUMNS
+
+MATRIX_FORMAT_VERSION = 1
+MATRIX_MAGIC = b"PRMFQM"
+MANIFEST_NAME = "quote_matrix.json"
+
+# magic, format version, first age, number of ages, family sizes, options, lumpsum age
+HEADER = struct.Struct("<6sHHHBBH")
+HEADER_SIZE = 16
+
+MATRIX_SHAPE = (MAX_AGE - MIN_AGE + 1, len(FAMILY_SIZES), len(OPTION_COLUMNS))
+
+# Cents value of a missing premium
+MISSING = -1
+
+
+def matrix_from_frame(df: pd.DataFrame) -> np.ndarray:
+    """
+    Build the cents matrix from rate rows.
+    
+    Args:
+        df: Frame with age, family_size and option_1..option_4 columns
+            (workbook rows or premium_rates rows)
+    
+    Returns:
+        int64 array of MATRIX_SHAPE, MISSING where there is no rate
+    """
+    cents = np.full(MATRIX_SHAPE, MISSING, dtype=np.int64)
+    
+    ages = pd.to_numeric(df["age"], errors="coerce").fillna(-1).to_numpy(dtype=np.int64)
+    families = df["family_size"].map({family_size: index for index, family_size in enumerate(FAMILY_SIZES)})
+    families = families.fillna(-1).to_numpy(dtype=np.int64)
+    amounts = df[list(OPTION_COLUMNS)].apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    valid = (ages >= MIN_AGE) & (ages <= MAX_AGE) & (families >= 0) & ~np.isnan(amounts).any(axis=1)
+    
+    cents[ages[valid] - MIN_AGE, families[valid]] = np.round(amounts[valid] * 100).astype(np.int64)
+    return cents
+
+
+def matrix_from_rates(rates: np.ndarray) -> np.ndarray:
+    """
+    Build the cents matrix from a dense rate array.
+    
+    Args:
+        rates: float64 array of rate_book.RATE_ARRAY_SHAPE (e.g. QuoteEngine.rates)
+    
+    Returns:
+        int64 array of MATRIX_SHAPE, MISSING where there is no rate
+    """
+    book = np.asarray(rates[MIN_AGE:MAX_AGE + 1], dtype=np.float64)
+    missing = np.isnan(book).any(axis=2, keepdims=True)
+    return np.where(missing, MISSING, np.round(np.nan_to_num(book) * 100)).astype(np.int64)
+
+
+def encode_binary(cents: np.ndarray) -> bytes:
+    """Serialize a cents matrix: header, then int64 little-endian cents in C order."""
+    header = HEADER.pack(
+        MATRIX_MAGIC, MATRIX_FORMAT_VERSION, MIN_AGE, MATRIX_SHAPE[0], MATRIX_SHAPE[1], MATRIX_SHAPE[2], LUMPSUM_MIN_AGE
+    )
+    return header.ljust(HEADER_SIZE, b"\0") + np.ascontiguousarray(cents, dtype="<i8").tobytes()
+
+
+def decode_binary(data: bytes) -> np.ndarray:
+    """
+    Read a binary cents matrix.
+    
+    Raises:
+        ValueError: If the header does not describe this rate book layout
+    """
+    magic, version, min_age, ages, families, options, lumpsum_min_age = HEADER.unpack(data[:HEADER.size])
+    if magic != MATRIX_MAGIC or version != MATRIX_FORMAT_VERSION:
+        raise ValueError(f"Not a version {MATRIX_FORMAT_VERSION} quote matrix")
+    if (min_age, (ages, families, options), lumpsum_min_age) != (MIN_AGE, MATRIX_SHAPE, LUMPSUM_MIN_AGE):
+        raise ValueError(f"Quote matrix layout {min_age}+{(ages, families, options)} does not match the rate book")
+    body = data[HEADER_SIZE:]
+    if len(body) != np.prod(MATRIX_SHAPE) * 8:
+        raise ValueError("Quote matrix is truncated")
+    return np.frombuffer(body, dtype="<i8").reshape(MATRIX_SHAPE).astype(np.int64)
+
+
+def matrix_digest(cents: np.ndarray) -> str:
+    """Hex SHA-256 of the binary form of a cents matrix."""
+    return hashlib.sha256(encode_binary(cents)).hexdigest()
+
+
+def matrix_etag(digest: str) -> str:
+    """HTTP ETag (quoted) for a matrix digest."""
+    return f'"qm{MATRIX_FORMAT_VERSION}-{digest[:32]}"'
+
+
+def encode_json(cents: np.ndarray) -> bytes:
+    """
+    Serialize a cents matrix as compact, canonical JSON.
+    
+    Keys are sorted and there is no whitespace or timestamp, so equal
+    matrices always give identical bytes.
+    """
+    digest = matrix_digest(cents)
+    document = {
+        "format": MATRIX_FORMAT_VERSION,
+        "sha256": digest,
+        "etag": matrix_etag(digest),
+        "currency": "KES",
+        "min_age": MIN_AGE,
+        "max_age": MAX_AGE,
+        "lumpsum_min_age": LUMPSUM_MIN_AGE,
+        "family_sizes": list(FAMILY_SIZES),
+        "options": list(OPTION_COLUMNS),
+        "cents": {family_size: cents[:, index].tolist() for index, family_size in enumerate(FAMILY_SIZES)},
+    }
+    return json.dumps(document, sort_keys=True, separators=(",", ":")).encode("utf-8")
+
+
+def decode_json(data: bytes) -> np.ndarray:
+    """
+    Read a JSON cents matrix and check it against its own sha256.
+    
+    Raises:
+        ValueError: If the layout differs from the rate book or the hash does not match
+    """
+    document = json.loads(data)
+    if document.get("format") != MATRIX_FORMAT_VERSION:
+        raise ValueError(f"Not a version {MATRIX_FORMAT_VERSION} quote matrix")
+    if (document["min_age"], document["max_age"], tuple(document["family_sizes"]), tuple(document["options"])) != (
+        MIN_AGE, MAX_AGE, FAMILY_SIZES, OPTION_COLUMNS
+    ):
+        raise ValueError("Quote matrix layout does not match the rate book")
+    
+    cents = np.stack([np.array(document["cents"][family_size], dtype=np.int64) for family_size in FAMILY_SIZES], axis=1)
+    if cents.shape != MATRIX_SHAPE:
+        raise ValueError(f"Quote matrix has shape {cents.shape}, expected {MATRIX_SHAPE}")
+    if matrix_digest(cents) != document["sha256"]:
+        raise ValueError("Quote matrix content does not match its sha256")
+    return cents
+
+
+def write_atomic(path: str, data: bytes) -> None:
+    """Write a file under a temporary name and rename it into place."""
+    tmp_path = f"{path}.{os.getpid()}.tmp"
+    with open(tmp_path, "wb") as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+
+def write_matrix(cents: np.ndarray, out_dir: str) -> dict:
+    """
+    Write the content-hashed artifact files and point the manifest at them.
+    
+    Hashed files are immutable (same name, same bytes), so they can be
+    cached forever; only the small manifest changes when the rates do.
+    
+    Args:
+        cents: Cents matrix (from matrix_from_frame)
+        out_dir: Output directory
+    
+    Returns:
+        Manifest dictionary (format, sha256, etag, json, bin, missing)
+    """
+    os.makedirs(out_dir, exist_ok=True)
+    digest = matrix_digest(cents)
+    stem = f"quote_matrix-{digest[:16]}"
+    
+    write_atomic(os.path.join(out_dir, f"{stem}.bin"), encode_binary(cents))
+    write_atomic(os.path.join(out_dir, f"{stem}.json"), encode_json(cents))
+    
+    manifest = {
+        "format": MATRIX_FORMAT_VERSION,
+        "sha256": digest,
+        "etag": matrix_etag(digest),
+        "json": f"{stem}.json",
+        "bin": f"{stem}.bin",
+        "missing": int((cents == MISSING).any(axis=2).sum()),
+    }
+    write_atomic(os.path.join(out_dir, MANIFEST_NAME), json.dumps(manifest, indent=2).encode("utf-8"))
+    return manifest
+
+
+class QuoteMatrix:
+    """
+    Loaded quote matrix.
+    
+    Args:
+        cents: int64 cents array of MATRIX_SHAPE
+    """
+    
+    def __init__(self, cents: np.ndarray):
+        if cents.shape != MATRIX_SHAPE:
+            raise ValueError(f"Quote matrix has shape {cents.shape}, expected {MATRIX_SHAPE}")
+        self.cents = cents
+        self.cents.setflags(write=False)
+        self.sha256 = matrix_digest(cents)
+        self.etag = matrix_etag(self.sha256)
+        self._engine = None
+    
+    @classmethod
+    def load(cls, path: str) -> "QuoteMatrix":
+        """
+        Load a matrix from a .bin or .json file, or from a directory's manifest.
+        
+        The content is re-hashed and checked against the manifest (and the
+        JSON's own sha256), so a corrupted or mismatched file is rejected.
+        
+        Args:
+            path: Artifact directory, manifest, .bin or .json file
+        
+        Raises:
+            ValueError: If the artifact is invalid
+        """
+        expected = None
+        if os.path.isdir(path):
+            path = os.path.join(path, MANIFEST_NAME)
+        if os.path.basename(path) == MANIFEST_NAME:
+            with open(path, encoding="utf-8") as f:
+                manifest = json.load(f)
+            expected = manifest["sha256"]
+            path = os.path.join(os.path.dirname(path), manifest["bin"])
+        
+        with open(path, "rb") as f:
+            data = f.read()
+        matrix = cls(decode_json(data) if path.endswith(".json") else decode_binary(data))
+        if expected is not None and matrix.sha256 != expected:
+            raise ValueError(f"{path} does not match the manifest sha256")
+        return matrix
+    
+    def rates(self) -> np.ndarray:
+        """Rates in KES as a float64 array of rate_book.RATE_ARRAY_SHAPE (for QuoteEngine)."""
+        rates = np.full((MAX_AGE + 1,) + MATRIX_SHAPE[1:], np.nan)
+        rates[MIN_AGE:] = np.where(self.cents == MISSING, np.nan, self.cents / 100)
+        return rates
+    
+    @property
+    def engine(self):
+        """QuoteEngine over the matrix (built on first use)."""
+        if self._engine is None:
+            from quote_engine import QuoteEngine
+            self._engine = QuoteEngine(self.rates())
+        return self._engine
+    
+    def quote(self, age: int, family_size: str, option: Union[str, int]) -> dict:
+        """Price one member (same result as QuoteEngine.quote)."""
+        return self.engine.quote(age, family_size, option)
+
+
+def compare_matrices(actual: np.ndarray, expected: np.ndarray) -> list[tuple]:
+    """
+    List the cells where two cents matrices differ.
+    
+    Returns:
+        (age, family_size, option, actual cents, expected cents) tuples
+    """
+    return [
+        (int(age) + MIN_AGE, FAMILY_SIZES[family], OPTION_COLUMNS[option], int(actual[age, family, option]), int(expected[age, family, option]))
+        for age, family, option in zip(*np.nonzero(actual != expected))
+    ]
+
+
+def validate_matrix(path: str, store) -> list[tuple]:
+    """
+    Check an artifact byte for byte against premium_rates.
+    
+    Args:
+        path: Artifact directory, manifest, .bin or .json file
+        store: Rate store (rate_storage.RateStore)
+    
+    Returns:
+        Differing cells (empty if the artifact matches the database)
+    
+    Raises:
+        ValueError: If the artifact itself is invalid
+    """
+    from rate_verification import fetch_rate_rows
+    
+    matrix = QuoteMatrix.load(path)
+    database = matrix_from_frame(fetch_rate_rows(store))
+    if encode_binary(database) == encode_binary(matrix.cents):
+        return []
+    return compare_matrices(matrix.cents, database)
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Build, validate or read the PRMF quote matrix artifact")
+    commands = parser.add_subparsers(dest="command", required=True)
+    
+    build = commands.add_parser("build", help="Build the artifact from a workbook or a rate store")
+    build.add_argument("--rates", default="Rates.xlsx", help="Rate workbook (default: Rates.xlsx)")
+    build.add_argument("--store", default=None, help="Build from this rate store instead of the workbook")
+    build.add_argument("--out", default="quote_matrix", help="Output directory (default: quote_matrix)")
+    
+    validate = commands.add_parser("validate", help="Compare the artifact with premium_rates")
+    validate.add_argument("artifact", help="Artifact directory, manifest, .bin or .json file")
+    validate.add_argument("--store", default=None, help="Rate store (default: $RATE_STORE or supabase)")
+    
+    show = commands.add_parser("show", help="Quote from the artifact")
+    show.add_argument("artifact", help="Artifact directory, manifest, .bin or .json file")
+    show.add_argument("--age", type=int, required=True, help=f"Member age ({MIN_AGE}-{MAX_AGE})")
+    show.add_argument("--family-size", choices=FAMILY_SIZES, default="M", help="Family size (default: M)")
+    show.add_argument("--option", default=None, help="Benefit option (option_1..option_4); all options if omitted")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    
+    if args.command == "build":
+        if args.store:
+            from rate_storage import open_store
+            from rate_verification import fetch_rate_rows
+            
+            with open_store(args.store) as store:
+                frame = fetch_rate_rows(store)
+        else:
+            from rate_book_cache import load_rates_frame
+            
+            frame = load_rates_frame(args.rates)
+        manifest = write_matrix(matrix_from_frame(frame), args.out)
+        print(f"📦 Quote matrix: {os.path.join(args.out, manifest['bin'])}")
+        print(f"   ETag: {manifest['etag']}")
+        if manifest["missing"]:
+            print(f"   ⚠️ {manifest['missing']} (age, family size) pairs have no rates")
+    
+    elif args.command == "validate":
+        from rate_storage import open_store
+        
+        with open_store(args.store) as store:
+            mismatches = validate_matrix(args.artifact, store)
+        if not mismatches:
+            print(f"✅ {args.artifact} matches premium_rates ({QuoteMatrix.load(args.artifact).etag})")
+            return
+        print(f"❌ {len(mismatches)} cells differ from premium_rates:")
+        for age, family_size, option, actual, expected in mismatches[:10]:
+            print(f"   Age {age}, {family_size} {option}: artifact {actual / 100:,.2f}, database {expected / 100:,.2f}")
+        raise SystemExit(1)
+    
+    else:
+        matrix = QuoteMatrix.load(args.artifact)
+        options: list[Optional[str]] = [args.option] if args.option else list(OPTION_COLUMNS)
+        for option in options:
+            try:
+                print(json.dumps(matrix.quote(args.age, args.family_size, option)))
+            except ValueError as e:
+                print(f"❌ {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,341 @@
+"""
+PRMF Rate Book
+==============
+Shared definition of the PRMF premium rate book: the age range, family
+sizes and benefit options it covers, the payment type rule, and the parser
+for the rate tables in Rates.xlsx ('Contribution Amounts').
+
+Used by seed_database.py (import into Supabase) and quote_engine.py
+(in-memory pricing).
+"""
+
+import os
+import re
+from typing import Iterable, Optional, Union
+
+import numpy as np
+import pandas as pd
+
+# Ages covered by the rate book (inclusive)
+MIN_AGE = 18
+MAX_AGE = 90
+
+# Ages from this one up pay a one-time lumpsum; younger members pay annually
+LUMPSUM_MIN_AGE = 61
+
+FAMILY_SIZES = ("M", "M+1")
+OPTION_COLUMNS = ("option_1", "option_2", "option_3", "option_4")
+PAYMENT_TYPES = ("ANNUAL", "LUMPSUM")
+
+# Dense rate array layout: rates[age, family size index, option index]
+RATE_ARRAY_SHAPE = (MAX_AGE + 1, len(FAMILY_SIZES), len(OPTION_COLUMNS))
+
+
+def get_payment_type(age: int) -> str:
+    """Determine payment type based on age."""
+    if age >= LUMPSUM_MIN_AGE:
+        return "LUMPSUM"
+    else:
+        return "ANNUAL"
+
+
+# Header row of a rate block: "Age" followed by one column per option
+RATE_HEADER = ("age", "option i", "option ii", "option iii", "option iv")
+
+# Rows above a header row searched for the block title
+TITLE_SEARCH_ROWS = 3
+
+
+class RateBlock:
+    """
+    One rate table found in a worksheet.
+    
+    Args:
+        source: Workbook path
+        sheet: Worksheet name
+        title: Block title (e.g. "Retirees' Lumpsum Payment - M Only In KES")
+        header_row: 0-based row of the "Age | Option I..IV" header
+        column: 0-based column of the "Age" header cell
+        family_size: "M" or "M+1"
+        payment_type: "LUMPSUM", "ANNUAL" or None (derived from age)
+    """
+    
+    def __init__(
+        self,
+        source: str,
+        sheet: str,
+        title: str,
+        header_row: int,
+        column: int,
+        family_size: str,
+        payment_type: Optional[str],
+    ):
+        self.source = source
+        self.sheet = sheet
+        self.title = title
+        self.header_row = header_row
+        self.column = column
+        self.family_size = family_size
+        self.payment_type = payment_type
+
+
+def normalize_label(value) -> str:
+    """Lower-case a header cell and collapse whitespace (non-strings give '')."""
+    return " ".join(value.split()).lower() if isinstance(value, str) else ""
+
+
+def classify_block_title(title: str) -> tuple[Optional[str], Optional[str]]:
+    """
+    Read the family size and payment type from a block title.
+    
+    Titles look like "Retirees' Lumpsum Payment - M Only" or
+    "Annual Lumpsum Payment - M+1" (the annual tables are also called
+    lumpsum, so "Annual" wins over "Lumpsum").
+    
+    Args:
+        title: Block title text
+    
+    Returns:
+        Tuple of (family size or None, payment type or None)
+    """
+    text = normalize_label(title)
+    
+    family_size = None
+    if re.search(r"\bm\s*\+\s*1\b", text):
+        family_size = "M+1"
+    elif re.search(r"\bm\b", text):
+        family_size = "M"
+    
+    payment_type = None
+    if "retiree" in text:
+        payment_type = "LUMPSUM"
+    elif "annual" in text:
+        payment_type = "ANNUAL"
+    elif "lumpsum" in text:
+        payment_type = "LUMPSUM"
+    
+    return family_size, payment_type
+
+
+def find_rate_blocks(grid: np.ndarray, source: str = "", sheet: str = "") -> list[RateBlock]:
+    """
+    Locate rate blocks in a sheet from their header text.
+    
+    A block starts at an "Age | Option I | Option II | Option III | Option IV"
+    header row; its title is the nearest text above the "Age" cell. Blocks
+    are returned top to bottom, left to right.
+    
+    Args:
+        grid: Sheet values as a 2-D object array
+        source: Workbook path (for messages)
+        sheet: Sheet name (for messages)
+    
+    Returns:
+        List of RateBlock, empty if the sheet has no rate tables
+    """
+    width = len(RATE_HEADER)
+    labels = np.vectorize(normalize_label, otypes=[object])(grid) if grid.size else grid
+    blocks = []
+    
+    for row, column in zip(*np.nonzero(labels == RATE_HEADER[0])):
+        if column + width > grid.shape[1] or tuple(labels[row, column:column + width]) != RATE_HEADER:
+            continue
+        
+        title = next(
+            (grid[r, column] for r in range(row - 1, max(row - 1 - TITLE_SEARCH_ROWS, -1), -1) if labels[r, column]),
+            "",
+        )
+        family_size, payment_type = classify_block_title(title)
+        if family_size is None:
+            print(f"   Warning: Skipping block at {sheet}!R{row + 1}C{column + 1}: no family size in title {title!r}")
+            continue
+        
+        blocks.append(RateBlock(source, sheet, " ".join(str(title).split()), int(row), int(column), family_size, payment_type))
+    
+    return blocks
+
+
+def read_sheet_grid(worksheet) -> np.ndarray:
+    """
+    Load a worksheet's values into a 2-D object array.
+    
+    Rows are streamed from a read-only, values-only worksheet and trailing
+    empty cells are dropped, so only the used area is materialized.
+    
+    Args:
+        worksheet: openpyxl read-only worksheet
+    
+    Returns:
+        Object array of shape (rows, used columns)
+    """
+    rows = []
+    width = 0
+    for values in worksheet.iter_rows(values_only=True):
+        used = len(values)
+        while used and values[used - 1] is None:
+            used -= 1
+        rows.append(values[:used])
+        width = max(width, used)
+    
+    while rows and not rows[-1]:
+        rows.pop()
+    
+    grid = np.full((len(rows), width), None, dtype=object)
+    for index, values in enumerate(rows):
+        grid[index, :len(values)] = values
+    return grid
+
+
+def extract_rate_block(grid: np.ndarray, block: RateBlock) -> pd.DataFrame:
+    """
+    Slice one block's rows out of the sheet grid.
+    
+    The block runs from the row under its header down to the first
+    non-blank age cell that is not a whole number (usually the next block's
+    title) or the end of the sheet. Blank rows inside a block are skipped.
+    
+    Args:
+        grid: Sheet values as a 2-D object array
+        block: Block located by find_rate_blocks
+    
+    Returns:
+        Normalized rows: age, family_size, payment_type, option_1-4
+    """
+    values = grid[block.header_row + 1:, block.column:block.column + len(RATE_HEADER)]
+    ages = pd.to_numeric(pd.Series(values[:, 0]), errors="coerce").to_numpy()
+    
+    is_age = ~np.isnan(ages) & (ages == np.floor(np.nan_to_num(ages)))
+    is_blank = np.array([v is None or (isinstance(v, str) and not v.strip()) for v in values[:, 0]], dtype=bool)
+    stops = np.nonzero(~is_age & ~is_blank)[0]
+    end = int(stops[0]) if len(stops) else len(ages)
+    
+    rows = np.nonzero(is_age[:end])[0]
+    options = pd.DataFrame(values[rows, 1:], columns=list(OPTION_COLUMNS)).apply(pd.to_numeric, errors="coerce")
+    df = pd.DataFrame({
+        "age": ages[rows].astype(np.int64),
+        "family_size": block.family_size,
+    })
+    if block.payment_type:
+        df["payment_type"] = block.payment_type
+    else:
+        df["payment_type"] = np.where(df["age"] >= LUMPSUM_MIN_AGE, "LUMPSUM", "ANNUAL")
+    df = pd.concat([df, options.astype(np.float64)], axis=1)
+    
+    incomplete = df[list(OPTION_COLUMNS)].isna().any(axis=1)
+    for row in rows[incomplete.to_numpy()]:
+        print(f"   Warning: Skipping row {block.header_row + row + 2} ({block.title}): non-numeric premium")
+    
+    return df[~incomplete]
+
+
+def read_excel_rates(
+    file_paths: Union[str, Iterable[str]],
+    sheet_names: Optional[Iterable[str]] = None,
+) -> pd.DataFrame:
+    """
+    Read and transform rate workbooks into a normalized DataFrame.
+    
+    Rate blocks are found from their header text ("Age", "Option I".."Option IV")
+    and titles, not from fixed row numbers, so inserted rows or moved
+    blocks are picked up. Workbooks are opened read-only with values only.
+    If the same (age, family_size) appears more than once, the last block
+    read wins.
+    
+    Args:
+        file_paths: Path to a rate workbook (e.g. Rates.xlsx), or several paths
+        sheet_names: Sheets to read (default: every sheet that contains rate blocks)
+    
+    Returns:
+        DataFrame with columns: age, family_size, payment_type, option_1-4
+    
+    Raises:
+        ValueError: If no rate blocks are found
+    """
+    import openpyxl
+    
+    if isinstance(file_paths, (str, os.PathLike)):
+        file_paths = [file_paths]
+    wanted = set(sheet_names) if sheet_names is not None else None
+    
+    frames = []
+    for file_path in file_paths:
+        workbook = openpyxl.load_workbook(file_path, read_only=True, data_only=True)
+        try:
+            for worksheet in workbook.worksheets:
+                if wanted is not None and worksheet.title not in wanted:
+                    continue
+                
+                grid = read_sheet_grid(worksheet)
+                for block in find_rate_blocks(grid, str(file_path), worksheet.title):
+                    df = extract_rate_block(grid, block)
+                    if df.empty:
+                        continue
+                    print(
+                        f"   Processing {block.family_size} - {block.payment_type or 'by age'} "
+                        f"(ages {df['age'].iloc[0]}-{df['age'].iloc[-1]}) from {worksheet.title}..."
+                    )
+                    frames.append(df)
+        finally:
+            workbook.close()
+    
+    if not frames:
+        raise ValueError(f"No rate blocks found in {', '.join(map(str, file_paths))}")
+    
+    rates = pd.concat(frames, ignore_index=True)
+    duplicated = rates.duplicated(["age", "family_size"], keep="last")
+    if duplicated.any():
+        print(f"   Warning: {int(duplicated.sum())} (age, family_size) rows defined more than once; keeping the last")
+        rates = rates[~duplicated].reset_index(drop=True)
+    return rates
+
+
+def rates_to_array(df: pd.DataFrame) -> np.ndarray:
+    """
+    Pack a normalized rate frame into the dense rate array.
+    
+    Args:
+        df: Frame with age, family_size and option_1..option_4 columns
+    
+    Returns:
+        float64 array of RATE_ARRAY_SHAPE, NaN where the frame has no rate
+    """
+    rates = np.full(RATE_ARRAY_SHAPE, np.nan)
+    
+    ages = df["age"].to_numpy(dtype=np.int64)
+    families = df["family_size"].map({family_size: index for index, family_size in enumerate(FAMILY_SIZES)})
+    families = families.fillna(-1).to_numpy(dtype=np.int64)
+    valid = (ages >= MIN_AGE) & (ages <= MAX_AGE) & (families >= 0)
+    if not valid.all():
+        print(f"   Warning: Ignoring {int((~valid).sum())} rate rows outside the rate book")
+    
+    rates[ages[valid], families[valid]] = df[list(OPTION_COLUMNS)].to_numpy(dtype=np.float64)[valid]
+    return rates
+
+
+def rates_from_array(rates: np.ndarray) -> pd.DataFrame:
+    """
+    Unpack the dense rate array into a normalized rate frame.
+    
+    Rows come out in workbook order (lumpsum then annual, M then M+1, oldest
+    age first), with payment types from get_payment_type.
+    
+    Args:
+        rates: float64 array of RATE_ARRAY_SHAPE
+    
+    Returns:
+        DataFrame with columns: age, family_size, payment_type, option_1-4
+    """
+    frames = []
+    for payment_type, ages in (
+        ("LUMPSUM", np.arange(MAX_AGE, LUMPSUM_MIN_AGE - 1, -1)),
+        ("ANNUAL", np.arange(LUMPSUM_MIN_AGE - 1, MIN_AGE - 1, -1)),
+    ):
+        for family, family_size in enumerate(FAMILY_SIZES):
+            values = np.asarray(rates[ages, family])
+            present = ~np.isnan(values).any(axis=1)
+            block = pd.DataFrame(values[present], columns=list(OPTION_COLUMNS))
+            block.insert(0, "age", ages[present].astype(np.int64))
+            block.insert(1, "family_size", family_size)
+            block.insert(2, "payment_type", payment_type)
+            frames.append(block)
+    return pd.concat(frames, ignore_index=True)
@@ -0,0 +1,209 @@
+"""
+PRMF Compiled Rate Book Cache
+=============================
+Parsing Rates.xlsx (openpyxl + pandas) dominates the start-up of short
+jobs. This module compiles the rate book once into a dense float64 array
+(see rate_book.RATE_ARRAY_SHAPE), stored as a .npy file plus a JSON
+metadata file, keyed by the SHA-256 of the workbook bytes:
+
+    .rate_book_cache/<sha256>-v<format>.npy
+    .rate_book_cache/<sha256>-v<format>.json
+
+Later loads hash the workbook and memory-map the matching .npy read-only,
+so the workbook is only parsed again when its contents change, and every
+process that maps the same file shares one copy of the pages.
+
+Usage:
+    python scripts/rate_book_cache.py Rates.xlsx            # compile (if needed) and report
+    python scripts/rate_book_cache.py Rates.xlsx --rebuild  # force a recompile
+"""
+
+import argparse
+import hashlib
+import json
+import os
+import time
+from datetime import datetime, timezone
+from typing import Optional
+
+import numpy as np
+
+from rate_book import (
+    FAMILY_SIZES,
+    LUMPSUM_MIN_AGE,
+    MAX_AGE,
+    MIN_AGE,
+    OPTION_COLUMNS,
+    RATE_ARRAY_SHAPE,
+    rates_from_array,
+    rates_to_array,
+    read_excel_rates,
+)
+
+# Cache directory name, created next to the workbook unless one is given
+DEFAULT_CACHE_DIRNAME = ".rate_book_cache"
+
+# Bump when the array layout or parser output changes, to invalidate old artifacts
+CACHE_FORMAT_VERSION = 1
+
+
+def file_sha256(path: str) -> str:
+    """Return the hex SHA-256 of a file's contents."""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(1 << 20), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def cache_paths(file_path: str, cache_dir: Optional[str] = None, digest: Optional[str] = None) -> tuple[str, str]:
+    """
+    Locate the compiled artifact of a workbook.
+    
+    Args:
+        file_path: Rate workbook
+        cache_dir: Cache directory (default: .rate_book_cache next to the workbook)
+        digest: Workbook SHA-256, if already computed
+    
+    Returns:
+        Tuple of (.npy path, .json metadata path)
+    """
+    cache_dir = cache_dir or os.path.join(os.path.dirname(os.path.abspath(file_path)), DEFAULT_CACHE_DIRNAME)
+    key = f"{digest or file_sha256(file_path)}-v{CACHE_FORMAT_VERSION}"
+    return os.path.join(cache_dir, f"{key}.npy"), os.path.join(cache_dir, f"{key}.json")
+
+
+def compile_rate_book(file_path: str, cache_dir: Optional[str] = None) -> str:
+    """
+    Parse a workbook and write its compiled artifact.
+    
+    Files are written to temporary names and renamed into place, so a
+    concurrent reader never maps a partial array.
+    
+    Args:
+        file_path: Rate workbook
+        cache_dir: Cache directory (default: .rate_book_cache next to the workbook)
+    
+    Returns:
+        Path of the compiled .npy file
+    """
+    digest = file_sha256(file_path)
+    array_path, meta_path = cache_paths(file_path, cache_dir, digest)
+    os.makedirs(os.path.dirname(array_path), exist_ok=True)
+    
+    started = time.perf_counter()
+    frame = read_excel_rates(file_path)
+    rates = rates_to_array(frame)
+    
+    expected = np.where(frame["age"] >= LUMPSUM_MIN_AGE, "LUMPSUM", "ANNUAL")
+    mismatched = int((frame["payment_type"].to_numpy() != expected).sum())
+    if mismatched:
+        print(f"   Warning: {mismatched} rows have a payment type that differs from the age rule")
+    
+    metadata = {
+        "format_version": CACHE_FORMAT_VERSION,
+        "source": os.path.abspath(file_path),
+        "sha256": digest,
+        "compiled_at": datetime.now(timezone.utc).isoformat(timespec="seconds"),
+        "parse_seconds": round(time.perf_counter() - started, 4),
+        "shape": list(RATE_ARRAY_SHAPE),
+        "dtype": str(rates.dtype),
+        "ages": [MIN_AGE, MAX_AGE],
+        "lumpsum_min_age": LUMPSUM_MIN_AGE,
+        "family_sizes": list(FAMILY_SIZES),
+        "options": list(OPTION_COLUMNS),
+        "rows": int(len(frame)),
+        "missing": int(np.isnan(rates[MIN_AGE:MAX_AGE + 1]).any(axis=2).sum()),
+    }
+    
+    suffix = f".{os.getpid()}.tmp"
+    with open(array_path + suffix, "wb") as f:
+        np.save(f, rates)
+    with open(meta_path + suffix, "w", encoding="utf-8") as f:
+        json.dump(metadata, f, indent=2)
+    os.replace(meta_path + suffix, meta_path)
+    os.replace(array_path + suffix, array_path)
+    return array_path
+
+
+def load_rate_book(file_path: str, cache_dir: Optional[str] = None, rebuild: bool = False) -> np.ndarray:
+    """
+    Load a workbook's rate array, compiling it first if needed.
+    
+    Args:
+        file_path: Rate workbook
+        cache_dir: Cache directory (default: .rate_book_cache next to the workbook)
+        rebuild: Recompile even if a matching artifact exists
+    
+    Returns:
+        Read-only memory-mapped float64 array of RATE_ARRAY_SHAPE
+    """
+    array_path, meta_path = cache_paths(file_path, cache_dir)
+    if rebuild or not (os.path.exists(array_path) and os.path.exists(meta_path)):
+        array_path = compile_rate_book(file_path, cache_dir)
+    return open_rate_array(array_path)
+
+
+def open_rate_array(array_path: str) -> np.ndarray:
+    """
+    Memory-map a compiled rate array read-only.
+    
+    Args:
+        array_path: Compiled .npy file
+    
+    Returns:
+        Read-only memory-mapped array
+    
+    Raises:
+        ValueError: If the file does not hold a rate array
+    """
+    rates = np.load(array_path, mmap_mode="r")
+    if rates.shape != RATE_ARRAY_SHAPE or rates.dtype != np.float64:
+        raise ValueError(f"{array_path} holds a {rates.dtype} array of shape {rates.shape}, not a rate book")
+    return rates
+
+
+def load_rates_frame(file_path: str, cache_dir: Optional[str] = None):
+    """
+    Load a workbook's normalized rate frame through the compiled cache.
+    
+    Same columns and row order as rate_book.read_excel_rates.
+    
+    Args:
+        file_path: Rate workbook
+        cache_dir: Cache directory (default: .rate_book_cache next to the workbook)
+    
+    Returns:
+        DataFrame with columns: age, family_size, payment_type, option_1-4
+    """
+    return rates_from_array(load_rate_book(file_path, cache_dir))
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Compile Rates.xlsx into a memory-mappable rate book")
+    parser.add_argument("workbook", nargs="?", default="Rates.xlsx", help="Rate workbook (default: Rates.xlsx)")
+    parser.add_argument("--cache-dir", default=None, help="Cache directory (default: .rate_book_cache next to the workbook)")
+    parser.add_argument("--rebuild", action="store_true", help="Recompile even if the workbook is unchanged")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    
+    started = time.perf_counter()
+    rates = load_rate_book(args.workbook, args.cache_dir, rebuild=args.rebuild)
+    elapsed = time.perf_counter() - started
+    
+    array_path, meta_path = cache_paths(args.workbook, args.cache_dir)
+    with open(meta_path, encoding="utf-8") as f:
+        metadata = json.load(f)
+    
+    print(f"📦 Rate book: {array_path}")
+    print(f"   Source: {metadata['source']} (sha256 {metadata['sha256'][:12]}...)")
+    print(f"   Compiled: {metadata['compiled_at']} (parse took {metadata['parse_seconds']:.3f}s)")
+    print(f"   Rows: {metadata['rows']}, missing (age, family size) pairs: {metadata['missing']}")
+    print(f"   Loaded {rates.shape} {rates.dtype} array in {elapsed * 1000:.1f} ms")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,259 @@
+"""
+PRMF Rate Verification
+======================
+Checks the premium_rates table from a single fetch of the rate columns:
+
+- completeness: one row for every age 18-90 x family size (M, M+1)
+- no duplicate (age, family_size) rows and no rows outside the rate book
+- payment types follow the age rule (LUMPSUM from 61, ANNUAL below)
+- premiums match the source workbook, compared in cents via a checksum
+  and, when the checksums differ, row by row
+
+Used by seed_database.py (after an import) and verify_database.py, against
+any rate store (see rate_storage.py).
+"""
+
+import hashlib
+from typing import Optional
+
+import numpy as np
+import pandas as pd
+
+from rate_book import FAMILY_SIZES, LUMPSUM_MIN_AGE, MAX_AGE, MIN_AGE, OPTION_COLUMNS
+
+# Columns fetched from premium_rates for verification
+VERIFY_COLUMNS = ("age", "family_size", "payment_type") + OPTION_COLUMNS
+
+# Premiums are stored as DECIMAL(15, 2); checks compare whole cents
+CENTS = 100
+
+
+def fetch_rate_rows(store) -> pd.DataFrame:
+    """
+    Fetch the columns verification needs from premium_rates in one request.
+    
+    Args:
+        store: Rate store (rate_storage.RateStore)
+    
+    Returns:
+        DataFrame with VERIFY_COLUMNS, one row per table row
+    """
+    return pd.DataFrame(store.fetch_rates(VERIFY_COLUMNS), columns=list(VERIFY_COLUMNS))
+
+
+def to_cents(values) -> np.ndarray:
+    """Convert premiums (numbers or numeric strings) to int64 cents, -1 where missing."""
+    amounts = pd.DataFrame(values).apply(pd.to_numeric, errors="coerce").to_numpy(dtype=np.float64)
+    return np.where(np.isnan(amounts), -1, np.round(amounts * CENTS)).astype(np.int64)
+
+
+def rates_checksum(df: pd.DataFrame) -> str:
+    """
+    Hash the rate rows independently of row order and number formatting.
+    
+    Rows are sorted by (age, family_size) and premiums hashed as whole
+    cents, so the table and the workbook hash alike when their values do.
+    
+    Args:
+        df: Frame with VERIFY_COLUMNS
+    
+    Returns:
+        Hex SHA-256 of the canonical rows
+    """
+    rows = df.sort_values(["age", "family_size"], kind="stable")
+    cents = to_cents(rows[list(OPTION_COLUMNS)])
+    digest = hashlib.sha256()
+    for (age, family_size, payment_type), amounts in zip(
+        rows[["age", "family_size", "payment_type"]].itertuples(index=False, name=None), cents
+    ):
+        digest.update(f"{int(age)}|{family_size}|{payment_type}|{'|'.join(map(str, amounts))}\n".encode())
+    return digest.hexdigest()
+
+
+class RateVerification:
+    """
+    Results of verifying premium_rates rows.
+    
+    Attributes:
+        total: Number of rows checked
+        family_counts: Rows per family size
+        payment_counts: Rows per payment type
+        missing: (age, family_size) pairs of the rate book with no row
+        duplicates: (age, family_size) pairs with more than one row
+        unexpected: (age, family_size) pairs outside the rate book
+        payment_errors: (age, family_size, actual, expected) payment type mismatches
+        checksum: Checksum of the rows
+        expected_checksum: Checksum of the workbook rows (None if not compared)
+        value_mismatches: (age, family_size, option, actual, expected) premium mismatches
+        samples: A few rows for display (ages 90, 60 and 18)
+    """
+    
+    def __init__(self):
+        self.total = 0
+        self.family_counts: dict = {}
+        self.payment_counts: dict = {}
+        self.missing: list[tuple] = []
+        self.duplicates: list[tuple] = []
+        self.unexpected: list[tuple] = []
+        self.payment_errors: list[tuple] = []
+        self.checksum = ""
+        self.expected_checksum: Optional[str] = None
+        self.value_mismatches: list[tuple] = []
+        self.samples: list[dict] = []
+    
+    @property
+    def expected_count(self) -> int:
+        return (MAX_AGE - MIN_AGE + 1) * len(FAMILY_SIZES)
+    
+    @property
+    def complete(self) -> bool:
+        return not (self.missing or self.duplicates or self.unexpected)
+    
+    @property
+    def values_match(self) -> Optional[bool]:
+        """Whether premiums match the workbook (None if no workbook was given)."""
+        if self.expected_checksum is None:
+            return None
+        return self.checksum == self.expected_checksum
+    
+    @property
+    def passed(self) -> bool:
+        return self.complete and not self.payment_errors and self.values_match is not False
+
+
+def verify_rates(rows: pd.DataFrame, expected: Optional[pd.DataFrame] = None) -> RateVerification:
+    """
+    Run every premium_rates check over one set of rows.
+    
+    Args:
+        rows: Table rows with VERIFY_COLUMNS (from fetch_rate_rows)
+        expected: Workbook rows to compare premiums against (e.g. from
+            rate_book_cache.load_rates_frame), or None to skip value checks
+    
+    Returns:
+        RateVerification with the results of all checks
+    """
+    result = RateVerification()
+    rows = rows.assign(age=pd.to_numeric(rows["age"], errors="coerce").fillna(-1).astype(np.int64))
+    result.total = len(rows)
+    result.family_counts = rows["family_size"].value_counts().to_dict()
+    result.payment_counts = rows["payment_type"].value_counts().to_dict()
+    
+    present = set(zip(rows["age"].tolist(), rows["family_size"].tolist()))
+    result.missing = [
+        (age, family_size)
+        for age in range(MIN_AGE, MAX_AGE + 1)
+        for family_size in FAMILY_SIZES
+        if (age, family_size) not in present
+    ]
+    duplicated = rows.duplicated(["age", "family_size"])
+    result.duplicates = sorted(set(rows.loc[duplicated, ["age", "family_size"]].itertuples(index=False, name=None)))
+    in_book = rows["age"].between(MIN_AGE, MAX_AGE) & rows["family_size"].isin(FAMILY_SIZES)
+    result.unexpected = sorted(set(rows.loc[~in_book, ["age", "family_size"]].itertuples(index=False, name=None)))
+    
+    expected_types = np.where(rows["age"] >= LUMPSUM_MIN_AGE, "LUMPSUM", "ANNUAL")
+    wrong = rows["payment_type"].to_numpy() != expected_types
+    result.payment_errors = [
+        (age, family_size, actual, should)
+        for (age, family_size, actual), should in zip(
+            rows.loc[wrong, ["age", "family_size", "payment_type"]].itertuples(index=False, name=None),
+            expected_types[wrong],
+        )
+    ]
+    
+    result.checksum = rates_checksum(rows)
+    if expected is not None:
+        result.expected_checksum = rates_checksum(expected)
+        if result.checksum != result.expected_checksum:
+            result.value_mismatches = compare_values(rows, expected)
+    
+    samples = rows[rows["age"].isin([90, 60, 18])].sort_values(["age", "family_size"], ascending=[False, True])
+    result.samples = samples.head(6).to_dict("records")
+    return result
+
+
+def compare_values(rows: pd.DataFrame, expected: pd.DataFrame) -> list[tuple]:
+    """
+    List premiums that differ from the workbook, in cents.
+    
+    Args:
+        rows: Table rows with VERIFY_COLUMNS
+        expected: Workbook rows with VERIFY_COLUMNS
+    
+    Returns:
+        (age, family_size, option, actual, expected) tuples; rows present on
+        only one side are reported by the completeness checks instead
+    """
+    merged = expected[["age", "family_size"] + list(OPTION_COLUMNS)].merge(
+        rows.drop_duplicates(["age", "family_size"], keep="last")[["age", "family_size"] + list(OPTION_COLUMNS)],
+        on=["age", "family_size"],
+        suffixes=("_expected", ""),
+    )
+    actual = to_cents(merged[list(OPTION_COLUMNS)])
+    wanted = to_cents(merged[[f"{column}_expected" for column in OPTION_COLUMNS]])
+    
+    mismatches = []
+    for row, column in zip(*np.nonzero(actual != wanted)):
+        mismatches.append((
+            int(merged["age"].iloc[row]),
+            merged["family_size"].iloc[row],
+            OPTION_COLUMNS[column],
+            actual[row, column] / CENTS,
+            wanted[row, column] / CENTS,
+        ))
+    return mismatches
+
+
+def summarize_ages(ages: list) -> str:
+    """Summarize a list of ages into ranges."""
+    if not ages:
+        return "None"
+    
+    ages = sorted(ages)
+    if len(ages) <= 5:
+        return str(ages)
+    
+    return f"Ages {ages[0]}-{ages[-1]} ({len(ages)} ages)"
+
+
+def print_verification(result: RateVerification) -> None:
+    """Print a verification report."""
+    print(f"\n📋 Expected records: {result.expected_count}")
+    print(f"✅ Found records: {result.total}")
+    for family_size in FAMILY_SIZES:
+        print(f"   - {family_size}: {result.family_counts.get(family_size, 0)}")
+    for payment_type in ("LUMPSUM", "ANNUAL"):
+        print(f"   - {payment_type}: {result.payment_counts.get(payment_type, 0)}")
+    print(f"❌ Missing records: {len(result.missing)}")
+    
+    if result.missing:
+        print("\n⚠️ Missing age/family_size combinations:")
+        m_missing = [age for age, fs in result.missing if fs == 'M']
+        m1_missing = [age for age, fs in result.missing if fs == 'M+1']
+        if m_missing:
+            print(f"   M (Principal Only): {summarize_ages(m_missing)}")
+        if m1_missing:
+            print(f"   M+1 (Principal + Spouse): {summarize_ages(m1_missing)}")
+    if result.duplicates:
+        print(f"⚠️ Duplicate age/family_size rows: {result.duplicates[:10]}")
+    if result.unexpected:
+        print(f"⚠️ Rows outside the rate book: {result.unexpected[:10]}")
+    
+    if result.payment_errors:
+        print(f"❌ Found {len(result.payment_errors)} records with incorrect payment_type:")
+        for age, family_size, actual, expected in result.payment_errors[:10]:
+            print(f"   Age {age}, {family_size}: has '{actual}', should be '{expected}'")
+    else:
+        print("✅ All payment types are correct!")
+    
+    print(f"\n🔐 Checksum: {result.checksum[:16]}...")
+    if result.values_match is None:
+        print("   (no workbook given; premiums not compared)")
+    elif result.values_match:
+        print("✅ Premiums match the workbook")
+    else:
+        print(f"❌ Workbook checksum {result.expected_checksum[:16]}... differs")
+        for age, family_size, option, actual, expected in result.value_mismatches[:10]:
+            print(f"   Age {age}, {family_size} {option}: KES {actual:,.2f}, workbook KES {expected:,.2f}")
+        if len(result.value_mismatches) > 10:
+            print(f"   ... {len(result.value_mismatches) - 10} more")
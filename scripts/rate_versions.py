@@ -0,0 +1,420 @@
+"""
+PRMF Versioned Rate Books
+=========================
+Keeps every rate book with the dates it applies to and prices quotes as of
+any date. Versions are stacked into one array,
+
+    rates[version, age, family size, option]
+
+and each quote date is resolved to its version with a binary search over
+the sorted effective_from dates (np.searchsorted), so a batch that spans
+many versions is priced with the same single fancy-indexing gather as a
+batch against one rate book.
+
+Versions come from the rate_book_versions / premium_rate_history tables
+(see rate_versions.sql; seed_database.py --effective-from imports them) or
+from a JSON manifest of workbooks:
+
+    {"versions": [
+        {"version": "2024", "workbook": "Rates_2024.xlsx", "effective_from": "2024-01-01"},
+        {"version": "2025", "workbook": "Rates.xlsx", "effective_from": "2025-01-01"}
+    ]}
+
+Usage:
+    python scripts/rate_versions.py --manifest rate_versions.json --date 2024-06-30 --age 45
+    python scripts/rate_versions.py --store sqlite:///rates.db --date 2024-06-30 --age 45 --family-size M+1
+"""
+
+import argparse
+import json
+import os
+from datetime import date
+from typing import Iterable, Optional
+
+import numpy as np
+import pandas as pd
+
+from quote_engine import BENEFIT_OPTION_NAMES, PREMIUM_DECIMALS, QuoteEngine, encode_family_sizes, encode_options
+from rate_book import (
+    FAMILY_SIZES,
+    LUMPSUM_MIN_AGE,
+    MAX_AGE,
+    MIN_AGE,
+    OPTION_COLUMNS,
+    PAYMENT_TYPES,
+    RATE_ARRAY_SHAPE,
+    rates_to_array,
+)
+from rate_book_cache import file_sha256, load_rate_book
+from rate_storage import HISTORY_TABLE, VERSIONS_TABLE, WRITE_COLUMNS, RateStore
+
+VERSION_COLUMNS = ("version", "effective_from", "effective_to", "source", "sha256")
+
+# End of an open-ended version
+OPEN_END = np.datetime64("9999-12-31", "D")
+
+
+def to_days(values) -> np.ndarray:
+    """Convert dates (strings, date objects, datetime64) to datetime64[D]; NaT where unparseable."""
+    if isinstance(values, np.ndarray) and values.dtype.kind == "M":
+        return values.astype("datetime64[D]")
+    return pd.to_datetime(pd.Series(np.asarray(values, dtype=object)), errors="coerce").to_numpy().astype("datetime64[D]")
+
+
+class RateVersion:
+    """
+    One rate book and the dates it applies to.
+    
+    Args:
+        version: Version label (e.g. "2025")
+        effective_from: First day the rates apply
+        effective_to: Day the next version takes over (exclusive), or None if open-ended
+        rates: float64 array of RATE_ARRAY_SHAPE
+        source: Workbook the rates came from
+        sha256: Workbook checksum
+    """
+    
+    def __init__(
+        self,
+        version: str,
+        effective_from,
+        effective_to,
+        rates: np.ndarray,
+        source: Optional[str] = None,
+        sha256: Optional[str] = None,
+    ):
+        if rates.shape != RATE_ARRAY_SHAPE:
+            raise ValueError(f"Rate array of version {version} has shape {rates.shape}, expected {RATE_ARRAY_SHAPE}")
+        self.version = str(version)
+        self.effective_from = to_days([effective_from])[0]
+        self.effective_to = to_days([effective_to])[0] if effective_to is not None else None
+        self.rates = rates
+        self.source = source
+        self.sha256 = sha256
+        if np.isnat(self.effective_from):
+            raise ValueError(f"Version {version} has no valid effective_from date")
+
+
+class VersionedRateBook:
+    """
+    Rate book versions indexed by their effective dates.
+    
+    Versions are sorted by effective_from. A version without an explicit
+    effective_to ends where the next one starts (the last one is open-ended).
+    Overlapping versions are rejected.
+    
+    Args:
+        versions: RateVersion objects, in any order
+    
+    Raises:
+        ValueError: If there are no versions, or two versions overlap
+    """
+    
+    def __init__(self, versions: Iterable[RateVersion]):
+        versions = sorted(versions, key=lambda v: v.effective_from)
+        if not versions:
+            raise ValueError("No rate book versions")
+        
+        starts = np.array([v.effective_from for v in versions], dtype="datetime64[D]")
+        ends = np.array([
+            v.effective_to if v.effective_to is not None
+            else (versions[i + 1].effective_from if i + 1 < len(versions) else OPEN_END)
+            for i, v in enumerate(versions)
+        ], dtype="datetime64[D]")
+        
+        overlaps = np.nonzero(ends[:-1] > starts[1:])[0]
+        if len(overlaps):
+            i = int(overlaps[0])
+            raise ValueError(f"Rate book versions {versions[i].version} and {versions[i + 1].version} overlap")
+        if (ends <= starts).any():
+            raise ValueError("A rate book version ends before it starts")
+        
+        self.versions = versions
+        self.starts = starts
+        self.ends = ends
+        self.rates = np.stack([v.rates for v in versions])
+        self.rates.setflags(write=False)
+        self.labels = np.array([v.version for v in versions] + [None], dtype=object)
+    
+    @classmethod
+    def from_manifest(cls, manifest_path: str, cache_dir: Optional[str] = None) -> "VersionedRateBook":
+        """
+        Load versions from a JSON manifest of workbooks.
+        
+        Workbook paths are relative to the manifest. Each workbook goes
+        through the compiled rate book cache (rate_book_cache.py).
+        
+        Args:
+            manifest_path: Manifest file
+            cache_dir: Compiled rate book directory (default: next to each workbook)
+        
+        Returns:
+            VersionedRateBook over the listed workbooks
+        """
+        with open(manifest_path, encoding="utf-8") as f:
+            manifest = json.load(f)
+        
+        base = os.path.dirname(os.path.abspath(manifest_path))
+        versions = []
+        for entry in manifest["versions"]:
+            workbook = os.path.join(base, entry["workbook"])
+            versions.append(RateVersion(
+                entry["version"],
+                entry["effective_from"],
+                entry.get("effective_to"),
+                load_rate_book(workbook, cache_dir),
+                source=workbook,
+                sha256=file_sha256(workbook),
+            ))
+        return cls(versions)
+    
+    @classmethod
+    def from_store(cls, store: RateStore) -> "VersionedRateBook":
+        """
+        Load every version from rate_book_versions and premium_rate_history.
+        
+        Two reads: the version list and all history rows.
+        
+        Args:
+            store: Rate store
+        
+        Returns:
+            VersionedRateBook with every stored version
+        """
+        versions = store.fetch_rows(VERSIONS_TABLE, VERSION_COLUMNS)
+        history = pd.DataFrame(
+            store.fetch_rows(HISTORY_TABLE, ("version",) + WRITE_COLUMNS),
+            columns=["version"] + list(WRITE_COLUMNS),
+        )
+        
+        frames = {label: frame for label, frame in history.groupby("version")}
+        return cls([
+            RateVersion(
+                row["version"],
+                row["effective_from"],
+                row.get("effective_to"),
+                rates_to_array(frames.get(row["version"], history.iloc[:0])),
+                source=row.get("source"),
+                sha256=row.get("sha256"),
+            )
+            for row in versions
+        ])
+    
+    def resolve(self, quote_dates) -> np.ndarray:
+        """
+        Find the version in force on each date.
+        
+        Args:
+            quote_dates: Array-like of dates
+        
+        Returns:
+            int64 version indices, -1 where no version applies
+        """
+        days = to_days(quote_dates)
+        index = np.searchsorted(self.starts, days, side="right") - 1
+        clipped = np.clip(index, 0, len(self.versions) - 1)
+        valid = (index >= 0) & ~np.isnat(days) & (days < self.ends[clipped])
+        return np.where(valid, index, -1)
+    
+    def engine_as_of(self, quote_date) -> QuoteEngine:
+        """
+        Quote engine for the version in force on one date.
+        
+        Raises:
+            ValueError: If no version applies on that date
+        """
+        index = int(self.resolve([quote_date])[0])
+        if index < 0:
+            raise ValueError(f"No rate book version applies on {quote_date}")
+        return QuoteEngine(self.rates[index])
+    
+    def price(self, versions: np.ndarray, ages: np.ndarray, families: np.ndarray, options: np.ndarray) -> np.ndarray:
+        """
+        Look up premiums for already-resolved versions and encoded inputs.
+        
+        Args:
+            versions: Version indices (from resolve)
+            ages: Integer ages
+            families: Family size indices (from encode_family_sizes)
+            options: Option indices (from encode_options)
+        
+        Returns:
+            float64 premiums rounded to PREMIUM_DECIMALS, NaN wherever an
+            input is invalid
+        """
+        ages = np.asarray(ages)
+        valid = (versions >= 0) & (ages >= MIN_AGE) & (ages <= MAX_AGE) & (families >= 0) & (options >= 0)
+        premiums = self.rates[
+            np.where(valid, versions, 0),
+            np.where(valid, ages, 0).astype(np.intp),
+            np.where(valid, families, 0),
+            np.where(valid, options, 0),
+        ]
+        premiums[~valid] = np.nan
+        return np.round(premiums, PREMIUM_DECIMALS)
+    
+    def quote_batch(self, quote_dates, ages, family_sizes, options) -> pd.DataFrame:
+        """
+        Price many members, each against the rate book in force on its quote date.
+        
+        Same output as QuoteEngine.quote_batch plus quote_date and
+        rate_version; rows whose date has no version are invalid.
+        
+        Args:
+            quote_dates: Array-like of dates, or a single date for all rows
+            ages: Array-like of ages
+            family_sizes: Array-like of family sizes, or a single value for all rows
+            options: Array-like of benefit options, or a single value for all rows
+        
+        Returns:
+            DataFrame with quote_date, rate_version, age, family_size,
+            benefit_option, premium_amount, payment_type and valid columns
+        """
+        raw_ages = pd.to_numeric(pd.Series(np.asarray(ages)), errors="coerce").to_numpy(dtype=np.float64)
+        whole = np.isfinite(raw_ages) & (raw_ages == np.floor(np.nan_to_num(raw_ages)))
+        int_ages = np.where(whole, np.nan_to_num(raw_ages), -1).astype(np.int64)
+        
+        days = np.broadcast_to(to_days(np.atleast_1d(quote_dates)), int_ages.shape)
+        versions = self.resolve(days)
+        families = np.broadcast_to(encode_family_sizes(family_sizes), int_ages.shape)
+        option_codes = np.broadcast_to(encode_options(options), int_ages.shape)
+        
+        premiums = self.price(versions, int_ages, families, option_codes)
+        valid = ~np.isnan(premiums)
+        
+        family_names = np.array(FAMILY_SIZES + (None,), dtype=object)
+        option_names = np.array([BENEFIT_OPTION_NAMES[c] for c in OPTION_COLUMNS] + [None], dtype=object)
+        payment_types = np.array(PAYMENT_TYPES, dtype=object)[(int_ages >= LUMPSUM_MIN_AGE).astype(np.int8)]
+        
+        return pd.DataFrame({
+            "quote_date": days,
+            "rate_version": self.labels[versions],
+            "age": pd.arrays.IntegerArray(np.where(whole, int_ages, 0), mask=~whole),
+            "family_size": family_names[families],
+            "benefit_option": option_names[option_codes],
+            "premium_amount": premiums,
+            "payment_type": np.where(valid, payment_types, None),
+            "valid": valid,
+        })
+
+
+def plan_version_row(existing: list[dict], version: str, effective_from, effective_to=None,
+                     source: Optional[str] = None, sha256: Optional[str] = None) -> dict:
+    """
+    Check a version being imported against the stored ones and build its row.
+    
+    effective_to is only stored when given; otherwise a version runs until
+    the next one starts, so versions can be added in any order (including
+    back-filled between two existing ones).
+    
+    Args:
+        existing: Current rate_book_versions rows
+        version: Label of the version being imported
+        effective_from: Its first day
+        effective_to: Its end (exclusive), or None
+        source: Workbook path
+        sha256: Workbook checksum
+    
+    Returns:
+        rate_book_versions row (VERSION_COLUMNS) with ISO date strings
+    
+    Raises:
+        ValueError: If the dates are invalid or the version would overlap another one
+    """
+    start = to_days([effective_from])[0]
+    end = to_days([effective_to])[0] if effective_to else None
+    if np.isnat(start) or (end is not None and (np.isnat(end) or end <= start)):
+        raise ValueError(f"Invalid effective dates for version {version}: {effective_from} to {effective_to}")
+    
+    for row in existing:
+        if row["version"] == version:
+            continue
+        row_start = to_days([row["effective_from"]])[0]
+        row_end = to_days([row["effective_to"]])[0] if row.get("effective_to") else None
+        if row_start == start:
+            raise ValueError(f"Version {row['version']} already starts on {start}")
+        if row_start < start and row_end is not None and row_end > start:
+            raise ValueError(f"Version {version} starting {start} falls inside version {row['version']} ({row_start} to {row_end})")
+        if start < row_start and end is not None and end > row_start:
+            raise ValueError(f"Version {version} ({start} to {end}) overlaps version {row['version']} starting {row_start}")
+    
+    return {
+        "version": version,
+        "effective_from": str(start),
+        "effective_to": str(end) if end is not None else None,
+        "source": source,
+        "sha256": sha256,
+    }
+
+
+def version_in_force(rows: list[dict], on) -> Optional[str]:
+    """
+    Label of the version in force on a date, from rate_book_versions rows.
+    
+    Args:
+        rows: rate_book_versions rows
+        on: Date
+    
+    Returns:
+        Version label, or None if no version applies
+    """
+    if not rows:
+        return None
+    rows = sorted(rows, key=lambda row: to_days([row["effective_from"]])[0])
+    starts = to_days([row["effective_from"] for row in rows])
+    day = to_days([on])[0]
+    index = int(np.searchsorted(starts, day, side="right")) - 1
+    if index < 0:
+        return None
+    end = rows[index].get("effective_to")
+    if end and day >= to_days([end])[0]:
+        return None
+    return rows[index]["version"]
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Quote PRMF premiums as of a date from versioned rate books")
+    source = parser.add_mutually_exclusive_group(required=True)
+    source.add_argument("--manifest", help="JSON manifest of rate workbooks and their effective dates")
+    source.add_argument("--store", help="Rate store with rate_book_versions (supabase, postgresql://..., sqlite:///path)")
+    parser.add_argument("--cache-dir", default=None, help="Compiled rate book cache (default: .rate_book_cache next to each workbook)")
+    parser.add_argument("--date", default=str(date.today()), help="Quote date (default: today)")
+    parser.add_argument("--age", type=int, required=True, help=f"Member age ({MIN_AGE}-{MAX_AGE})")
+    parser.add_argument("--family-size", choices=FAMILY_SIZES, default="M", help="Family size (default: M)")
+    parser.add_argument("--option", default=None, help="Benefit option (option_1..option_4); all options are quoted if omitted")
+    return parser.parse_args()
+
+
+def main():
+    args = parse_arguments()
+    
+    if args.manifest:
+        print(f"📖 Loading rate book versions: {args.manifest}")
+        book = VersionedRateBook.from_manifest(args.manifest, args.cache_dir)
+    else:
+        from rate_storage import open_store
+        
+        print("📖 Loading rate book versions from the rate store...")
+        with open_store(args.store) as store:
+            book = VersionedRateBook.from_store(store)
+    
+    for version, start, end in zip(book.versions, book.starts, book.ends):
+        print(f"   {version.version}: {start} to {'open' if end == OPEN_END else end}")
+    
+    index = int(book.resolve([args.date])[0])
+    if index < 0:
+        print(f"❌ No rate book version applies on {args.date}")
+        return
+    print(f"   Quoting as of {args.date} with version {book.versions[index].version}")
+    
+    engine = QuoteEngine(book.rates[index])
+    options: list[Optional[str]] = [args.option] if args.option else list(OPTION_COLUMNS)
+    for option in options:
+        try:
+            print(json.dumps(engine.quote(args.age, args.family_size, option)))
+        except ValueError as e:
+            print(f"❌ {e}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,61 @@
+-- ============================================
+-- PRMF Versioned Rate Books
+-- Project: PRMF-Modeller
+-- ============================================
+-- Run this script in Supabase SQL Editor after schema.sql.
+-- premium_rates keeps the current rate book; every imported rate book is
+-- also kept here with the dates it applies to, for re-pricing past quotes.
+-- ============================================
+
+-- One row per rate book version. effective_to is exclusive; NULL = until the next version starts
+CREATE TABLE IF NOT EXISTS rate_book_versions (
+    id SERIAL PRIMARY KEY,
+    version VARCHAR(50) NOT NULL UNIQUE,
+    effective_from DATE NOT NULL,
+    effective_to DATE,
+    source TEXT,
+    sha256 VARCHAR(64),
+    created_at TIMESTAMP WITH TIME ZONE DEFAULT TIMEZONE('utc', NOW()),
+
+    CONSTRAINT chk_effective_range CHECK (effective_to IS NULL OR effective_to > effective_from)
+);
+
+-- The rates of every version, same columns as premium_rates
+CREATE TABLE IF NOT EXISTS premium_rate_history (
+    id SERIAL PRIMARY KEY,
+    version VARCHAR(50) NOT NULL REFERENCES rate_book_versions (version) ON DELETE CASCADE,
+    age INTEGER NOT NULL,
+    family_size VARCHAR(10) NOT NULL,
+    payment_type VARCHAR(10) NOT NULL,
+    option_1 DECIMAL(15, 2) NOT NULL,
+    option_2 DECIMAL(15, 2) NOT NULL,
+    option_3 DECIMAL(15, 2) NOT NULL,
+    option_4 DECIMAL(15, 2) NOT NULL,
+
+    -- Constraints
+    CONSTRAINT chk_history_age CHECK (age >= 18 AND age <= 90),
+    CONSTRAINT chk_history_family_size CHECK (family_size IN ('M', 'M+1')),
+    CONSTRAINT chk_history_payment_type CHECK (payment_type IN ('LUMPSUM', 'ANNUAL')),
+    CONSTRAINT unique_version_age_family UNIQUE (version, age, family_size)
+);
+
+-- As-of lookups scan versions by start date
+CREATE INDEX IF NOT EXISTS idx_rate_book_effective ON rate_book_versions(effective_from, effective_to);
+
+COMMENT ON TABLE rate_book_versions IS 'Imported PRMF rate books and the dates they apply to';
+COMMENT ON COLUMN rate_book_versions.effective_from IS 'First day the rate book applies (inclusive)';
+COMMENT ON COLUMN rate_book_versions.effective_to IS 'Day the rate book stops applying (exclusive); NULL = until the next version starts';
+COMMENT ON TABLE premium_rate_history IS 'Premium rates of every rate book version';
+
+-- Enable Row Level Security (RLS)
+ALTER TABLE rate_book_versions ENABLE ROW LEVEL SECURITY;
+ALTER TABLE premium_rate_history ENABLE ROW LEVEL SECURITY;
+
+-- Create policies to allow public read access
+CREATE POLICY "Allow public read access" ON rate_book_versions
+    FOR SELECT
+    USING (true);
+
+CREATE POLICY "Allow public read access" ON premium_rate_history
+    FOR SELECT
+    USING (true);
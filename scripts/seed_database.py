@@ -1,213 +1,380 @@
 """
 PRMF Premium Rates - Excel to Supabase Import Script
 =====================================================
-This script reads premium rates from Rates.xlsx and imports them to Supabase.
+This script reads premium rates from Rates.xlsx and imports them to Supabase,
+or to any other rate store (see rate_storage.py).
+
+By default it syncs: the current premium_rates rows are fetched in one
+request, diffed against the workbook by (age, family_size), and only new
+or changed rows are sent, in one bulk upsert. Rows in the table that are
+not in the workbook are reported (and deleted with --prune).
 
 Usage:
     python scripts/seed_database.py
+    python scripts/seed_database.py --dry-run       # show the changes only
+    python scripts/seed_database.py --prune         # also delete rows not in the workbook
+    python scripts/seed_database.py --full          # upsert every row
+    python scripts/seed_database.py --store sqlite:///rates.db   # offline, no Supabase
+    python scripts/seed_database.py --version 2025 --effective-from 2025-01-01   # also keep it as a version
+    python scripts/seed_database.py --matrix-dir quote_matrix   # also emit the static quote matrix
 """
 
+import argparse
+from datetime import date
+
+import numpy as np
 import pandas as pd
 import os
-from dotenv import load_dotenv
-from supabase import create_client, Client
 
-# Load environment variables
-load_dotenv()
+from rate_book import OPTION_COLUMNS
+from quote_matrix import matrix_from_frame, validate_matrix, write_matrix
+from rate_book_cache import file_sha256, load_rates_frame
+from rate_storage import HISTORY_TABLE, VERSIONS_TABLE, RateStore, open_store
+from rate_versions import VERSION_COLUMNS, plan_version_row, version_in_force
+from rate_verification import fetch_rate_rows, print_verification, verify_rates
 
-# Supabase configuration
-SUPABASE_URL = os.getenv("SUPABASE_URL")
-SUPABASE_KEY = os.getenv("SUPABASE_SERVICE_KEY")
+# premium_rates stores DECIMAL(15, 2), so rates are compared and sent rounded to cents
+RATE_DECIMALS = 2
+KEY_COLUMNS = ['age', 'family_size']
+RATE_COLUMNS = KEY_COLUMNS + ['payment_type'] + list(OPTION_COLUMNS)
 
 
-def get_payment_type(age: int) -> str:
-    """Determine payment type based on age."""
-    if age >= 61:
-        return "LUMPSUM"
-    else:
-        return "ANNUAL"
+def upload_rates(df: pd.DataFrame, store: RateStore, dry_run: bool = False) -> dict:
+    """
+    Upload every row to the premium_rates table in one upsert.
+    
+    The rows go out in a single request (one statement), so a failure
+    leaves the table as it was rather than partly updated.
+    
+    Args:
+        df: DataFrame with premium rates
+        store: Rate store
+        dry_run: Only report what would be uploaded
+    
+    Returns:
+        Dictionary with total_records, or error
+    """
+    # Convert DataFrame to list of dictionaries
+    records = df[RATE_COLUMNS].round({column: RATE_DECIMALS for column in OPTION_COLUMNS}).to_dict('records')
+    
+    if dry_run:
+        print(
+            f"   Dry run: would upsert {len(records)} records "
+            f"(ages {df['age'].min()}-{df['age'].max()}, family sizes {df['family_size'].min()}-{df['family_size'].max()})"
+        )
+        return {'total_records': len(records)}
+    
+    # Use upsert to insert or update records based on (age, family_size)
+    print("   Upserting records (insert or update)...")
+    try:
+        store.upsert_rates(records)
+    except Exception as e:
+        print(f"   ✗ Error upserting records: {e}")
+        return {'error': str(e)}
+    
+    return {'total_records': len(records)}
 
 
-def read_excel_rates(file_path: str) -> pd.DataFrame:
+def fetch_current_rates(store: RateStore) -> pd.DataFrame:
     """
-    Read and transform the Rates.xlsx file into a normalized DataFrame.
+    Fetch every premium_rates row in one request.
     
     Args:
-        file_path: Path to the Rates.xlsx file
-        
+        store: Rate store
+    
     Returns:
-        DataFrame with columns: age, family_size, payment_type, option_1-4
+        DataFrame with id and the rate columns (empty if the table is empty)
+    """
+    current = pd.DataFrame(store.fetch_rates(['id'] + RATE_COLUMNS), columns=['id'] + RATE_COLUMNS)
+    current['age'] = current['age'].astype('int64')
+    current[list(OPTION_COLUMNS)] = current[list(OPTION_COLUMNS)].astype(float)
+    return current
+
+
+def diff_rates(current: pd.DataFrame, desired: pd.DataFrame) -> dict:
     """
-    # Read the Excel file
-    df = pd.read_excel(file_path, sheet_name='Contribution Amounts', header=None)
+    Compare the table's rows with the workbook's by (age, family_size).
     
-    records = []
+    Premiums are compared rounded to cents, the precision of the table.
     
-    # Process M Only - Retirees Lumpsum (rows 2-31, ages 90-61, skip header at row 1)
-    print("   Processing M Only - Lumpsum (ages 90-61)...")
-    for i in range(2, 32):
-        try:
-            age = int(df.iloc[i, 0])
-            records.append({
-                'age': age,
-                'family_size': 'M',
-                'payment_type': 'LUMPSUM',
-                'option_1': float(df.iloc[i, 1]),
-                'option_2': float(df.iloc[i, 2]),
-                'option_3': float(df.iloc[i, 3]),
-                'option_4': float(df.iloc[i, 4])
-            })
-        except (ValueError, TypeError) as e:
-            print(f"   Warning: Skipping row {i} (M Lumpsum): {e}")
-    
-    # Process M+1 - Retirees Lumpsum (rows 2-31, ages 90-61, skip header at row 1)
-    print("   Processing M+1 - Lumpsum (ages 90-61)...")
-    for i in range(2, 32):
-        try:
-            age = int(df.iloc[i, 7])
-            records.append({
-                'age': age,
-                'family_size': 'M+1',
-                'payment_type': 'LUMPSUM',
-                'option_1': float(df.iloc[i, 8]),
-                'option_2': float(df.iloc[i, 9]),
-                'option_3': float(df.iloc[i, 10]),
-                'option_4': float(df.iloc[i, 11])
-            })
-        except (ValueError, TypeError) as e:
-            print(f"   Warning: Skipping row {i} (M+1 Lumpsum): {e}")
-    
-    # Process M Only - Annual (rows 37-79, ages 60-18, skip header at row 36)
-    print("   Processing M Only - Annual (ages 60-18)...")
-    for i in range(37, 80):
-        try:
-            age = int(df.iloc[i, 0])
-            records.append({
-                'age': age,
-                'family_size': 'M',
-                'payment_type': 'ANNUAL',
-                'option_1': float(df.iloc[i, 1]),
-                'option_2': float(df.iloc[i, 2]),
-                'option_3': float(df.iloc[i, 3]),
-                'option_4': float(df.iloc[i, 4])
-            })
-        except (ValueError, TypeError) as e:
-            print(f"   Warning: Skipping row {i} (M Annual): {e}")
-    
-    # Process M+1 - Annual (rows 37-79, ages 60-18, skip header at row 36)
-    print("   Processing M+1 - Annual (ages 60-18)...")
-    for i in range(37, 80):
-        try:
-            age = int(df.iloc[i, 7])
-            records.append({
-                'age': age,
-                'family_size': 'M+1',
-                'payment_type': 'ANNUAL',
-                'option_1': float(df.iloc[i, 8]),
-                'option_2': float(df.iloc[i, 9]),
-                'option_3': float(df.iloc[i, 10]),
-                'option_4': float(df.iloc[i, 11])
-            })
-        except (ValueError, TypeError) as e:
-            print(f"   Warning: Skipping row {i} (M+1 Annual): {e}")
-    
-    return pd.DataFrame(records)
-
-
-def upload_to_supabase(df: pd.DataFrame, supabase: Client) -> dict:
+    Args:
+        current: Rows currently in premium_rates (from fetch_current_rates)
+        desired: Rows parsed from the workbook
+    
+    Returns:
+        Dictionary with 'new', 'changed' (workbook values plus old_* columns),
+        'removed' (table rows not in the workbook) and 'unchanged' (count)
     """
-    Upload DataFrame to Supabase premium_rates table using upsert.
+    desired = desired[RATE_COLUMNS].copy()
+    desired[list(OPTION_COLUMNS)] = desired[list(OPTION_COLUMNS)].round(RATE_DECIMALS)
+    
+    merged = desired.merge(current, on=KEY_COLUMNS, how='outer', suffixes=('', '_old'), indicator=True)
+    new = merged[merged['_merge'] == 'left_only']
+    removed = merged[merged['_merge'] == 'right_only']
+    both = merged[merged['_merge'] == 'both']
+    
+    compare = ['payment_type'] + list(OPTION_COLUMNS)
+    old = both[[f"{column}_old" for column in compare]].to_numpy()
+    differs = np.zeros(len(both), dtype=bool)
+    for index, column in enumerate(compare):
+        if column == 'payment_type':
+            differs |= both[column].to_numpy() != old[:, index]
+        else:
+            differs |= ~np.isclose(both[column].to_numpy(dtype=float), old[:, index].astype(float), rtol=0, atol=0.005)
+    changed = both[differs]
+    
+    return {
+        'new': new[RATE_COLUMNS].reset_index(drop=True),
+        'changed': changed[RATE_COLUMNS + [f"{column}_old" for column in compare]].reset_index(drop=True),
+        'removed': removed[['id'] + KEY_COLUMNS + [f"{column}_old" for column in compare]].reset_index(drop=True),
+        'unchanged': int((~differs).sum()),
+    }
+
+
+def print_change_summary(diff: dict, prune: bool) -> None:
+    """Print the counts and the first few rows of each kind of change."""
+    print(f"   New: {len(diff['new'])}, changed: {len(diff['changed'])}, "
+          f"not in workbook: {len(diff['removed'])}, unchanged: {diff['unchanged']}")
+    
+    for row in diff['new'].head(10).itertuples(index=False):
+        print(f"   + Age {row.age}, {row.family_size}: {row.payment_type} - Option I: KES {row.option_1:,.2f}")
+    for row in diff['changed'].head(10).itertuples(index=False):
+        changes = [
+            f"{column} {getattr(row, column + '_old')} -> {getattr(row, column)}"
+            for column in ['payment_type'] + list(OPTION_COLUMNS)
+            if getattr(row, column + '_old') != getattr(row, column)
+        ]
+        print(f"   ~ Age {row.age}, {row.family_size}: {'; '.join(changes)}")
+    for row in diff['removed'].head(10).itertuples(index=False):
+        action = "deleting" if prune else "would delete with --prune"
+        print(f"   - Age {row.age}, {row.family_size}: not in workbook ({action})")
+    
+    shown = max(len(diff['new']), len(diff['changed']), len(diff['removed']))
+    if shown > 10:
+        print("   ...")
+
+
+def sync_rates(df: pd.DataFrame, store: RateStore, prune: bool = False, dry_run: bool = False) -> dict:
+    """
+    Bring premium_rates in line with the workbook with as few requests as possible.
+    
+    One read fetches the table; new and changed rows go out in a single bulk
+    upsert (one statement, so it either fully applies or not at all), and
+    with ``prune`` rows missing from the workbook are removed in one delete.
+    An unchanged workbook costs one read and no writes.
     
     Args:
-        df: DataFrame with premium rates
-        supabase: Supabase client
-        
+        df: DataFrame with premium rates from the workbook
+        store: Rate store
+        prune: Delete table rows whose (age, family_size) is not in the workbook
+        dry_run: Only report the changes
+    
     Returns:
-        Response from Supabase
+        Dictionary with upserted and deleted row counts, plus the diff
     """
-    # Convert DataFrame to list of dictionaries
-    records = df.to_dict('records')
+    print("   Fetching current premium_rates...")
+    diff = diff_rates(fetch_current_rates(store), df)
+    print_change_summary(diff, prune)
     
-    # Use upsert to insert or update records based on (age, family_size)
-    print("   Upserting records (insert or update)...")
+    upserts = pd.concat([diff['new'], diff['changed'][RATE_COLUMNS]], ignore_index=True)
+    result = {'upserted': 0, 'deleted': 0, 'diff': diff}
+    if dry_run:
+        print("   Dry run: no changes written")
+        return result
     
-    batch_size = 50
-    total_upserted = 0
+    if len(upserts):
+        records = upserts.astype({'age': int}).to_dict('records')
+        try:
+            store.upsert_rates(records)
+        except Exception as e:
+            print(f"   ✗ Error upserting records: {e}")
+            return {**result, 'error': str(e)}
+        result['upserted'] = len(records)
+        print(f"   ✓ Upserted {len(records)} records in one request")
     
-    for i in range(0, len(records), batch_size):
-        batch = records[i:i + batch_size]
+    if prune and len(diff['removed']):
+        ids = [int(row_id) for row_id in diff['removed']['id']]
         try:
-            response = supabase.table('premium_rates').upsert(
-                batch, 
-                on_conflict='age,family_size'
-            ).execute()
-            total_upserted += len(batch)
-            print(f"   Upserted {total_upserted}/{len(records)} records...")
+            store.delete_rates(ids)
         except Exception as e:
-            print(f"   ✗ Error upserting batch: {e}")
-            return {'error': str(e)}
+            print(f"   ✗ Error deleting records: {e}")
+            return {**result, 'error': str(e)}
+        result['deleted'] = len(ids)
+        print(f"   ✓ Deleted {len(ids)} records not in the workbook")
+    
+    if not result['upserted'] and not result['deleted']:
+        print("   ✓ premium_rates already matches the workbook; nothing written")
+    return result
+
+
+def import_version(df: pd.DataFrame, store: RateStore, version: str, effective_from: str,
+                   effective_to: str = None, source: str = None, dry_run: bool = False) -> bool:
+    """
+    Record the workbook as a versioned rate book (see rate_versions.sql).
+    
+    One read of rate_book_versions, then one upsert of the version row and
+    one bulk upsert of the version's rates. The two writes are separate
+    transactions, so if the rates fail to write the version row is put
+    back as it was: deleted if it is new, or restored to its previous values.
+    
+    Args:
+        df: DataFrame with premium rates from the workbook
+        store: Rate store
+        version: Version label
+        effective_from: First day the rates apply (YYYY-MM-DD)
+        effective_to: Day they stop applying (exclusive), or None to run until the next version
+        source: Workbook path
+        dry_run: Check the version and report whether it is in force without writing it
+    
+    Returns:
+        True if the version is in force today (premium_rates should hold it)
     
-    return {'total_records': total_upserted}
+    Raises:
+        ValueError: If the dates are invalid or the version would overlap another one
+    """
+    existing = store.fetch_rows(VERSIONS_TABLE, VERSION_COLUMNS)
+    row = plan_version_row(
+        existing,
+        version,
+        effective_from,
+        effective_to,
+        source=os.path.abspath(source) if source else None,
+        sha256=file_sha256(source) if source else None,
+    )
+    history = df[RATE_COLUMNS].round({column: RATE_DECIMALS for column in OPTION_COLUMNS}).astype({'age': int})
+    history.insert(0, 'version', version)
+    
+    if dry_run:
+        print(f"   Dry run: version {version} from {row['effective_from']} ({len(history)} rates) not stored")
+    else:
+        previous = next((other for other in existing if other['version'] == version), None)
+        store.upsert_rows(VERSIONS_TABLE, [row])
+        try:
+            store.upsert_rows(HISTORY_TABLE, history.to_dict('records'))
+        except Exception:
+            if previous is not None:
+                store.upsert_rows(VERSIONS_TABLE, [previous])
+            else:
+                ids = [other['id'] for other in store.fetch_rows(VERSIONS_TABLE, ('id', 'version')) if other['version'] == version]
+                store.delete_rows(VERSIONS_TABLE, ids)
+            raise
+        print(f"   ✓ Stored version {version} from {row['effective_from']} ({len(history)} rates)")
+    
+    versions = [other for other in existing if other['version'] != version] + [row]
+    return version_in_force(versions, date.today()) == version
 
 
-def verify_import(supabase: Client):
-    """Verify the import was successful."""
-    # Count total records
-    response = supabase.table('premium_rates').select('*', count='exact').execute()
-    total = len(response.data)
+def verify_import(store: RateStore, df: pd.DataFrame = None):
+    """
+    Verify the import was successful.
     
-    # Count by family size
-    m_count = len(supabase.table('premium_rates').select('*').eq('family_size', 'M').execute().data)
-    m1_count = len(supabase.table('premium_rates').select('*').eq('family_size', 'M+1').execute().data)
+    Fetches premium_rates once and runs every check in rate_verification
+    against it, comparing premiums with the workbook rows when given.
     
-    # Count by payment type
-    lumpsum_count = len(supabase.table('premium_rates').select('*').eq('payment_type', 'LUMPSUM').execute().data)
-    annual_count = len(supabase.table('premium_rates').select('*').eq('payment_type', 'ANNUAL').execute().data)
+    Args:
+        store: Rate store
+        df: Workbook rows that were imported
+    """
+    result = verify_rates(fetch_rate_rows(store), df)
     
     print("\n" + "=" * 50)
     print("IMPORT VERIFICATION")
     print("=" * 50)
-    print(f"Total Records: {total}")
-    print(f"  - M Only: {m_count}")
-    print(f"  - M+1: {m1_count}")
-    print(f"  - Lumpsum (61-90): {lumpsum_count}")
-    print(f"  - Annual (18-60): {annual_count}")
+    print_verification(result)
     
     # Sample data check
     print("\nSample Records:")
-    sample = supabase.table('premium_rates').select('*').in_('age', [90, 60, 18]).order('age', desc=True).execute()
-    for record in sample.data[:6]:
-        print(f"  Age {record['age']}, {record['family_size']}: {record['payment_type']} - Option I: KES {record['option_1']:,.2f}")
+    for record in result.samples:
+        print(f"  Age {record['age']}, {record['family_size']}: {record['payment_type']} - Option I: KES {float(record['option_1']):,.2f}")
+    return result
+
+
+def write_quote_matrix(df: pd.DataFrame, store: RateStore, matrix_dir: str, step: int):
+    """
+    Emit the quote matrix artifact and check it against premium_rates.
+    
+    Args:
+        df: Workbook rows that were imported
+        store: Rate store
+        matrix_dir: Output directory (nothing is written if None)
+        step: Step number to print
+    """
+    if not matrix_dir:
+        return
+    
+    print(f"\n{step}. Writing quote matrix to {matrix_dir}...")
+    try:
+        manifest = write_matrix(matrix_from_frame(df), matrix_dir)
+        print(f"   ✓ {manifest['bin']} / {manifest['json']} (ETag {manifest['etag']})")
+        mismatches = validate_matrix(matrix_dir, store)
+    except Exception as e:
+        print(f"   ✗ Writing the quote matrix failed: {e}")
+        return
+    
+    if mismatches:
+        print(f"   ✗ {len(mismatches)} cells differ from premium_rates; do not publish this artifact")
+    else:
+        print("   ✓ Matches premium_rates byte for byte")
+
+
+def parse_arguments() -> argparse.Namespace:
+    parser = argparse.ArgumentParser(description="Import PRMF premium rates from Rates.xlsx into Supabase")
+    parser.add_argument(
+        "--store",
+        default=None,
+        help="Rate store: supabase, postgresql://..., sqlite:///path or sqlite:// (default: $RATE_STORE or supabase)",
+    )
+    parser.add_argument("--rates", default="Rates.xlsx", help="Path to the rate workbook (default: Rates.xlsx)")
+    parser.add_argument("--dry-run", action="store_true", help="Print the changes without writing anything")
+    parser.add_argument("--prune", action="store_true", help="Delete premium_rates rows that are not in the workbook")
+    parser.add_argument("--full", action="store_true", help="Upsert every row instead of only the changed ones")
+    parser.add_argument("--matrix-dir", default=None, help="Also write the quote matrix artifact (quote_matrix.py) to this directory")
+    parser.add_argument("--version", default=None, help="Also store the workbook as this rate book version")
+    parser.add_argument("--effective-from", default=None, help="First day the version applies (YYYY-MM-DD; required with --version)")
+    parser.add_argument("--effective-to", default=None, help="Day the version stops applying (exclusive; default: when the next version starts)")
+    return parser.parse_args()
 
 
 def main():
     """Main execution function."""
+    args = parse_arguments()
+    if bool(args.version) != bool(args.effective_from):
+        print("ERROR: --version and --effective-from go together")
+        return
+    
     print("=" * 50)
     print("PRMF Premium Rates - Supabase Import")
     print("=" * 50)
     
-    # Validate environment variables
-    if not SUPABASE_URL or not SUPABASE_KEY:
-        print("\nERROR: Missing SUPABASE_URL or SUPABASE_SERVICE_KEY in .env file")
-        print("\nPlease create a .env file in the project root with:")
-        print("  SUPABASE_URL=https://your-project.supabase.co")
-        print("  SUPABASE_SERVICE_KEY=your-service-role-key")
-        return
-    
-    # Initialize Supabase client
-    print("\n1. Connecting to Supabase...")
+    # Connect to the rate store
+    print("\n1. Connecting to the rate store...")
     try:
-        supabase: Client = create_client(SUPABASE_URL, SUPABASE_KEY)
-        print("   ✓ Connected successfully")
+        store = open_store(args.store)
+        print(f"   ✓ Connected to {store.name}")
+    except ValueError as e:
+        print(f"\nERROR: {e}")
+        if "SUPABASE" in str(e):
+            print("\nPlease create a .env file in the project root with:")
+            print("  SUPABASE_URL=https://your-project.supabase.co")
+            print("  SUPABASE_SERVICE_KEY=your-service-role-key")
+        return
     except Exception as e:
         print(f"   ✗ Connection failed: {e}")
         return
     
+    try:
+        import_rates(args, store)
+    finally:
+        store.close()
+
+
+def import_rates(args: argparse.Namespace, store: RateStore):
+    """Steps 2-5 of main: read the workbook, write it to the store and verify."""
     # Read Excel file
-    excel_path = "Rates.xlsx"
+    excel_path = args.rates
     print(f"\n2. Reading Excel file: {excel_path}")
     try:
-        df = read_excel_rates(excel_path)
+        df = load_rates_frame(excel_path)
         print(f"   ✓ Read {len(df)} records")
     except FileNotFoundError:
         print(f"   ✗ File not found: {excel_path}")
@@ -220,22 +387,68 @@ def main():
     print("\n3. Sample transformed data:")
     print(df.head(3).to_string(index=False))
     
-    # Upload to Supabase
-    print("\n4. Uploading to Supabase...")
-    try:
-        result = upload_to_supabase(df, supabase)
+    # Keep the workbook as a versioned rate book
+    step = 4
+    if args.version:
+        print(f"\n{step}. Storing rate book version {args.version}...")
+        try:
+            current = import_version(
+                df, store, args.version, args.effective_from, args.effective_to,
+                source=excel_path, dry_run=args.dry_run,
+            )
+        except ValueError as e:
+            print(f"   ✗ {e}")
+            return
+        except Exception as e:
+            print(f"   ✗ Storing the version failed: {e}")
+            return
+        if not current:
+            print("   Version is not in force today; premium_rates left unchanged")
+            return
+        step += 1
+    
+    # Upload to the rate store
+    if args.full:
+        print(f"\n{step}. Uploading to {store.name}...")
+        try:
+            result = upload_rates(df, store, dry_run=args.dry_run)
+        except Exception as e:
+            print(f"   ✗ Upload failed: {e}")
+            return
+        if 'error' in result:
+            return
+        if args.dry_run:
+            print("\n" + "=" * 50)
+            print("NOTHING WRITTEN")
+            print("=" * 50)
+            return
         print(f"   ✓ Uploaded {result['total_records']} records")
-    except Exception as e:
-        print(f"   ✗ Upload failed: {e}")
-        return
+    else:
+        print(f"\n{step}. Syncing with {store.name}...")
+        try:
+            result = sync_rates(df, store, prune=args.prune, dry_run=args.dry_run)
+        except Exception as e:
+            print(f"   ✗ Sync failed: {e}")
+            return
+        if 'error' in result:
+            return
+        if args.dry_run or not (result['upserted'] or result['deleted']):
+            if not args.dry_run:
+                write_quote_matrix(df, store, args.matrix_dir, step + 1)
+            print("\n" + "=" * 50)
+            print("NOTHING WRITTEN" if args.dry_run else "ALREADY UP TO DATE")
+            print("=" * 50)
+            return
     
     # Verify import
-    print("\n5. Verifying import...")
+    print(f"\n{step + 1}. Verifying import...")
     try:
-        verify_import(supabase)
+        verify_import(store, df)
     except Exception as e:
         print(f"   ✗ Verification failed: {e}")
     
+    write_quote_matrix(df, store, args.matrix_dir, step + 2)
+    
     print("\n" + "=" * 50)
     print("IMPORT COMPLETE!")
     print("=" * 50)
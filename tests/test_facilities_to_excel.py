@@ -0,0 +1,44 @@
+"""Streaming .xlsx writer output, read back with openpyxl."""
+
+from datetime import datetime
+
+import numpy as np
+import openpyxl
+import pandas as pd
+
+from facilities_to_excel import XlsxStreamWriter, excel_cell_value
+
+
+def test_excel_cell_value_unwraps_numpy_scalars():
+    assert type(excel_cell_value(np.float64(1.5))) is float
+    assert type(excel_cell_value(np.int64(7))) is int
+    assert type(excel_cell_value(np.bool_(True))) is bool
+    assert excel_cell_value(np.float64("nan")) is None
+    assert excel_cell_value(pd.NA) is None
+
+
+def test_stream_writer_round_trips_through_openpyxl(tmp_path):
+    path = tmp_path / "facilities.xlsx"
+    columns = ["code", "name", "beds", "latitude", "open_whole_day", "nested", "updated"]
+    rows = [
+        [np.int64(10001), "Kenyatta <National> & Referral", np.int64(1800), np.float64(-1.3011), np.bool_(True), ["a", "b"], datetime(2024, 5, 1, 8, 30)],
+        [10002, " Padded name ", 12.0, float("nan"), False, {"level": 4}, None],
+        [np.int32(10003), "Ctrl\x07char", None, np.float32(0.5), None, None, None],
+    ]
+    
+    writer = XlsxStreamWriter(str(path), "Facilities", columns)
+    for row in rows:
+        writer.write_row(row)
+    writer.close()
+    
+    sheet = openpyxl.load_workbook(path).active
+    values = [list(row) for row in sheet.iter_rows(values_only=True)]
+    
+    assert sheet.title == "Facilities"
+    assert sheet["A1"].font.bold
+    assert values[0] == columns
+    assert values[1][:5] == [10001, "Kenyatta <National> & Referral", 1800, -1.3011, True]
+    assert values[1][5] == "['a', 'b']"
+    assert values[1][6] == "2024-05-01 08:30:00"
+    assert values[2] == [10002, " Padded name ", 12, None, False, "{'level': 4}", None]
+    assert values[3] == [10003, "Ctrlchar", None, 0.5, None, None, None]
@@ -0,0 +1,104 @@
+"""Seed, verify and quote matrix checks against an in-memory SQLite rate store."""
+
+import pandas as pd
+import pytest
+
+from quote_matrix import matrix_from_frame, validate_matrix, write_matrix
+from rate_book import FAMILY_SIZES, MAX_AGE, MIN_AGE, OPTION_COLUMNS, get_payment_type
+from rate_storage import open_store
+from seed_database import sync_rates, upload_rates, verify_import
+
+
+@pytest.fixture
+def rates() -> pd.DataFrame:
+    """A full rate book with premiums that need rounding to cents."""
+    rows = []
+    for age in range(MIN_AGE, MAX_AGE + 1):
+        for family, family_size in enumerate(FAMILY_SIZES):
+            row = {"age": age, "family_size": family_size, "payment_type": get_payment_type(age)}
+            for option, column in enumerate(OPTION_COLUMNS):
+                row[column] = 1000 * (option + 1) + age * 12.345 + family * 500.0049
+            rows.append(row)
+    return pd.DataFrame(rows)
+
+
+@pytest.fixture
+def store():
+    with open_store("sqlite://") as store:
+        yield store
+
+
+def stored_count(store) -> int:
+    return len(store.fetch_rates(["id"]))
+
+
+def test_seed_verify_and_matrix(rates, store, tmp_path):
+    assert sync_rates(rates, store)["upserted"] == len(rates)
+    
+    result = verify_import(store, rates)
+    assert result.passed
+    assert result.total == len(rates)
+    assert result.values_match
+    
+    write_matrix(matrix_from_frame(rates), str(tmp_path))
+    assert validate_matrix(str(tmp_path), store) == []
+
+
+def test_validate_matrix_reports_drift(rates, store, tmp_path):
+    upload_rates(rates, store)
+    write_matrix(matrix_from_frame(rates), str(tmp_path))
+    
+    changed = rates.iloc[[0]].assign(option_1=rates["option_1"].iloc[0] + 1)
+    upload_rates(changed, store)
+    
+    assert len(validate_matrix(str(tmp_path), store)) == 1
+    assert not verify_import(store, rates).values_match
+
+
+def test_sync_dry_run_writes_nothing(rates, store):
+    result = sync_rates(rates, store, dry_run=True)
+    
+    assert result["upserted"] == 0
+    assert len(result["diff"]["new"]) == len(rates)
+    assert stored_count(store) == 0
+
+
+def test_sync_sends_only_changed_rows(rates, store):
+    sync_rates(rates, store)
+    assert sync_rates(rates, store)["upserted"] == 0
+    
+    changed = rates.copy()
+    changed.loc[3, "option_2"] += 10
+    result = sync_rates(changed, store)
+    
+    assert result["upserted"] == 1
+    assert len(result["diff"]["changed"]) == 1
+    assert verify_import(store, changed).values_match
+
+
+def test_sync_prune_deletes_rows_not_in_workbook(rates, store):
+    sync_rates(rates, store)
+    trimmed = rates.iloc[1:]
+    
+    kept = sync_rates(trimmed, store)
+    assert kept["deleted"] == 0
+    assert len(kept["diff"]["removed"]) == 1
+    assert stored_count(store) == len(rates)
+    
+    assert sync_rates(trimmed, store, prune=True, dry_run=True)["deleted"] == 0
+    assert stored_count(store) == len(rates)
+    
+    pruned = sync_rates(trimmed, store, prune=True)
+    assert pruned["deleted"] == 1
+    assert stored_count(store) == len(trimmed)
+    assert verify_import(store, trimmed).missing == [(MIN_AGE, FAMILY_SIZES[0])]
+
+
+def test_full_upload(rates, store):
+    assert upload_rates(rates, store, dry_run=True) == {"total_records": len(rates)}
+    assert stored_count(store) == 0
+    
+    assert upload_rates(rates, store) == {"total_records": len(rates)}
+    assert upload_rates(rates, store) == {"total_records": len(rates)}
+    assert stored_count(store) == len(rates)
+    assert verify_import(store, rates).passed